@@ -0,0 +1,358 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import metricas
+
+# Almacén de resultados en SQLite.
+# Cada extracto procesado se guarda con clave (SHA-256 del PDF, procesador, versión del procesador,
+# opciones): el Excel generado, los mensajes que mostró el procesador, y los datos leídos del Excel,
+# que son las cuentas (saldos y totales por hoja) y los movimientos. Si el mismo PDF se vuelve a
+# subir, por otro usuario o después de reiniciar, se devuelve el resultado guardado sin procesarlo.
+# La versión sale de procesadores.VERSIONES. Al subirla, las entradas viejas de ese procesador dejan
+# de coincidir y se borran al abrir el almacén; las de los demás procesadores siguen valiendo.
+# Las opciones (CUITs propios) solo forman parte de la clave en los procesadores que las usan.
+# BANCOS_RESULTADOS indica el archivo (por defecto bancos_resultados.sqlite); "0" lo desactiva.
+# Los movimientos también se indexan para buscar texto (FTS5) en todos los extractos procesados,
+# con filtros por banco, cuenta, fecha e importe (busqueda.py). Si el SQLite no trae FTS5, se busca
+# con LIKE sobre las descripciones: más lento, pero con los mismos filtros.
+
+RUTA_POR_DEFECTO = "bancos_resultados.sqlite"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    procesador TEXT NOT NULL,
+    version TEXT NOT NULL,
+    opciones TEXT NOT NULL,
+    nombre TEXT,
+    creado REAL NOT NULL,
+    usado REAL NOT NULL,
+    aciertos INTEGER NOT NULL DEFAULT 0,
+    movimientos INTEGER NOT NULL,
+    mensajes TEXT NOT NULL,
+    excel BLOB NOT NULL,
+    UNIQUE (sha256, procesador, version, opciones)
+);
+CREATE TABLE IF NOT EXISTS cuentas (
+    resultado INTEGER NOT NULL REFERENCES resultados(id) ON DELETE CASCADE,
+    orden INTEGER NOT NULL,
+    hoja TEXT NOT NULL,
+    saldo_inicial REAL,
+    saldo_final REAL,
+    total_creditos REAL NOT NULL,
+    total_debitos REAL NOT NULL,
+    cantidad INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS movimientos (
+    resultado INTEGER NOT NULL REFERENCES resultados(id) ON DELETE CASCADE,
+    hoja TEXT NOT NULL,
+    orden INTEGER NOT NULL,
+    fecha TEXT,
+    descripcion TEXT,
+    importe REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cuentas_resultado ON cuentas(resultado);
+CREATE INDEX IF NOT EXISTS movimientos_resultado ON movimientos(resultado);
+"""
+
+# Índice de búsqueda: busqueda_datos tiene los filtros (banco, cuenta, fecha ISO, importe) con
+# índices B-tree, y la tabla FTS5 busqueda indexa su descripción (contenido externo: no la duplica).
+# Borrar un resultado borra sus filas en cascada, y el trigger las saca del índice de texto.
+ESQUEMA_BUSQUEDA = """
+CREATE TABLE IF NOT EXISTS busqueda_datos (
+    id INTEGER PRIMARY KEY,
+    resultado INTEGER NOT NULL REFERENCES resultados(id) ON DELETE CASCADE,
+    banco TEXT NOT NULL,
+    cuenta TEXT NOT NULL,
+    dia TEXT,
+    importe REAL NOT NULL,
+    descripcion TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS busqueda_datos_resultado ON busqueda_datos(resultado);
+CREATE INDEX IF NOT EXISTS busqueda_datos_dia ON busqueda_datos(dia);
+CREATE INDEX IF NOT EXISTS busqueda_datos_banco ON busqueda_datos(banco, cuenta, dia);
+"""
+ESQUEMA_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS busqueda USING fts5(
+    descripcion, content = 'busqueda_datos', content_rowid = 'id', tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS busqueda_borrar AFTER DELETE ON busqueda_datos BEGIN
+    INSERT INTO busqueda (busqueda, rowid, descripcion) VALUES ('delete', old.id, old.descripcion);
+END;
+"""
+
+
+def _texto(valor):
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.strftime("%d/%m/%Y")
+    return None if valor is None else str(valor)
+
+
+def _numero(valor):
+    return float(valor) if isinstance(valor, (int, float)) else None
+
+
+def clave_opciones(banco, cuits_propios=None):
+    """
+    Parte de la clave que depende de las opciones (vacía si el procesador no usa CUITs propios).
+    Entra cada entidad completa, ya normalizada: la etiqueta también cambia el Excel
+    ("Transf. Propias - {etiqueta}")
+    """
+    from procesadores import CON_CUITS_PROPIOS
+    from propios import entidades_desde_tuplas
+
+    if banco not in CON_CUITS_PROPIOS or not cuits_propios:
+        return ""
+    entidades = sorted([e.cuit, e.razon, e.etiqueta] for e in entidades_desde_tuplas(cuits_propios))
+    return hashlib.sha256(json.dumps(entidades, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+class Almacen:
+    """Resultados procesados en un archivo SQLite (una conexión por operación: se usa desde varios hilos)"""
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO):
+        self.ruta = ruta
+        with self._conectar() as conexion:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.executescript(ESQUEMA)
+            nuevo = conexion.execute("SELECT 1 FROM sqlite_master WHERE name = 'busqueda_datos'").fetchone() is None
+            conexion.executescript(ESQUEMA_BUSQUEDA)
+            try:
+                conexion.executescript(ESQUEMA_FTS)
+                self.fts = True
+            except sqlite3.OperationalError:  # SQLite sin FTS5
+                self.fts = False
+        self.invalidados = self.invalidar_obsoletos()
+        if nuevo:
+            self.reindexar()  # almacén de antes del índice: se indexa lo que ya tenía
+
+    @contextmanager
+    def _conectar(self):
+        """Conexión en una transacción (commit al salir sin error) que se cierra al terminar"""
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            conexion.execute("PRAGMA foreign_keys=ON")
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+    def invalidar_obsoletos(self):
+        """Borra los resultados de procesadores cuya versión cambió. Devuelve cuántos borró"""
+        from procesadores import lista_bancos, version_procesador
+
+        borrados = 0
+        with self._conectar() as conexion:
+            for banco in lista_bancos():
+                cursor = conexion.execute("DELETE FROM resultados WHERE procesador = ? AND version != ?",
+                                          (banco, version_procesador(banco)))
+                borrados += cursor.rowcount
+        return borrados
+
+    def obtener(self, contenido, banco=None, cuits_propios=None):
+        """
+        Resultado guardado del PDF para el procesador `banco` en su versión actual (con banco=None,
+        el más reciente de cualquier procesador). Devuelve un dict con excel, mensajes, banco, nombre,
+        creado, movimientos y controles, o None.
+        """
+        from procesadores import version_procesador
+
+        sha256 = hashlib.sha256(contenido).hexdigest()
+        consulta = "SELECT id, procesador, version, opciones, nombre, creado, movimientos, mensajes, excel " \
+                   "FROM resultados WHERE sha256 = ?"
+        parametros = [sha256]
+        if banco is not None:
+            consulta += " AND procesador = ? AND opciones = ?"
+            parametros += [banco, clave_opciones(banco, cuits_propios)]
+        with self._conectar() as conexion:
+            filas = conexion.execute(consulta + " ORDER BY creado DESC", parametros).fetchall()
+            fila = next((f for f in filas if f[2] == version_procesador(f[1])
+                         and (banco is not None or f[3] == "")), None)
+            if fila is None:
+                metricas.CACHE.inc(cache="resultados", resultado="fallo")
+                return None
+            conexion.execute("UPDATE resultados SET usado = ?, aciertos = aciertos + 1 WHERE id = ?",
+                             (time.time(), fila[0]))
+            controles = self._controles(conexion, fila[0])
+        metricas.CACHE.inc(cache="resultados", resultado="acierto")
+        return {"id": fila[0], "banco": fila[1], "nombre": fila[4], "creado": fila[5], "movimientos": fila[6],
+                "mensajes": [tuple(m) for m in json.loads(fila[7])], "excel": fila[8], "controles": controles}
+
+    def _controles(self, conexion, id_resultado, tolerancia=0.005):
+        """Mismo control que metricas.controles_conciliacion, con los totales guardados"""
+        controles = []
+        for hoja, inicial, final, creditos, debitos in conexion.execute(
+                "SELECT hoja, saldo_inicial, saldo_final, total_creditos, total_debitos FROM cuentas "
+                "WHERE resultado = ? ORDER BY orden", (id_resultado,)):
+            if inicial is None or final is None:
+                continue
+            diferencia = round(inicial + creditos - debitos - final, 2)
+            controles.append({"hoja": hoja, "diferencia": 0.0 if abs(diferencia) <= tolerancia else diferencia})
+        return controles
+
+    def guardar(self, contenido, banco, excel, cuits_propios=None, nombre="", mensajes=(), hojas=None):
+        """
+        Guarda (o reemplaza) el resultado del PDF para la versión actual del procesador. hojas: las de
+        lectura_excel.leer_excel(excel), si ya se leyeron
+        """
+        from procesadores import version_procesador
+        from lectura_excel import leer_excel
+
+        hojas = hojas if hojas is not None else leer_excel(excel)
+        ahora = time.time()
+        clave = (hashlib.sha256(contenido).hexdigest(), banco, version_procesador(banco),
+                 clave_opciones(banco, cuits_propios))
+        cantidad = sum(len(h["creditos"]) + len(h["debitos"]) for h in hojas)
+        with self._conectar() as conexion:
+            conexion.execute("DELETE FROM resultados WHERE sha256 = ? AND procesador = ? AND version = ? "
+                             "AND opciones = ?", clave)
+            cursor = conexion.execute(
+                "INSERT INTO resultados (sha256, procesador, version, opciones, nombre, creado, usado, movimientos, "
+                "mensajes, excel) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                clave + (nombre, ahora, ahora, cantidad, json.dumps(list(mensajes), ensure_ascii=False, default=str),
+                         sqlite3.Binary(excel)))
+            id_resultado = cursor.lastrowid
+            for orden, hoja in enumerate(hojas):
+                conexion.execute(
+                    "INSERT INTO cuentas VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (id_resultado, orden, hoja["hoja"], _numero(hoja["saldo_inicial"]), _numero(hoja["saldo_final"]),
+                     round(sum(f[2] for f in hoja["creditos"]), 2), round(sum(f[2] for f in hoja["debitos"]), 2),
+                     len(hoja["creditos"]) + len(hoja["debitos"])))
+                filas = [(fecha, descripcion, importe) for fecha, descripcion, importe in hoja["creditos"]]
+                filas += [(fecha, descripcion, -importe) for fecha, descripcion, importe in hoja["debitos"]]
+                conexion.executemany(
+                    "INSERT INTO movimientos VALUES (?, ?, ?, ?, ?, ?)",
+                    [(id_resultado, hoja["hoja"], i, _texto(fecha), _texto(descripcion), importe)
+                     for i, (fecha, descripcion, importe) in enumerate(filas)])
+                self._indexar(conexion, [(banco, hoja["hoja"], fecha, descripcion, importe, id_resultado)
+                                         for fecha, descripcion, importe in filas])
+        return id_resultado
+
+    def _indexar(self, conexion, filas):
+        """filas: (banco, cuenta, fecha, descripcion, importe, resultado)"""
+        from transferencias import parsear_fecha
+
+        def dia(fecha):
+            valor = parsear_fecha(fecha)
+            return valor.isoformat() if valor is not None else None
+
+        inicio = conexion.execute("SELECT COALESCE(MAX(id), 0) FROM busqueda_datos").fetchone()[0]
+        conexion.executemany(
+            "INSERT INTO busqueda_datos (resultado, banco, cuenta, dia, importe, descripcion) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(resultado, banco, cuenta, dia(fecha), importe, _texto(descripcion) or "")
+             for banco, cuenta, fecha, descripcion, importe, resultado in filas])
+        if self.fts:
+            conexion.execute("INSERT INTO busqueda (rowid, descripcion) SELECT id, descripcion FROM busqueda_datos "
+                             "WHERE id > ?", (inicio,))
+
+    def reindexar(self):
+        """Rearma el índice de búsqueda desde la tabla de movimientos. Devuelve cuántos indexó"""
+        with self._conectar() as conexion:
+            conexion.execute("DELETE FROM busqueda_datos")
+            if self.fts:
+                conexion.execute("INSERT INTO busqueda (busqueda) VALUES ('delete-all')")
+            filas = conexion.execute(
+                "SELECT r.procesador, m.hoja, m.fecha, m.descripcion, m.importe, m.resultado FROM movimientos m "
+                "JOIN resultados r ON r.id = m.resultado").fetchall()
+            self._indexar(conexion, filas)
+        return len(filas)
+
+    def buscar(self, consulta="", banco=None, cuenta=None, desde=None, hasta=None, minimo=None, maximo=None,
+               limite=200):
+        """
+        Movimientos de todos los extractos guardados. consulta: texto (palabras o prefijos, en cualquier
+        orden) o un CUIT; banco, cuenta: igualdad; desde, hasta: datetime.date; minimo, maximo: importe
+        absoluto. Devuelve {"total", "movimientos", "bancos", "cuentas"}: los movimientos (hasta
+        `limite`, los más relevantes o los más recientes) y el conteo de coincidencias por banco y cuenta.
+        """
+        from busqueda import consulta_fts, patron_like
+
+        origen, condiciones, parametros, orden = "busqueda_datos d", [], [], "d.dia DESC, d.id DESC"
+        if self.fts:
+            texto = consulta_fts(consulta)
+            if texto:
+                # El texto lo resuelve FTS5 (ids y relevancia) y después se filtra cada id en busqueda_datos.
+                # CROSS JOIN fija ese orden: si no, con un filtro por banco el planificador puede recorrer
+                # busqueda_datos y repetir la consulta de texto por cada fila
+                origen = "(SELECT rowid, rank FROM busqueda WHERE busqueda MATCH ?) f " \
+                         "CROSS JOIN busqueda_datos d ON d.id = f.rowid"
+                parametros.append(texto)
+                orden = "f.rank"
+        else:
+            for patron in patron_like(consulta):
+                condiciones.append("d.descripcion LIKE ?")
+                parametros.append(patron)
+        filtros = (("d.banco = ?", banco), ("d.cuenta = ?", cuenta), ("d.dia >= ?", desde), ("d.dia <= ?", hasta),
+                   ("ABS(d.importe) >= ?", minimo), ("ABS(d.importe) <= ?", maximo))
+        for campo, valor in filtros:
+            if valor is not None and valor != "":
+                condiciones.append(campo)
+                parametros.append(valor.isoformat() if hasattr(valor, "isoformat") else valor)
+        donde = (" WHERE " + " AND ".join(condiciones)) if condiciones else ""
+
+        with self._conectar() as conexion:
+            filas = conexion.execute(f"SELECT d.banco, d.cuenta, d.dia, d.descripcion, d.importe, d.resultado "
+                                     f"FROM {origen}{donde} ORDER BY {orden} LIMIT ?", parametros + [limite]).fetchall()
+            facetas = conexion.execute(f"SELECT d.banco, d.cuenta, COUNT(*) FROM {origen}{donde} GROUP BY 1, 2",
+                                       parametros).fetchall()
+            nombres = dict(conexion.execute(
+                f"SELECT id, nombre FROM resultados WHERE id IN ({','.join('?' * len(filas))})",
+                [f[5] for f in filas]).fetchall()) if filas else {}
+        bancos, cuentas = defaultdict(int), defaultdict(int)
+        for banco_, cuenta_, cantidad in facetas:
+            bancos[banco_] += cantidad
+            cuentas[f"{banco_} · {cuenta_}"] += cantidad
+        movimientos = [{"banco": b, "cuenta": c, "fecha": d, "descripcion": t, "importe": i,
+                        "extracto": nombres.get(r), "resultado": r} for b, c, d, t, i, r in filas]
+        return {"total": sum(bancos.values()), "movimientos": movimientos,
+                "bancos": sorted(bancos.items(), key=lambda x: -x[1]),
+                "cuentas": sorted(cuentas.items(), key=lambda x: -x[1])}
+
+    def cuentas(self, id_resultado):
+        """Cuentas (hojas) de un resultado: saldos y totales"""
+        with self._conectar() as conexion:
+            filas = conexion.execute("SELECT hoja, saldo_inicial, saldo_final, total_creditos, total_debitos, cantidad "
+                                     "FROM cuentas WHERE resultado = ? ORDER BY orden", (id_resultado,)).fetchall()
+        return [dict(zip(("hoja", "saldo_inicial", "saldo_final", "total_creditos", "total_debitos", "cantidad"), f))
+                for f in filas]
+
+    def movimientos(self, id_resultado):
+        """Movimientos de un resultado (importe positivo = crédito, negativo = débito)"""
+        with self._conectar() as conexion:
+            filas = conexion.execute("SELECT hoja, fecha, descripcion, importe FROM movimientos WHERE resultado = ? "
+                                     "ORDER BY rowid", (id_resultado,)).fetchall()
+        return [dict(zip(("hoja", "fecha", "descripcion", "importe"), f)) for f in filas]
+
+    def estadisticas(self):
+        with self._conectar() as conexion:
+            resultados, aciertos, bytes_excel = conexion.execute(
+                "SELECT COUNT(*), COALESCE(SUM(aciertos), 0), COALESCE(SUM(LENGTH(excel)), 0) FROM resultados"
+            ).fetchone()
+            movimientos = conexion.execute("SELECT COUNT(*) FROM movimientos").fetchone()[0]
+        return {"ruta": self.ruta, "resultados": resultados, "aciertos": aciertos, "movimientos": movimientos,
+                "bytes_excel": bytes_excel, "invalidados_al_abrir": self.invalidados}
+
+
+_ALMACEN = None
+_lock_almacen = threading.Lock()
+
+
+def almacen_compartido():
+    """El almacén del proceso según BANCOS_RESULTADOS (None si está desactivado)"""
+    global _ALMACEN
+    ruta = os.environ.get("BANCOS_RESULTADOS", RUTA_POR_DEFECTO)
+    if ruta == "0":
+        return None
+    with _lock_almacen:
+        if _ALMACEN is None or _ALMACEN.ruta != ruta:
+            _ALMACEN = Almacen(ruta)
+        return _ALMACEN
@@ -0,0 +1,211 @@
+"""
+Análisis de los movimientos: categorías y resúmenes por categoría, por día y por contraparte.
+
+Los reportes listan los CRÉDITOS y DÉBITOS tal como vienen en el extracto. Esta etapa, opcional,
+etiqueta cada movimiento con una categoría (impuestos, comisiones, sueldos, transferencias...)
+según listas de palabras clave y agrega al Excel tres hojas de resumen. Las reglas arrancan de las
+palabras clave de comafi.py y se evalúan en orden: gana la primera categoría que coincide (así
+"IMPUESTO LEY 25413 S/TRANSFERENCIA" es un impuesto y no una transferencia). Cada palabra se busca
+al comienzo de una palabra de la descripción, sin distinguir mayúsculas ni acentos: "IVA" no
+coincide con "ACTIVA" y "IMPUESTO" sí con "IMPUESTOS".
+
+Todo se calcula con pandas sobre columnas (una regex por categoría y un groupby por resumen), sin
+recorrer los movimientos en Python. Lo que más cuesta es abrir y volver a guardar el Excel para
+agregar las hojas.
+
+Otras reglas: un JSON {"Categoría": ["PALABRA", ...], ...} (el orden del archivo es la prioridad),
+con --reglas o la variable BANCOS_REGLAS.
+
+Uso:
+    python analisis.py Galicia.xlsx -o Galicia_analisis.xlsx
+"""
+import argparse
+import io
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from lectura_excel import leer_hojas
+from transferencias import FORMATOS_FECHA, _tabla, parsear_fecha
+
+# Categoría -> palabras clave, en orden de prioridad
+REGLAS = {
+    "Impuestos": ["IMP. IB", "IMP IB", "IMPUESTO", "IMP.", "IVA", "PERCEPCION", "PERC.", "RETENCION", "RET.",
+                  "SELLOS", "LEY 25413", "LEY 25.413", "INGRESOS BRUTOS", "IIBB", "SIRCREB", "DEV. IMP."],
+    "Comisiones y gastos": ["COMISION", "COM.", "MANTENIMIENTO", "MANT.", "CARGO", "GASTOS", "SEGURO"],
+    "Sueldos": ["TRANSF INMED SUELDOS", "TRANSFERENCIA SUELDOS", "SUELDO", "HABERES", "ANSES"],
+    "Transferencias": ["TRANSFERENCIA", "TRANSF", "TRF", "DEBIN", "DEBITO INMED", "CREDITO INMED", "DATANET"],
+    "Plazo fijo e inversiones": ["PLAZO FIJO", "RESCATE", "SUSCRIPCION", "COBRANZA BURSATIL", "FONDO COMUN", "FCI"],
+    "Intereses": ["INTERES", "ACRED. INTERESES"],
+    "Cheques": ["CHEQUE", "ECHEQ", "CHQ"],
+    "Efectivo": ["EXTRACCION", "DEPOSITO EFECTIVO", "DEPOSITO DE EFECTIVO", "CAJERO", "AJUSTE BANELCO"],
+    "Débitos automáticos y servicios": ["DEBITO AUTOM", "DEBITO TARJETA", "PAGO DE SERVICIOS", "PAGO ELECTRONICO",
+                                        "DEBITO POR RECAUDACION", "PAGO TARJETA", "PAGO VISA", "PAGO MASTER"],
+}
+SIN_CATEGORIA = "Otros"
+MAXIMO_CONTRAPARTES = 1000  # filas de la hoja Por contraparte (las de mayor volumen)
+
+_ACENTOS = (("Á", "A"), ("É", "E"), ("Í", "I"), ("Ó", "O"), ("Ú", "U"), ("Ü", "U"), ("Ñ", "N"))
+# Sin lookbehind: así pandas resuelve las regex con los kernels de pyarrow (RE2) y no fila por fila
+_RE_CUIT = r"(?:^|[^0-9])(\d{2})-?(\d{8})-?(\d)(?:[^0-9]|$)"
+
+
+def cargar_reglas(ruta=None):
+    """Reglas de un JSON {categoría: [palabras]}; sin ruta, las de BANCOS_REGLAS o REGLAS"""
+    ruta = ruta or os.environ.get("BANCOS_REGLAS")
+    if not ruta:
+        return REGLAS
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _sin_acentos(texto):
+    for acento, letra in _ACENTOS:
+        texto = texto.replace(acento, letra)
+    return texto
+
+
+def _normalizar(descripciones):
+    """Serie de descripciones -> mayúsculas sin acentos"""
+    texto = descripciones.fillna("").astype(str).str.upper()
+    for acento, letra in _ACENTOS:
+        texto = texto.str.replace(acento, letra, regex=False)
+    return texto
+
+
+def _patron(palabras):
+    """Regex de una categoría: alguna de las palabras, al comienzo de una palabra de la descripción"""
+    alternativas = "|".join(re.escape(_sin_acentos(p.upper())) for p in palabras)
+    return rf"(?:^|[^A-Z0-9])(?:{alternativas})"
+
+
+def categorizar(descripciones, reglas=None):
+    """Serie de descripciones -> Serie de categorías (la primera regla que coincide, o SIN_CATEGORIA)"""
+    return _categorias(_normalizar(pd.Series(descripciones)), reglas)
+
+
+def _categorias(texto, reglas=None):
+    """Como categorizar, sobre descripciones ya normalizadas"""
+    reglas = reglas or REGLAS
+    mascaras = [texto.str.contains(_patron(palabras), regex=True).to_numpy() for palabras in reglas.values()]
+    return pd.Series(np.select(mascaras, list(reglas), default=SIN_CATEGORIA), index=texto.index)
+
+
+def _fechas(valores):
+    """Fechas de las celdas: las date y los textos dd/mm/aaaa en bloque, los otros formatos uno por uno"""
+    fechas = pd.to_datetime(valores, format=FORMATOS_FECHA[0], errors="coerce")
+    pendientes = fechas.isna() & valores.notna()
+    if pendientes.any():
+        fechas[pendientes] = pd.to_datetime(valores[pendientes].map(parsear_fecha), errors="coerce")
+    return fechas
+
+
+def movimientos(hojas):
+    """Hojas de lectura_excel.leer_hojas -> DataFrame Cuenta, Fecha, Descripcion, Importe (+ crédito, - débito)"""
+    partes = []
+    for hoja in hojas:
+        for clave, signo in (("creditos", 1), ("debitos", -1)):
+            if hoja[clave]:
+                parte = pd.DataFrame(hoja[clave], columns=["Fecha", "Descripcion", "Importe"])
+                parte["Importe"] = signo * pd.to_numeric(parte["Importe"], errors="coerce").abs()
+                parte.insert(0, "Cuenta", hoja["hoja"])
+                partes.append(parte)
+    if not partes:
+        return pd.DataFrame(columns=["Cuenta", "Fecha", "Descripcion", "Importe"])
+    df = pd.concat(partes, ignore_index=True)
+    df["Fecha"] = _fechas(df["Fecha"])
+    df["Descripcion"] = df["Descripcion"].fillna("").astype(str)
+    return df.dropna(subset=["Importe"])
+
+
+def resumir(df, reglas=None):
+    """
+    Resúmenes de un DataFrame de movimientos(): {"categorias", "dias", "contrapartes"}, cada uno un
+    DataFrame con Movimientos, Ingresos, Egresos y Neto. Con más de una cuenta (una hoja en pesos y
+    otra en dólares) se resume por cuenta, para no sumar monedas distintas.
+    """
+    texto = _normalizar(df["Descripcion"])
+    con_cuit = texto.str.contains(r"\d{2}-?\d{8}-?\d", regex=True)
+    cuit = texto[con_cuit].str.extract(_RE_CUIT).reindex(texto.index)
+    nombre = texto.str.replace(r"[^A-Z]+", " ", regex=True).str.strip()
+    df = df.assign(Categoria=_categorias(texto, reglas).to_numpy(),
+                   Ingresos=df["Importe"].clip(lower=0), Egresos=(-df["Importe"]).clip(lower=0),
+                   CUIT=cuit[0] + "-" + cuit[1] + "-" + cuit[2], Nombre=nombre)
+    # Contraparte: el CUIT si la descripción lo trae; si no, el texto sin números (sin nros. de operación)
+    df["Contraparte"] = df["CUIT"].fillna(df["Nombre"])
+
+    cuentas = ["Cuenta"] if df["Cuenta"].nunique() > 1 else []
+    totales = {"Movimientos": ("Importe", "size"), "Ingresos": ("Ingresos", "sum"), "Egresos": ("Egresos", "sum"),
+               "Neto": ("Importe", "sum")}
+
+    def por_volumen(resumen):
+        volumen = resumen["Ingresos"] + resumen["Egresos"]
+        return resumen.assign(_volumen=volumen).sort_values(cuentas + ["_volumen"],
+                                                            ascending=[True] * len(cuentas) + [False])\
+            .drop(columns="_volumen").reset_index(drop=True)
+
+    categorias = por_volumen(df.groupby(cuentas + ["Categoria"], sort=False).agg(**totales).reset_index())
+
+    dias = df.dropna(subset=["Fecha"]).groupby(cuentas + ["Fecha"]).agg(**totales).reset_index()
+    dias["Neto acumulado"] = dias.groupby(cuentas)["Neto"].cumsum() if cuentas else dias["Neto"].cumsum()
+
+    contrapartes = df.groupby(cuentas + ["Contraparte"], sort=False).agg(
+        Nombre=("Nombre", "first"), CUIT=("CUIT", "first"), Categoria=("Categoria", "first"), **totales)
+    contrapartes = por_volumen(contrapartes.reset_index().drop(columns="Contraparte")).head(MAXIMO_CONTRAPARTES)
+    return {"categorias": categorias, "dias": dias, "contrapartes": contrapartes}
+
+
+def escribir_hojas(wb, resumenes):
+    """Agrega al workbook las hojas Por categoría, Por día y Por contraparte"""
+    hojas = (("categorias", "Por categoría", "MOVIMIENTOS POR CATEGORÍA", {"Categoria": "Categoría"}),
+             ("dias", "Por día", "MOVIMIENTOS POR DÍA", {}),
+             ("contrapartes", "Por contraparte", "MOVIMIENTOS POR CONTRAPARTE",
+              {"Nombre": "Contraparte", "Categoria": "Categoría"}))
+    anchos = {"Cuenta": 30, "Categoría": 30, "Contraparte": 45, "CUIT": 15, "Fecha": 13, "Movimientos": 14}
+    for clave, titulo_hoja, titulo, nombres in hojas:
+        resumen = resumenes[clave].rename(columns=nombres)
+        encabezados = list(resumen.columns)
+        monedas = [i for i, c in enumerate(encabezados) if c in ("Ingresos", "Egresos", "Neto", "Neto acumulado")]
+        filas = resumen.astype(object).where(resumen.notna(), None).itertuples(index=False, name=None)
+        ws = wb.create_sheet(titulo_hoja)
+        _tabla(ws, titulo, encabezados, list(filas), [anchos.get(c, 16) for c in encabezados], monedas=monedas)
+        if "Fecha" in encabezados:
+            columna = encabezados.index("Fecha") + 1
+            for fila in ws.iter_rows(min_row=4, min_col=columna, max_col=columna):
+                fila[0].number_format = "DD/MM/YYYY"
+
+
+def agregar_hojas(contenido, reglas=None):
+    """Excel de un procesar_* (bytes) -> el mismo Excel con las hojas de análisis (sin movimientos, sin cambios)"""
+    wb = load_workbook(io.BytesIO(contenido))
+    df = movimientos(leer_hojas(wb))
+    if df.empty:
+        return contenido
+    escribir_hojas(wb, resumir(df, reglas or cargar_reglas()))
+    salida = io.BytesIO()
+    wb.save(salida)
+    return salida.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agrega al Excel procesado los resúmenes por categoría, día y "
+                                                 "contraparte")
+    parser.add_argument("excel", help="Excel generado por la app")
+    parser.add_argument("-o", "--salida", help="Excel de salida (por defecto <excel>_analisis.xlsx)")
+    parser.add_argument("--reglas", help="JSON {categoría: [palabras clave]} (por defecto las de analisis.REGLAS)")
+    args = parser.parse_args()
+
+    with open(args.excel, "rb") as f:
+        contenido = f.read()
+    salida = args.salida or os.path.splitext(args.excel)[0] + "_analisis.xlsx"
+    with open(salida, "wb") as f:
+        f.write(agregar_hojas(contenido, cargar_reglas(args.reglas)))
+    print(f"-> {salida}")
+
+
+if __name__ == "__main__":
+    main()
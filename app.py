@@ -1,122 +1,89 @@
+import hashlib
+import time
+import traceback
+
 import streamlit as st
-from frances import procesar_bbva_frances
-from santander import procesar_santander_rio
-from santander_prueba import procesar_santander_rio_prueba
-from galicia import procesar_galicia
-from icbc import procesar_icbc
-from icbc_2 import procesar_icbc_formato_2
-from icbc_formato_3 import procesar_icbc_formato_3
-from macro import procesar_macro
-from nacion import procesar_nacion
-from provincia import procesar_provincia
-from provincia_2 import procesar_provincia_formato_2
-from supervielle import procesar_supervielle
-from hipotecario import procesar_hipotecario
-from hsbc import procesar_hsbc
-from credicoop import procesar_credicoop
-from mercadopago import procesar_mercadopago
-from credicoop_2 import procesar_credicoop_formato_2
-from macro_2 import procesar_macro_formato_2
-from macro_3 import procesar_macro_formato_3
-from macro_4 import procesar_macro_formato_4
-from galicia_mas import procesar_galicia_mas
-from comafi import procesar_comafi
-from ciudad import procesar_ciudad
-from patagonia import procesar_patagonia
-from patagonia_2 import procesar_patagonia_formato_2
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from almacen import almacen_compartido
+from analisis import agregar_hojas
+from duplicados import deduplicar
+from guardia import LARGO_MAXIMO_LINEA
+from libro import libro_compartido
+from planificador import planificador_compartido
+from procesadores import ArchivoPDF, ResultadoProcesado, lista_bancos, procesar_banco
+from propios import leer_csv, validar_cuit
+from segundo_plano import TrabajoSesion, clave_trabajo, iniciar
+from transferencias import VENTANA_DIAS, emparejar, exportar, movimientos_de_excel
+from vista import mostrar, resumen_cuentas, tabla_movimientos
 
 st.set_page_config(page_title="Movimientos Bancos", page_icon="🏦")
 
-# Lista de bancos (orden alfabético)
-bancos = [
-    "BBVA Frances",
-    "Ciudad",
-    "Comafi",
-    "Credicoop",
-    "Credicoop (Formato 2)",
-    "Galicia",
-    "Galicia Más",
-    "Hipotecario",
-    "HSBC",
-    "ICBC (Formato 1)",
-    "ICBC (Formato 2)",
-    "ICBC (Formato 3)",
-    "Macro",
-    "Macro (Formato 2)",
-    "Macro (Formato 3)",
-    "Macro (Formato 4)",
-    "MercadoPago",
-    "Nacion",
-    "Patagonia",
-    "Patagonia (Formato 2)",
-    "Provincia",
-    "Provincia (Formato 2)",
-    "Santander Rio",
-    "Santander Rio (Prueba)",
-    "Supervielle",
-]
-
-
-def procesar_banco(banco_seleccionado, archivo_pdf):
-    """Función principal que dirige el procesamiento según el banco seleccionado"""
-    if banco_seleccionado == "BBVA Frances":
-        return procesar_bbva_frances(archivo_pdf)
-    elif banco_seleccionado == "Santander Rio":
-        return procesar_santander_rio(archivo_pdf)
-    elif banco_seleccionado == "Santander Rio (Prueba)":
-        return procesar_santander_rio_prueba(archivo_pdf, cuits_propios=cuits_propios)
-    elif banco_seleccionado == "Galicia":
-        return procesar_galicia(archivo_pdf)
-    elif banco_seleccionado == "Galicia Más":
-        return procesar_galicia_mas(archivo_pdf)
-    elif banco_seleccionado == "ICBC (Formato 1)":
-        return procesar_icbc(archivo_pdf)
-    elif banco_seleccionado == "ICBC (Formato 2)":
-        return procesar_icbc_formato_2(archivo_pdf)
-    elif banco_seleccionado == "ICBC (Formato 3)":
-        return procesar_icbc_formato_3(archivo_pdf)
-    elif banco_seleccionado == "Macro":
-        return procesar_macro(archivo_pdf)
-    elif banco_seleccionado == "Macro (Formato 2)":
-        return procesar_macro_formato_2(archivo_pdf)
-    elif banco_seleccionado == "Macro (Formato 3)":
-        return procesar_macro_formato_3(archivo_pdf)
-    elif banco_seleccionado == "Macro (Formato 4)":
-        return procesar_macro_formato_4(archivo_pdf)
-    elif banco_seleccionado == "Nacion":
-        return procesar_nacion(archivo_pdf)
-    elif banco_seleccionado == "Provincia":
-        return procesar_provincia(archivo_pdf)
-    elif banco_seleccionado == "Provincia (Formato 2)":
-        return procesar_provincia_formato_2(archivo_pdf)
-    elif banco_seleccionado == "Supervielle":
-        return procesar_supervielle(archivo_pdf)
-    elif banco_seleccionado == "Hipotecario":
-        return procesar_hipotecario(archivo_pdf)
-    elif banco_seleccionado == "HSBC":
-        return procesar_hsbc(archivo_pdf)
-    elif banco_seleccionado == "Credicoop":
-        return procesar_credicoop(archivo_pdf)
-    elif banco_seleccionado == "Credicoop (Formato 2)":
-        return procesar_credicoop_formato_2(archivo_pdf)
-    elif banco_seleccionado == "MercadoPago":
-        return procesar_mercadopago(archivo_pdf)
-    elif banco_seleccionado == "Comafi":
-        return procesar_comafi(archivo_pdf)
-    elif banco_seleccionado == "Ciudad":
-        return procesar_ciudad(archivo_pdf)
-    elif banco_seleccionado == "Patagonia":
-        return procesar_patagonia(archivo_pdf)
-    elif banco_seleccionado == "Patagonia (Formato 2)":
-        return procesar_patagonia_formato_2(archivo_pdf)
-    else:
-        st.info(f"Lógica para {banco_seleccionado} aún no implementada")
-        return None
+# Lista de bancos (orden alfabético) + formatos declarativos definidos como JSON en formatos/
+bancos = lista_bancos()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def movimientos_de_excel_cacheado(sha256, _contenido, banco, archivo):
+    """movimientos_de_excel por hash del archivo: cada rerun de la página no vuelve a abrir los Excel"""
+    return movimientos_de_excel(_contenido, banco, archivo)
 
 
 # Interfaz principal de Streamlit
 st.title("Selector de Banco y Subida de PDF")
 
+# Transferencias entre cuentas propias: se cruzan los Excel ya generados de varios extractos
+with st.sidebar:
+    st.subheader("Transferencias entre cuentas propias")
+    st.caption("Subí los Excel generados de varios extractos (de cualquier banco) para emparejar las "
+               "salidas de una cuenta con las entradas en otra.")
+    excels = st.file_uploader("Excel procesados", type=["xlsx"], accept_multiple_files=True)
+    if excels:
+        ventana = st.number_input("Días de diferencia aceptados", min_value=0, max_value=10, value=VENTANA_DIAS)
+        movimientos, sin_fecha = [], 0
+        for excel in excels:
+            contenido_excel = excel.getvalue()
+            leidos, sin = movimientos_de_excel_cacheado(hashlib.sha256(contenido_excel).hexdigest(), contenido_excel,
+                                                        excel.name.rsplit(".", 1)[0], excel.name)
+            movimientos += leidos
+            sin_fecha += sin
+        leidos = len(movimientos)
+        movimientos, duplicados = deduplicar(movimientos)  # bordes de períodos superpuestos
+        pares, sin_pareja = emparejar(movimientos, int(ventana))
+        st.write(f"{len(pares):,} transferencias emparejadas · {len(sin_pareja):,} sin pareja")
+        if duplicados:
+            st.caption(f"{len(duplicados):,} movimientos repetidos entre extractos descartados")
+
+        # El Excel de la conciliación se arma al hacer clic, no en cada rerun de la página
+        def conciliacion_descarga(pares=pares, sin_pareja=sin_pareja, leidos=leidos, sin_fecha=sin_fecha,
+                                  descartados=len(duplicados)):
+            return exportar(pares, sin_pareja, leidos, sin_fecha, descartados)
+
+        st.download_button(
+            label="Descargar conciliación",
+            data=conciliacion_descarga,
+            file_name="conciliacion_transferencias.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
+    # Libro consolidado: historia de cada cuenta armada con los extractos agregados (libro.py). Es uno
+    # solo para todas las sesiones: solo aparece si se configuró BANCOS_LIBRO
+    libro = libro_compartido()
+    if libro is not None:
+        st.subheader("Libro consolidado")
+        datos_libro = libro.estadisticas()
+        st.caption(f"{datos_libro['cuentas']} cuentas · {datos_libro['periodos']} extractos · "
+                   f"{datos_libro['movimientos']:,} movimientos")
+        if datos_libro["periodos"] and st.button("Preparar Excel del libro"):
+            st.session_state["libro_excel"] = libro.exportar_excel()
+        if "libro_excel" in st.session_state:
+            st.download_button(
+                label="Descargar libro consolidado",
+                data=st.session_state["libro_excel"],
+                file_name="libro_consolidado.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+
 # Selector de banco
 banco_seleccionado = st.selectbox("Selecciona un banco:", bancos)
 
@@ -133,29 +100,227 @@ if banco_seleccionado == "Santander Rio (Prueba)":
             cuit = st.text_input(f"CUIT #{i+1}", key=f"cuit_{i}", placeholder="30711511004")
         with col2:
             razon = st.text_input(f"Razón Social #{i+1}", key=f"razon_{i}", placeholder="Empresa SA")
-        if cuit and cuit.strip() or razon and razon.strip():
-            cuit_val = cuit.strip().replace("-", "") if cuit else ""
-            razon_val = razon.strip() if razon else ""
+        cuit_val = validar_cuit(cuit)
+        razon_val = razon.strip() if razon else ""
+        if cuit and cuit.strip() and not cuit_val:
+            st.warning(f"CUIT #{i+1} inválido ({cuit.strip()}): tiene que tener 11 dígitos y el dígito verificador "
+                       "correcto. " + ("Se usa solo la razón social." if razon_val else "No se agrega."))
+        if cuit_val or razon_val:
             label = razon_val if razon_val else f"CUIT {cuit_val}"
             cuits_propios.append((cuit_val, razon_val, label))
+    # Grupos grandes: CSV con una entidad por fila (cuit; razón social; etiqueta opcional)
+    archivo_propios = st.file_uploader("O subí un CSV de CUITs y razones sociales propias", type=["csv", "txt"])
+    if archivo_propios is not None:
+        entidades, descartadas = leer_csv(archivo_propios.getvalue())
+        cuits_propios += [(e.cuit, e.razon, e.etiqueta) for e in entidades]
+        st.caption(f"{len(entidades):,} entidades cargadas del CSV"
+                   + (f" ({descartadas} filas sin CUIT válido ni razón social)" if descartadas else ""))
     st.markdown("---")
 
 # Subida de archivo PDF
 archivo_pdf = st.file_uploader("Sube un archivo PDF", type=["pdf"])
 
+# Perfilado opcional (cProfile + tracemalloc): más lento, pero permite analizar un extracto
+# problemático descargando solo el perfil, sin compartir el PDF
+perfilar_activo = st.checkbox("Perfilar procesamiento (cProfile + tracemalloc)", value=False)
+
+# Hojas de análisis opcionales (analisis.py): resúmenes por categoría, por día y por contraparte
+analisis_activo = st.checkbox("Agregar hojas de análisis (por categoría, día y contraparte)", value=False)
+
 if archivo_pdf is not None:
     st.success(f"Archivo '{archivo_pdf.name}' subido correctamente.")
 
-    # Procesar el archivo según el banco seleccionado
-    resultado = procesar_banco(banco_seleccionado, archivo_pdf)
+    # Procesar en segundo plano (midiendo cada etapa). El trabajo queda en la sesión: los reruns
+    # (cambiar un widget) reutilizan el que está en curso y el resultado se conserva
+    contenido = archivo_pdf.getvalue()
+    clave = clave_trabajo(contenido, banco_seleccionado, cuits_propios, perfilar_activo)
+    trabajo = st.session_state.get("trabajo")
+    almacen = almacen_compartido()
+    if trabajo is None or trabajo.clave != clave:
+        if trabajo is not None and not trabajo.terminado:
+            trabajo.cancelar()  # cambiaron el archivo o las opciones: el trabajo anterior ya no sirve
+        # Mismo PDF ya procesado (por cualquier usuario) con la versión actual del procesador:
+        # se devuelve el resultado guardado. Al perfilar siempre se procesa
+        guardado = None
+        if almacen is not None and not perfilar_activo:
+            guardado = almacen.obtener(contenido, banco_seleccionado, cuits_propios)
+        if guardado is not None:
+            trabajo = TrabajoSesion(clave=clave, banco=banco_seleccionado, nombre=archivo_pdf.name,
+                                    resultado=ResultadoProcesado(banco_seleccionado, excel=guardado["excel"]),
+                                    mensajes=guardado["mensajes"], fin=time.time(),
+                                    recuperado=guardado["creado"], guardado=True)
+        else:
+            # Pool de procesos compartido por todas las sesiones (con turnos entre sesiones); con
+            # BANCOS_PROCESOS=0 se procesa en un hilo de esta sesión. Diferido: los bancos con etapas
+            # separadas (procesadores.etapas) solo parsean y el Excel se arma cuando se descarga
+            with st.spinner("Preparando los procesos de trabajo..."):
+                planificador = planificador_compartido()
+            if planificador is not None:
+                contexto = get_script_run_ctx()
+                sesion = contexto.session_id if contexto is not None else "local"
+                trabajo = planificador.enviar(sesion, clave, banco_seleccionado, archivo_pdf.name, contenido,
+                                              cuits_propios=cuits_propios, perfilar=perfilar_activo, diferido=True)
+            else:
+                trabajo = iniciar(clave, banco_seleccionado, archivo_pdf.name, procesar_banco, banco_seleccionado,
+                                  ArchivoPDF(contenido, archivo_pdf.name), perfilar=perfilar_activo,
+                                  cuits_propios=cuits_propios, diferido=True)
+        st.session_state["trabajo"] = trabajo
+
+    if not trabajo.terminado:
+        barra = st.progress(0.0, text="Procesando...")
+        if st.button("Cancelar procesamiento"):
+            trabajo.cancelar()
+        while not trabajo.terminado:
+            if trabajo.posicion:
+                texto = f"En cola: posición {trabajo.posicion} (esperando un proceso libre)..."
+            elif trabajo.paginas_totales:
+                texto = f"Procesando página {trabajo.paginas_hechas} de {trabajo.paginas_totales}..."
+            else:
+                texto = "Procesando..."
+            barra.progress(trabajo.fraccion(), text=texto)
+            time.sleep(0.2)
+        barra.empty()
+
+    if trabajo.cancelado:
+        st.warning("Procesamiento cancelado.")
+        if st.button("Procesar de nuevo"):
+            del st.session_state["trabajo"]
+            st.rerun()
+        st.stop()
+
+    # La vista previa y el almacén usan las mismas hojas, que se leen una sola vez (del parseo si el
+    # Excel todavía no se armó)
+    hojas = None
+    if trabajo.resultado is not None and trabajo.vista is None:
+        try:
+            hojas = trabajo.resultado.hojas()
+            trabajo.vista = (tabla_movimientos(hojas), resumen_cuentas(hojas))
+        except Exception:
+            print(traceback.format_exc())
+            trabajo.vista = (None, [])
+
+    # El almacén guarda el Excel: si todavía no se armó, se guarda cuando se descarga
+    def guardar_resultado(trabajo=trabajo, hojas=None):
+        if trabajo.guardado or almacen is None:
+            return
+        trabajo.guardado = True
+        try:
+            almacen.guardar(contenido, banco_seleccionado, trabajo.resultado.excel(), cuits_propios=cuits_propios,
+                            nombre=archivo_pdf.name, mensajes=trabajo.mensajes, hojas=hojas)
+        except Exception:
+            print(traceback.format_exc())  # sin almacén se sigue igual: solo se pierde el atajo
+
+    if trabajo.resultado is not None and not trabajo.resultado.pendiente:
+        guardar_resultado(hojas=hojas)
+
+    if trabajo.recuperado is not None:
+        procesado = time.strftime("%d/%m/%Y %H:%M", time.localtime(trabajo.recuperado))
+        st.info(f"Este extracto ya se había procesado el {procesado}: se usa el resultado guardado.")
+    trabajo.mostrar_mensajes()
+    if trabajo.error:
+        st.error(trabajo.error)
+    resultado, perfil, ejecucion = trabajo.resultado, trabajo.perfil, trabajo.ejecucion
+    omitidas = ejecucion.contadores.get("lineas_omitidas") if ejecucion is not None else None
+    if omitidas:
+        st.warning(f"Se omitieron {omitidas} línea(s) anómala(s) de más de {LARGO_MAXIMO_LINEA} caracteres. "
+                   "Revisar el Excel por posibles movimientos faltantes.")
 
     if resultado is not None:
         # Determinar el nombre del archivo según el banco
         nombre_archivo = f"{banco_seleccionado}.xlsx"
 
+        # Vista previa: saldos, control y movimientos (filtrados y paginados del lado del servidor)
+        st.subheader("Vista previa")
+        tabla, cuentas = trabajo.vista
+        mostrar(tabla, cuentas)
+
+        # El Excel (y las hojas de análisis, sobre el Excel ya generado) se arma recién cuando se descarga,
+        # en otro hilo, y queda en el trabajo para las descargas siguientes. El almacén y el libro usan el
+        # Excel sin las hojas de análisis
+        def excel_descarga(trabajo=trabajo, analisis=analisis_activo):
+            excel = trabajo.resultado.excel()
+            guardar_resultado(trabajo)
+            if not analisis:
+                return excel
+            if trabajo.excel_analisis is None:
+                try:
+                    trabajo.excel_analisis = agregar_hojas(excel)
+                except Exception:
+                    print(traceback.format_exc())
+                    return excel
+            return trabajo.excel_analisis
+
         st.download_button(
             label="Descargar archivo Excel procesado",
-            data=resultado,
+            data=excel_descarga,
             file_name=nombre_archivo,
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         )
+
+        # Se agregan solo los movimientos que el libro no tenía (los períodos se superponen)
+        if libro is not None and st.button("Agregar al libro consolidado"):
+            try:
+                informe = libro.agregar(contenido, banco_seleccionado, resultado.excel(), archivo_pdf.name)
+                guardar_resultado(trabajo)
+            except Exception:
+                print(traceback.format_exc())
+                st.error("No se pudo agregar el extracto al libro consolidado.")
+                informe = []
+            for datos in informe:
+                if datos["sin_identificar"]:
+                    st.warning(f"{datos['cuenta']}: el reporte no trae número de cuenta ni titular, así que no "
+                               "se puede saber a qué cuenta del libro corresponde. No se agregó.")
+                    continue
+                if datos["ya_estaba"]:
+                    st.info(f"{datos['cuenta']}: este extracto ya estaba en el libro.")
+                    continue
+                st.success(f"{datos['cuenta']}: {datos['nuevos']:,} movimientos nuevos "
+                           f"({datos['repetidos']:,} ya estaban en el libro).")
+                if datos["continuidad"]:
+                    st.warning(f"{datos['cuenta']}: el saldo inicial no continúa el saldo final de "
+                               f"{datos['anterior']} (diferencia {datos['continuidad']:,.2f}). "
+                               "Puede faltar un extracto.")
+            st.session_state.pop("libro_excel", None)  # el Excel preparado quedó viejo
+
+    if ejecucion is not None:
+        with st.expander("Performance"):
+            datos_ejecucion = ejecucion.como_dict()
+            st.write(f"Tiempo total: {datos_ejecucion['total_ms']:,.1f} ms")
+            if ejecucion.etapas:
+                st.table(ejecucion.filas_etapas())
+            if datos_ejecucion["contadores"]:
+                st.write(" · ".join(f"{k}: {v:,}" for k, v in datos_ejecucion["contadores"].items()))
+            if datos_ejecucion["pagina_max_ms"] is not None:
+                st.write(f"Extracción por página: media {datos_ejecucion['pagina_media_ms']:,.1f} ms, "
+                         f"máx {datos_ejecucion['pagina_max_ms']:,.1f} ms")
+
+    if perfil is not None:
+        nombre_base = archivo_pdf.name.rsplit(".", 1)[0]
+        with st.expander("Perfil (cProfile + tracemalloc)", expanded=True):
+            st.write(f"Tiempo perfilado: {perfil.segundos:,.2f} s · "
+                     f"Pico de memoria: {perfil.pico_memoria / 1024 / 1024:,.2f} MiB")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    label="Descargar perfil (.prof)",
+                    data=perfil.prof,
+                    file_name=f"{nombre_base}.prof",
+                    mime="application/octet-stream",
+                )
+            with col2:
+                st.download_button(
+                    label="Descargar reporte de memoria",
+                    data=perfil.reporte_memoria,
+                    file_name=f"{nombre_base}.memoria.txt",
+                    mime="text/plain",
+                )
+            st.text(perfil.reporte_cpu)
+            if perfil.asignaciones:
+                st.table(perfil.asignaciones)
+            if perfil.patrones:
+                st.caption("Regex por patrón (patrones.py)")
+                st.table(perfil.patrones)
+            else:
+                st.caption("Sin conteo por patrón: definir BANCOS_PERFILAR_REGEX=1 antes de iniciar la app "
+                           "(solo Comafi, Galicia, Macro (Formato 3), MercadoPago y los formatos declarativos "
+                           "usan el registro de patrones).")
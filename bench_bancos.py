@@ -0,0 +1,250 @@
+"""
+Benchmark de procesadores: throughput y curva de escala por banco.
+
+Para cada banco genera extractos sintéticos (sinteticos.py) de 10 / 100 / 1.000 / 10.000 movimientos
+y los procesa con el procesador real, cada uno en un proceso aparte con timeout. Registra tiempo
+total, páginas/s, movimientos/s, tiempos por etapa (rendimiento.py) y pico de memoria residente al
+cerrar cada etapa, y controla que el Excel coincida con la verdad del extracto. Los resultados se
+guardan en JSON y se pueden comparar dos corridas para detectar regresiones.
+
+Uso:
+    python bench_bancos.py --json base.json                       # todos los bancos y tamaños
+    python bench_bancos.py Galicia MercadoPago Comafi --tamanios 100 1000 --json nuevo.json --base base.json
+    python bench_bancos.py --comparar base.json nuevo.json        # solo comparar dos corridas
+"""
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import sinteticos
+
+TAMANIOS = [10, 100, 1000, 10000]
+
+
+def _procesar(banco, pdf, nombre, cola):
+    """Corre en un proceso aparte: procesa el PDF midiendo etapas y memoria"""
+    import rendimiento
+    from procesadores import ArchivoPDF, procesar_banco
+
+    rendimiento.logger.disabled = True  # el benchmark junta los datos él mismo
+    sys.stdout = open(os.devnull, "w")  # los procesadores imprimen trazas de depuración
+    rss_base = rendimiento.rss_pico_kib()
+    t0 = time.perf_counter()
+    with rendimiento.medir_ejecucion(banco, nombre, memoria=True) as ejecucion:
+        resultado = procesar_banco(banco, ArchivoPDF(pdf, nombre))
+        ejecucion.ok = resultado is not None
+    segundos = time.perf_counter() - t0
+    cola.put((segundos, ejecucion.como_dict(), rss_base, rendimiento.rss_pico_kib(), resultado))
+
+
+def correr(banco, pdf, nombre, timeout):
+    """Devuelve (segundos, datos_ejecucion, rss_base, rss_pico, xlsx) o None si se pasó del timeout"""
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else mp.get_context()
+    cola = ctx.Queue()
+    proc = ctx.Process(target=_procesar, args=(banco, pdf, nombre, cola))
+    proc.start()
+    try:
+        salida = cola.get(timeout=timeout)
+    except Exception:
+        salida = None
+    if proc.is_alive():
+        proc.terminate()
+    proc.join()
+    return salida
+
+
+def medir(banco, movimientos, opciones, repeticiones, timeout):
+    """Mide un banco en un tamaño: se queda con la repetición más rápida"""
+    opciones = sinteticos.Opciones(**{**opciones.__dict__, "movimientos": movimientos})
+    pdf, verdad = sinteticos.generar(banco, opciones)
+    nombre = f"sintetico_{movimientos}.pdf"
+    fila = {
+        "banco": banco,
+        "movimientos": movimientos,
+        "paginas": verdad["paginas"],
+        "pdf_kib": round(len(pdf) / 1024, 1),
+        "timeout": False,
+    }
+    corridas = []
+    for _ in range(repeticiones):
+        salida = correr(banco, pdf, nombre, timeout)
+        if salida is None:
+            fila["timeout"] = True
+            return fila
+        corridas.append(salida)
+
+    segundos, datos, rss_base, rss_pico, xlsx = min(corridas, key=lambda c: c[0])
+    diferencias = sinteticos.comparar(verdad, xlsx)
+    fila.update({
+        "ok": datos["ok"],
+        "correcto": not diferencias,
+        "diferencias": diferencias[:5],
+        "segundos": round(segundos, 4),
+        "segundos_corridas": [round(c[0], 4) for c in corridas],
+        "paginas_s": round(verdad["paginas"] / segundos, 2) if segundos else None,
+        "movimientos_s": round(movimientos / segundos, 1) if segundos else None,
+        "etapas_ms": datos["etapas_ms"],
+        "rss_base_kib": rss_base,
+        "rss_pico_kib": rss_pico,
+        # Cuánto subió el pico de RSS durante cada etapa (el pico es monótono: la etapa que lo mueve
+        # es la que más memoria pidió)
+        "etapas_rss_kib": _incrementos(datos.get("etapas_rss_pico_kib") or {}, rss_base),
+    })
+    return fila
+
+
+def _incrementos(picos, base):
+    if base is None:
+        return {}
+    incrementos, anterior = {}, base
+    for etapa, pico in picos.items():
+        incrementos[etapa] = pico - anterior if pico is not None else None
+        anterior = pico if pico is not None else anterior
+    return incrementos
+
+
+def exponente(filas):
+    """
+    Exponente de escala entre los dos tamaños más grandes medidos: ~1 lineal, ~2 cuadrático.
+    Con muy pocos movimientos domina el costo fijo (abrir el PDF, armar el Excel), así que solo
+    se usan tamaños de 100 movimientos para arriba.
+    """
+    validas = sorted((f["movimientos"], f["segundos"]) for f in filas
+                     if not f["timeout"] and f.get("segundos") and f["movimientos"] >= 100)
+    if len(validas) < 2:
+        return None
+    (n1, t1), (n2, t2) = validas[-2], validas[-1]
+    return round(math.log(t2 / t1) / math.log(n2 / n1), 2)
+
+
+def comparar_corridas(base, nueva, tolerancia=0.15, minimo_ms=20.0, tolerancia_rss=0.25):
+    """
+    Compara dos corridas (dicts del JSON) por banco y tamaño. Devuelve la lista de regresiones.
+    Un tiempo es regresión si empeora más que `tolerancia` (proporción) y más que `minimo_ms`;
+    la memoria, si el aumento de RSS sobre la base del proceso empeora más que `tolerancia_rss`.
+    También es regresión que deje de coincidir con la verdad o que pase a timeout.
+    """
+    anteriores = {(f["banco"], f["movimientos"]): f for f in base["resultados"]}
+    regresiones = []
+    for f in nueva["resultados"]:
+        a = anteriores.get((f["banco"], f["movimientos"]))
+        if a is None:
+            continue
+        clave = f"{f['banco']} ({f['movimientos']} mov.)"
+        if f["timeout"] and not a["timeout"]:
+            regresiones.append(f"{clave}: timeout (antes {a['segundos']:.3f} s)")
+            continue
+        if f["timeout"] or a["timeout"]:
+            continue
+        if a["correcto"] and not f["correcto"]:
+            regresiones.append(f"{clave}: dejó de coincidir con la verdad: {'; '.join(f['diferencias'])}")
+        dif_ms = (f["segundos"] - a["segundos"]) * 1000
+        if a["segundos"] and f["segundos"] / a["segundos"] > 1 + tolerancia and dif_ms > minimo_ms:
+            regresiones.append(f"{clave}: {a['segundos']:.3f} s -> {f['segundos']:.3f} s "
+                               f"(+{100 * (f['segundos'] / a['segundos'] - 1):.0f}%)")
+        if None not in (a["rss_pico_kib"], a["rss_base_kib"], f["rss_pico_kib"], f["rss_base_kib"]):
+            uso_a = a["rss_pico_kib"] - a["rss_base_kib"]
+            uso_f = f["rss_pico_kib"] - f["rss_base_kib"]
+            if uso_f > uso_a * (1 + tolerancia_rss) and uso_f - uso_a > 10 * 1024:
+                regresiones.append(f"{clave}: memoria {uso_a / 1024:.1f} MiB -> {uso_f / 1024:.1f} MiB")
+    return regresiones
+
+
+def _cargar(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _informar_regresiones(regresiones):
+    if regresiones:
+        print(f"\nRegresiones: {len(regresiones)}")
+        for r in regresiones:
+            print(f"  !! {r}")
+    else:
+        print("\nSin regresiones")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de throughput y escala de los procesadores")
+    parser.add_argument("bancos", nargs="*", help="Bancos a medir (como en la app). Por defecto todos.")
+    parser.add_argument("--tamanios", nargs="+", type=int, default=TAMANIOS, help="Cantidades de movimientos")
+    parser.add_argument("--repeticiones", type=int, default=1, help="Corridas por medición (se toma la mínima)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Segundos máximos por corrida")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--multilinea", type=float, default=0.15)
+    parser.add_argument("--json", help="Guardar resultados en este archivo JSON")
+    parser.add_argument("--base", help="JSON de una corrida anterior para comparar al terminar")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "NUEVA"), help="Solo comparar dos JSON")
+    parser.add_argument("--tolerancia", type=float, default=0.15,
+                        help="Empeoramiento de tiempo tolerado (0.15 = 15%%)")
+    parser.add_argument("--minimo-ms", type=float, default=20.0,
+                        help="Diferencia mínima en ms para considerar una regresión de tiempo")
+    args = parser.parse_args()
+
+    if args.comparar:
+        regresiones = comparar_corridas(_cargar(args.comparar[0]), _cargar(args.comparar[1]),
+                                        args.tolerancia, args.minimo_ms)
+        _informar_regresiones(regresiones)
+        sys.exit(1 if regresiones else 0)
+
+    bancos = args.bancos or list(sinteticos.GENERADORES)
+    for banco in bancos:
+        if banco not in sinteticos.GENERADORES:
+            parser.error(f"Banco sin generador sintético: {banco}. Opciones: {', '.join(sinteticos.GENERADORES)}")
+    tamanios = sorted(args.tamanios)
+    opciones = sinteticos.Opciones(semilla=args.semilla, multilinea=args.multilinea)
+
+    # Importar los procesadores una vez antes de crear los procesos (con fork no se mide la importación)
+    import procesadores  # noqa: F401
+
+    print(f"{'Banco':<24} {'Mov.':>6} {'Pág.':>5} {'Tiempo s':>9} {'Pág/s':>8} {'Mov/s':>9} {'RSS MiB':>8}  Control")
+    resultados, escala = [], {}
+    for banco in bancos:
+        filas = []
+        for n in tamanios:
+            fila = medir(banco, n, opciones, args.repeticiones, args.timeout)
+            filas.append(fila)
+            if fila["timeout"]:
+                print(f"{banco:<24} {n:>6} {fila['paginas']:>5} {'TIMEOUT':>9}")
+                break  # los tamaños mayores tardarían más
+            uso = "-" if fila["rss_base_kib"] is None else f"{(fila['rss_pico_kib'] - fila['rss_base_kib']) / 1024:.1f}"
+            control = "OK" if fila["correcto"] else "DIFERENCIAS: " + "; ".join(fila["diferencias"])
+            print(f"{banco:<24} {n:>6} {fila['paginas']:>5} {fila['segundos']:>9.3f} {fila['paginas_s']:>8.1f} "
+                  f"{fila['movimientos_s']:>9.1f} {uso:>8}  {control}")
+        resultados += filas
+        escala[banco] = exponente(filas)
+
+    print("\nExponente de escala (tiempo ~ movimientos^k, entre los dos tamaños mayores):")
+    for banco, k in sorted(escala.items(), key=lambda x: -(x[1] or 0)):
+        marca = "!!" if k is not None and k >= 1.5 else "  "
+        print(f"{marca}{banco:<24} {'-' if k is None else f'{k:.2f}'}")
+
+    corrida = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "tamanios": tamanios,
+        "repeticiones": args.repeticiones,
+        "semilla": args.semilla,
+        "escala": escala,
+        "resultados": resultados,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(corrida, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en {args.json}")
+
+    if args.base:
+        regresiones = comparar_corridas(_cargar(args.base), corrida, args.tolerancia, args.minimo_ms)
+        _informar_regresiones(regresiones)
+        sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
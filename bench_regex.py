@@ -0,0 +1,210 @@
+"""
+Benchmark / fuzz de peor caso para los regex de los parsers.
+
+Recorre (vía AST) todos los módulos de bancos, junta cada patrón literal usado en
+re.match/search/findall/finditer/sub/split/fullmatch/compile, en registro(...).compilar(...)
+y en las especificaciones declarativas (FormatoExtracto / Metadato),
+y lo corre contra generadores de líneas adversarias (miles de espacios, mayúsculas,
+dígitos, fechas truncadas...). Cada patrón se evalúa en un proceso aparte con timeout,
+así un backtracking catastrófico no congela el benchmark.
+
+Uso:
+    python bench_regex.py                  # todos los módulos
+    python bench_regex.py galicia macro_3  # solo esos módulos
+    python bench_regex.py --json bench_regex.json --tamanios 1000 4000 16000
+"""
+import argparse
+import ast
+import glob
+import json
+import multiprocessing as mp
+import os
+import re
+import time
+
+from guardia import LARGO_MAXIMO_LINEA
+
+EXCLUIR = {"app.py", "bench_regex.py", "repro_regex.py", "patrones.py", "guardia.py", "secciones.py",
+           "formatos.py", "dashboard.py"}
+FUNCIONES_RE = {"match", "search", "findall", "finditer", "sub", "split", "fullmatch", "compile"}
+# Campos con regex en las especificaciones declarativas (formatos.py)
+CAMPOS_REGEX_FORMATO = {"FormatoExtracto": {"fecha", "movimiento"}, "Metadato": {"patron"}}
+FLAGS = {"IGNORECASE": re.IGNORECASE, "I": re.IGNORECASE, "MULTILINE": re.MULTILINE, "M": re.MULTILINE,
+         "DOTALL": re.DOTALL, "S": re.DOTALL, "VERBOSE": re.VERBOSE, "X": re.VERBOSE}
+
+# Generadores de líneas adversarias: reciben el tamaño y devuelven la línea
+GENERADORES = {
+    "espacios": lambda n: " " * n,
+    "espacios_x": lambda n: " " * n + "x",
+    "mayusculas": lambda n: "A" * n,
+    "minus_mayus": lambda n: ("aA" * (n // 2))[:n] + "1",
+    "mayus_espacios": lambda n: ("A " * (n // 2))[:n] + "1",
+    "cuenta_mayus": lambda n: "Cuenta: 1" + ("A " * (n // 2))[:n],
+    "digitos": lambda n: "1" * n,
+    "miles": lambda n: ("1." * (n // 2))[:n] + ",",
+    "comas": lambda n: ("1," * (n // 2))[:n],
+    "fechas_truncas": lambda n: ("  12/12/1" * (n // 9 + 1))[:n],
+    "pesos": lambda n: ("$ -" * (n // 3 + 1))[:n],
+    "puntos_espacios": lambda n: (". " * (n // 2))[:n] + "-",
+}
+
+
+def recolectar_patrones(archivos):
+    """Devuelve [(modulo, linea, patron, flags)] con los patrones literales de cada módulo"""
+    encontrados = []
+    for ruta in archivos:
+        with open(ruta, encoding="utf-8") as f:
+            arbol = ast.parse(f.read(), filename=ruta)
+        modulo = os.path.splitext(os.path.basename(ruta))[0]
+        for nodo in ast.walk(arbol):
+            if isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Name) and nodo.func.id in CAMPOS_REGEX_FORMATO:
+                ignorar = any(k.arg == "ignorar_mayusculas" and isinstance(k.value, ast.Constant) and k.value.value
+                              for k in nodo.keywords)
+                for k in nodo.keywords:
+                    if k.arg in CAMPOS_REGEX_FORMATO[nodo.func.id] and isinstance(k.value, ast.Constant) \
+                            and isinstance(k.value.value, str):
+                        encontrados.append((modulo, k.value.lineno, k.value.value, re.IGNORECASE if ignorar else 0))
+                continue
+            if not isinstance(nodo, ast.Call) or not isinstance(nodo.func, ast.Attribute):
+                continue
+            args = nodo.args
+            if nodo.func.attr in FUNCIONES_RE and isinstance(nodo.func.value, ast.Name) and nodo.func.value.id == "re":
+                idx_patron, idx_flags = 0, {"match": 2, "search": 2, "findall": 2, "finditer": 2,
+                                            "fullmatch": 2, "compile": 1, "sub": 4, "split": 3}[nodo.func.attr]
+            elif nodo.func.attr == "compilar":
+                idx_patron, idx_flags = 1, 2
+            else:
+                continue
+            if len(args) <= idx_patron or not isinstance(args[idx_patron], ast.Constant) \
+                    or not isinstance(args[idx_patron].value, str):
+                continue
+            flags = 0
+            nodos_flags = [args[idx_flags]] if len(args) > idx_flags else []
+            nodos_flags += [k.value for k in nodo.keywords if k.arg == "flags"]
+            for nf in nodos_flags:
+                for sub in ast.walk(nf):
+                    if isinstance(sub, ast.Attribute) and sub.attr in FLAGS:
+                        flags |= FLAGS[sub.attr]
+            encontrados.append((modulo, nodo.lineno, args[idx_patron].value, flags))
+
+    # Deduplicar por (patrón, flags) conservando la primera ubicación
+    unicos = {}
+    for modulo, linea, patron, flags in encontrados:
+        unicos.setdefault((patron, flags), (modulo, linea, patron, flags))
+    return list(unicos.values())
+
+
+def _medir_patron(patron, flags, tamanios, cola):
+    """Corre en un proceso aparte: mide findall sobre cada generador y tamaño"""
+    compilado = re.compile(patron, flags)
+    resultados = {}
+    for nombre, gen in GENERADORES.items():
+        tiempos = []
+        for n in tamanios:
+            linea = gen(n)
+            t0 = time.perf_counter()
+            compilado.findall(linea)
+            tiempos.append(time.perf_counter() - t0)
+        resultados[nombre] = tiempos
+        cola.put(("parcial", nombre, tiempos))
+    cola.put(("fin", None, None))
+
+
+def evaluar(patron, flags, tamanios, timeout):
+    """Devuelve (peor_generador, tiempos, crecimiento, timeout_alcanzado)"""
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else mp.get_context()
+    cola = ctx.Queue()
+    proc = ctx.Process(target=_medir_patron, args=(patron, flags, tamanios, cola))
+    proc.start()
+    resultados = {}
+    limite = time.monotonic() + timeout
+    terminado = False
+    while time.monotonic() < limite:
+        try:
+            tipo, nombre, tiempos = cola.get(timeout=max(0.01, limite - time.monotonic()))
+        except Exception:
+            break
+        if tipo == "fin":
+            terminado = True
+            break
+        resultados[nombre] = tiempos
+    if proc.is_alive():
+        proc.terminate()
+    proc.join()
+
+    if not terminado:
+        pendiente = next((g for g in GENERADORES if g not in resultados), "?")
+        return pendiente, None, None, True
+
+    peor = max(resultados, key=lambda g: resultados[g][-1])
+    tiempos = resultados[peor]
+    # Crecimiento entre los dos tamaños más grandes, normalizado por el factor de tamaño.
+    # ~1 = lineal, ~factor = cuadrático.
+    factor = tamanios[-1] / tamanios[-2] if len(tamanios) > 1 else 1
+    crecimiento = (tiempos[-1] / tiempos[-2]) / factor if len(tiempos) > 1 and tiempos[-2] > 0 else 1.0
+    return peor, tiempos, crecimiento, False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de peor caso de los regex de los parsers")
+    parser.add_argument("modulos", nargs="*", help="Módulos a analizar (sin .py). Por defecto todos.")
+    parser.add_argument("--tamanios", nargs="+", type=int, default=[LARGO_MAXIMO_LINEA, 4 * LARGO_MAXIMO_LINEA],
+                        help="Largos de línea a probar (el primero debería ser el límite de la guardia)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Segundos máximos por patrón")
+    parser.add_argument("--umbral-ms", type=float, default=5.0,
+                        help="Tiempo (ms) en el largo máximo de la guardia a partir del cual se marca el patrón")
+    parser.add_argument("--json", help="Guardar resultados en este archivo JSON")
+    args = parser.parse_args()
+
+    base = os.path.dirname(os.path.abspath(__file__))
+    if args.modulos:
+        archivos = [os.path.join(base, m if m.endswith(".py") else m + ".py") for m in args.modulos]
+    else:
+        archivos = sorted(p for p in glob.glob(os.path.join(base, "*.py")) if os.path.basename(p) not in EXCLUIR)
+
+    tamanios = sorted(args.tamanios)
+    patrones = recolectar_patrones(archivos)
+    print(f"Patrones encontrados: {len(patrones)} en {len(archivos)} módulos. Tamaños: {tamanios}")
+
+    filas = []
+    for modulo, linea, patron, flags in patrones:
+        peor, tiempos, crecimiento, colgado = evaluar(patron, flags, tamanios, args.timeout)
+        # Tiempo en el tamaño más cercano (por debajo o igual) al límite de la guardia
+        idx_guardia = max([i for i, n in enumerate(tamanios) if n <= LARGO_MAXIMO_LINEA] or [0])
+        t_guardia = None if colgado else tiempos[idx_guardia]
+        sospechoso = colgado or crecimiento >= 2.5 or (t_guardia * 1000) >= args.umbral_ms
+        filas.append({
+            "modulo": modulo,
+            "linea": linea,
+            "patron": patron,
+            "flags": flags,
+            "peor_generador": peor,
+            "tiempos_ms": None if colgado else [round(t * 1000, 3) for t in tiempos],
+            "crecimiento": None if colgado else round(crecimiento, 2),
+            "timeout": colgado,
+            "sospechoso": sospechoso,
+        })
+
+    filas.sort(key=lambda f: (not f["timeout"], -(f["tiempos_ms"][-1] if f["tiempos_ms"] else 0)))
+
+    print(f"\n{'Modulo:Linea':<24} {'Peor generador':<16} {'ms por tamaño':<28} {'Crec.':>6}  Patrón")
+    for f in filas:
+        ubicacion = f"{f['modulo']}:{f['linea']}"
+        tiempos = "TIMEOUT" if f["timeout"] else " / ".join(f"{t:.2f}" for t in f["tiempos_ms"])
+        crec = "-" if f["crecimiento"] is None else f"{f['crecimiento']:.1f}"
+        marca = "!!" if f["sospechoso"] else "  "
+        print(f"{marca}{ubicacion:<22} {f['peor_generador']:<16} {tiempos:<28} {crec:>6}  {f['patron'][:70]}")
+
+    sospechosos = [f for f in filas if f["sospechoso"]]
+    print(f"\nSospechosos: {len(sospechosos)} de {len(filas)} "
+          f"(crecimiento superlineal, > {args.umbral_ms} ms en {LARGO_MAXIMO_LINEA} caracteres, o timeout)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"tamanios": tamanios, "largo_maximo_guardia": LARGO_MAXIMO_LINEA, "patrones": filas},
+                      f, ensure_ascii=False, indent=2)
+        print(f"Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Búsqueda de texto en todos los extractos procesados.
+
+Los movimientos que guarda el almacén de resultados (almacen.py) quedan indexados en una tabla
+SQLite FTS5. Una contraparte, un CUIT o parte de una descripción se encuentran en miles de
+extractos en milisegundos, sin abrir los Excel uno por uno. Se puede filtrar por banco, cuenta,
+fechas e importe, y el resultado trae cuántas coincidencias hay por banco y por cuenta.
+
+Las palabras se buscan como prefijos y en cualquier orden: "distrib sur" encuentra "DISTRIBUIDORA
+DEL SUR SA". Un CUIT se encuentra con o sin guiones.
+
+Uso:
+    python busqueda.py "distribuidora del sur"
+    python busqueda.py 30-71151100-4 --banco Galicia --desde 01/01/2024 --minimo 100000
+    python busqueda.py alquiler --json
+"""
+import argparse
+import json
+import os
+import re
+
+from propios import normalizar_cuit, normalizar_texto
+
+_CUIT = re.compile(r"^\s*\d{2}[-. ]?\d{8}[-. ]?\d\s*$")
+
+
+def consulta_fts(texto):
+    """Consulta FTS5 para el texto del usuario ("" si no hay nada que buscar)"""
+    cuit = normalizar_cuit(texto) if _CUIT.match(texto or "") else ""
+    if cuit:
+        # El tokenizador corta en los guiones: "30-71151100-4" queda como la frase "30 71151100 4"
+        return f'"{cuit}" OR "{cuit[:2]} {cuit[2:10]} {cuit[10]}"'
+    return " AND ".join(f'"{token}"*' for token in normalizar_texto(texto).split())
+
+
+def patron_like(texto):
+    """Patrones LIKE (uno por palabra) para cuando SQLite no trae FTS5"""
+    cuit = normalizar_cuit(texto) if _CUIT.match(texto or "") else ""
+    if cuit:
+        return [f"%{cuit[:2]}%{cuit[2:10]}%{cuit[10]}%"]
+    return [f"%{token}%" for token in normalizar_texto(texto).split()]
+
+
+def main():
+    from almacen import RUTA_POR_DEFECTO, Almacen
+    from transferencias import parsear_fecha
+
+    parser = argparse.ArgumentParser(description="Busca movimientos en todos los extractos procesados")
+    parser.add_argument("consulta", nargs="?", default="", help="Texto o CUIT (vacío: solo filtros)")
+    parser.add_argument("--banco")
+    parser.add_argument("--cuenta", help="Hoja del Excel (ej. \"Reporte Galicia\")")
+    parser.add_argument("--desde", help="Fecha mínima (dd/mm/aaaa)")
+    parser.add_argument("--hasta", help="Fecha máxima (dd/mm/aaaa)")
+    parser.add_argument("--minimo", type=float, help="Importe mínimo (valor absoluto)")
+    parser.add_argument("--maximo", type=float, help="Importe máximo (valor absoluto)")
+    parser.add_argument("-n", "--limite", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    parser.add_argument("--resultados", default=os.environ.get("BANCOS_RESULTADOS", RUTA_POR_DEFECTO))
+    parser.add_argument("--reindexar", action="store_true", help="Rearmar el índice desde los movimientos guardados")
+    args = parser.parse_args()
+
+    almacen = Almacen(args.resultados)
+    if args.reindexar:
+        print(f"{almacen.reindexar()} movimientos indexados")
+    desde = parsear_fecha(args.desde) if args.desde else None
+    hasta = parsear_fecha(args.hasta) if args.hasta else None
+    resultado = almacen.buscar(args.consulta, banco=args.banco, cuenta=args.cuenta, desde=desde, hasta=hasta,
+                               minimo=args.minimo, maximo=args.maximo, limite=args.limite)
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2, default=str))
+        return
+    for m in resultado["movimientos"]:
+        print(f"{m['fecha'] or '':<10} {m['importe']:>16,.2f}  {m['descripcion'][:60]:<60}  "
+              f"{m['banco']} · {m['cuenta']}  [{m['extracto']}]")
+    print(f"{resultado['total']:,} coincidencias"
+          + (f" (se muestran {len(resultado['movimientos'])})" if resultado["total"] > len(resultado["movimientos"])
+             else ""))
+    for banco, cantidad in resultado["bancos"][:10]:
+        print(f"  {banco}: {cantidad:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Precalentamiento de procesos trabajadores.
+
+El primer extracto después de un deploy (o de reiniciar un proceso) paga la importación de pandas,
+openpyxl, PyPDF2, pdfplumber/pdfminer y los 25 procesadores, más la compilación de los regex que
+se usan sueltos (re.match(r"...") compila en el primer uso). calentar() hace todo eso por adelantado:
+importa las librerías y procesa un extracto sintético mínimo por banco, con lo que quedan
+compilados los patrones y ejercitadas las rutas de PyPDF2 y pdfplumber. crear_pool() arma un pool de
+procesos a partir de un proceso padre ya caliente (fork): cada trabajador nuevo, incluso los que
+reemplazan a uno caído, arranca con la latencia del estado estable. Donde no hay fork (Windows),
+cada trabajador se calienta solo al iniciar. Desde un proceso que no se puede copiar (el servidor
+de Streamlit: sus hilos de tornado y asyncio no sobreviven a un fork, y los st.info del extracto
+sintético irían a la página del usuario que abrió el pool) se pasa contexto_aislado(): cada
+trabajador arranca del forkserver y se calienta él mismo.
+
+Uso:
+    python calentamiento.py               # informe del costo de calentamiento (importaciones y por banco)
+    python calentamiento.py --bancos Galicia Comafi --json calentamiento.json
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing as mp
+import os
+import re
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+# Librerías pesadas, en el orden en que conviene importarlas (las últimas dependen de las primeras)
+LIBRERIAS = ("pandas", "openpyxl", "PyPDF2", "pdfminer.high_level", "pdfplumber", "streamlit", "pyarrow")
+
+_INFORME = None  # informe del calentamiento de este proceso (o del padre, si se heredó por fork)
+
+
+def _silenciar():
+    """Los procesadores imprimen trazas y Streamlit avisa que no hay sesión: no interesan al calentar"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def calentar(bancos=None, movimientos=5):
+    """
+    Importa las librerías y los procesadores y procesa un extracto sintético por banco.
+    Devuelve el informe de costos (segundos por importación y por banco, regex en caché).
+    Se puede llamar más de una vez: lo ya cargado no se vuelve a pagar.
+    """
+    global _INFORME
+    t0 = time.perf_counter()
+    importaciones = {}
+    for nombre in LIBRERIAS:
+        t = time.perf_counter()
+        try:
+            importlib.import_module(nombre)
+        except ImportError:
+            continue  # dependencia opcional (ej. pyarrow)
+        importaciones[nombre] = round(time.perf_counter() - t, 4)
+    t = time.perf_counter()
+    with _silenciar():
+        import procesadores
+        procesadores.lista_bancos()  # compila los formatos declarativos
+    importaciones["procesadores"] = round(time.perf_counter() - t, 4)
+
+    import rendimiento
+    import sinteticos
+
+    por_banco = {}
+    fallidos = []
+    silenciado = rendimiento.logger.disabled
+    rendimiento.logger.disabled = True
+    try:
+        for banco in bancos or list(sinteticos.GENERADORES):
+            pdf, _ = sinteticos.generar(banco, sinteticos.Opciones(movimientos=movimientos, multilinea=0.5,
+                                                                   huerfanas=0.5))
+            t = time.perf_counter()
+            with _silenciar():
+                try:
+                    resultado = procesadores.procesar_banco(banco, procesadores.ArchivoPDF(pdf, "calentamiento.pdf"))
+                except Exception:
+                    resultado = None
+            por_banco[banco] = round(time.perf_counter() - t, 4)
+            if resultado is None:
+                fallidos.append(banco)
+    finally:
+        rendimiento.logger.disabled = silenciado
+
+    _INFORME = {
+        "pid": os.getpid(),
+        "total_s": round(time.perf_counter() - t0, 3),
+        "importaciones_s": importaciones,
+        "bancos_s": por_banco,
+        "fallidos": fallidos,
+        "regex_en_cache": len(getattr(re, "_cache", {})),
+    }
+    return _INFORME
+
+
+def informe():
+    """Informe del calentamiento del proceso actual (None si no se calentó)"""
+    return _INFORME
+
+
+def _inicializar_trabajador(bancos, inicializador=None, argumentos=()):
+    if _INFORME is None:
+        calentar(bancos)
+    if inicializador is not None:
+        inicializador(*argumentos)
+
+
+def _informe_trabajador():
+    return dict(_INFORME or {}, pid_trabajador=os.getpid())
+
+
+_lock_principal = threading.Lock()
+
+
+@contextlib.contextmanager
+def _sin_principal():
+    """
+    Con forkserver y spawn, cada proceso nuevo vuelve a ejecutar el __main__ del padre. Dentro de
+    Streamlit ese __main__ es el script de la app: mientras arranca el proceso se deja uno vacío
+    """
+    with _lock_principal:
+        principal = sys.modules.get("__main__")
+        vacio = sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            yield
+        finally:
+            if sys.modules.get("__main__") is vacio:  # si otra sesión ya puso el suyo, queda ese
+                sys.modules["__main__"] = principal
+
+
+class _SinPrincipal:
+    def start(self):
+        with _sin_principal():
+            super().start()
+
+
+class _ProcesoSpawn(_SinPrincipal, mp.get_context("spawn").Process):
+    pass
+
+
+class _ContextoSpawn(type(mp.get_context("spawn"))):
+    Process = _ProcesoSpawn
+
+
+if "forkserver" in mp.get_all_start_methods():
+    class _ProcesoForkserver(_SinPrincipal, mp.get_context("forkserver").Process):
+        pass
+
+    class _ContextoForkserver(type(mp.get_context("forkserver"))):
+        Process = _ProcesoForkserver
+
+
+def contexto_aislado():
+    """
+    Contexto de multiprocessing que no copia el proceso actual ni vuelve a ejecutar su __main__:
+    forkserver (con los procesadores ya importados en el servidor de fork) o, donde no existe, spawn
+    """
+    if "forkserver" not in mp.get_all_start_methods():
+        return _ContextoSpawn()
+    contexto = _ContextoForkserver()
+    contexto.set_forkserver_preload(["procesadores"])  # sin efecto si el servidor de fork ya arrancó
+    return contexto
+
+
+def crear_pool(procesos, bancos=None, inicializador=None, argumentos=(), contexto=None):
+    """
+    Pool de procesos calientes. Con fork se calienta el proceso actual una sola vez y los
+    trabajadores lo heredan; sin fork, o con un `contexto` (ej. contexto_aislado()), cada trabajador
+    se calienta en su inicializador y el proceso actual no corre ningún procesador.
+    `inicializador(*argumentos)` se corre además en cada trabajador (ej. para recibir memoria compartida).
+    """
+    if contexto is None and "fork" in mp.get_all_start_methods():
+        if _INFORME is None:
+            calentar(bancos)
+        return ProcessPoolExecutor(max_workers=procesos, mp_context=mp.get_context("fork"),
+                                   initializer=inicializador, initargs=argumentos)
+    return ProcessPoolExecutor(max_workers=procesos, mp_context=contexto, initializer=_inicializar_trabajador,
+                               initargs=(bancos, inicializador, argumentos))
+
+
+def arrancar_trabajadores(pool, procesos):
+    """Fuerza el arranque de los trabajadores ahora (y no con el primer extracto); devuelve sus informes"""
+    futuros = [pool.submit(_informe_trabajador) for _ in range(procesos)]
+    return [f.result() for f in futuros]
+
+
+def _medir_primera_vez(banco, pdf):
+    """En un proceso sin calentar: importa y procesa dos veces (primera = en frío, segunda = estable)"""
+    with _silenciar():
+        import procesadores
+        tiempos = []
+        for _ in range(2):
+            t = time.perf_counter()
+            procesadores.procesar_banco(banco, procesadores.ArchivoPDF(pdf, "medicion.pdf"))
+            tiempos.append(time.perf_counter() - t)
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Informe del costo de calentar un proceso trabajador")
+    parser.add_argument("--bancos", nargs="+", help="Bancos a calentar (por defecto todos)")
+    parser.add_argument("--comparar", nargs="*", metavar="BANCO", default=["Galicia", "MercadoPago", "Comafi"],
+                        help="Bancos para comparar primer extracto en frío vs estado estable")
+    parser.add_argument("--json", help="Guardar el informe en JSON")
+    args = parser.parse_args()
+
+    import sinteticos
+
+    # Frío vs estable, cada banco en un proceso nuevo sin calentar (spawn: no hereda nada)
+    ctx = mp.get_context("spawn")
+    frio = {}
+    for banco in args.comparar:
+        pdf, _ = sinteticos.generar(banco, sinteticos.Opciones(movimientos=50))
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            primera, segunda = pool.submit(_medir_primera_vez, banco, pdf).result()
+        frio[banco] = {"primera_s": round(primera, 4), "estable_s": round(segunda, 4)}
+
+    datos = calentar(args.bancos)
+    datos["frio_vs_estable"] = frio
+
+    print(f"Calentamiento total: {datos['total_s']:.2f} s (regex en caché: {datos['regex_en_cache']})")
+    print("\nImportaciones:")
+    for nombre, s in datos["importaciones_s"].items():
+        print(f"  {nombre:<24} {s * 1000:>9.1f} ms")
+    print("\nPrimer extracto sintético por banco:")
+    for banco, s in sorted(datos["bancos_s"].items(), key=lambda x: -x[1]):
+        print(f"  {banco:<24} {s * 1000:>9.1f} ms{'  (sin resultado)' if banco in datos['fallidos'] else ''}")
+    if frio:
+        print("\nProceso nuevo sin calentar (incluye la primera compilación de regex, no las importaciones):")
+        for banco, t in frio.items():
+            print(f"  {banco:<24} primera {t['primera_s'] * 1000:>8.1f} ms · estable {t['estable_s'] * 1000:>8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+        print(f"\nInforme guardado en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
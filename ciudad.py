@@ -6,6 +6,8 @@ import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_texto
+from rendimiento import marcar, contar, paginas_medidas
 
 # Regex para limpiar caracteres ilegales de Excel
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -60,14 +62,19 @@ def procesar_ciudad(archivo_pdf):
 
 
         archivo_pdf.seek(0)
+        marcar("lectura")
         with pdfplumber.open(io.BytesIO(archivo_pdf.read())) as pdf:
             texto_completo = ""
-            for page in pdf.pages:
+            marcar("extraccion")
+            for page in paginas_medidas(pdf.pages):
                 t = page.extract_text()
                 if t:
                     texto_completo += t + "\n"
 
+        texto_completo = filtrar_texto(texto_completo, "Ciudad")
         lineas = texto_completo.splitlines()
+        contar("lineas", len(lineas))
+        marcar("secciones")
 
         # ============================================================
         # 1. METADATOS
@@ -118,6 +125,7 @@ def procesar_ciudad(archivo_pdf):
         # ============================================================
         # 2. MOVIMIENTOS - Estrategia: calcular importe desde diferencia de saldos
         # ============================================================
+        marcar("importes")
         transactions = []
 
         # Patrón: dd-MMM-yyyy seguido de descripción y montos
@@ -172,6 +180,7 @@ def procesar_ciudad(archivo_pdf):
                     })
 
         # Calcular importe como diferencia de saldos
+        marcar("conciliacion")
         saldo_previo = saldo_inicial
         for mov in movimientos_raw:
             importe = mov["saldo"] - saldo_previo
@@ -183,6 +192,9 @@ def procesar_ciudad(archivo_pdf):
                 "Importe": round(importe, 2)
             })
 
+        contar("movimientos", len(transactions))
+        contar("cuentas", 1)
+
         if not transactions:
             st.info("No se encontraron movimientos. Se generará el Excel solo con los saldos.")
 
@@ -193,6 +205,7 @@ def procesar_ciudad(archivo_pdf):
         # 3. GENERAR EXCEL
         # ============================================================
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte Ciudad"
@@ -393,6 +406,7 @@ def procesar_ciudad(archivo_pdf):
         ws.column_dimensions["F"].width = 40
         ws.column_dimensions["G"].width = 18
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
@@ -11,6 +11,10 @@ import re
 import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from guardia import filtrar_lineas
+from patrones import registro
+from rendimiento import marcar, contar, paginas_medidas
+from lectura_excel import importe_celda, saldo_celda, texto_celda
 
 
 # ── Utilidades ──────────────────────────────────────────────
@@ -33,23 +37,46 @@ def parse_ar_number(s):
     return -val if neg else val
 
 
+# Patrones compilados (registro central, medibles en modo perfilado)
+RE_COMAFI = registro("Comafi")
+
 # Regex para montos argentinos: 1.234.567,89 ó 567,89 ó 0,00  (opcionalmente con '-' al final)
-RE_MONTO = re.compile(r'(?<!\d)(\d{1,3}(?:\.\d{3})*,\d{2}-?)(?!\d)')
+RE_MONTO = RE_COMAFI.compilar("monto", r'(?<!\d)(\d{1,3}(?:\.\d{3})*,\d{2}-?)(?!\d)')
 
 # Regex para fecha DD/MM/YY
-RE_FECHA = re.compile(r'^(\d{2}/\d{2}/\d{2})\s+(.+)')
+RE_FECHA = RE_COMAFI.compilar("fecha", r'^(\d{2}/\d{2}/\d{2})\s+(.+)')
 
 # Regex para detectar encabezado de sección de cuenta
-RE_CUENTA_HEADER = re.compile(
-    r'(CUENTA CORRIENTE BANCARIA|CUENTA CORRIENTE ESPECIAL|CAJA DE AHORROS|CUENTA DE LA SEGURIDAD SOCIAL)\s+EN\s+(PESOS|DOLARES|DÓLARES)',
+RE_CUENTA_HEADER = RE_COMAFI.compilar(
+    "cuenta_header",
+    r'(CUENTA CORRIENTE BANCARIA|CUENTA CORRIENTE ESPECIAL|CAJA DE AHORROS|CUENTA DE LA SEGURIDAD SOCIAL)'
+    r'\s+EN\s+(PESOS|DOLARES|DÓLARES)',
     re.IGNORECASE
 )
 
 # Regex para número de cuenta  NNNN-NNNNN-N
-RE_NRO_CUENTA = re.compile(r'(\d{4}-\d{5}-\d)')
+RE_NRO_CUENTA = RE_COMAFI.compilar("nro_cuenta", r'(\d{4}-\d{5}-\d)')
+RE_NRO = RE_COMAFI.compilar("nro", r'NRO\.?\s*(\d{4}-\d{5}-\d)', re.IGNORECASE)
+RE_NUMERO = RE_COMAFI.compilar("numero", r'Número\s+(\d{4}-\d{5}-\d)', re.IGNORECASE)
 
 # Regex para saldo al cierre
-RE_SALDO_AL = re.compile(r'Saldo al:\s*\d{2}/\d{2}/\d{4}\s+([\d.,]+)', re.IGNORECASE)
+RE_SALDO_AL = RE_COMAFI.compilar("saldo_al", r'Saldo al:\s*\d{2}/\d{2}/\d{4}\s+([\d.,]+)', re.IGNORECASE)
+
+# Metadata: titular (línea con "Hoja:1/") y periodo ("ENERO - 2025")
+RE_TITULAR = RE_COMAFI.compilar("titular", r'^(.+?)\s+Hoja:\s*1/')
+RE_PERIODO = RE_COMAFI.compilar(
+    "periodo",
+    r'(ENERO|FEBRERO|MARZO|ABRIL|MAYO|JUNIO|JULIO|AGOSTO|SEPTIEMBRE|OCTUBRE|NOVIEMBRE|DICIEMBRE)\s*-\s*(\d{4})',
+    re.IGNORECASE
+)
+
+# Líneas a ignorar: encabezados de columna y de página, barcodes
+RE_ENCABEZADO_COLUMNAS = RE_COMAFI.compilar("encabezado_columnas", r'^Fecha\s+Conceptos\s+Referencias',
+                                            re.IGNORECASE)
+RE_ENCABEZADO_PAGINA = RE_COMAFI.compilar("encabezado_pagina", r'^\d+\.\d+\s*-\s*\d+/\d+')
+RE_HOJA = RE_COMAFI.compilar("hoja", r'^Hoja:\s*\d+/\d+', re.IGNORECASE)
+RE_CODIGO = RE_COMAFI.compilar("codigo", r'^\d{10,}$')
+RE_PAGINA = RE_COMAFI.compilar("pagina", r'^Página\s+\d+', re.IGNORECASE)
 
 # Keywords que indican CRÉDITO
 KEYWORDS_CREDITO = [
@@ -127,10 +154,11 @@ def _last_known_saldo(movs, saldo_ini):
 
 # ── Parser principal ────────────────────────────────────────
 
-def procesar_comafi(archivo_pdf):
+def parsear_comafi(archivo_pdf):
     """
-    Lee el PDF de Banco Comafi, extrae los movimientos de cada cuenta
-    y genera un Excel dashboard con estilos Comafi.
+    Lee el PDF de Banco Comafi y extrae los movimientos de cada cuenta, sin armar el Excel.
+    Devuelve {"titular", "periodo", "cuentas": {nro_cuenta: {tipo, moneda, movimientos, saldo_ini, saldo_fin}}}
+    o None.
     """
     st.info("Procesando Banco Comafi…")
 
@@ -139,22 +167,26 @@ def procesar_comafi(archivo_pdf):
 
         # ── Extraer texto completo ──
         all_text = ""
+        marcar("lectura")
         raw_bytes = archivo_pdf.read()
         with pdfplumber.open(io.BytesIO(raw_bytes)) as pdf:
-            for page in pdf.pages:
+            marcar("extraccion")
+            for page in paginas_medidas(pdf.pages):
                 text = page.extract_text()
                 if text:
                     all_text += text + "\n"
 
-        lines = all_text.splitlines()
+        lines = filtrar_lineas(all_text.splitlines(), "Comafi")
+        contar("lineas", len(lines))
 
         # ── FASE 1: Metadata global ──
+        marcar("secciones")
         titular = "S/D"
         periodo = ""
 
         # Titular: está en la primera página, línea con "Hoja:1/"
         for line in lines[:20]:
-            m = re.search(r'^(.+?)\s+Hoja:\s*1/', line)
+            m = RE_TITULAR.search(line)
             if m:
                 titular = m.group(1).strip()
                 break
@@ -166,7 +198,7 @@ def procesar_comafi(archivo_pdf):
             "SEPTIEMBRE": "09", "OCTUBRE": "10", "NOVIEMBRE": "11", "DICIEMBRE": "12"
         }
         for line in lines[:10]:
-            m = re.search(r'(ENERO|FEBRERO|MARZO|ABRIL|MAYO|JUNIO|JULIO|AGOSTO|SEPTIEMBRE|OCTUBRE|NOVIEMBRE|DICIEMBRE)\s*-\s*(\d{4})', line, re.IGNORECASE)
+            m = RE_PERIODO.search(line)
             if m:
                 periodo = f"{m.group(1).capitalize()} {m.group(2)}"
                 break
@@ -179,6 +211,7 @@ def procesar_comafi(archivo_pdf):
         # Seguido de "NRO. NNNN-NNNNN-N ..."
         # Y luego "DETALLE DE MOVIMIENTOS"
 
+        marcar("movimientos")
         cuentas_info = {}   # {nro_cuenta: {tipo, moneda, movimientos, saldo_ini, saldo_fin}}
 
         current_account = None
@@ -204,9 +237,9 @@ def procesar_comafi(archivo_pdf):
                 # Buscar NRO en las siguientes líneas
                 nro_cuenta = None
                 for j in range(i, min(i + 5, len(lines))):
-                    m_nro = re.search(r'NRO\.?\s*(\d{4}-\d{5}-\d)', lines[j], re.IGNORECASE)
+                    m_nro = RE_NRO.search(lines[j])
                     if not m_nro:
-                        m_nro = re.search(r'Número\s+(\d{4}-\d{5}-\d)', lines[j], re.IGNORECASE)
+                        m_nro = RE_NUMERO.search(lines[j])
                     if m_nro:
                         nro_cuenta = m_nro.group(1)
                         break
@@ -233,7 +266,7 @@ def procesar_comafi(archivo_pdf):
             if line.startswith("---") or line.startswith("___"):
                 continue
 
-            if re.match(r'^Fecha\s+Conceptos\s+Referencias', line, re.IGNORECASE):
+            if RE_ENCABEZADO_COLUMNAS.match(line):
                 continue
 
             # ── Detectar fin de movimientos ──
@@ -259,15 +292,15 @@ def procesar_comafi(archivo_pdf):
                 if line.upper().startswith("SIN MOVIMIENTOS"):
                     continue
                 # Encabezados de página repetidos (ej: "138.065 - 3/7 - 02 ...")
-                if re.match(r'^\d+\.\d+\s*-\s*\d+/\d+', line):
+                if RE_ENCABEZADO_PAGINA.match(line):
                     continue
-                if re.match(r'^Hoja:\s*\d+/\d+', line, re.IGNORECASE):
+                if RE_HOJA.match(line):
                     continue
                 # Barcodes / códigos basura
-                if line.startswith('<') or re.match(r'^\d{10,}$', line):
+                if line.startswith('<') or RE_CODIGO.match(line):
                     continue
                 # Líneas tipo "Página N" (del texto pegado, no del PDF real)
-                if re.match(r'^Página\s+\d+', line, re.IGNORECASE):
+                if RE_PAGINA.match(line):
                     continue
 
                 # ── Línea con fecha = nuevo movimiento ──
@@ -407,6 +440,7 @@ def procesar_comafi(archivo_pdf):
                 continue
 
         # ── Completar saldos faltantes (running balance) ──
+        marcar("conciliacion")
         for nro, info in cuentas_info.items():
             movs = info["movimientos"]
             running = info["saldo_ini"]
@@ -417,215 +451,269 @@ def procesar_comafi(archivo_pdf):
                 else:
                     running = mov["Saldo"]  # reset al saldo conocido
 
-        # ── FASE 3: Generar Excel ──
+        contar("cuentas", len(cuentas_info))
+        contar("movimientos", sum(len(info["movimientos"]) for info in cuentas_info.values()))
+
         if not any(info["movimientos"] for info in cuentas_info.values()):
             st.warning("No se extrajeron movimientos de ninguna cuenta.")
             return None
 
-        output = io.BytesIO()
-        wb = Workbook()
-        if "Sheet" in wb.sheetnames:
-            del wb["Sheet"]
-
-        # Estilos Comafi (azul oscuro)
-        color_comafi = "003366"
-        fill_header = PatternFill(start_color=color_comafi, end_color=color_comafi, fill_type="solid")
-        font_header = Font(color="FFFFFF", bold=True, size=12)
-        font_bold = Font(bold=True)
-        thin_border = Border(
-            left=Side(style='thin', color="A6A6A6"),
-            right=Side(style='thin', color="A6A6A6"),
-            top=Side(style='thin', color="A6A6A6"),
-            bottom=Side(style='thin', color="A6A6A6"),
-        )
-        fill_deb_h = PatternFill(start_color="C00000", end_color="C00000", fill_type="solid")
-        fill_deb_c = PatternFill(start_color="F2DCDB", end_color="F2DCDB", fill_type="solid")
-        fill_cred_h = PatternFill(start_color="00B050", end_color="00B050", fill_type="solid")
-        fill_cred_c = PatternFill(start_color="EBF1DE", end_color="EBF1DE", fill_type="solid")
-
-        for nro_cuenta, info in cuentas_info.items():
-            movs = info["movimientos"]
-            tipo = info["tipo"]
-            moneda = info["moneda"]
-
-            # Nombre de hoja
-            if moneda == "Dólares":
-                safe_name = f"USD {nro_cuenta}"
-                fmt_moneda = '"u$s "#,##0.00'
-            else:
-                safe_name = f"ARS {nro_cuenta}"
-                fmt_moneda = '"$ "#,##0.00'
-
-            ws = wb.create_sheet(title=clean_for_excel(safe_name)[:31])
-            ws.sheet_view.showGridLines = False
-
-            ws.column_dimensions['A'].width = 14
-            ws.column_dimensions['B'].width = 55
-            ws.column_dimensions['C'].width = 18
-            ws.column_dimensions['D'].width = 4
-            ws.column_dimensions['E'].width = 14
-            ws.column_dimensions['F'].width = 55
-            ws.column_dimensions['G'].width = 18
-            ws.column_dimensions['I'].width = 22
-            ws.column_dimensions['J'].width = 28
-
-            # ── Título ──
-            ws.merge_cells("A1:G1")
-            ws["A1"] = f"REPORTE COMAFI — {tipo} en {moneda} — {nro_cuenta}"
-            ws["A1"].fill = fill_header
-            ws["A1"].font = font_header
-            ws["A1"].alignment = Alignment(horizontal="center", vertical="center")
-            ws.row_dimensions[1].height = 28
-
-            s_ini = info["saldo_ini"]
-            s_fin = info["saldo_fin"]
-
-            ws["A3"] = "SALDO INICIAL"
-            ws["A3"].font = Font(bold=True, color="666666")
-            ws["B3"] = s_ini
-            ws["B3"].number_format = fmt_moneda
-            ws["B3"].font = font_bold
-
-            ws["A4"] = "SALDO FINAL"
-            ws["A4"].font = Font(bold=True, color="666666")
-            ws["B4"] = s_fin
-            ws["B4"].number_format = fmt_moneda
-            ws["B4"].font = font_bold
-
-            ws["I3"] = "TITULAR"
-            ws["I3"].font = Font(bold=True, color="666666")
-            ws["J3"] = titular
-            ws["J3"].font = font_bold
-
-            ws["I4"] = "PERIODO"
-            ws["I4"].font = Font(bold=True, color="666666")
-            ws["J4"] = periodo
-            ws["J4"].font = font_bold
-
-            ws["I5"] = "CUENTA"
-            ws["I5"].font = Font(bold=True, color="666666")
-            ws["J5"] = nro_cuenta
-            ws["J5"].font = font_bold
-
-            if not movs:
-                ws.merge_cells("A7:G7")
-                ws["A7"] = "NO HUBO MOVIMIENTOS EN ESTE PERIODO"
-                ws["A7"].font = Font(italic=True, color="666666", size=11)
-                ws["A7"].alignment = Alignment(horizontal="center")
-                continue
+        st.success(f"✅ Procesamiento Comafi completado — {len(cuentas_info)} cuenta(s) encontradas.")
+        return {"titular": titular, "periodo": periodo, "cuentas": cuentas_info}
+
+    except Exception as e:
+        st.error(f"Error Crítico: {str(e)}")
+        import traceback
+        st.code(traceback.format_exc())
+        return None
 
-            df = pd.DataFrame(movs)
-            creditos = df[df["Credito"] > 0]
-            debitos = df[df["Debito"] > 0]
-
-            fila = 7
-            headers = ["Fecha", "Descripción", "Importe"]
-
-            # ── CRÉDITOS (A-C) ──
-            ws.merge_cells(f"A{fila}:C{fila}")
-            ws[f"A{fila}"] = "CRÉDITOS"
-            ws[f"A{fila}"].fill = fill_cred_h
-            ws[f"A{fila}"].font = Font(color="FFFFFF", bold=True)
-            ws[f"A{fila}"].alignment = Alignment(horizontal="center")
-
-            for idx_h, h in enumerate(headers):
-                c = ws.cell(row=fila + 1, column=1 + idx_h, value=h)
-                c.fill = fill_cred_c
-                c.font = font_bold
-                c.border = thin_border
-                c.alignment = Alignment(horizontal="center")
-
-            r_cred = fila + 2
-            start_cred = r_cred
-            if creditos.empty:
-                ws[f"A{r_cred}"] = "SIN MOVIMIENTOS"
-                ws[f"A{r_cred}"].font = Font(italic=True, color="999999")
+
+# ── Excel ───────────────────────────────────────────────────
+
+def renderizar_comafi(parseo):
+    """Excel dashboard (bytes) de lo que devuelve parsear_comafi: una hoja por cuenta"""
+    titular = parseo["titular"]
+    periodo = parseo["periodo"]
+    cuentas_info = parseo["cuentas"]
+
+    output = io.BytesIO()
+    marcar("excel")
+    wb = Workbook()
+    if "Sheet" in wb.sheetnames:
+        del wb["Sheet"]
+
+    # Estilos Comafi (azul oscuro)
+    color_comafi = "003366"
+    fill_header = PatternFill(start_color=color_comafi, end_color=color_comafi, fill_type="solid")
+    font_header = Font(color="FFFFFF", bold=True, size=12)
+    font_bold = Font(bold=True)
+    thin_border = Border(
+        left=Side(style='thin', color="A6A6A6"),
+        right=Side(style='thin', color="A6A6A6"),
+        top=Side(style='thin', color="A6A6A6"),
+        bottom=Side(style='thin', color="A6A6A6"),
+    )
+    fill_deb_h = PatternFill(start_color="C00000", end_color="C00000", fill_type="solid")
+    fill_deb_c = PatternFill(start_color="F2DCDB", end_color="F2DCDB", fill_type="solid")
+    fill_cred_h = PatternFill(start_color="00B050", end_color="00B050", fill_type="solid")
+    fill_cred_c = PatternFill(start_color="EBF1DE", end_color="EBF1DE", fill_type="solid")
+
+    for nro_cuenta, info in cuentas_info.items():
+        movs = info["movimientos"]
+        tipo = info["tipo"]
+        moneda = info["moneda"]
+        nombre_hoja, fmt_moneda = _nombre_hoja(nro_cuenta, info)
+
+        ws = wb.create_sheet(title=nombre_hoja)
+        ws.sheet_view.showGridLines = False
+
+        ws.column_dimensions['A'].width = 14
+        ws.column_dimensions['B'].width = 55
+        ws.column_dimensions['C'].width = 18
+        ws.column_dimensions['D'].width = 4
+        ws.column_dimensions['E'].width = 14
+        ws.column_dimensions['F'].width = 55
+        ws.column_dimensions['G'].width = 18
+        ws.column_dimensions['I'].width = 22
+        ws.column_dimensions['J'].width = 28
+
+        # ── Título ──
+        ws.merge_cells("A1:G1")
+        ws["A1"] = f"REPORTE COMAFI — {tipo} en {moneda} — {nro_cuenta}"
+        ws["A1"].fill = fill_header
+        ws["A1"].font = font_header
+        ws["A1"].alignment = Alignment(horizontal="center", vertical="center")
+        ws.row_dimensions[1].height = 28
+
+        s_ini = info["saldo_ini"]
+        s_fin = info["saldo_fin"]
+
+        ws["A3"] = "SALDO INICIAL"
+        ws["A3"].font = Font(bold=True, color="666666")
+        ws["B3"] = s_ini
+        ws["B3"].number_format = fmt_moneda
+        ws["B3"].font = font_bold
+
+        ws["A4"] = "SALDO FINAL"
+        ws["A4"].font = Font(bold=True, color="666666")
+        ws["B4"] = s_fin
+        ws["B4"].number_format = fmt_moneda
+        ws["B4"].font = font_bold
+
+        ws["I3"] = "TITULAR"
+        ws["I3"].font = Font(bold=True, color="666666")
+        ws["J3"] = titular
+        ws["J3"].font = font_bold
+
+        ws["I4"] = "PERIODO"
+        ws["I4"].font = Font(bold=True, color="666666")
+        ws["J4"] = periodo
+        ws["J4"].font = font_bold
+
+        ws["I5"] = "CUENTA"
+        ws["I5"].font = Font(bold=True, color="666666")
+        ws["J5"] = nro_cuenta
+        ws["J5"].font = font_bold
+
+        if not movs:
+            ws.merge_cells("A7:G7")
+            ws["A7"] = "NO HUBO MOVIMIENTOS EN ESTE PERIODO"
+            ws["A7"].font = Font(italic=True, color="666666", size=11)
+            ws["A7"].alignment = Alignment(horizontal="center")
+            continue
+
+        df = pd.DataFrame(movs)
+        creditos = df[df["Credito"] > 0]
+        debitos = df[df["Debito"] > 0]
+
+        fila = 7
+        headers = ["Fecha", "Descripción", "Importe"]
+
+        # ── CRÉDITOS (A-C) ──
+        ws.merge_cells(f"A{fila}:C{fila}")
+        ws[f"A{fila}"] = "CRÉDITOS"
+        ws[f"A{fila}"].fill = fill_cred_h
+        ws[f"A{fila}"].font = Font(color="FFFFFF", bold=True)
+        ws[f"A{fila}"].alignment = Alignment(horizontal="center")
+
+        for idx_h, h in enumerate(headers):
+            c = ws.cell(row=fila + 1, column=1 + idx_h, value=h)
+            c.fill = fill_cred_c
+            c.font = font_bold
+            c.border = thin_border
+            c.alignment = Alignment(horizontal="center")
+
+        r_cred = fila + 2
+        start_cred = r_cred
+        if creditos.empty:
+            ws[f"A{r_cred}"] = "SIN MOVIMIENTOS"
+            ws[f"A{r_cred}"].font = Font(italic=True, color="999999")
+            r_cred += 1
+        else:
+            for _, row in creditos.iterrows():
+                ws[f"A{r_cred}"] = row["Fecha"]
+                ws[f"A{r_cred}"].alignment = Alignment(horizontal="center")
+                ws[f"B{r_cred}"] = clean_for_excel(row["Descripcion"])
+                ws[f"C{r_cred}"] = row["Credito"]
+                ws[f"C{r_cred}"].number_format = fmt_moneda
+                for col in ["A", "B", "C"]:
+                    ws[f"{col}{r_cred}"].border = thin_border
+                    if r_cred % 2 == 0:
+                        ws[f"{col}{r_cred}"].fill = fill_cred_c
                 r_cred += 1
-            else:
-                for _, row in creditos.iterrows():
-                    ws[f"A{r_cred}"] = row["Fecha"]
-                    ws[f"A{r_cred}"].alignment = Alignment(horizontal="center")
-                    ws[f"B{r_cred}"] = clean_for_excel(row["Descripcion"])
-                    ws[f"C{r_cred}"] = row["Credito"]
-                    ws[f"C{r_cred}"].number_format = fmt_moneda
-                    for col in ["A", "B", "C"]:
-                        ws[f"{col}{r_cred}"].border = thin_border
-                        if r_cred % 2 == 0:
-                            ws[f"{col}{r_cred}"].fill = fill_cred_c
-                    r_cred += 1
-
-            ws[f"B{r_cred}"] = "TOTAL CRÉDITOS"
-            ws[f"B{r_cred}"].font = font_bold
-            ws[f"B{r_cred}"].alignment = Alignment(horizontal="right")
-            ref_cred = f"C{r_cred}"
-            if not creditos.empty:
-                ws[f"C{r_cred}"] = f"=SUM(C{start_cred}:C{r_cred - 1})"
-            else:
-                ws[f"C{r_cred}"] = 0
-            ws[f"C{r_cred}"].number_format = fmt_moneda
-            ws[f"C{r_cred}"].font = font_bold
-
-            # ── DÉBITOS (E-G) ──
-            ws.merge_cells(f"E{fila}:G{fila}")
-            ws[f"E{fila}"] = "DÉBITOS"
-            ws[f"E{fila}"].fill = fill_deb_h
-            ws[f"E{fila}"].font = Font(color="FFFFFF", bold=True)
-            ws[f"E{fila}"].alignment = Alignment(horizontal="center")
-
-            for idx_h, h in enumerate(headers):
-                c = ws.cell(row=fila + 1, column=5 + idx_h, value=h)
-                c.fill = fill_deb_c
-                c.font = font_bold
-                c.border = thin_border
-                c.alignment = Alignment(horizontal="center")
-
-            r_deb = fila + 2
-            start_deb = r_deb
-            if debitos.empty:
-                ws[f"E{r_deb}"] = "SIN MOVIMIENTOS"
-                ws[f"E{r_deb}"].font = Font(italic=True, color="999999")
+
+        ws[f"B{r_cred}"] = "TOTAL CRÉDITOS"
+        ws[f"B{r_cred}"].font = font_bold
+        ws[f"B{r_cred}"].alignment = Alignment(horizontal="right")
+        ref_cred = f"C{r_cred}"
+        if not creditos.empty:
+            ws[f"C{r_cred}"] = f"=SUM(C{start_cred}:C{r_cred - 1})"
+        else:
+            ws[f"C{r_cred}"] = 0
+        ws[f"C{r_cred}"].number_format = fmt_moneda
+        ws[f"C{r_cred}"].font = font_bold
+
+        # ── DÉBITOS (E-G) ──
+        ws.merge_cells(f"E{fila}:G{fila}")
+        ws[f"E{fila}"] = "DÉBITOS"
+        ws[f"E{fila}"].fill = fill_deb_h
+        ws[f"E{fila}"].font = Font(color="FFFFFF", bold=True)
+        ws[f"E{fila}"].alignment = Alignment(horizontal="center")
+
+        for idx_h, h in enumerate(headers):
+            c = ws.cell(row=fila + 1, column=5 + idx_h, value=h)
+            c.fill = fill_deb_c
+            c.font = font_bold
+            c.border = thin_border
+            c.alignment = Alignment(horizontal="center")
+
+        r_deb = fila + 2
+        start_deb = r_deb
+        if debitos.empty:
+            ws[f"E{r_deb}"] = "SIN MOVIMIENTOS"
+            ws[f"E{r_deb}"].font = Font(italic=True, color="999999")
+            r_deb += 1
+        else:
+            for _, row in debitos.iterrows():
+                ws[f"E{r_deb}"] = row["Fecha"]
+                ws[f"E{r_deb}"].alignment = Alignment(horizontal="center")
+                ws[f"F{r_deb}"] = clean_for_excel(row["Descripcion"])
+                ws[f"G{r_deb}"] = row["Debito"]
+                ws[f"G{r_deb}"].number_format = fmt_moneda
+                for col in ["E", "F", "G"]:
+                    ws[f"{col}{r_deb}"].border = thin_border
+                    if r_deb % 2 == 0:
+                        ws[f"{col}{r_deb}"].fill = fill_deb_c
                 r_deb += 1
-            else:
-                for _, row in debitos.iterrows():
-                    ws[f"E{r_deb}"] = row["Fecha"]
-                    ws[f"E{r_deb}"].alignment = Alignment(horizontal="center")
-                    ws[f"F{r_deb}"] = clean_for_excel(row["Descripcion"])
-                    ws[f"G{r_deb}"] = row["Debito"]
-                    ws[f"G{r_deb}"].number_format = fmt_moneda
-                    for col in ["E", "F", "G"]:
-                        ws[f"{col}{r_deb}"].border = thin_border
-                        if r_deb % 2 == 0:
-                            ws[f"{col}{r_deb}"].fill = fill_deb_c
-                    r_deb += 1
-
-            ws[f"F{r_deb}"] = "TOTAL DÉBITOS"
-            ws[f"F{r_deb}"].font = font_bold
-            ws[f"F{r_deb}"].alignment = Alignment(horizontal="right")
-            ref_deb = f"G{r_deb}"
-            if not debitos.empty:
-                ws[f"G{r_deb}"] = f"=SUM(G{start_deb}:G{r_deb - 1})"
-            else:
-                ws[f"G{r_deb}"] = 0
-            ws[f"G{r_deb}"].number_format = fmt_moneda
-            ws[f"G{r_deb}"].font = font_bold
-
-            # ── CONTROL ──
-            ws["I7"] = "CONTROL (debe ser 0)"
-            ws["I7"].font = Font(bold=True, color="666666")
-            ws["I7"].alignment = Alignment(horizontal="center")
-
-            formula = f"=ROUND(B3 + {ref_cred} - {ref_deb} - B4, 2)"
-            ws["I8"] = formula
-            ws["I8"].font = Font(bold=True, size=14)
-            ws["I8"].alignment = Alignment(horizontal="center")
-            ws["I8"].number_format = fmt_moneda
-            ws["I8"].border = thin_border
-
-        wb.save(output)
-        output.seek(0)
-        st.success(f"✅ Procesamiento Comafi completado — {len(cuentas_info)} cuenta(s) encontradas.")
-        return output.getvalue()
 
+        ws[f"F{r_deb}"] = "TOTAL DÉBITOS"
+        ws[f"F{r_deb}"].font = font_bold
+        ws[f"F{r_deb}"].alignment = Alignment(horizontal="right")
+        ref_deb = f"G{r_deb}"
+        if not debitos.empty:
+            ws[f"G{r_deb}"] = f"=SUM(G{start_deb}:G{r_deb - 1})"
+        else:
+            ws[f"G{r_deb}"] = 0
+        ws[f"G{r_deb}"].number_format = fmt_moneda
+        ws[f"G{r_deb}"].font = font_bold
+
+        # ── CONTROL ──
+        ws["I7"] = "CONTROL (debe ser 0)"
+        ws["I7"].font = Font(bold=True, color="666666")
+        ws["I7"].alignment = Alignment(horizontal="center")
+
+        formula = f"=ROUND(B3 + {ref_cred} - {ref_deb} - B4, 2)"
+        ws["I8"] = formula
+        ws["I8"].font = Font(bold=True, size=14)
+        ws["I8"].alignment = Alignment(horizontal="center")
+        ws["I8"].number_format = fmt_moneda
+        ws["I8"].border = thin_border
+
+    marcar("guardado")
+    wb.save(output)
+    output.seek(0)
+    return output.getvalue()
+
+
+def _nombre_hoja(nro_cuenta, info):
+    """Nombre de la hoja de una cuenta y formato de sus importes"""
+    if info["moneda"] == "Dólares":
+        return clean_for_excel(f"USD {nro_cuenta}")[:31], '"u$s "#,##0.00'
+    return clean_for_excel(f"ARS {nro_cuenta}")[:31], '"$ "#,##0.00'
+
+
+def hojas_comafi(parseo):
+    """
+    Lo mismo que lectura_excel.leer_excel(renderizar_comafi(parseo)), sin armar el Excel. Las cuentas
+    sin movimientos no tienen tablas, así que (como al leer el Excel) no aparecen.
+    """
+    def celda(valor):
+        return clean_for_excel(valor) or None
+
+    hojas = []
+    for nro_cuenta, info in parseo["cuentas"].items():
+        if not info["movimientos"]:
+            continue
+        creditos = [(m["Fecha"], celda(m["Descripcion"]), importe_celda(m["Credito"]))
+                    for m in info["movimientos"] if m["Credito"] > 0]
+        debitos = [(m["Fecha"], celda(m["Descripcion"]), importe_celda(m["Debito"]))
+                   for m in info["movimientos"] if m["Debito"] > 0]
+        hojas.append({"hoja": _nombre_hoja(nro_cuenta, info)[0], "titular": texto_celda(parseo["titular"]),
+                      "cuenta": texto_celda(nro_cuenta), "saldo_inicial": saldo_celda(info["saldo_ini"]),
+                      "saldo_final": saldo_celda(info["saldo_fin"]), "creditos": creditos, "debitos": debitos})
+    return hojas
+
+
+def procesar_comafi(archivo_pdf):
+    """
+    Lee el PDF de Banco Comafi, extrae los movimientos de cada cuenta
+    y genera un Excel dashboard con estilos Comafi.
+    """
+    parseo = parsear_comafi(archivo_pdf)
+    if parseo is None:
+        return None
+    try:
+        return renderizar_comafi(parseo)
     except Exception as e:
         st.error(f"Error Crítico: {str(e)}")
         import traceback
@@ -0,0 +1,177 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+from openpyxl.styles import Alignment, Font, PatternFill
+
+from dashboard import clean_for_excel
+from guardia import LARGO_MAXIMO_LINEA
+
+# Control de saldo corrido fila por fila.
+# La celda D7 dice si el extracto concilia, pero no dónde deja de hacerlo. Acá se recalcula el saldo
+# corrido (saldo inicial + importes acumulados, en centavos para no arrastrar error de float) y se
+# compara contra cada saldo leído del PDF, todo con numpy. La primera fila distinta es donde empieza
+# el problema: un movimiento salteado, un importe mal leído o un signo invertido. Cada fila trae la
+# página y la línea del PDF de donde salió. Los "quiebres" son las filas donde la diferencia cambia
+# de valor: cada uno es un error nuevo, y entre dos quiebres la diferencia solo se arrastra.
+
+MAXIMO_QUIEBRES = 500
+CONTEXTO = 3  # filas antes y después de la primera divergencia en la hoja Control
+
+
+@dataclass
+class FilaControl:
+    numero: int  # movimiento (base 1, en el orden del extracto)
+    fecha: str
+    descripcion: str
+    importe: float
+    saldo_informado: float
+    saldo_calculado: float
+    diferencia: float
+    pagina: int = None
+    linea: int = None
+    texto: str = ""
+
+
+@dataclass
+class ControlSaldos:
+    saldo_inicial: float
+    saldo_final: float
+    saldo_calculado: float  # saldo inicial + todos los importes
+    filas_con_saldo: int
+    primera: FilaControl = None  # primera fila cuyo saldo no coincide (None si todas coinciden)
+    quiebres: list = field(default_factory=list)
+    contexto: list = field(default_factory=list)  # filas alrededor de la primera divergencia
+
+    @property
+    def diferencia_final(self):
+        return round(self.saldo_calculado - self.saldo_final, 2) if self.saldo_final is not None else None
+
+    def mensaje(self):
+        """Texto para la interfaz (None si el saldo corrido coincide en todas las filas)"""
+        if self.primera is None:
+            return None
+        p = self.primera
+        origen = f" (página {p.pagina}, línea {p.linea})" if p.pagina is not None else ""
+        return (f"Control de saldos: el saldo corrido deja de coincidir en el movimiento {p.numero}{origen}, "
+                f"{p.fecha} {p.descripcion[:40]}: el extracto informa {p.saldo_informado:,.2f} y el calculado "
+                f"es {p.saldo_calculado:,.2f} (diferencia {p.diferencia:,.2f}). "
+                f"{len(self.quiebres)} punto(s) de diferencia en total; detalle en la hoja Control.")
+
+
+def _centavos(valores):
+    """Lista de importes (None = sin dato) -> (centavos int64, máscara de presentes)"""
+    arr = np.array([np.nan if v is None else v for v in valores], dtype=float)
+    presentes = ~np.isnan(arr)
+    return np.where(presentes, np.round(arr * 100), 0).astype(np.int64), presentes
+
+
+def controlar(movimientos, saldos, saldo_inicial, saldo_final=None, origen=None):
+    """
+    movimientos: [{"Fecha", "Descripcion", "Importe"}] en el orden del extracto; saldos: saldo leído
+    en cada fila (None si la fila no lo trae); origen(i): (página, línea, texto del PDF) de la fila i,
+    solo se consulta para las filas que se informan. Devuelve un ControlSaldos.
+    """
+    importes, _ = _centavos([m["Importe"] for m in movimientos])
+    informados, con_saldo = _centavos(saldos)
+    inicial = int(round((saldo_inicial or 0) * 100))
+    calculados = inicial + np.cumsum(importes)
+    diferencias = np.where(con_saldo, informados - calculados, 0)
+
+    # Quiebres: filas con saldo cuya diferencia no es la de la fila con saldo anterior
+    indices = np.flatnonzero(con_saldo)
+    dif_con_saldo = diferencias[indices]
+    previas = np.concatenate(([0], dif_con_saldo[:-1]))
+    quiebres = indices[dif_con_saldo != previas][:MAXIMO_QUIEBRES]
+
+    def fila(i):
+        i = int(i)
+        pagina, linea, texto = origen(i) if origen is not None else (None, None, "")
+        return FilaControl(i + 1, str(movimientos[i]["Fecha"]), str(movimientos[i]["Descripcion"]),
+                           movimientos[i]["Importe"], float(informados[i] / 100) if con_saldo[i] else None,
+                           float(calculados[i] / 100), float(diferencias[i] / 100) if con_saldo[i] else None,
+                           pagina, linea, texto)
+
+    control = ControlSaldos(saldo_inicial, saldo_final, (inicial + int(importes.sum())) / 100,
+                            int(con_saldo.sum()))
+    control.quiebres = [fila(i) for i in quiebres]
+    if control.quiebres:
+        control.primera = control.quiebres[0]
+        n = control.primera.numero - 1
+        control.contexto = [fila(i) for i in range(max(0, n - CONTEXTO), min(len(movimientos), n + CONTEXTO + 1))]
+    return control
+
+
+def ubicador(originales, filtradas, lineas_por_pagina=None):
+    """
+    Función índice en `filtradas` (filtrar_lineas(originales)) -> (página, línea en la página) del PDF.
+    Sin lineas_por_pagina la página es None y la línea es la del texto completo
+    """
+    conservadas = None
+    if len(filtradas) != len(originales):
+        # filtrar_lineas descartó líneas anómalas: índice filtrado -> índice original
+        conservadas = [i for i, l in enumerate(originales) if len(l) <= LARGO_MAXIMO_LINEA]
+    inicios = np.cumsum([0] + list(lineas_por_pagina or []))
+
+    def ubicar(indice):
+        original = conservadas[indice] if conservadas is not None else indice
+        if lineas_por_pagina is None:
+            return None, original + 1
+        pagina = int(np.searchsorted(inicios, original, side="right"))
+        return pagina, int(original - inicios[pagina - 1]) + 1
+
+    return ubicar
+
+
+_ENCABEZADOS = ["Mov.", "Fecha", "Descripción", "Importe", "Saldo del extracto", "Saldo calculado", "Diferencia",
+                "Página", "Línea", "Texto en el PDF"]
+
+
+def _escribir_filas(ws, fila_inicio, filas, resaltar=None):
+    encabezado = PatternFill(start_color="1F4E78", end_color="1F4E78", fill_type="solid")
+    rojo = PatternFill(start_color="FDE9D9", end_color="FDE9D9", fill_type="solid")
+    for c, texto in enumerate(_ENCABEZADOS, 1):
+        celda = ws.cell(fila_inicio, c, texto)
+        celda.font = Font(bold=True, color="FFFFFF")
+        celda.fill = encabezado
+        celda.alignment = Alignment(horizontal="center")
+    for r, f in enumerate(filas, fila_inicio + 1):
+        valores = (f.numero, f.fecha, f.descripcion, f.importe, f.saldo_informado, f.saldo_calculado, f.diferencia,
+                   f.pagina, f.linea, f.texto)
+        for c, valor in enumerate(valores, 1):
+            celda = ws.cell(r, c, clean_for_excel(valor) if isinstance(valor, str) else valor)
+            if 4 <= c <= 7:
+                celda.number_format = '"$ "#,##0.00'
+            if resaltar is not None and f.numero == resaltar:
+                celda.fill = rojo
+    return fila_inicio + len(filas) + 2
+
+
+def escribir_hoja(wb, control, titulo="Control"):
+    """Agrega al workbook la hoja de control fila por fila"""
+    ws = wb.create_sheet(titulo)
+    ws.sheet_view.showGridLines = False
+    ws["A1"] = "CONTROL DE SALDO CORRIDO"
+    ws["A1"].font = Font(bold=True, size=14, color="1F4E78")
+    resumen = (("Saldo inicial del extracto", control.saldo_inicial),
+               ("Saldo final del extracto", control.saldo_final),
+               ("Saldo final calculado", control.saldo_calculado),
+               ("Diferencia final", control.diferencia_final),
+               ("Filas con saldo informado", control.filas_con_saldo),
+               ("Puntos de diferencia", len(control.quiebres)))
+    for r, (rotulo, valor) in enumerate(resumen, 3):
+        ws.cell(r, 1, rotulo).font = Font(bold=True, color="666666")
+        celda = ws.cell(r, 4, valor)
+        if isinstance(valor, float):
+            celda.number_format = '"$ "#,##0.00'
+    fila = len(resumen) + 4
+    if control.primera is None:
+        ws.cell(fila, 1, "El saldo corrido coincide con el saldo del extracto en todas las filas.").font = \
+            Font(bold=True, color="00B050")
+    else:
+        ws.cell(fila, 1, "PRIMERA DIVERGENCIA (y filas vecinas)").font = Font(bold=True, color="C00000")
+        fila = _escribir_filas(ws, fila + 1, control.contexto, resaltar=control.primera.numero)
+        ws.cell(fila, 1, "PUNTOS DONDE CAMBIA LA DIFERENCIA").font = Font(bold=True, color="1F4E78")
+        _escribir_filas(ws, fila + 1, control.quiebres)
+    for c, ancho in zip("ABCDEFGHIJ", (7, 12, 40, 16, 18, 18, 16, 8, 8, 70)):
+        ws.column_dimensions[c].width = ancho
+    return ws
@@ -0,0 +1,266 @@
+"""
+Corpus de regresión con salidas "golden".
+
+Procesa un directorio de extractos anonimizados (una carpeta por banco, con el nombre tal como
+aparece en la app) y, para cada PDF, hashea la tabla de movimientos normalizada y los valores de
+control (saldos, cantidades, totales). Los hashes se comparan contra los guardados en
+<corpus>/golden.json, así una reescritura de rendimiento de un parser se puede validar contra todo
+el corpus: si un hash cambia, cambió la salida. Los archivos se procesan en paralelo y se informa
+el tiempo de cada uno.
+
+Los hashes salen de los movimientos y saldos, no del archivo: con --solo-parseo los procesadores con
+etapas separadas (procesadores.ETAPAS: Comafi, Galicia, MercadoPago; y los formatos declarativos:
+Nación, Provincia y los JSON de formatos/) se comparan sin armar el Excel, con los mismos hashes
+golden. Los demás procesadores arman el reporte mientras parsean y no cambian.
+
+Estructura:
+    corpus/
+        Galicia/extracto_2024_03.pdf
+        Macro (Formato 3)/empresa_a.pdf
+        golden.json
+
+Uso:
+    python corpus.py corpus --actualizar          # (re)generar los hashes golden
+    python corpus.py corpus -j 8                  # comparar contra golden.json
+    python corpus.py corpus --bancos Galicia Comafi --json reporte.json
+    python corpus.py corpus --sembrar 200         # agregar un extracto sintético por banco
+    python corpus.py corpus --metricas /var/lib/node_exporter/bancos_corpus.prom
+    python corpus.py corpus --solo-parseo         # sin armar los Excel de los bancos con etapas separadas
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+
+ARCHIVO_GOLDEN = "golden.json"
+
+
+def _normalizar_valor(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime("%d/%m/%Y")
+    if isinstance(valor, float):
+        return round(valor, 2)
+    if isinstance(valor, str):
+        return " ".join(valor.split())
+    return valor
+
+
+def normalizar(contenido, hojas=None):
+    """
+    Reduce el Excel de un procesar_* a lo que importa para la regresión: por hoja, los
+    movimientos (fecha, descripción, importe) y los valores de control. Los estilos, anchos de
+    columna y demás detalles de presentación no cambian el hash. hojas: las de
+    lectura_excel.leer_excel(contenido), o las de ResultadoProcesado.hojas() sin Excel
+    """
+    from lectura_excel import leer_excel
+
+    normalizadas = []
+    for hoja in hojas if hojas is not None else leer_excel(contenido):
+        movimientos = {
+            clave: [[_normalizar_valor(v) for v in fila] for fila in hoja[clave]]
+            for clave in ("creditos", "debitos")
+        }
+        control = {
+            "saldo_inicial": _normalizar_valor(hoja["saldo_inicial"]),
+            "saldo_final": _normalizar_valor(hoja["saldo_final"]),
+            "cantidad_creditos": len(hoja["creditos"]),
+            "cantidad_debitos": len(hoja["debitos"]),
+            "total_creditos": round(sum(f[2] for f in hoja["creditos"]), 2),
+            "total_debitos": round(sum(f[2] for f in hoja["debitos"]), 2),
+        }
+        normalizadas.append({"hoja": hoja["hoja"], "movimientos": movimientos, "control": control})
+    return normalizadas
+
+
+def _hash(datos):
+    canonico = json.dumps(datos, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+
+def huella(contenido, hojas=None):
+    """Hashes de movimientos y de control del Excel, más el control legible (para los reportes)"""
+    if contenido is None and hojas is None:
+        return {"hash_movimientos": None, "hash_control": None, "control": None}
+    hojas = normalizar(contenido, hojas)
+    return {
+        "hash_movimientos": _hash([[h["hoja"], h["movimientos"]] for h in hojas]),
+        "hash_control": _hash([[h["hoja"], h["control"]] for h in hojas]),
+        "control": {h["hoja"]: h["control"] for h in hojas},
+    }
+
+
+def procesar_archivo(base, relativa, solo_parseo=False):
+    """
+    Corre en un proceso del pool: procesa un PDF del corpus y devuelve su huella y el tiempo (con
+    solo_parseo, sin armar el Excel si el banco separa el parseo del reporte)
+    """
+    import rendimiento
+    from metricas import controles_conciliacion
+    from procesadores import ArchivoPDF, procesar_banco
+
+    rendimiento.logger.disabled = True  # los tiempos por etapa vuelven en el resultado
+    sys.stdout = open(os.devnull, "w")  # los procesadores imprimen trazas de depuración
+    banco = relativa.replace("\\", "/").split("/")[0]
+    archivo = ArchivoPDF.desde_ruta(os.path.join(base, relativa))
+    t0, cpu0 = time.perf_counter(), time.process_time()
+    try:
+        with rendimiento.medir_ejecucion(banco, relativa) as ejecucion:
+            resultado = procesar_banco(banco, archivo, diferido=solo_parseo)
+            ejecucion.ok = resultado is not None
+        error = None
+    except Exception as e:
+        resultado, error = None, f"{type(e).__name__}: {e}"
+    segundos, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    hojas = None
+    if solo_parseo and resultado is not None:
+        resultado, hojas = None, resultado.hojas()
+    return {"archivo": relativa, "banco": banco, "segundos": round(segundos, 4), "cpu_segundos": round(cpu, 4),
+            "error": error, "rendimiento": ejecucion.como_dict() if error is None else None,
+            "controles": controles_conciliacion(resultado, hojas=hojas) if resultado is not None or hojas is not None
+            else [],
+            **huella(resultado, hojas)}
+
+
+def listar(base, bancos=None):
+    """PDFs del corpus como rutas relativas <banco>/<archivo>.pdf"""
+    archivos = []
+    for ruta in sorted(glob.glob(os.path.join(base, "*", "**", "*.pdf"), recursive=True)):
+        relativa = os.path.relpath(ruta, base).replace("\\", "/")
+        if bancos is None or relativa.split("/")[0] in bancos:
+            archivos.append(relativa)
+    return archivos
+
+
+def diferencias(golden, actual):
+    """Describe qué cambió entre la huella guardada y la actual (lista vacía si coinciden)"""
+    cambios = []
+    if golden["hash_movimientos"] != actual["hash_movimientos"]:
+        cambios.append("movimientos")
+    if golden["hash_control"] != actual["hash_control"]:
+        detalle = []
+        anteriores, nuevos = golden.get("control") or {}, actual.get("control") or {}
+        for hoja in sorted(set(anteriores) | set(nuevos)):
+            a, n = anteriores.get(hoja), nuevos.get(hoja)
+            if a is None or n is None:
+                detalle.append(f"hoja {hoja} {'nueva' if a is None else 'faltante'}")
+                continue
+            detalle += [f"{hoja}.{clave}: {a[clave]} -> {n.get(clave)}" for clave in a if a[clave] != n.get(clave)]
+        cambios += detalle or ["control"]
+    return cambios
+
+
+def sembrar(base, movimientos):
+    """Agrega al corpus un extracto sintético por banco (para tener cobertura sin extractos reales)"""
+    import sinteticos
+
+    for banco in sinteticos.GENERADORES:
+        pdf, _ = sinteticos.generar(banco, sinteticos.Opciones(movimientos=movimientos, multilinea=0.2))
+        directorio = os.path.join(base, banco)
+        os.makedirs(directorio, exist_ok=True)
+        with open(os.path.join(directorio, f"sintetico_{movimientos}.pdf"), "wb") as f:
+            f.write(pdf)
+    print(f"Agregados {len(sinteticos.GENERADORES)} extractos sintéticos de {movimientos} movimientos en {base}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus de regresión con hashes golden de la salida")
+    parser.add_argument("corpus", help="Directorio del corpus (una carpeta por banco)")
+    parser.add_argument("--actualizar", action="store_true", help="Guardar los resultados actuales como golden")
+    parser.add_argument("-j", "--procesos", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo")
+    parser.add_argument("--bancos", nargs="+", help="Limitar a estos bancos")
+    parser.add_argument("--json", help="Guardar el reporte (huellas, diferencias y tiempos) en JSON")
+    parser.add_argument("--metricas", help="Guardar las métricas de la corrida en formato Prometheus (.prom)")
+    parser.add_argument("--sembrar", type=int, metavar="N",
+                        help="Antes de correr, agregar un extracto sintético de N movimientos por banco")
+    parser.add_argument("--solo-parseo", action="store_true",
+                        help="No armar el Excel de los bancos con etapas separadas (Comafi, Galicia, MercadoPago y "
+                             "los formatos declarativos; los demás lo arman igual). Los hashes no cambian")
+    args = parser.parse_args()
+
+    if args.sembrar:
+        sembrar(args.corpus, args.sembrar)
+
+    archivos = listar(args.corpus, set(args.bancos) if args.bancos else None)
+    if not archivos:
+        parser.error(f"No hay PDFs en {args.corpus}/<banco>/")
+
+    ruta_golden = os.path.join(args.corpus, ARCHIVO_GOLDEN)
+    golden = {}
+    if os.path.exists(ruta_golden):
+        with open(ruta_golden, encoding="utf-8") as f:
+            golden = json.load(f)
+
+    # Importar los procesadores antes de crear el pool (con fork los procesos ya arrancan cargados)
+    import procesadores  # noqa: F401
+
+    t0 = time.perf_counter()
+    resultados = []
+    with ProcessPoolExecutor(max_workers=max(1, args.procesos)) as pool:
+        futuros = [pool.submit(procesar_archivo, args.corpus, a, args.solo_parseo) for a in archivos]
+        for futuro in as_completed(futuros):
+            resultados.append(futuro.result())
+    total = time.perf_counter() - t0
+    resultados.sort(key=lambda r: r["archivo"])
+
+    sin_golden, con_cambios = 0, 0
+    print(f"{'Archivo':<50} {'Tiempo s':>9}  Estado")
+    for r in resultados:
+        anterior = golden.get(r["archivo"])
+        if r["error"]:
+            estado = f"ERROR {r['error']}"
+        elif r["hash_movimientos"] is None:
+            estado = "SIN RESULTADO"
+        else:
+            estado = "OK"
+        if any(c["diferencia"] for c in r["controles"]):
+            estado += " (control distinto de cero)"
+        if anterior is None:
+            r["cambios"] = None
+            sin_golden += 1
+            estado += " (sin golden)"
+        else:
+            r["cambios"] = diferencias(anterior, r)
+            if r["cambios"]:
+                con_cambios += 1
+                estado = "CAMBIÓ: " + "; ".join(r["cambios"][:6])
+            r["segundos_golden"] = anterior.get("segundos")
+            if anterior.get("segundos"):
+                estado += f" ({r['segundos'] / anterior['segundos']:.2f}x tiempo)"
+        print(f"{r['archivo'][:50]:<50} {r['segundos']:>9.3f}  {estado}")
+
+    print(f"\n{len(resultados)} archivos en {total:.1f} s con {args.procesos} procesos "
+          f"(suma de tiempos {sum(r['segundos'] for r in resultados):.1f} s). "
+          f"Con cambios: {con_cambios}. Sin golden: {sin_golden}.")
+
+    if args.metricas:
+        import metricas
+        for r in resultados:
+            metricas.registrar_ejecucion(r["banco"], r["rendimiento"], r["cpu_segundos"], r["controles"],
+                                         ok=r["hash_movimientos"] is not None)
+        metricas.escribir(args.metricas)
+        print(f"Métricas guardadas en {args.metricas}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"fecha": datetime.now().isoformat(timespec="seconds"), "total_s": round(total, 3),
+                       "resultados": resultados}, f, ensure_ascii=False, indent=2)
+        print(f"Reporte guardado en {args.json}")
+
+    if args.actualizar:
+        for r in resultados:
+            golden[r["archivo"]] = {k: r[k] for k in ("banco", "hash_movimientos", "hash_control", "control",
+                                                      "segundos")}
+        with open(ruta_golden, "w", encoding="utf-8") as f:
+            json.dump(golden, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"Golden actualizado: {ruta_golden} ({len(resultados)} archivos)")
+    elif con_cambios:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,9 @@ import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_lineas
+from rendimiento import marcar, contar, paginas_medidas
+from control import controlar, ubicador, escribir_hoja
 
 # Regex para caracteres ilegales en Excel (ASCII Control characters excepto \t, \n, \r)
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -28,12 +31,26 @@ def convertir_a_numerico(valor_str):
     except:
         return 0.0
 
+def fin_importe(linea, montos):
+    """
+    Columna donde termina el importe (el primer monto de la línea); de ella sale el signo.
+    Con saldo (último monto) el importe se busca antes que él: si el saldo termina con los mismos
+    dígitos (ej. 4,64 y 236.494,64), buscar desde el final de la línea lo encontraría dentro del saldo
+    y el débito se leería como crédito
+    """
+    limite = linea.rfind(montos[-1]) if len(montos) >= 2 else len(linea)
+    return linea.rfind(montos[0], 0, limite) + len(montos[0])
+
 def procesar_credicoop(archivo_pdf):
     st.info("Procesando archivo Credicoop (Formato Estandarizado)...")
     try:
         archivo_pdf.seek(0)
+        marcar("lectura")
         reader = PyPDF2.PdfReader(io.BytesIO(archivo_pdf.read()))
-        texto = "".join(page.extract_text() + "\n" for page in reader.pages)
+        marcar("extraccion")
+        textos = [page.extract_text() + "\n" for page in paginas_medidas(reader.pages)]
+        texto = "".join(textos)
+        marcar("limpieza")
         texto = texto.replace('\x00', '')
         
         # Limpieza específica de basura intercalada (cubre CONTINUA/CONTINUAR y PÁGINA/PAGINA)
@@ -48,7 +65,10 @@ def procesar_credicoop(archivo_pdf):
         texto = re.sub(r"(?i).*@bancocredicoop\.coop.*", "", texto)
         texto = re.sub(r"(?i).*www\.bancocredicoop\.coop.*", "", texto)
         
-        lineas = texto.splitlines()
+        originales = texto.splitlines()
+        lineas = filtrar_lineas(originales, "Credicoop")
+        contar("lineas", len(lineas))
+        marcar("movimientos")
         
         nombre_titular = None
         periodo = None
@@ -56,6 +76,8 @@ def procesar_credicoop(archivo_pdf):
         saldo_final = None 
         ultimo_saldo_acumulado = None
         movimientos = []
+        saldos = []  # saldo de cada movimiento según el extracto (None si la línea no lo trae)
+        indices = []  # línea de cada movimiento, para el control de saldos
         
         # Regex corregido y mejorado para capturar Código Opcional
         # Grupo 1: Fecha, Grupo 2: Código (opcional), Grupo 3: Resto
@@ -198,8 +220,7 @@ def procesar_credicoop(archivo_pdf):
                     if len(montos_candidatos) >= 2:
                         ultimo_saldo_acumulado = montos_candidatos[-1]
                     
-                    idx_monto = linea.rfind(monto_str)
-                    idx_fin = idx_monto + len(monto_str)
+                    idx_fin = fin_importe(linea, montos_candidatos)
                     val = convertir_a_numerico(monto_str)
                     
                     # Heurística de posición DINÁMICA basada en ALINEACIÓN DERECHA (Final del monto)
@@ -209,6 +230,7 @@ def procesar_credicoop(archivo_pdf):
                         importe = abs(val) # Crédito
                     
                     # Descripción extra
+                    indice_mov = i
                     desc_extra = ""
                     j = i + 1
                     while j < len(lineas):
@@ -231,6 +253,8 @@ def procesar_credicoop(archivo_pdf):
                         "Importe": importe
                     }
                     movimientos.append(mov)
+                    saldos.append(convertir_a_numerico(montos_candidatos[-1]) if len(montos_candidatos) >= 2 else None)
+                    indices.append(indice_mov)
 
 
 
@@ -238,6 +262,9 @@ def procesar_credicoop(archivo_pdf):
         
 
 
+        marcar("conciliacion")
+        contar("movimientos", len(movimientos))
+        contar("cuentas", 1)
         if saldo_final is None and ultimo_saldo_acumulado:
              saldo_final = ultimo_saldo_acumulado
             
@@ -247,8 +274,26 @@ def procesar_credicoop(archivo_pdf):
                 saldo_calc += m["Importe"]
             saldo_final = saldo_calc 
 
+        control = None
+        if any(s is not None for s in saldos):
+            # Las limpiezas de arriba conservan los saltos de línea salvo un CONTINUA EN PAGINA partido en
+            # dos líneas; en ese caso la página y la línea no se informan
+            por_pagina = [len(t.splitlines()) for t in textos]
+            ubicar = ubicador(originales, lineas, por_pagina) if sum(por_pagina) == len(originales) else None
+
+            def origen(fila):
+                indice = indices[fila]
+                pagina, linea = ubicar(indice) if ubicar else (None, None)
+                return pagina, linea, lineas[indice].strip()
+
+            control = controlar(movimientos, saldos, convertir_a_numerico(saldo_inicial) if saldo_inicial else 0,
+                                convertir_a_numerico(saldo_final) if saldo_final else 0, origen)
+            if control.mensaje():
+                st.warning(control.mensaje())
+
         # --- EXCEL ---
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         ws = wb.active
         ws.title = "Movimientos"
@@ -476,6 +521,10 @@ def procesar_credicoop(archivo_pdf):
         ws.column_dimensions["F"].width = 40
         ws.column_dimensions["G"].width = 18
 
+        if control is not None:
+            escribir_hoja(wb, control)
+
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
@@ -6,6 +6,9 @@ import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_lineas
+from rendimiento import marcar, contar, paginas_medidas
+from control import controlar, ubicador, escribir_hoja
 
 # Regex para caracteres ilegales en Excel
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -34,12 +37,16 @@ def procesar_credicoop_formato_2(archivo_pdf):
     st.info("Procesando archivo Credicoop (Formato 2)...")
 
     try:
-        texto_completo = ""
+        marcar("lectura")
         with pdfplumber.open(io.BytesIO(archivo_pdf.read())) as pdf:
-            for page in pdf.pages:
-                texto_completo += page.extract_text() + "\n"
+            marcar("extraccion")
+            textos = [page.extract_text() + "\n" for page in paginas_medidas(pdf.pages)]
+        texto_completo = "".join(textos)
         
-        lineas = texto_completo.splitlines()
+        originales = texto_completo.splitlines()
+        lineas = filtrar_lineas(originales, "Credicoop (Formato 2)")
+        contar("lineas", len(lineas))
+        marcar("secciones")
         
         # --- 1. Metadata ---
         titular = "Sin Especificar"
@@ -66,6 +73,7 @@ def procesar_credicoop_formato_2(archivo_pdf):
                  periodo = match_per.group(1).strip()
 
         # --- 2. Movimientos y Saldos ---
+        marcar("movimientos")
         # Regex update: Permitir negativos con "-?" en los grupos de montos.
         # Estructura: Fecha | ...Desc... | Deb | Cred | Saldo | Cod
         
@@ -73,7 +81,7 @@ def procesar_credicoop_formato_2(archivo_pdf):
         
         movimientos = []
         
-        for l in lineas:
+        for indice, l in enumerate(lineas):
             l = l.strip()
             # Headers ignorar
             if "Fecha" in l and "Concepto" in l: continue
@@ -111,7 +119,8 @@ def procesar_credicoop_formato_2(archivo_pdf):
                     "Importe": importe,
                     "SaldoLinea": saldo,
                     "DebitoRaw": debito, 
-                    "CreditoRaw": credito
+                    "CreditoRaw": credito,
+                    "Linea": indice
                 })
             else:
                 # Append línea multilínea
@@ -120,10 +129,13 @@ def procesar_credicoop_formato_2(archivo_pdf):
                         continue
                     movimientos[-1]["Descripcion"] += " " + l
 
+        contar("movimientos", len(movimientos))
+        contar("cuentas", 1)
         if not movimientos:
             st.error("No se encontraron movimientos")
             return None
             
+        marcar("conciliacion")
         # Orden Cronológico Ascendente (para Excel)
         # El PDF viene Descendente.
         
@@ -146,6 +158,18 @@ def procesar_credicoop_formato_2(archivo_pdf):
         saldo_inicial_reporte = ultimo_mov["SaldoLinea"] - ultimo_mov["CreditoRaw"] + ultimo_mov["DebitoRaw"]
         
         movimientos.reverse()
+
+        # Control fila por fila contra el saldo de cada línea (el de la más antigua define el saldo inicial)
+        ubicar = ubicador(originales, lineas, [len(t.splitlines()) for t in textos])
+
+        def origen(fila):
+            indice = movimientos[fila]["Linea"]
+            return (*ubicar(indice), lineas[indice].strip())
+
+        control = controlar(movimientos, [m["SaldoLinea"] for m in movimientos], saldo_inicial_reporte,
+                            saldo_final_reporte, origen)
+        if control.mensaje():
+            st.warning(control.mensaje())
         
         # DataFrame
         df = pd.DataFrame(movimientos)
@@ -157,6 +181,7 @@ def procesar_credicoop_formato_2(archivo_pdf):
 
         # --- GENERACIÓN EXCEL (DASHBOARD) ---
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte Credicoop"
@@ -366,6 +391,9 @@ def procesar_credicoop_formato_2(archivo_pdf):
         ws.column_dimensions["F"].width = 40
         ws.column_dimensions["G"].width = 18
 
+        escribir_hoja(wb, control)
+
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
@@ -0,0 +1,71 @@
+import io
+
+import PyPDF2
+
+# Detección del banco/formato de un extracto a partir del texto de las primeras páginas.
+# Cada formato se reconoce por los marcadores que su procesador necesita encontrar (los mismos
+# rótulos que busca al parsear), comparados sin espacios y en mayúsculas: así da igual si el texto
+# sale de PyPDF2 o de pdfplumber, o si el PDF espacia las letras ("C U E N T A N Ú M E R O").
+# Un formato es candidato si aparecen todos sus marcadores; entre los candidatos gana el más
+# específico (el que tiene más marcadores). Santander Rio (Prueba) usa el mismo extracto que
+# Santander Rio, así que nunca se elige automáticamente.
+FIRMAS = {
+    "BBVA Frances": ["Movimientos en cuentas", "SALDO ANTERIOR"],
+    "Ciudad": ["CUIL/CUIT/CDI", "C U E N T A N Ú M E R O", "S A L D O A N T E R I O R"],
+    "Comafi": ["Hoja: 1/", "DETALLE DE MOVIMIENTOS", "SALDO ANTERIOR"],
+    "Credicoop": ["Resumen:", "del:", "al:", "DEBITO", "CREDITO"],
+    "Credicoop (Formato 2)": ["Adherente:", "Nro. de Cuenta:", "Saldos y movimientos"],
+    "Galicia": ["Cuenta:", "Resumen de cuenta", "Saldos", "Período"],
+    "Galicia Más": ["EXTRACTO DEL", "ESTIMADO", "PRODUCTO", "GALICIA"],
+    "Hipotecario": ["Sr(es):", "Período del Extracto:", "SALDO INICIAL"],
+    "HSBC": ["EXTRACTO DEL", "ESTIMADO", "PRODUCTO", "HSBC"],
+    "ICBC (Formato 1)": ["V.001", "PERIODO", "SALDO ULTIMO EXTRACTO AL"],
+    "ICBC (Formato 2)": ["Cuentas CC", "FILTROS", "Fecha desde:", "Fecha hasta:"],
+    "ICBC (Formato 3)": ["P ER I OD O"],
+    "Macro": ["Período", "Saldos Anteriores"],
+    "Macro (Formato 2)": ["Empresa:", "Número"],
+    "Macro (Formato 3)": ["C.U.I.T", "Periodo del Extracto:", "SALDO ULTIMO EXTRACTO AL"],
+    "Macro (Formato 4)": ["Sr/a:", "Período del Extracto:", "SALDO INICIAL"],
+    "MercadoPago": ["RESUMEN DE CUENTA", "CVU:", "Saldo inicial:"],
+    "Nacion": ["PERIODO:", "FECHA MOVIMIENTOS COMPROB", "SALDO ANTERIOR"],
+    "Patagonia": ["Cuenta:", "Titularidad:"],
+    "Patagonia (Formato 2)": ["C.U.I.T.", "SUBCTA", "SALDO ANTERIOR"],
+    "Provincia": ["CAJA DE AHORROS EN PESOS", "SALDO ANTERIOR"],
+    "Provincia (Formato 2)": ["Fecha:", "Cuenta:", "Detalle de Movimientos"],
+    "Santander Rio": ["CUIT:", "Desde:", "Hasta:"],
+    "Supervielle": ["RESUMEN DE CUENTA DESDE", "NUMERO DE CUENTA"],
+}
+
+PAGINAS_DETECCION = 2
+
+
+def _compactar(texto):
+    return "".join(texto.split()).upper()
+
+
+_FIRMAS_COMPACTAS = {banco: [_compactar(m) for m in marcadores] for banco, marcadores in FIRMAS.items()}
+
+
+def candidatos(texto):
+    """Formatos cuyos marcadores aparecen todos en el texto, del más específico al menos"""
+    compacto = _compactar(texto)
+    encontrados = [banco for banco, marcadores in _FIRMAS_COMPACTAS.items()
+                   if all(m in compacto for m in marcadores)]
+    return sorted(encontrados, key=lambda b: -len(_FIRMAS_COMPACTAS[b]))
+
+
+def detectar_banco(archivo_pdf):
+    """
+    Devuelve el nombre del banco/formato (como en PROCESADORES) del extracto, o None si no se
+    reconoce. Solo lee el texto de las primeras páginas con PyPDF2.
+    """
+    archivo_pdf.seek(0)
+    try:
+        reader = PyPDF2.PdfReader(io.BytesIO(archivo_pdf.read()))
+        texto = "\n".join((pagina.extract_text() or "") for pagina in reader.pages[:PAGINAS_DETECCION])
+    except Exception:
+        return None
+    finally:
+        archivo_pdf.seek(0)
+    encontrados = candidatos(texto)
+    return encontrados[0] if encontrados else None
@@ -0,0 +1,147 @@
+"""
+Movimientos repetidos entre extractos consecutivos.
+
+Los períodos de los extractos se superponen (Galicia y Nación suelen ir "Del 27/01 al 24/02"), así
+que al juntar varios meses los movimientos del borde aparecen dos veces. Cada movimiento se resume
+en una huella (cuenta, fecha, importe en centavos, descripción normalizada, ocurrencia) y los
+extractos de cada cuenta se recorren por período: una huella ya vista en un extracto anterior de la
+misma cuenta, cuyo período se superpone con el del nuevo, es un duplicado. La cuenta es la del
+encabezado del reporte (número o titular, y hoja; lectura_excel.identificar_cuenta): dos cuentas
+del mismo banco con la misma comisión el mismo día no se confunden. Con un conjunto de huellas el
+costo es lineal en la cantidad de movimientos.
+
+La ocurrencia ocupa el lugar del saldo corrido, que los Excel generados no conservan: dos
+movimientos iguales el mismo día en el mismo extracto (dos transferencias de $1.000 al mismo
+destinatario) son la 1ª y la 2ª ocurrencia, así que no se confunden entre sí. Si el extracto
+siguiente repite solo la 1ª, se descarta solo esa.
+
+Uso:
+    python duplicados.py enero.pdf febrero.pdf marzo.xlsx -o consolidado.xlsx
+"""
+import argparse
+import io
+from collections import defaultdict
+from dataclasses import dataclass
+
+from openpyxl import Workbook
+from openpyxl.styles import Font
+
+from propios import normalizar_texto
+from transferencias import MovimientoNormalizado, _tabla, cargar
+
+
+@dataclass
+class Duplicado:
+    movimiento: MovimientoNormalizado  # el descartado
+    conservado: str  # extracto del que se tomó el movimiento
+
+
+def _cuenta(movimiento):
+    return movimiento.clave_cuenta or movimiento.cuenta
+
+
+def huella(movimiento):
+    """Clave del movimiento sin la ocurrencia (la cuenta sin el banco, igual en todos los meses)"""
+    return (_cuenta(movimiento), movimiento.fecha, movimiento.centavos,
+            " ".join(normalizar_texto(movimiento.descripcion).split()))
+
+
+def deduplicar(movimientos):
+    """
+    Descarta los movimientos que ya aparecieron en un extracto anterior de la misma cuenta con un
+    período superpuesto. Los extractos de cada cuenta se ordenan por su primera fecha; dentro de
+    cada uno se respeta el orden original. Devuelve (conservados, duplicados).
+    """
+    por_extracto = defaultdict(list)  # (cuenta, archivo) -> movimientos
+    for movimiento in movimientos:
+        por_extracto[(_cuenta(movimiento), movimiento.archivo)].append(movimiento)
+    if len({archivo for _, archivo in por_extracto}) < 2:
+        return list(movimientos), []
+    periodos = {extracto: (min(m.fecha for m in lista), max(m.fecha for m in lista))
+                for extracto, lista in por_extracto.items()}
+
+    anteriores = defaultdict(list)  # cuenta -> [(período, archivo, huellas)] de los extractos ya recorridos
+    conservados, duplicados = [], []
+    for (cuenta, archivo), lista in sorted(por_extracto.items(), key=lambda e: (e[0][0], periodos[e[0]])):
+        desde, hasta = periodo = periodos[(cuenta, archivo)]
+        # Solo cuentan los extractos de la cuenta cuyo período se superpone con este
+        candidatos = [(origen, huellas) for (d, h), origen, huellas in anteriores[cuenta] if d <= hasta and desde <= h]
+        ocurrencias = defaultdict(int)
+        propias = set()
+        for movimiento in lista:
+            base = huella(movimiento)
+            ocurrencias[base] += 1
+            clave = base + (ocurrencias[base],)
+            origen = next((o for o, huellas in candidatos if clave in huellas), None)
+            if origen is not None:
+                duplicados.append(Duplicado(movimiento, origen))
+            else:
+                propias.add(clave)
+                conservados.append(movimiento)
+        anteriores[cuenta].append((periodo, archivo, propias))
+    return conservados, duplicados
+
+
+def exportar(conservados, duplicados):
+    """Excel consolidado (bytes): movimientos sin repetir con su extracto de origen, y los descartados"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Movimientos"
+    filas = [(m.fecha, m.cuenta, m.descripcion, m.importe, m.archivo)
+             for m in sorted(conservados, key=lambda m: (_cuenta(m), m.fecha))]
+    _tabla(ws, "MOVIMIENTOS CONSOLIDADOS", ["Fecha", "Cuenta", "Descripción", "Importe", "Extracto"], filas,
+           [13, 30, 50, 16, 30], monedas=(3,))
+    for fila in ws.iter_rows(min_row=4, max_col=1):
+        fila[0].number_format = "DD/MM/YYYY"
+
+    ws = wb.create_sheet("Duplicados")
+    filas = [(d.movimiento.fecha, d.movimiento.cuenta, d.movimiento.descripcion, d.movimiento.importe,
+              d.movimiento.archivo, d.conservado)
+             for d in sorted(duplicados, key=lambda d: (_cuenta(d.movimiento), d.movimiento.fecha))]
+    _tabla(ws, "MOVIMIENTOS REPETIDOS ENTRE EXTRACTOS",
+           ["Fecha", "Cuenta", "Descripción", "Importe", "Descartado de", "Conservado de"], filas,
+           [13, 30, 50, 16, 30, 30], monedas=(3,))
+    for fila in ws.iter_rows(min_row=4, max_col=1):
+        fila[0].number_format = "DD/MM/YYYY"
+
+    ws = wb.create_sheet("Extractos")
+    resumen = defaultdict(lambda: [None, None, 0, 0])
+    for m in conservados:
+        datos = resumen[m.archivo]
+        datos[0] = m.fecha if datos[0] is None else min(datos[0], m.fecha)
+        datos[1] = m.fecha if datos[1] is None else max(datos[1], m.fecha)
+        datos[2] += 1
+    for d in duplicados:
+        resumen[d.movimiento.archivo][3] += 1
+    filas = [(archivo, desde, hasta, cantidad, descartados)
+             for archivo, (desde, hasta, cantidad, descartados) in resumen.items()]
+    _tabla(ws, "EXTRACTOS", ["Extracto", "Desde", "Hasta", "Conservados", "Descartados"], filas,
+           [34, 13, 13, 14, 14])
+    for fila in ws.iter_rows(min_row=4, min_col=2, max_col=3):
+        for celda in fila:
+            celda.number_format = "DD/MM/YYYY"
+    ws.cell(len(filas) + 6, 1, "Movimientos repetidos").font = Font(bold=True)
+    ws.cell(len(filas) + 6, 2, len(duplicados))
+
+    salida = io.BytesIO()
+    wb.save(salida)
+    return salida.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Junta varios extractos descartando los movimientos repetidos")
+    parser.add_argument("archivos", nargs="+", help="Extractos PDF o Excel generados por la app")
+    parser.add_argument("--banco", help="Banco de los PDF (por defecto se detecta en cada uno)")
+    parser.add_argument("-o", "--salida", default="consolidado.xlsx")
+    args = parser.parse_args()
+
+    movimientos, sin_fecha = cargar(args.archivos, args.banco)
+    conservados, duplicados = deduplicar(movimientos)
+    with open(args.salida, "wb") as f:
+        f.write(exportar(conservados, duplicados))
+    print(f"{len(conservados)} movimientos, {len(duplicados)} repetidos descartados"
+          + (f", {sin_fecha} sin fecha" if sin_fecha else "") + f" -> {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
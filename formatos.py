@@ -0,0 +1,486 @@
+import io
+import json
+import os
+import re
+import glob
+from collections import OrderedDict
+from dataclasses import dataclass
+import streamlit as st
+import PyPDF2
+import pdfplumber
+
+from patrones import registro
+from secciones import IndiceSecciones
+from guardia import filtrar_lineas
+from control import controlar, ubicador
+from dashboard import generar_dashboard, hojas_dashboard, clean_for_excel
+from rendimiento import marcar, contar, paginas_medidas
+
+# Formatos declarativos: cada formato de extracto "clásico" (metadatos por regex, sección delimitada
+# por marcadores, movimientos que empiezan con fecha, saldo corrido y reporte dashboard) se describe
+# con un FormatoExtracto y se compila UNA vez en un ParserFormato (regex precompilados en el registro
+# de patrones, índice de secciones en una pasada).
+# Un formato nuevo es solo datos: un FormatoExtracto en el módulo del banco o un .json en formatos/
+# (la carpeta no viene con el repositorio; BANCOS_DIR_FORMATOS apunta a otra).
+# Hoy lo usan Nación y Provincia. El resto de los procesadores tiene particularidades que el motor no
+# cubre (columnas por posición, año deducido, una hoja por cuenta, tabla única) y sigue a mano.
+
+DIRECTORIO_FORMATOS = os.environ.get(
+    "BANCOS_DIR_FORMATOS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "formatos")
+)
+
+SIGNOS = ("saldo", "ajustar", "importe")
+NUMEROS = ("ar", "decimal")
+EXTRACTORES = ("pypdf2", "pdfplumber")
+SIN_ESPECIFICAR = "Sin Especificar"
+
+
+@dataclass(frozen=True)
+class Metadato:
+    """
+    Regla para un dato de cabecera (titular, período) o un saldo.
+    - patron: regex (re.search). La plantilla se completa con los grupos: {1}, {2}... ({0} = match completo)
+    - lineas: buscar línea por línea en las primeras N (None = sobre el texto completo)
+    - marcador: para saldos, texto que identifica la línea (ej. "SALDO ANTERIOR")
+    """
+    patron: str
+    plantilla: str = "{1}"
+    lineas: int = None
+    marcador: str = None
+    ignorar_mayusculas: bool = False
+
+
+@dataclass(frozen=True)
+class Columnas:
+    """
+    Geometría por tokens (linea.split()) para formatos sin separadores confiables.
+    Índices negativos cuentan desde el final; descripcion es un rango [desde, hasta).
+    """
+    fecha: int = 0
+    descripcion: tuple = (1, -1)
+    importe: int = None
+    saldo: int = None
+    minimo: int = 3
+
+
+@dataclass(frozen=True)
+class FormatoExtracto:
+    """
+    Especificación de un formato de extracto.
+    - inicio / fin: marcadores (substring) que delimitan la sección de movimientos
+    - fecha: regex con el que empieza la línea de un movimiento
+    - movimiento: regex con grupos fecha/descripcion/importe/saldo, o bien columnas (geometría por tokens)
+    - signo: "saldo" (importe = saldo - saldo anterior), "ajustar" (el signo del importe se corrige con
+      la variación del saldo) o "importe" (se usa tal cual)
+    - numeros: "ar" (1.234,56 / 1.234,56-) o "decimal" (1234.56)
+    """
+    nombre: str
+    banco: str
+    hoja: str
+    titulo: str
+    color: str
+    inicio: str
+    fin: str
+    fecha: str
+    movimiento: str = None
+    columnas: Columnas = None
+    extractor: str = "pypdf2"
+    titular: Metadato = None
+    periodo: Metadato = None
+    saldo_inicial: Metadato = None
+    saldo_final: Metadato = None
+    desde_inicio: int = 0
+    incluir_fin: bool = False
+    limpiar_prefijo: str = ""
+    saltar: tuple = ()
+    unir_continuaciones: bool = False
+    signo: str = "saldo"
+    numeros: str = "ar"
+    sufijos_importe: str = ""
+
+    def __post_init__(self):
+        if (self.movimiento is None) == (self.columnas is None):
+            raise ValueError(f"Formato '{self.nombre}': definir 'movimiento' o 'columnas' (uno solo)")
+        if self.signo not in SIGNOS:
+            raise ValueError(f"Formato '{self.nombre}': signo '{self.signo}' inválido (opciones: {SIGNOS})")
+        if self.numeros not in NUMEROS:
+            raise ValueError(f"Formato '{self.nombre}': numeros '{self.numeros}' inválido (opciones: {NUMEROS})")
+        if self.extractor not in EXTRACTORES:
+            raise ValueError(f"Formato '{self.nombre}': extractor '{self.extractor}' inválido (opciones: {EXTRACTORES})")
+        for regla in (self.saldo_inicial, self.saldo_final):
+            if regla is not None and not regla.marcador:
+                raise ValueError(f"Formato '{self.nombre}': las reglas de saldo necesitan 'marcador'")
+
+
+def formato_desde_dict(datos):
+    """Construye un FormatoExtracto desde un dict (ej. cargado de JSON)"""
+    datos = dict(datos)
+    for clave in ("titular", "periodo", "saldo_inicial", "saldo_final"):
+        if isinstance(datos.get(clave), dict):
+            datos[clave] = Metadato(**datos[clave])
+    if isinstance(datos.get("columnas"), dict):
+        cols = dict(datos["columnas"])
+        if "descripcion" in cols:
+            cols["descripcion"] = tuple(cols["descripcion"])
+        datos["columnas"] = Columnas(**cols)
+    if "saltar" in datos:
+        datos["saltar"] = tuple(datos["saltar"])
+    return FormatoExtracto(**datos)
+
+
+@dataclass
+class ResultadoParseo:
+    titular: str
+    periodo: str
+    saldo_inicial: float
+    saldo_final: float
+    movimientos: list
+    control: object = None  # control.ControlSaldos (si los movimientos traen saldo)
+
+
+class ParserFormato:
+    """Parser compilado a partir de un FormatoExtracto (se construye una vez por formato)"""
+
+    def __init__(self, formato):
+        self.formato = formato
+        reg = registro(formato.nombre)
+        self.re_fecha = reg.compilar("fecha", formato.fecha)
+        self.re_movimiento = reg.compilar("movimiento", formato.movimiento) if formato.movimiento else None
+        if self.re_movimiento is not None and "fecha" not in self.re_movimiento.groupindex:
+            raise ValueError(f"Formato '{formato.nombre}': el regex de movimiento necesita el grupo (?P<fecha>...)")
+        self.re_reglas = {}
+        for clave in ("titular", "periodo", "saldo_inicial", "saldo_final"):
+            regla = getattr(formato, clave)
+            if regla is not None:
+                flags = re.IGNORECASE if regla.ignorar_mayusculas else 0
+                self.re_reglas[clave] = reg.compilar(clave, regla.patron, flags)
+        self.marcadores = {"inicio": formato.inicio, "fin": formato.fin}
+        self.re_limpiar = re.compile("^[" + re.escape(formato.limpiar_prefijo) + "]+") if formato.limpiar_prefijo else None
+
+    # --- Lectura ---
+
+    def extraer_texto(self, archivo_pdf):
+        """Devuelve (texto_completo, lineas, lineas_por_pagina) con el extractor del formato"""
+        marcar("lectura")
+        archivo_pdf.seek(0)
+        datos = archivo_pdf.read()
+        contar("bytes", len(datos))
+        if self.formato.extractor == "pdfplumber":
+            with pdfplumber.open(io.BytesIO(datos)) as pdf:
+                marcar("extraccion")
+                textos = [page.extract_text() + "\n" for page in paginas_medidas(pdf.pages)]
+        else:
+            with io.BytesIO(datos) as pdf_file:
+                reader = PyPDF2.PdfReader(pdf_file)
+                marcar("extraccion")
+                textos = [page.extract_text() + "\n" for page in paginas_medidas(reader.pages)]
+        texto_completo = "".join(textos)
+        lineas = texto_completo.splitlines()
+        contar("lineas", len(lineas))
+        # Cada página termina en "\n", así que sus líneas son las mismas que dentro del texto completo
+        return texto_completo, lineas, [len(t.splitlines()) for t in textos]
+
+    # --- Números y metadatos ---
+
+    def _numero(self, texto):
+        """Convierte un importe según el formato; None si no es válido"""
+        if texto is None:
+            return None
+        s = texto.strip()
+        if self.formato.sufijos_importe and s and s[-1] in self.formato.sufijos_importe:
+            s = s[:-1]
+        try:
+            if self.formato.numeros == "decimal":
+                return float(s)
+            signo = 1
+            if s.endswith("-"):
+                signo = -1
+                s = s[:-1]
+            elif s.startswith("-"):
+                signo = -1
+                s = s[1:]
+            return float(s.replace(".", "").replace(",", ".")) * signo
+        except ValueError:
+            return None
+
+    def _metadato(self, clave, texto_completo, lineas):
+        regla = getattr(self.formato, clave)
+        if regla is None:
+            return SIN_ESPECIFICAR
+        patron = self.re_reglas[clave]
+        m = None
+        if regla.lineas is None:
+            m = patron.search(texto_completo)
+        else:
+            for l in lineas[:regla.lineas]:
+                m = patron.search(l)
+                if m:
+                    break
+        if not m:
+            return SIN_ESPECIFICAR
+        return regla.plantilla.format(m.group(0), *(g or "" for g in m.groups())).strip()
+
+    def _texto_saldo(self, clave, linea):
+        """Texto del importe en una línea de saldo (None si el patrón no coincide)"""
+        m = self.re_reglas[clave].search(linea)
+        return m.group(1) if m else None
+
+    # --- Movimientos ---
+
+    def _limpiar(self, linea):
+        linea = linea.strip()
+        if self.re_limpiar is not None:
+            linea = self.re_limpiar.sub("", linea).strip()
+        return linea
+
+    def _evento_movimiento(self, texto, indice=None):
+        """
+        ("movimiento", fecha, descripcion, importe, saldo, indice) o None si el texto no es un movimiento
+        válido; indice es la línea de la sección donde empieza (para el control fila por fila)
+        """
+        f = self.formato
+        if self.re_movimiento is not None:
+            m = self.re_movimiento.match(texto.strip())
+            if not m:
+                return None
+            grupos = m.groupdict()
+            fecha = grupos.get("fecha")
+            descripcion = (grupos.get("descripcion") or "").strip()
+            textos_num = (grupos.get("importe"), grupos.get("saldo"))
+        else:
+            c = f.columnas
+            parts = texto.split()
+            if len(parts) < c.minimo:
+                return None
+            fecha = parts[c.fecha]
+            descripcion = " ".join(parts[c.descripcion[0]:c.descripcion[1]])
+            textos_num = tuple(parts[i] if i is not None else None for i in (c.importe, c.saldo))
+        valores = []
+        for t in textos_num:
+            v = self._numero(t)
+            if t is not None and v is None:
+                return None
+            valores.append(v)
+        return ("movimiento", fecha, descripcion, valores[0], valores[1], indice)
+
+    def _eventos(self, lineas):
+        f = self.formato
+        marca_ini = f.saldo_inicial.marcador if f.saldo_inicial else None
+        marca_fin = f.saldo_final.marcador if f.saldo_final else None
+        eventos = []
+        pendiente = None
+        indice_pendiente = None
+
+        def cerrar():
+            if pendiente is not None:
+                ev = self._evento_movimiento(pendiente, indice_pendiente)
+                if ev:
+                    eventos.append(ev)
+
+        for indice, linea in enumerate(lineas):
+            linea = self._limpiar(linea)
+            if f.saltar and any(s in linea for s in f.saltar):
+                continue
+            if marca_ini and marca_ini in linea:
+                # Al unir continuaciones, el saldo inicial reinicia el acumulado y descarta el
+                # movimiento pendiente (comportamiento histórico de Provincia)
+                if not f.unir_continuaciones:
+                    cerrar()
+                pendiente = None
+                eventos.append(("saldo_inicial", self._texto_saldo("saldo_inicial", linea), linea))
+                continue
+            if marca_fin and marca_fin in linea:
+                cerrar()
+                pendiente = None
+                eventos.append(("saldo_final", self._texto_saldo("saldo_final", linea), linea))
+                continue
+            if self.re_fecha.match(linea):
+                cerrar()
+                pendiente = linea
+                indice_pendiente = indice
+            elif f.unir_continuaciones and pendiente is not None:
+                pendiente += " " + linea
+        cerrar()
+        return eventos
+
+    def _acumular(self, eventos):
+        """
+        Aplica la regla de signo con el saldo corrido. Devuelve (movimientos, saldo_inicial, saldo_final,
+        filas), con filas = [(saldo leído, índice de línea)] de cada movimiento
+        """
+        f = self.formato
+        movimientos = []
+        filas = []
+        saldo_inicial = 0.0
+        saldo_final = None
+        saldo_anterior = None
+        for ev in eventos:
+            tipo = ev[0]
+            if tipo == "saldo_inicial" or tipo == "saldo_final":
+                texto, linea = ev[1], ev[2]
+                if texto is None:
+                    continue
+                valor = self._numero(texto)
+                if valor is None:
+                    st.warning(f"Error procesando la línea de saldo: {linea}")
+                    continue
+                if tipo == "saldo_inicial":
+                    saldo_anterior = valor
+                    saldo_inicial = valor
+                else:
+                    saldo_final = valor
+                continue
+
+            _, fecha, descripcion, importe, saldo, indice = ev
+            if f.signo == "saldo":
+                if saldo_anterior is None or saldo is None:
+                    continue
+                importe = saldo - saldo_anterior
+            elif f.signo == "ajustar" and saldo_anterior is not None and saldo is not None:
+                # Signo según la variación de saldo (tolerancia por redondeo)
+                diff = saldo - saldo_anterior
+                if diff < -0.01:
+                    if importe > 0: importe = -importe
+                elif diff > 0.01:
+                    if importe < 0: importe = -importe
+            if importe is None:
+                continue
+
+            movimientos.append({
+                "Fecha": fecha,
+                "Descripcion": clean_for_excel(descripcion),
+                "Importe": importe
+            })
+            filas.append((saldo, indice))
+            if saldo is not None:
+                saldo_anterior = saldo
+
+        if f.saldo_final is None:
+            saldo_final = saldo_anterior
+        return movimientos, saldo_inicial, saldo_final if saldo_final is not None else 0.0, filas
+
+    # --- API ---
+
+    def parsear(self, texto_completo, lineas, lineas_por_pagina=None):
+        """Devuelve un ResultadoParseo, o None si no se encuentran las secciones"""
+        f = self.formato
+        marcar("secciones")
+        originales = lineas
+        lineas = filtrar_lineas(lineas, f.nombre)
+        titular = self._metadato("titular", texto_completo, lineas)
+        periodo = self._metadato("periodo", texto_completo, lineas)
+
+        indice = IndiceSecciones(lineas, self.marcadores)
+        inicio = indice.primera("inicio")
+        fin = indice.primera("fin")
+        if inicio is None or fin is None:
+            st.error(f"No se encontraron las secciones '{f.inicio}' o '{f.fin}' en el PDF")
+            return None
+        base = max(0, inicio + f.desde_inicio)
+        seccion = lineas[base:fin + 1 if f.incluir_fin else fin]
+
+        marcar("movimientos")
+        eventos = self._eventos(seccion)
+        marcar("conciliacion")
+        movimientos, saldo_inicial, saldo_final, filas = self._acumular(eventos)
+        contar("movimientos", len(movimientos))
+        contar("cuentas", 1)
+        control = None
+        # Con signo "saldo" cada importe sale del saldo de su fila: el saldo corrido coincide siempre
+        if f.signo != "saldo" and any(saldo is not None for saldo, _ in filas):
+            control = controlar(movimientos, [saldo for saldo, _ in filas], saldo_inicial, saldo_final,
+                                self._origenes(originales, lineas, base, seccion, filas, lineas_por_pagina))
+        return ResultadoParseo(titular, periodo, saldo_inicial, saldo_final, movimientos, control)
+
+    def _origenes(self, originales, filtradas, base, seccion, filas, lineas_por_pagina):
+        """Función fila -> (página, línea en la página, texto) para el control de saldos"""
+        ubicar = ubicador(originales, filtradas, lineas_por_pagina)
+
+        def origen(fila):
+            indice = filas[fila][1]
+            if indice is None:
+                return None, None, ""
+            return (*ubicar(base + indice), seccion[indice].strip())
+
+        return origen
+
+    def parsear_pdf(self, archivo_pdf):
+        """Extrae y parsea el PDF sin armar el Excel: ResultadoParseo, o None (con el motivo ya informado)"""
+        f = self.formato
+        st.info(f"Procesando archivo del banco {f.banco}...")
+        try:
+            texto_completo, lineas, lineas_por_pagina = self.extraer_texto(archivo_pdf)
+            resultado = self.parsear(texto_completo, lineas, lineas_por_pagina=lineas_por_pagina)
+            if resultado is None:
+                return None
+            if not resultado.movimientos:
+                st.warning("No se encontraron movimientos en el PDF")
+                return None
+            if resultado.control is not None and resultado.control.mensaje():
+                st.warning(resultado.control.mensaje())
+            return resultado
+        except Exception as e:
+            import traceback
+            st.error(f"Error al procesar el archivo: {str(e)}")
+            print(traceback.format_exc())
+            return None
+
+    def renderizar(self, resultado):
+        """Excel (bytes) de un ResultadoParseo"""
+        f = self.formato
+        return generar_dashboard(resultado.movimientos, resultado.titular, resultado.periodo,
+                                 resultado.saldo_inicial, resultado.saldo_final,
+                                 hoja=f.hoja, titulo=f.titulo, color=f.color, control=resultado.control)
+
+    def hojas(self, resultado):
+        """Lo mismo que lectura_excel.leer_excel devolvería del Excel de renderizar(resultado), sin armarlo"""
+        return hojas_dashboard(resultado.movimientos, resultado.titular, resultado.saldo_inicial,
+                               resultado.saldo_final, hoja=self.formato.hoja)
+
+    def procesar(self, archivo_pdf):
+        """Mismo contrato que los procesar_*: bytes del Excel o None"""
+        resultado = self.parsear_pdf(archivo_pdf)
+        if resultado is None:
+            return None
+        try:
+            return self.renderizar(resultado)
+        except Exception as e:
+            import traceback
+            st.error(f"Error al procesar el archivo: {str(e)}")
+            print(traceback.format_exc())
+            return None
+
+
+# --- Registro de formatos ---
+
+FORMATOS = OrderedDict()
+
+
+def registrar(formato):
+    """Compila y registra un formato. Devuelve el ParserFormato"""
+    parser = ParserFormato(formato)
+    FORMATOS[formato.nombre] = parser
+    return parser
+
+
+def cargar_formatos(directorio=None):
+    """
+    Registra los formatos definidos como JSON en `directorio` (por defecto formatos/).
+    Devuelve los nombres cargados; un archivo inválido se informa por consola y se saltea.
+    """
+    directorio = directorio or DIRECTORIO_FORMATOS
+    nombres = []
+    for ruta in sorted(glob.glob(os.path.join(directorio, "*.json"))):
+        try:
+            with open(ruta, encoding="utf-8") as fh:
+                formato = formato_desde_dict(json.load(fh))
+            registrar(formato)
+            nombres.append(formato.nombre)
+        except Exception as e:
+            print(f"[formatos] {ruta}: {e}")
+    return nombres
+
+
+def procesar_formato(nombre, archivo_pdf):
+    """Procesa con un formato registrado por nombre"""
+    return FORMATOS[nombre].procesar(archivo_pdf)
@@ -6,6 +6,21 @@ import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from secciones import IndiceSecciones
+from guardia import filtrar_texto
+from rendimiento import marcar, contar, sumar, paginas_medidas
+
+# Marcadores de sección (se indexan en una sola pasada)
+PATRON_CUENTA_FRANCES = re.compile(r"^(CA|CC)\s")
+MARCADORES_FRANCES = {
+    "movimientos": "Movimientos en cuentas",
+    "encabezado": "FECHA ORIGEN CONCEPTO DÉBITO CRÉDITO SALDO",
+    "transferencias": "Transferencias",
+}
+MARCADORES_CUENTAS_FRANCES = {
+    "cuenta": lambda l: PATRON_CUENTA_FRANCES.match(l) is not None,
+    "total": "TOTAL MOVIMIENTOS",
+}
 
 # Regex para caracteres ilegales en Excel
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -23,14 +38,19 @@ def procesar_bbva_frances(archivo_pdf):
 
     try:
         # Leer el PDF usando pdfplumber
+        marcar("lectura")
         with pdfplumber.open(io.BytesIO(archivo_pdf.read())) as pdf:
             texto_completo = ""
-            for page in pdf.pages:
+            marcar("extraccion")
+            for page in paginas_medidas(pdf.pages):
                 texto_completo += page.extract_text() + "\n"
             
             # Debug removed
             
+        texto_completo = filtrar_texto(texto_completo, "BBVA Frances")
         lineas = texto_completo.splitlines()
+        contar("lineas", len(lineas))
+        marcar("secciones")
 
         # 1. Extracción de Metadata Global (Titular, Período)
         titular_global = "Sin Especificar"
@@ -78,21 +98,21 @@ def procesar_bbva_frances(archivo_pdf):
              periodo_global = "Calcular"
 
         # 2. Lógica de Extracción de Movimientos (Existente)
-        inicio = next((i for i, line in enumerate(lineas) if "Movimientos en cuentas" in line), None)
+        indice = IndiceSecciones(lineas, MARCADORES_FRANCES)
+        inicio = indice.primera("movimientos")
         
         if inicio is None:
             # Fallback para el formato nuevo (ej. buscando el encabezado de las columnas)
-            for i, line in enumerate(lineas):
-                if "FECHA ORIGEN CONCEPTO DÉBITO CRÉDITO SALDO" in line:
-                    # El encabezado de la cuenta (CA $ ...) suele estar poco antes, buscamos hacia arriba
-                    for j in range(i - 1, max(-1, i - 10), -1):
-                        if re.match(r"^(CA|CC)\s", lineas[j]):
-                            inicio = j - 1
-                            break
-                    if inicio is not None:
+            for i in indice.posiciones("encabezado"):
+                # El encabezado de la cuenta (CA $ ...) suele estar poco antes, buscamos hacia arriba
+                for j in range(i - 1, max(-1, i - 10), -1):
+                    if PATRON_CUENTA_FRANCES.match(lineas[j]):
+                        inicio = j - 1
                         break
+                if inicio is not None:
+                    break
 
-        fin = next((i for i, line in enumerate(lineas) if "Transferencias" in line), None)
+        fin = indice.primera("transferencias")
 
         if inicio is None:
              st.error("No se encontró la sección 'Movimientos en cuentas' o encabezados de detalle")
@@ -101,32 +121,20 @@ def procesar_bbva_frances(archivo_pdf):
         # Si no encuentra "Transferencias", usar el final del archivo
         movimientos_extraidos = lineas[inicio + 1 : fin] if fin else lineas[inicio+1:]
 
-        pattern_cuenta = r"^(CA|CC)\s"
         cuentas = []
-
-        for index, movimiento in enumerate(movimientos_extraidos):
-            if re.match(pattern_cuenta, movimiento):
-                corte = movimiento.find("(") - 1 if "(" in movimiento else len(movimiento)
-                cuenta = {
-                    "cuenta": movimiento[:corte].strip(),
-                    "inicio": index,
-                    "saldo_inicial": 0.0,
-                    "saldo_final": 0.0,
-                    "fin": len(movimientos_extraidos)
-                }
-                # Buscar fin del bloque
-                for j in range(index + 1, len(movimientos_extraidos)):
-                    if "TOTAL MOVIMIENTOS" in movimientos_extraidos[j] or re.match(pattern_cuenta, movimientos_extraidos[j]):
-                         # Si encontramos TOTAL MOVIMIENTOS o el inicio de OTRA cuenta
-                        if "TOTAL MOVIMIENTOS" in movimientos_extraidos[j]:
-                             cuenta["fin"] = j
-                        else:
-                             cuenta["fin"] = j # Cortar antes de la siguiente cuenta
-                        cuentas.append(cuenta)
-                        break
-                else:
-                    # Si llega al final sin encontrar cierre explícito
-                    cuentas.append(cuenta)
+        indice_cuentas = IndiceSecciones(movimientos_extraidos, MARCADORES_CUENTAS_FRANCES)
+
+        for index in indice_cuentas.posiciones("cuenta"):
+            movimiento = movimientos_extraidos[index]
+            corte = movimiento.find("(") - 1 if "(" in movimiento else len(movimiento)
+            # Fin del bloque: TOTAL MOVIMIENTOS o el inicio de OTRA cuenta (si no hay cierre explícito, fin del texto)
+            cuentas.append({
+                "cuenta": movimiento[:corte].strip(),
+                "inicio": index,
+                "saldo_inicial": 0.0,
+                "saldo_final": 0.0,
+                "fin": indice_cuentas.fin_seccion(["total", "cuenta"], index)
+            })
 
         # Deduplicar cuentas por nombre de la cuenta, conservando el primer bloque (detalle completo)
         cuentas_dict = {}
@@ -135,6 +143,7 @@ def procesar_bbva_frances(archivo_pdf):
                 cuentas_dict[c['cuenta']] = c
         cuentas_unicas = list(cuentas_dict.values())
 
+        contar("cuentas", len(cuentas_unicas))
         if not cuentas_unicas:
             st.warning("No se encontraron cuentas en el PDF")
             return None
@@ -215,6 +224,7 @@ def procesar_bbva_frances(archivo_pdf):
 
         # --- GENERACIÓN EXCEL (ESTILO DASHBOARD) ---
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         # Eliminar hoja default
         if "Sheet" in wb.sheetnames:
@@ -247,6 +257,7 @@ def procesar_bbva_frances(archivo_pdf):
             pattern = r"^(\d{2}/\d{2})\s+(.*?)\s+([-]?\d{1,3}(?:[\.,]\d{3})*(?:[\.,]\d{2})|[-]?0[\.,]\d{2})(?:\s+[-]?\d{1,3}(?:[\.,]\d{3})*(?:[\.,]\d{2})|\s*[-]?0[\.,]\d{2})?\s*$"
             resultados = []
             
+            marcar("importes")
             raw_lines = movimientos_extraidos[cuenta_info["inicio"] + 1 : cuenta_info["fin"]]
             
             saldo_inicial = 0.0
@@ -293,6 +304,8 @@ def procesar_bbva_frances(archivo_pdf):
                         "Importe": importe
                     })
             
+            sumar("movimientos", len(resultados))
+            marcar("excel")
             # DataFrames
             df = pd.DataFrame(resultados)
             
@@ -502,6 +515,7 @@ def procesar_bbva_frances(archivo_pdf):
             ws.column_dimensions["F"].width = 40
             ws.column_dimensions["G"].width = 18
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
@@ -6,6 +6,8 @@ import io
 import PyPDF2
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from guardia import filtrar_lineas, filtrar_texto
+from rendimiento import marcar, contar, sumar, paginas_medidas
 
 def clean_for_excel(text):
     """Elimina caracteres ilegales para Excel."""
@@ -46,11 +48,13 @@ def procesar_galicia_mas(archivo_pdf):
         # Word boundaries para no matchear parciales como 25.41 de 25.413
         re_monto = re.compile(r"(?<!\d)(\d{1,3}(?:,\d{3})*\.\d{2}|\.\d{2})(?!\d)")
         
+        marcar("lectura")
         with pdfplumber.open(io.BytesIO(archivo_pdf.read())) as pdf:
             # ============================================================
             # FASE 1: METADATA GLOBAL (pagina 1, sin layout)
             # ============================================================
-            text_p1 = pdf.pages[0].extract_text() or ""
+            marcar("secciones")
+            text_p1 = filtrar_texto(pdf.pages[0].extract_text() or "", "Galicia Más")
             
             # 1.1 AÑO y PERIODO
             match_periodo = re.search(r"EXTRACTO DEL (\d{2}/\d{2}/\d{4}) AL (\d{2}/\d{2}/\d{4})", text_p1)
@@ -148,11 +152,16 @@ def procesar_galicia_mas(archivo_pdf):
                 "EL MONTO DEL IVA"
             ]
             
-            for page in pdf.pages:
+            for page in paginas_medidas(pdf.pages):
+                # Extracción y parseo van página por página: se marca cada tramo por separado
+                marcar("extraccion")
                 text = page.extract_text(layout=True)
+                marcar("movimientos")
                 if not text: continue
                 
-                for line in text.splitlines():
+                lineas_pagina = filtrar_lineas(text.splitlines(), "Galicia Más")
+                sumar("lineas", len(lineas_pagina))
+                for line in lineas_pagina:
                     line_clean = line.strip()
                     if not line_clean: continue
                     
@@ -246,6 +255,9 @@ def procesar_galicia_mas(archivo_pdf):
                                 cuentas_data[current_account][-1]["Descripcion"] += " " + line_clean
         
         
+        contar("cuentas", len(cuentas_data))
+        contar("movimientos", sum(len(movs) for movs in cuentas_data.values()))
+
         # ============================================================
         # FASE 3: GENERAR EXCEL
         # ============================================================
@@ -254,6 +266,7 @@ def procesar_galicia_mas(archivo_pdf):
             return None
 
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         if "Sheet" in wb.sheetnames:
             del wb["Sheet"]
@@ -434,6 +447,7 @@ def procesar_galicia_mas(archivo_pdf):
             ws["I7"].number_format = '"$ "#,##0.00'
             ws["I7"].border = thin_border
         
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         st.success("✅ Procesamiento completado (Galicia Más V1.0)")
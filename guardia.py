@@ -0,0 +1,49 @@
+import logging
+import os
+
+from rendimiento import sumar
+
+# Largo máximo de línea que se deja pasar a los parsers.
+# Las líneas reales de un extracto rondan los 80-250 caracteres; una línea de miles de
+# espacios o mayúsculas (PDF malformado) puede hacer que patrones como \s{2,}\d{2}/... o
+# [a-z]([A-Z\s\.]+)$ retrocedan de forma cuadrática o peor y congelen el worker.
+# El módulo re no se puede interrumpir a mitad de un match, así que el límite se aplica
+# antes de llegar al regex (no hay "presupuesto de tiempo" posible por línea).
+# Cada procesador filtra el texto apenas lo extrae. Las líneas omitidas se suman al contador
+# "lineas_omitidas" de la ejecución (rendimiento.py) y se detallan en el logger "bancos.guardia".
+LARGO_MAXIMO_LINEA = int(os.environ.get("BANCOS_LARGO_MAXIMO_LINEA", "1000"))
+
+logger = logging.getLogger("bancos.guardia")
+
+
+def filtrar_lineas(lineas, origen="", largo_maximo=None):
+    """
+    Descarta las líneas que superan el largo máximo y las informa (contador y logger).
+    Devuelve la lista filtrada (mismo orden; la misma lista si no había ninguna).
+    """
+    limite = largo_maximo or LARGO_MAXIMO_LINEA
+    if not any(len(l) > limite for l in lineas):
+        return lineas
+
+    conservadas = []
+    descartadas = []
+    for i, l in enumerate(lineas):
+        if len(l) > limite:
+            descartadas.append((i, len(l), l[:60]))
+        else:
+            conservadas.append(l)
+
+    sumar("lineas_omitidas", len(descartadas))
+    for i, largo, muestra in descartadas:
+        logger.warning("%s línea %d: %d caracteres (más de %d) omitida -> %r...", origen, i, largo, limite, muestra)
+    return conservadas
+
+
+def filtrar_texto(texto, origen="", largo_maximo=None):
+    """
+    filtrar_lineas sobre el texto extraído entero, para los procesadores que además buscan con
+    regex en el texto completo. Devuelve el mismo texto si no había líneas anómalas
+    """
+    lineas = texto.splitlines()
+    filtradas = filtrar_lineas(lineas, origen, largo_maximo)
+    return texto if filtradas is lineas else "\n".join(filtradas) + "\n"
@@ -6,6 +6,8 @@ import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_texto
+from rendimiento import marcar, contar, paginas_medidas
 
 # Regex
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -37,12 +39,17 @@ def procesar_hipotecario(archivo_pdf):
     st.info("Procesando archivo del Banco Hipotecario...")
     try:
         archivo_pdf.seek(0)
+        marcar("lectura")
         with pdfplumber.open(io.BytesIO(archivo_pdf.read())) as pdf:
             texto_completo = ""
-            for page in pdf.pages:
+            marcar("extraccion")
+            for page in paginas_medidas(pdf.pages):
                 texto_completo += page.extract_text() + "\n"
         
+        texto_completo = filtrar_texto(texto_completo, "Hipotecario")
         lineas = texto_completo.splitlines()
+        contar("lineas", len(lineas))
+        marcar("secciones")
 
         # 1. Metadatos
         titular = "Sin Especificar"
@@ -96,6 +103,7 @@ def procesar_hipotecario(archivo_pdf):
                 saldo_final = parse_amount(match_saldos.group(2))
 
         # 2. Movimientos
+        marcar("movimientos")
         transactions = []
         
         keywords_credito = ["N/C", "ACRED", "CREDITO", "DEVOLUCION", "DEPOSITO", "RESCATE", "RECIBISTE"] 
@@ -142,12 +150,15 @@ def procesar_hipotecario(archivo_pdf):
                 "Importe": amount
             })
             
+        contar("movimientos", len(transactions))
+        contar("cuentas", 1)
         if not transactions:
             st.warning("No se encontraron movimientos")
             return None
 
         # --- EXCEL ---
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte Hipotecario"
@@ -345,6 +356,7 @@ def procesar_hipotecario(archivo_pdf):
         ws.column_dimensions["F"].width = 40
         ws.column_dimensions["G"].width = 18
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
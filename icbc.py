@@ -6,6 +6,8 @@ import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_texto
+from rendimiento import marcar, contar, paginas_medidas
 
 # Regex para caracteres ilegales en Excel
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -25,9 +27,14 @@ def procesar_icbc(archivo_pdf):
         archivo_pdf.seek(0)
         
         # Leer PDF completo
+        marcar("lectura")
         reader = PyPDF2.PdfReader(io.BytesIO(archivo_pdf.read()))
-        texto_completo = "".join(page.extract_text() + "\n" for page in reader.pages)
+        marcar("extraccion")
+        texto_completo = "".join(page.extract_text() + "\n" for page in paginas_medidas(reader.pages))
+        texto_completo = filtrar_texto(texto_completo, "ICBC (Formato 1)")
         lineas = texto_completo.splitlines()
+        contar("lineas", len(lineas))
+        marcar("secciones")
 
         # 1. Metadatos (Titular, Periodo) y Año Inicial
         titular_global = "Sin Especificar"
@@ -73,6 +80,7 @@ def procesar_icbc(archivo_pdf):
                     saldo_inicial = float(saldo_str.replace(".", "").replace(",", "."))
 
         # 3. Movimientos
+        marcar("importes")
         movimientos = []
         
         # Filtrar líneas con fecha DD-MM (formato ICBC típico)
@@ -121,9 +129,12 @@ def procesar_icbc(archivo_pdf):
                     "Descripcion": clean_for_excel(descripcion),
                     "Importe": importe
                 })
+        contar("movimientos", len(movimientos))
+        contar("cuentas", 1)
 
         # --- GENERACIÓN EXCEL (DASHBOARD) ---
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte ICBC"
@@ -339,6 +350,7 @@ def procesar_icbc(archivo_pdf):
         ws.column_dimensions["F"].width = 40
         ws.column_dimensions["G"].width = 18
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
@@ -6,6 +6,8 @@ import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_lineas
+from rendimiento import marcar, contar, paginas_medidas
 
 # Regex para caracteres ilegales en Excel
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -34,12 +36,16 @@ def procesar_icbc_formato_2(archivo_pdf):
 
     try:
         # Leer PDF completo
+        marcar("lectura")
         with pdfplumber.open(io.BytesIO(archivo_pdf.read())) as pdf:
             texto_completo = ""
-            for page in pdf.pages:
+            marcar("extraccion")
+            for page in paginas_medidas(pdf.pages):
                 texto_completo += page.extract_text() + "\n"
             
-        lineas = texto_completo.splitlines()
+        lineas = filtrar_lineas(texto_completo.splitlines(), "ICBC (Formato 2)")
+        contar("lineas", len(lineas))
+        marcar("secciones")
         
         # --- 1. Extracción de Metadata ---
         titular_global = "Sin Especificar"
@@ -66,6 +72,7 @@ def procesar_icbc_formato_2(archivo_pdf):
                     periodo_global = f"Del {desde} al {hasta}"
         
         # --- 2. Extracción de Movimientos ---
+        marcar("importes")
         # Regex: Fecha (DD-mmm.-YYYY) + Descripcion + Importe + Saldo
         # Ej: 30-may-2025 TRANSF CONNBKG $ -250.271,00 $ -735.333,38
         # Nota: El mes puede ser 'may' o 'may.' o '05' dependiendo variante, ajustamos regex
@@ -98,10 +105,13 @@ def procesar_icbc_formato_2(archivo_pdf):
                     "Saldo": saldo
                 })
         
+        contar("movimientos", len(movimientos))
+        contar("cuentas", 1)
         if not movimientos:
             st.error("No se encontraron movimientos. Verifique el formato.")
             return None
 
+        marcar("conciliacion")
         # Convertimos a DataFrame
         df = pd.DataFrame(movimientos)
         
@@ -162,6 +172,7 @@ def procesar_icbc_formato_2(archivo_pdf):
 
         # --- GENERACIÓN EXCEL (ESTILO DASHBOARD) ---
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte ICBC"
@@ -385,6 +396,7 @@ def procesar_icbc_formato_2(archivo_pdf):
         ws.column_dimensions["F"].width = 40
         ws.column_dimensions["G"].width = 18
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
@@ -6,6 +6,8 @@ import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_lineas
+from rendimiento import marcar, contar, paginas_medidas
 
 # Regex para caracteres ilegales en Excel
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -29,11 +31,15 @@ def procesar_icbc_formato_3(archivo_pdf):
 
     try:
         texto_completo = ""
+        marcar("lectura")
         with pdfplumber.open(io.BytesIO(archivo_pdf.read())) as pdf:
-            for page in pdf.pages:
+            marcar("extraccion")
+            for page in paginas_medidas(pdf.pages):
                 texto_completo += page.extract_text() + "\n"
         
-        lineas = texto_completo.splitlines()
+        lineas = filtrar_lineas(texto_completo.splitlines(), "ICBC (Formato 3)")
+        contar("lineas", len(lineas))
+        marcar("secciones")
         
         # --- Metadata ---
         titular_global = "Sin Especificar"
@@ -59,6 +65,7 @@ def procesar_icbc_formato_3(archivo_pdf):
                     break
 
         # --- Movimientos ---
+        marcar("importes")
         # Formato esperado linea: "05-06 VARIOS ..."
         regex_linea = r"^(\d{2}-\d{2})\s+(.*)$"
         regex_importe = r"(\d{1,3}(?:\.\d{3})*,\d{2})"
@@ -109,6 +116,8 @@ def procesar_icbc_formato_3(archivo_pdf):
                         "Importe": importe
                     })
         
+        contar("movimientos", len(movimientos))
+        contar("cuentas", 1)
         if not movimientos:
             st.error("No se encontraron movimientos en este archivo.")
             return None
@@ -119,6 +128,7 @@ def procesar_icbc_formato_3(archivo_pdf):
         
         # --- EXCEL ---
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte Transf"
@@ -213,6 +223,7 @@ def procesar_icbc_formato_3(archivo_pdf):
         ws.column_dimensions["C"].width = 18
         ws.column_dimensions["D"].width = 18
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
@@ -0,0 +1,115 @@
+"""
+Lectura de los Excel que generan los procesar_* (dashboard.py y los reportes propios de cada banco).
+
+Todo lo que trabaja sobre un resultado ya generado (almacén, libro consolidado, transferencias,
+análisis, corpus de regresión) lee los movimientos y saldos de cada hoja con leer_excel, en vez de
+depender del formato de cada banco. Se reconocen los dos diseños de reporte: el dashboard (tablas
+CRÉDITOS A-C / DÉBITOS E-G en paralelo, saldos arriba) y la tabla única Fecha | Descripción |
+Débitos | Créditos. Del encabezado se toman además el titular y el número de cuenta, que junto con
+el banco y la hoja identifican la cuenta (identificar_cuenta). Los números pasan por importe_celda
+y saldo_celda, que usan también los parsers que arman estas mismas hojas sin escribir el Excel.
+"""
+import io
+
+from openpyxl import load_workbook
+
+
+def _tabla(ws, fila, columnas):
+    """Lee filas (fecha, descripción, importe) desde `fila` hasta el total o un hueco"""
+    filas = []
+    while True:
+        fecha, descripcion, importe = (ws[f"{c}{fila}"].value for c in columnas)
+        if isinstance(fecha, str) and (fecha.startswith("TOTAL") or fecha == "SIN MOVIMIENTOS"):
+            break
+        if fecha is None and descripcion is None and importe is None:
+            break
+        if isinstance(importe, (int, float)):
+            filas.append((fecha, descripcion, importe_celda(importe)))
+        fila += 1
+    return filas
+
+
+def importe_celda(valor):
+    """
+    Importe de un movimiento: float al centavo. El xlsx guarda 15-17 cifras significativas, así que
+    el valor leído y el calculado en memoria pueden diferir más allá del centavo
+    """
+    return round(float(valor), 2)
+
+
+def saldo_celda(valor):
+    """Saldo: los números al centavo (enteros como int, como los lee openpyxl); el resto tal cual"""
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        return valor
+    valor = round(valor, 2)
+    return int(valor) if isinstance(valor, float) and valor.is_integer() else valor
+
+
+def texto_celda(valor):
+    """Texto de una celda del encabezado sin espacios repetidos (None si está vacía)"""
+    if valor is None:
+        return None
+    return " ".join(str(valor).split()) or None
+
+
+def identificar_cuenta(banco, hoja):
+    """
+    "Banco · número de cuenta (o titular) · hoja" de una hoja de leer_excel. El nombre de la hoja
+    solo no alcanza: casi todos los bancos usan el mismo ("Reporte Galicia") para cualquier cliente.
+    None si el reporte no trae ni número de cuenta ni titular.
+    """
+    dato = hoja.get("cuenta") or hoja.get("titular")
+    if not dato:
+        return None
+    return " · ".join(p for p in (banco, dato, hoja["hoja"]) if p)
+
+
+def leer_excel(contenido):
+    """
+    Lee el Excel de un procesar_* y devuelve una lista por hoja con
+    {"hoja", "titular", "cuenta", "saldo_inicial", "saldo_final", "creditos", "debitos"} (importes
+    positivos; titular y cuenta: None si el reporte no los trae).
+    Reconoce el dashboard (CRÉDITOS A-C / DÉBITOS E-G) y la tabla única Débitos/Créditos.
+    """
+    return leer_hojas(load_workbook(io.BytesIO(contenido)))
+
+
+def leer_hojas(wb):
+    """Lo mismo que leer_excel, sobre un workbook de openpyxl ya abierto"""
+    hojas = []
+    for ws in wb.worksheets:
+        hoja = {"hoja": ws.title, "titular": None, "cuenta": None, "saldo_inicial": None, "saldo_final": None,
+                "creditos": [], "debitos": []}
+        encontrada = False
+        for fila in ws.iter_rows(min_row=1, max_row=min(ws.max_row, 30)):
+            for celda in fila:
+                valor = celda.value
+                if valor == "SALDO INICIAL":
+                    hoja["saldo_inicial"] = saldo_celda(ws.cell(celda.row, celda.column + 1).value)
+                elif valor == "SALDO FINAL":
+                    hoja["saldo_final"] = saldo_celda(ws.cell(celda.row, celda.column + 1).value)
+                elif valor in ("TITULAR", "CUENTA") and celda.row <= 8:
+                    hoja[valor.lower()] = texto_celda(ws.cell(celda.row, celda.column + 1).value)
+                elif valor == "CRÉDITOS" and celda.column == 1:
+                    hoja["creditos"] = _tabla(ws, celda.row + 2, "ABC")
+                    encontrada = True
+                elif valor == "DÉBITOS" and celda.column == 5:
+                    hoja["debitos"] = _tabla(ws, celda.row + 2, "EFG")
+                    encontrada = True
+                elif valor == "Débitos" and ws.cell(celda.row, celda.column + 1).value == "Créditos":
+                    # Tabla unificada: Fecha | Descripción | Débitos | Créditos
+                    for r in range(celda.row + 1, ws.max_row + 1):
+                        deb = ws.cell(r, celda.column).value
+                        cred = ws.cell(r, celda.column + 1).value
+                        fecha = ws.cell(r, 1).value
+                        desc = ws.cell(r, 2).value
+                        if any(isinstance(v, str) and v.upper().startswith("TOTAL") for v in (fecha, desc)):
+                            break
+                        if isinstance(deb, (int, float)) and deb:
+                            hoja["debitos"].append((fecha, desc, importe_celda(deb)))
+                        if isinstance(cred, (int, float)) and cred:
+                            hoja["creditos"].append((fecha, desc, importe_celda(cred)))
+                    encontrada = True
+        if encontrada:
+            hojas.append(hoja)
+    return hojas
@@ -0,0 +1,411 @@
+"""
+Libro consolidado por cuenta, que crece mes a mes.
+
+Cada extracto que se agrega suma a la cuenta su período: archivo, fechas,
+saldo inicial y final. También suma sus movimientos, salvo los que ya estaban en el libro. Los
+períodos se superponen, así que los movimientos del borde se reconocen con la misma huella que
+usa duplicados.py. Solo se consultan las huellas del libro dentro de las fechas del extracto nuevo.
+Los meses anteriores no se vuelven a procesar: el libro es una base SQLite, y agregar un mes cuesta
+lo mismo con un año de historia que con diez.
+
+La cuenta es banco · número de cuenta (o titular) · hoja, tomados del encabezado del reporte
+(lectura_excel.identificar_cuenta): el nombre de la hoja es el mismo para todos los clientes de un
+banco. Las hojas sin número ni titular no se agregan.
+
+Al agregar se controla la continuidad: el saldo final del período anterior tiene que ser el saldo
+inicial del nuevo. Un salto indica un extracto faltante o mal leído.
+
+El libro se exporta a un solo Excel (una hoja por cuenta con saldo corrido, más la hoja
+"Continuidad") o a Parquet, con una fila por movimiento de todas las cuentas.
+
+Uso:
+    python libro.py agregar enero.pdf febrero.pdf --banco Galicia
+    python libro.py agregar marzo.xlsx --banco Galicia
+    python libro.py estado
+    python libro.py exportar -o libro.xlsx          # o libro.parquet
+BANCOS_LIBRO indica el archivo del libro (por defecto bancos_libro.sqlite). En la app el libro es
+uno solo para todas las sesiones, así que solo se activa si BANCOS_LIBRO está definida.
+"""
+import argparse
+import contextlib
+import datetime
+import hashlib
+import io
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill
+
+RUTA_POR_DEFECTO = "bancos_libro.sqlite"
+TOLERANCIA = 0.005
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS periodos (
+    id INTEGER PRIMARY KEY,
+    cuenta TEXT NOT NULL,
+    archivo TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    desde TEXT,
+    hasta TEXT,
+    saldo_inicial REAL,
+    saldo_final REAL,
+    agregado REAL NOT NULL,
+    nuevos INTEGER NOT NULL,
+    repetidos INTEGER NOT NULL,
+    sin_fecha INTEGER NOT NULL,
+    UNIQUE (cuenta, sha256)
+);
+CREATE TABLE IF NOT EXISTS asientos (
+    cuenta TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    descripcion TEXT NOT NULL,
+    centavos INTEGER NOT NULL,
+    huella TEXT NOT NULL,
+    periodo INTEGER NOT NULL REFERENCES periodos(id) ON DELETE CASCADE,
+    orden INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dias (
+    periodo INTEGER NOT NULL REFERENCES periodos(id) ON DELETE CASCADE,
+    fecha TEXT NOT NULL,
+    centavos INTEGER NOT NULL,
+    PRIMARY KEY (periodo, fecha)
+);
+CREATE INDEX IF NOT EXISTS asientos_cuenta_fecha ON asientos(cuenta, fecha);
+CREATE INDEX IF NOT EXISTS periodos_cuenta ON periodos(cuenta, desde);
+"""
+
+
+def _saldo(valor):
+    return round(float(valor), 2) if isinstance(valor, (int, float)) else None
+
+
+def _huella_texto(movimiento):
+    """duplicados.huella como texto (la fecha ya es columna aparte y la cuenta es la del libro)"""
+    from duplicados import huella
+
+    _, _, centavos, descripcion = huella(movimiento)
+    return f"{centavos}|{descripcion}"
+
+
+def _continuidad(conexion, anterior, saldo_final, hasta, saldo_inicial, desde):
+    """
+    Diferencia entre el saldo en que terminó el período `anterior` (id) y el saldo inicial del siguiente
+    (None si falta alguno). Si los períodos se superponen, al saldo final se le restan los
+    movimientos del extracto anterior en los días compartidos: es el saldo del día anterior a `desde`.
+    Salen de la tabla dias y no de asientos, donde un movimiento repetido queda a nombre del extracto
+    que llegó primero y uno tardío del extracto nuevo caería en los mismos días.
+    """
+    if saldo_final is None or saldo_inicial is None:
+        return None
+    superpuestos = 0
+    if desde is not None and hasta is not None and desde <= hasta:
+        superpuestos = conexion.execute("SELECT COALESCE(SUM(centavos), 0) FROM dias WHERE periodo = ? "
+                                        "AND fecha BETWEEN ? AND ?", (anterior, desde, hasta)).fetchone()[0]
+    diferencia = round(saldo_final - superpuestos / 100 - saldo_inicial, 2)
+    return 0.0 if abs(diferencia) <= TOLERANCIA else diferencia
+
+
+class Libro:
+    """Libro consolidado en un archivo SQLite (una conexión por operación, como almacen.Almacen)"""
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO):
+        self.ruta = ruta
+        with self._conectar() as conexion:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.executescript(ESQUEMA)
+
+    @contextmanager
+    def _conectar(self):
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            conexion.execute("PRAGMA foreign_keys=ON")
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+    def agregar(self, contenido, banco, excel, archivo=""):
+        """
+        Agrega al libro las cuentas del Excel generado para el extracto `contenido` (bytes del PDF o
+        del Excel). Devuelve una lista por cuenta con nuevos, repetidos, sin_fecha, ya_estaba y la
+        continuidad con el período anterior (diferencia, o None si no hay período anterior o saldos).
+        Las hojas que no se pueden identificar vuelven con sin_identificar y no se agregan.
+        """
+        from lectura_excel import identificar_cuenta, leer_excel
+        from transferencias import MovimientoNormalizado, parsear_fecha
+
+        sha256 = hashlib.sha256(contenido).hexdigest()
+        informe = []
+        with self._conectar() as conexion:
+            for hoja in leer_excel(excel):
+                cuenta = identificar_cuenta(banco, hoja)
+                datos = {"cuenta": cuenta or hoja["hoja"], "nuevos": 0, "repetidos": 0, "sin_fecha": 0,
+                         "ya_estaba": False, "sin_identificar": cuenta is None, "anterior": None, "continuidad": None}
+                informe.append(datos)
+                if cuenta is None:
+                    continue
+                if conexion.execute("SELECT 1 FROM periodos WHERE cuenta = ? AND sha256 = ?",
+                                    (cuenta, sha256)).fetchone():
+                    datos["ya_estaba"] = True
+                    continue
+
+                filas = []
+                for clave, signo in (("creditos", 1), ("debitos", -1)):
+                    for fecha, descripcion, importe in hoja[clave]:
+                        dia = parsear_fecha(fecha)
+                        if dia is None:
+                            datos["sin_fecha"] += 1
+                            continue
+                        movimiento = MovimientoNormalizado(cuenta, archivo, dia, str(descripcion or ""),
+                                                           signo * round(abs(importe) * 100), cuenta)
+                        filas.append((dia.isoformat(), movimiento.descripcion, movimiento.centavos,
+                                      _huella_texto(movimiento)))
+                desde = min((f[0] for f in filas), default=None)
+                hasta = max((f[0] for f in filas), default=None)
+
+                # Huellas del libro en las fechas del extracto: solo ahí puede haber superposición
+                existentes = defaultdict(int)
+                if filas:
+                    for fecha, huella in conexion.execute(
+                            "SELECT fecha, huella FROM asientos WHERE cuenta = ? AND fecha BETWEEN ? AND ?",
+                            (cuenta, desde, hasta)):
+                        existentes[(fecha, huella)] += 1
+                ocurrencias = defaultdict(int)
+                nuevas = []
+                for orden, (fecha, descripcion, centavos, huella) in enumerate(filas):
+                    ocurrencias[(fecha, huella)] += 1
+                    if ocurrencias[(fecha, huella)] <= existentes[(fecha, huella)]:
+                        datos["repetidos"] += 1
+                    else:
+                        nuevas.append((fecha, descripcion, centavos, huella, orden))
+                datos["nuevos"] = len(nuevas)
+
+                periodo = {"saldo_inicial": _saldo(hoja["saldo_inicial"]),
+                           "saldo_final": _saldo(hoja["saldo_final"])}
+                cursor = conexion.execute(
+                    "INSERT INTO periodos (cuenta, archivo, sha256, desde, hasta, saldo_inicial, saldo_final, "
+                    "agregado, nuevos, repetidos, sin_fecha) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (cuenta, archivo, sha256, desde, hasta, periodo["saldo_inicial"], periodo["saldo_final"],
+                     time.time(), datos["nuevos"], datos["repetidos"], datos["sin_fecha"]))
+                conexion.executemany(
+                    "INSERT INTO asientos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(cuenta, fecha, descripcion, centavos, huella, cursor.lastrowid, orden)
+                     for fecha, descripcion, centavos, huella, orden in nuevas])
+                # Total por día de todo el extracto (repetidos incluidos), para la continuidad
+                por_dia = defaultdict(int)
+                for fecha, _, centavos, _ in filas:
+                    por_dia[fecha] += centavos
+                conexion.executemany("INSERT INTO dias VALUES (?, ?, ?)",
+                                     [(cursor.lastrowid, fecha, centavos) for fecha, centavos in por_dia.items()])
+
+                # Continuidad con el período que termina antes (los extractos pueden llegar desordenados)
+                if desde is not None:
+                    anterior = conexion.execute(
+                        "SELECT id, archivo, saldo_final, hasta FROM periodos "
+                        "WHERE cuenta = ? AND id != ? AND hasta <= ? "
+                        "ORDER BY hasta DESC, desde DESC LIMIT 1", (cuenta, cursor.lastrowid, hasta)).fetchone()
+                    if anterior is not None:
+                        datos["anterior"] = anterior[1]
+                        datos["continuidad"] = _continuidad(conexion, anterior[0], anterior[2], anterior[3],
+                                                            periodo["saldo_inicial"], desde)
+        return informe
+
+    def periodos(self, cuenta=None):
+        """Períodos por cuenta, ordenados por fecha, con la continuidad respecto del anterior"""
+        consulta = "SELECT id, cuenta, archivo, desde, hasta, saldo_inicial, saldo_final, nuevos, repetidos, " \
+                   "sin_fecha FROM periodos"
+        parametros = ()
+        if cuenta is not None:
+            consulta += " WHERE cuenta = ?"
+            parametros = (cuenta,)
+        with self._conectar() as conexion:
+            filas = conexion.execute(consulta + " ORDER BY cuenta, desde, hasta", parametros).fetchall()
+            periodos = [dict(zip(("id", "cuenta", "archivo", "desde", "hasta", "saldo_inicial", "saldo_final", "nuevos",
+                                  "repetidos", "sin_fecha"), f)) for f in filas]
+            for anterior, periodo in zip([None] + periodos, periodos):
+                periodo["continuidad"] = None
+                if anterior is not None and anterior["cuenta"] == periodo["cuenta"]:
+                    periodo["continuidad"] = _continuidad(conexion, anterior["id"], anterior["saldo_final"],
+                                                          anterior["hasta"], periodo["saldo_inicial"],
+                                                          periodo["desde"])
+        return periodos
+
+    def cuentas(self):
+        with self._conectar() as conexion:
+            return [f[0] for f in conexion.execute("SELECT DISTINCT cuenta FROM periodos ORDER BY cuenta")]
+
+    def asientos(self, cuenta):
+        """Movimientos de la cuenta en orden (fecha, período, orden en el extracto) con su extracto de origen"""
+        with self._conectar() as conexion:
+            return conexion.execute(
+                "SELECT a.fecha, a.descripcion, a.centavos, p.archivo FROM asientos a "
+                "JOIN periodos p ON p.id = a.periodo WHERE a.cuenta = ? "
+                "ORDER BY a.fecha, p.desde, a.periodo, a.orden", (cuenta,)).fetchall()
+
+    def estadisticas(self):
+        with self._conectar() as conexion:
+            cuentas, periodos = conexion.execute("SELECT COUNT(DISTINCT cuenta), COUNT(*) FROM periodos").fetchone()
+            asientos = conexion.execute("SELECT COUNT(*) FROM asientos").fetchone()[0]
+        return {"ruta": self.ruta, "cuentas": cuentas, "periodos": periodos, "movimientos": asientos}
+
+    # -----------------------------------------------------------------------
+    # Exportación
+    # -----------------------------------------------------------------------
+
+    def exportar_excel(self):
+        """Un Excel (bytes) con una hoja por cuenta (saldo corrido desde el primer período) y la continuidad"""
+        from transferencias import _tabla
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Continuidad"
+        periodos = self.periodos()
+        filas = [(p["cuenta"], p["archivo"], _fecha(p["desde"]), _fecha(p["hasta"]), p["saldo_inicial"],
+                  p["saldo_final"], p["nuevos"], p["repetidos"], p["continuidad"]) for p in periodos]
+        rojo = PatternFill(start_color="FDE9D9", end_color="FDE9D9", fill_type="solid")
+        _tabla(ws, "CONTINUIDAD DE SALDOS POR CUENTA",
+               ["Cuenta", "Extracto", "Desde", "Hasta", "Saldo inicial", "Saldo final", "Nuevos", "Repetidos",
+                "Salto de saldo"], filas, [30, 30, 12, 12, 16, 16, 10, 11, 16], monedas=(4, 5, 8),
+               relleno=lambda f: rojo if f[-1] else None)
+        for fila in ws.iter_rows(min_row=4, min_col=3, max_col=4):
+            for celda in fila:
+                celda.number_format = "DD/MM/YYYY"
+
+        nombres = set()
+        for cuenta in self.cuentas():
+            nombre = _nombre_hoja(cuenta, nombres)
+            ws = wb.create_sheet(nombre)
+            inicial = next((p["saldo_inicial"] for p in periodos if p["cuenta"] == cuenta), None)
+            saldo = round((inicial or 0) * 100)
+            filas = []
+            for fecha, descripcion, centavos, archivo in self.asientos(cuenta):
+                saldo += centavos
+                filas.append((_fecha(fecha), descripcion, centavos / 100 if centavos > 0 else None,
+                              -centavos / 100 if centavos < 0 else None,
+                              saldo / 100 if inicial is not None else None, archivo))
+            _tabla(ws, cuenta.upper(), ["Fecha", "Descripción", "Crédito", "Débito", "Saldo", "Extracto"], filas,
+                   [12, 50, 16, 16, 18, 30], monedas=(2, 3, 4))
+            for fila in ws.iter_rows(min_row=4, max_col=1):
+                fila[0].number_format = "DD/MM/YYYY"
+            ws.cell(2, 1, f"Saldo inicial: {inicial:,.2f}" if inicial is not None else "Sin saldo inicial")
+            ws.cell(2, 1).font = Font(italic=True, color="595959")
+
+        salida = io.BytesIO()
+        wb.save(salida)
+        return salida.getvalue()
+
+    def exportar_parquet(self, ruta):
+        """Todas las cuentas en un Parquet: cuenta, fecha, descripcion, importe, extracto"""
+        import pandas as pd
+
+        filas = [(cuenta, fecha, descripcion, centavos / 100, archivo)
+                 for cuenta in self.cuentas() for fecha, descripcion, centavos, archivo in self.asientos(cuenta)]
+        df = pd.DataFrame(filas, columns=["cuenta", "fecha", "descripcion", "importe", "extracto"])
+        df["fecha"] = pd.to_datetime(df["fecha"])
+        df.to_parquet(ruta, index=False)  # requiere pyarrow (llega con streamlit)
+        return len(df)
+
+
+def _fecha(texto):
+    return datetime.date.fromisoformat(texto) if texto else None
+
+
+def _nombre_hoja(cuenta, usados):
+    """Nombre de hoja válido para Excel (31 caracteres, sin []:*?/\\) y sin repetir"""
+    base = "".join(" " if c in "[]:*?/\\" else c for c in cuenta)[:31].strip() or "Cuenta"
+    nombre, n = base, 2
+    while nombre.lower() in usados:
+        sufijo = f" ({n})"
+        nombre, n = base[:31 - len(sufijo)] + sufijo, n + 1
+    usados.add(nombre.lower())
+    return nombre
+
+
+_LIBRO = None
+_lock_libro = threading.Lock()
+
+
+def libro_compartido():
+    """El libro del proceso según BANCOS_LIBRO (None si no está definida o es 0: lo comparten todas las sesiones)"""
+    global _LIBRO
+    ruta = os.environ.get("BANCOS_LIBRO", "").strip()
+    if not ruta or ruta == "0":
+        return None
+    with _lock_libro:
+        if _LIBRO is None or _LIBRO.ruta != ruta:
+            _LIBRO = Libro(ruta)
+        return _LIBRO
+
+
+# ---------------------------------------------------------------------------
+# Línea de comandos
+# ---------------------------------------------------------------------------
+
+def _informar(nombre, informe):
+    for datos in informe:
+        if datos["sin_identificar"]:
+            print(f"  {nombre} [{datos['cuenta']}]: el reporte no trae número de cuenta ni titular, no se agrega")
+            continue
+        if datos["ya_estaba"]:
+            print(f"  {nombre} [{datos['cuenta']}]: ya estaba en el libro")
+            continue
+        texto = f"  {nombre} [{datos['cuenta']}]: {datos['nuevos']} nuevos, {datos['repetidos']} repetidos"
+        if datos["sin_fecha"]:
+            texto += f", {datos['sin_fecha']} sin fecha"
+        if datos["continuidad"]:
+            texto += f" · SALTO DE SALDO de {datos['continuidad']:,.2f} respecto de {datos['anterior']}"
+        print(texto)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Libro consolidado por cuenta, incremental mes a mes")
+    parser.add_argument("--libro", default=os.environ.get("BANCOS_LIBRO", RUTA_POR_DEFECTO))
+    sub = parser.add_subparsers(dest="comando", required=True)
+    agregar = sub.add_parser("agregar", help="Agregar extractos (PDF o Excel generados por la app)")
+    agregar.add_argument("archivos", nargs="+")
+    agregar.add_argument("--banco", help="Banco de los extractos (en los PDF, por defecto se detecta)")
+    sub.add_parser("estado", help="Cuentas, períodos y saltos de saldo")
+    exportar = sub.add_parser("exportar", help="Exportar a Excel (.xlsx) o Parquet (.parquet)")
+    exportar.add_argument("-o", "--salida", default="libro.xlsx")
+    args = parser.parse_args()
+
+    libro = Libro(args.libro)
+    if args.comando == "agregar":
+        from transferencias import _excel_de_pdf
+
+        for ruta in args.archivos:
+            nombre = os.path.basename(ruta)
+            with open(ruta, "rb") as f:
+                contenido = f.read()
+            if ruta.lower().endswith(".xlsx"):
+                banco, excel = args.banco, contenido
+            else:
+                with contextlib.redirect_stdout(io.StringIO()):  # trazas de depuración de los procesadores
+                    banco, excel = _excel_de_pdf(ruta, args.banco)
+            if excel is None:
+                print(f"  {nombre}: no se pudo procesar{'' if banco else ' (banco no detectado)'}", file=sys.stderr)
+                continue
+            _informar(nombre, libro.agregar(contenido, banco, excel, nombre))
+    elif args.comando == "estado":
+        for p in libro.periodos():
+            salto = f"  SALTO {p['continuidad']:,.2f}" if p["continuidad"] else ""
+            print(f"{p['cuenta']:<40} {p['desde'] or '-':>10} a {p['hasta'] or '-':>10}  {p['archivo']}{salto}")
+        print(libro.estadisticas())
+    else:
+        if args.salida.lower().endswith(".parquet"):
+            cantidad = libro.exportar_parquet(args.salida)
+        else:
+            with open(args.salida, "wb") as f:
+                f.write(libro.exportar_excel())
+            cantidad = libro.estadisticas()["movimientos"]
+        print(f"{cantidad} movimientos -> {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
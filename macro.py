@@ -6,6 +6,8 @@ import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_lineas
+from rendimiento import marcar, contar, paginas_medidas
 
 # Regex para caracteres ilegales en Excel
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -41,9 +43,13 @@ def procesar_macro(archivo_pdf):
         patron_fecha = r"\d{2}/\d{2}/\d{4}"
 
         # Abrir el PDF usando PyPDF2
+        marcar("lectura")
         reader = PyPDF2.PdfReader(io.BytesIO(archivo_pdf.read()))
-        texto_completo = "".join(page.extract_text() + "\n" for page in reader.pages)
-        lineas_raw = texto_completo.splitlines()
+        marcar("extraccion")
+        texto_completo = "".join(page.extract_text() + "\n" for page in paginas_medidas(reader.pages))
+        lineas_raw = filtrar_lineas(texto_completo.splitlines(), "Macro")
+        contar("lineas", len(lineas_raw))
+        marcar("secciones")
 
         
         # 1. Metadatos (Titular, Periodo)
@@ -80,6 +86,7 @@ def procesar_macro(archivo_pdf):
         # LOGICA ORIGINAL PRESERVADA: Saltarse encabezado inicial (20 lineas)
         texto = texto[20:] 
 
+        marcar("movimientos")
         movimientos = []
         for linea in texto:
             if "Saldos Finales" in linea:
@@ -94,6 +101,7 @@ def procesar_macro(archivo_pdf):
                 movimientos.append(linea)
 
         # Procesar movimientos
+        marcar("importes")
         resultado = []
         for linea in movimientos:
             if not linea.strip():
@@ -125,12 +133,15 @@ def procesar_macro(archivo_pdf):
                 st.warning(f"Línea con formato inesperado: {linea}")
 
 
+        contar("movimientos", len(resultado))
+        contar("cuentas", 1)
         if not resultado:
             st.warning("No se encontraron movimientos en el PDF")
             return None
 
         # --- GENERACIÓN EXCEL (DASHBOARD) ---
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte Macro"
@@ -346,6 +357,7 @@ def procesar_macro(archivo_pdf):
         ws.column_dimensions["F"].width = 40
         ws.column_dimensions["G"].width = 18
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
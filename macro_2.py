@@ -6,6 +6,8 @@ import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_texto
+from rendimiento import marcar, contar, paginas_medidas
 
 # Regex
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -32,12 +34,17 @@ def procesar_macro_formato_2(archivo_pdf):
     st.info("Procesando archivo del Banco Macro (Formato 2)...")
     try:
         archivo_pdf.seek(0)
+        marcar("lectura")
         with pdfplumber.open(io.BytesIO(archivo_pdf.read())) as pdf:
             texto_completo = ""
-            for page in pdf.pages:
+            marcar("extraccion")
+            for page in paginas_medidas(pdf.pages):
                 texto_completo += page.extract_text() + "\n"
         
+        texto_completo = filtrar_texto(texto_completo, "Macro (Formato 2)")
         lineas = texto_completo.splitlines()
+        contar("lineas", len(lineas))
+        marcar("secciones")
 
         # 1. Metadatos
         titular = "Sin Especificar"
@@ -55,6 +62,7 @@ def procesar_macro_formato_2(archivo_pdf):
             cuenta = match_cuenta.group(1)
 
         # 2. Movimientos
+        marcar("movimientos")
         # Separar el texto completo en bloques usando la fecha de inicio de transacción como delimitador
         blocks = re.split(r"(?m)^(?=\d{2}/\d{2}/\d{4})", texto_completo)
         
@@ -163,6 +171,7 @@ def procesar_macro_formato_2(archivo_pdf):
                     "orphans_above": []
                 })
 
+        marcar("union_lineas")
         # PRE-PASS: Mover orphans_below a orphans_above si la siguiente transaccion no tiene descripcion
         if len(raw_txs) > 0:
             if not has_alpha(raw_txs[0]['header_desc']):
@@ -196,10 +205,13 @@ def procesar_macro_formato_2(archivo_pdf):
                 "Saldo": tx["saldo"]
             })
 
+        contar("movimientos", len(transactions))
+        contar("cuentas", 1)
         if not transactions:
             st.warning("No se encontraron movimientos")
             return None
 
+        marcar("conciliacion")
         # Ordenar cronologicamente ascendente (vienen descendente)
         # Convertir a datetime para metadata
         df = pd.DataFrame(transactions)
@@ -228,6 +240,7 @@ def procesar_macro_formato_2(archivo_pdf):
 
         # Generar Excel
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte Macro"
@@ -424,6 +437,7 @@ def procesar_macro_formato_2(archivo_pdf):
         ws.column_dimensions["F"].width = 40
         ws.column_dimensions["G"].width = 18
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
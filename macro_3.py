@@ -6,9 +6,27 @@ import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_lineas
+from rendimiento import marcar, contar, paginas_medidas
+from patrones import registro
 
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
 
+# Patrones compilados (registro central, medibles en modo perfilado)
+RE_MACRO_3 = registro("Macro (Formato 3)")
+RE_FECHA_INTERNA = RE_MACRO_3.compilar("fecha_interna", r'\s{2,}\d{2}/\d{2}/\d{2}\s')
+RE_FECHA_CORTA = RE_MACRO_3.compilar("fecha_corta", r'\d{2}/\d{2}/\d{2}')
+RE_TITULAR = RE_MACRO_3.compilar("titular", r'C\.U\.I\.T\s+\d+\s+(.*)')
+RE_PERIODO = RE_MACRO_3.compilar(
+    "periodo", r'Per[ií]odo\s+del\s+Extracto:\s*(\d{2}/\d{2}/\d{4})\s+al\s+(\d{2}/\d{2}/\d{4})', re.IGNORECASE
+)
+RE_CUENTA_HEADER = RE_MACRO_3.compilar("cuenta_header", r'(CUENTA\s+CORRIENTE.*?)NRO\.:\s*(\S+)', re.IGNORECASE)
+RE_FECHA = RE_MACRO_3.compilar("fecha", r'^\s*(\d{2}/\d{2}/\d{2})\s+(.*)')
+RE_MONTO = RE_MACRO_3.compilar("monto", r'-?\d{1,3}(?:\.\d{3})*,\d{2}')
+RE_SEPARADOR = RE_MACRO_3.compilar("separador", r'^\s*-\s+-\s+-')
+RE_CERO_FINAL = RE_MACRO_3.compilar("cero_final", r'\s+0\s*$')
+RE_ESPACIOS = RE_MACRO_3.compilar("espacios", r'\s{2,}')
+
 def clean_for_excel(text):
     if not text: return ""
     text = str(text)
@@ -43,21 +61,19 @@ def _detectar_umbral(lineas):
 def _split_lineas_fusionadas(lineas):
     """Separa líneas que tienen 2+ movimientos pegados por la extracción PDF."""
     resultado = []
-    re_fecha_interna = re.compile(r'(\s{2,})(\d{2}/\d{2}/\d{2}\s)')
-    
     for linea in lineas:
         # Buscar fechas internas (no al inicio de la línea)
         # Una fecha interna es precedida por 2+ espacios y aparece después de posición 20
         partes = []
         pos = 0
-        for m in re.finditer(r'\s{2,}\d{2}/\d{2}/\d{2}\s', linea):
+        for m in RE_FECHA_INTERNA.finditer(linea):
             start = m.start()
             if start < 20:  # La primera fecha puede empezar cerca del inicio
                 continue
             # Encontrar donde empieza la fecha dentro del match
             fecha_start = m.start() + len(m.group()) - len(m.group().lstrip())
             # Buscar posición real de la fecha
-            fecha_match = re.search(r'\d{2}/\d{2}/\d{2}', m.group())
+            fecha_match = RE_FECHA_CORTA.search(m.group())
             if fecha_match:
                 real_start = m.start() + fecha_match.start()
                 if real_start > 20:  # No es la primera fecha de la línea
@@ -304,27 +320,33 @@ def procesar_macro_formato_3(archivo_pdf):
     st.info("Procesando archivo del Banco Macro (Formato 3 - Multi-Cuenta)...")
     try:
         archivo_pdf.seek(0)
+        marcar("lectura")
         reader = PyPDF2.PdfReader(io.BytesIO(archivo_pdf.read()))
-        texto = "".join(page.extract_text() + "\n" for page in reader.pages)
+        marcar("extraccion")
+        texto = "".join(page.extract_text() + "\n" for page in paginas_medidas(reader.pages))
+        marcar("limpieza")
         texto = texto.replace('\x00', '')
         
-        lineas_raw = texto.splitlines()
+        lineas_raw = filtrar_lineas(texto.splitlines(), "Macro F3")
+        contar("lineas", len(lineas_raw))
         
         # Pre-procesamiento: separar líneas fusionadas (2 movimientos en 1 línea)
+        marcar("union_lineas")
         lineas = _split_lineas_fusionadas(lineas_raw)
         
+        marcar("secciones")
         # === METADATOS ===
         titular = "Sin Especificar"
         periodo = "Sin Especificar"
         
         for l in lineas_raw[:20]:
-            match_tit = re.search(r'C\.U\.I\.T\s+\d+\s+(.*)', l)
+            match_tit = RE_TITULAR.search(l)
             if match_tit:
                 titular = match_tit.group(1).strip()
                 break
         
         for l in lineas_raw[:20]:
-            match_per = re.search(r'Per[ií]odo\s+del\s+Extracto:\s*(\d{2}/\d{2}/\d{4})\s+al\s+(\d{2}/\d{2}/\d{4})', l, re.IGNORECASE)
+            match_per = RE_PERIODO.search(l)
             if match_per:
                 periodo = f"Del {match_per.group(1)} al {match_per.group(2)}"
                 break
@@ -333,9 +355,7 @@ def procesar_macro_formato_3(archivo_pdf):
         umbral = _detectar_umbral(lineas)
         
         # === PARSEO POR CUENTAS ===
-        re_cuenta_header = re.compile(r'(CUENTA\s+CORRIENTE.*?)NRO\.:\s*(\S+)', re.IGNORECASE)
-        re_fecha = re.compile(r'^\s*(\d{2}/\d{2}/\d{2})\s+(.*)')
-        re_monto = re.compile(r'-?\d{1,3}(?:\.\d{3})*,\d{2}')
+        marcar("movimientos")
         
         # Diccionario de cuentas: {nro: {nombre, saldo_ini, saldo_fin, movimientos}}
         cuentas = {}
@@ -347,7 +367,7 @@ def procesar_macro_formato_3(archivo_pdf):
             l_upper = linea.upper().strip()
             
             # Detectar inicio de sección de cuenta
-            match_cta = re_cuenta_header.search(linea)
+            match_cta = RE_CUENTA_HEADER.search(linea)
             if match_cta:
                 nombre_cta = match_cta.group(1).strip()
                 nro_cta = match_cta.group(2).strip()
@@ -396,7 +416,7 @@ def procesar_macro_formato_3(archivo_pdf):
                 continue
             if "SUCURSAL" in l_upper and "MONEDA" in l_upper:
                 continue
-            if re.match(r'^\s*-\s+-\s+-', linea):
+            if RE_SEPARADOR.match(linea):
                 cuenta_actual_nro = None  # Separador = fin de esta sección
                 continue
             
@@ -414,7 +434,7 @@ def procesar_macro_formato_3(archivo_pdf):
             # Saldo Anterior
             if "SALDO ULTIMO EXTRACTO" in l_upper:
                 if not cta["saldo_ini_set"]:
-                    montos = re_monto.findall(linea)
+                    montos = RE_MONTO.findall(linea)
                     if montos:
                         val = parse_monto(montos[-1])
                         monto_str = montos[-1]
@@ -429,7 +449,7 @@ def procesar_macro_formato_3(archivo_pdf):
             # Saldo Final
             if "SALDO FINAL" in l_upper:
                 # Siempre tomar el último (por si aparece en varias páginas)
-                montos = re_monto.findall(linea)
+                montos = RE_MONTO.findall(linea)
                 if montos:
                     val = parse_monto(montos[-1])
                     monto_str = montos[-1]
@@ -442,11 +462,11 @@ def procesar_macro_formato_3(archivo_pdf):
                 continue
             
             # Movimientos: fecha dd/mm/yy
-            match_mov = re_fecha.match(linea)
+            match_mov = RE_FECHA.match(linea)
             if match_mov:
                 fecha = match_mov.group(1)
                 
-                montos = re_monto.findall(linea)
+                montos = RE_MONTO.findall(linea)
                 if not montos:
                     continue
                 
@@ -454,8 +474,8 @@ def procesar_macro_formato_3(archivo_pdf):
                 desc = match_mov.group(2)
                 for m in montos:
                     desc = desc.replace(m, "", 1)
-                desc = re.sub(r'\s+0\s*$', '', desc).strip()
-                desc = re.sub(r'\s{2,}', ' ', desc).strip()
+                desc = RE_CERO_FINAL.sub('', desc).strip()
+                desc = RE_ESPACIOS.sub(' ', desc).strip()
                 
                 # Primer monto = importe, determinar signo por posición
                 primer_monto_str = montos[0]
@@ -474,8 +494,12 @@ def procesar_macro_formato_3(archivo_pdf):
                     "Importe": importe
                 })
         
+        contar("cuentas", len(orden_cuentas))
+        contar("movimientos", sum(len(cuentas[nro]["movimientos"]) for nro in orden_cuentas))
+
         # === GENERAR EXCEL ===
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         # Eliminar hoja por defecto
         wb.remove(wb.active)
@@ -512,6 +536,7 @@ def procesar_macro_formato_3(archivo_pdf):
             st.warning("No se encontraron cuentas en el PDF")
             return None
         
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
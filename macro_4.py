@@ -6,6 +6,8 @@ import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_lineas
+from rendimiento import marcar, contar, paginas_medidas
 
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
 
@@ -33,13 +35,17 @@ def procesar_macro_formato_4(archivo_pdf):
         archivo_pdf.seek(0)
         
         texto = ""
+        marcar("lectura")
         with pdfplumber.open(io.BytesIO(archivo_pdf.read())) as pdf:
-            for page in pdf.pages:
+            marcar("extraccion")
+            for page in paginas_medidas(pdf.pages):
                 extracted = page.extract_text()
                 if extracted:
                     texto += extracted + "\n"
         
-        lineas_raw = texto.splitlines()
+        lineas_raw = filtrar_lineas(texto.splitlines(), "Macro (Formato 4)")
+        contar("lineas", len(lineas_raw))
+        marcar("secciones")
         
         # === METADATOS ===
         titular = "Sin Especificar"
@@ -95,6 +101,7 @@ def procesar_macro_formato_4(archivo_pdf):
         movimientos = []
         
         # 2. Extraer Movimientos
+        marcar("importes")
         for l in lineas_raw:
             match_mov = re_fecha.match(l.strip())
             
@@ -136,6 +143,7 @@ def procesar_macro_formato_4(archivo_pdf):
                     saldo_fin = parse_monto(montos_fi[-1])
         
         # Balanceo heurístico refinado:
+        marcar("conciliacion")
         # Calcular el saldo acumulado para determinar el signo correcto de los montos sin prefijo "N/D" o "N/C"
         saldo_calculado = saldo_ini
         for idx_m, mov in enumerate(movimientos):
@@ -166,10 +174,14 @@ def procesar_macro_formato_4(archivo_pdf):
                       # Validemos si el signo ya es negativo
                       pass
                       
+        contar("movimientos", len(movimientos))
+        contar("cuentas", 1)
+
         # === GENERAR EXCEL ===
         df = pd.DataFrame(movimientos)
         
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         ws = wb.active
         
@@ -391,6 +403,7 @@ def procesar_macro_formato_4(archivo_pdf):
         if not movimientos:
             st.warning("No se encontraron movimientos. Se generará un Excel en blanco.")
             
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
@@ -0,0 +1,210 @@
+import os
+import threading
+import time
+
+# Métricas en formato de texto de Prometheus (sin dependencias: contadores, medidores e histogramas
+# con etiquetas). Las usan el servicio HTTP (GET /metrics) y el corredor del corpus (--metricas, para
+# el textfile collector de node_exporter). Cubren trabajos por banco, páginas y movimientos, latencia
+# por etapa, tiempo de CPU por banco, aciertos de caché, fallas de conciliación (control D7 distinto
+# de cero) y profundidad de la cola de trabajadores.
+
+BUCKETS_SEGUNDOS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(nombres, valores, extra=""):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _clave(self, etiquetas):
+        if set(etiquetas) != set(self.etiquetas):
+            raise ValueError(f"{self.nombre}: se esperaban las etiquetas {self.etiquetas}, no {tuple(etiquetas)}")
+        return tuple(str(etiquetas[n]) for n in self.etiquetas)
+
+    def encabezado(self):
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, valor=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def valor(self, **etiquetas):
+        return self._valores.get(self._clave(etiquetas), 0)
+
+    def exponer(self):
+        with self._lock:
+            filas = sorted(self._valores.items())
+        return self.encabezado() + [f"{self.nombre}{_etiquetas(self.etiquetas, k)} {_numero(v)}" for k, v in filas]
+
+
+class Medidor(_Metrica):
+    """Valor instantáneo. Con `funcion` se calcula al exponer (ej. profundidad de la cola)"""
+    tipo = "gauge"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), funcion=None):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.funcion = funcion
+
+    def set(self, valor, **etiquetas):
+        with self._lock:
+            self._valores[self._clave(etiquetas)] = valor
+
+    def exponer(self):
+        if self.funcion is not None:
+            self.set(self.funcion())
+        with self._lock:
+            filas = sorted(self._valores.items())
+        return self.encabezado() + [f"{self.nombre}{_etiquetas(self.etiquetas, k)} {_numero(v)}" for k, v in filas]
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            conteos, suma = self._valores.get(clave, ([0] * len(self.buckets), 0.0))
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    conteos[i] += 1
+                    break
+            self._valores[clave] = (conteos, suma + valor)
+
+    def exponer(self):
+        lineas = self.encabezado()
+        with self._lock:
+            filas = sorted((k, (list(c), s)) for k, (c, s) in self._valores.items())
+        for clave, (conteos, suma) in filas:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, conteos):
+                acumulado += conteo
+                etiquetas = _etiquetas(self.etiquetas, clave, f'le="{_numero(limite)}"')
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {_numero(round(suma, 6))}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {acumulado}")
+        return lineas
+
+
+class Registro:
+    def __init__(self):
+        self.metricas = []
+
+    def _agregar(self, metrica):
+        # Registrar otra vez un nombre reemplaza la familia anterior (ej. un Servicio nuevo en el mismo
+        # proceso): no se repiten las líneas # TYPE y la función del medidor viejo no retiene su objeto
+        self.metricas = [m for m in self.metricas if m.nombre != metrica.nombre] + [metrica]
+        return metrica
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._agregar(Contador(nombre, ayuda, etiquetas))
+
+    def medidor(self, nombre, ayuda, etiquetas=(), funcion=None):
+        return self._agregar(Medidor(nombre, ayuda, etiquetas, funcion))
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_SEGUNDOS):
+        return self._agregar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def exponer(self):
+        """Todas las métricas en formato de texto de Prometheus (text/plain; version=0.0.4)"""
+        lineas = []
+        for metrica in self.metricas:
+            lineas += metrica.exponer()
+        return "\n".join(lineas) + "\n"
+
+
+REGISTRO = Registro()
+
+TRABAJOS = REGISTRO.contador("bancos_trabajos_total", "Trabajos procesados por banco y resultado",
+                             ("banco", "resultado"))
+PAGINAS = REGISTRO.contador("bancos_paginas_total", "Páginas de PDF procesadas", ("banco",))
+MOVIMIENTOS = REGISTRO.contador("bancos_movimientos_total", "Movimientos extraídos", ("banco",))
+CPU = REGISTRO.contador("bancos_cpu_segundos_total", "Tiempo de CPU de los procesadores", ("banco",))
+DURACION = REGISTRO.histograma("bancos_trabajo_segundos", "Duración total del procesamiento", ("banco",))
+ETAPAS = REGISTRO.histograma("bancos_etapa_segundos", "Duración de cada etapa del procesamiento",
+                             ("banco", "etapa"))
+CACHE = REGISTRO.contador("bancos_cache_consultas_total", "Consultas a la caché de resultados",
+                          ("cache", "resultado"))
+CONCILIACION = REGISTRO.contador("bancos_conciliacion_fallas_total",
+                                 "Hojas cuyo control (saldo inicial + créditos - débitos - saldo final) no da cero",
+                                 ("banco",))
+CALENTAMIENTO = REGISTRO.medidor("bancos_calentamiento_segundos",
+                                 "Costo del precalentamiento de los trabajadores (último arranque del pool)",
+                                 ("fase",))
+INICIO = REGISTRO.medidor("bancos_inicio_timestamp_segundos", "Momento de inicio del proceso")
+INICIO.set(round(time.time(), 3))
+
+
+def controles_conciliacion(contenido, tolerancia=0.005, hojas=None):
+    """
+    Recalcula el control de cada hoja del Excel (la celda D7 de los reportes: saldo inicial +
+    créditos - débitos - saldo final) y devuelve [{"hoja", "diferencia"}] de las hojas con saldos.
+    hojas: las de lectura_excel.leer_excel(contenido), si ya se leyeron
+    """
+    from lectura_excel import leer_excel
+
+    controles = []
+    for hoja in hojas if hojas is not None else leer_excel(contenido):
+        inicial, final = hoja["saldo_inicial"], hoja["saldo_final"]
+        if not isinstance(inicial, (int, float)) or not isinstance(final, (int, float)):
+            continue
+        diferencia = round(inicial + sum(f[2] for f in hoja["creditos"]) - sum(f[2] for f in hoja["debitos"])
+                           - final, 2)
+        controles.append({"hoja": hoja["hoja"], "diferencia": 0.0 if abs(diferencia) <= tolerancia else diferencia})
+    return controles
+
+
+def registrar_ejecucion(banco, datos_ejecucion=None, cpu_segundos=None, controles=None, ok=True):
+    """Suma un procesamiento a las métricas (datos_ejecucion: Ejecucion.como_dict() de rendimiento.py)"""
+    banco = banco or "desconocido"
+    TRABAJOS.inc(banco=banco, resultado="ok" if ok else "error")
+    if datos_ejecucion:
+        DURACION.observe(datos_ejecucion["total_ms"] / 1000, banco=banco)
+        for etapa, ms in datos_ejecucion["etapas_ms"].items():
+            ETAPAS.observe(ms / 1000, banco=banco, etapa=etapa)
+        contadores = datos_ejecucion.get("contadores") or {}
+        PAGINAS.inc(contadores.get("paginas", 0), banco=banco)
+        MOVIMIENTOS.inc(contadores.get("movimientos", 0), banco=banco)
+    if cpu_segundos is not None:
+        CPU.inc(round(cpu_segundos, 6), banco=banco)
+    for control in controles or []:
+        if control["diferencia"]:
+            CONCILIACION.inc(banco=banco)
+
+
+def escribir(ruta, registro=REGISTRO):
+    """Guarda las métricas en un archivo .prom (textfile collector); escribe y renombra para no dejarlo a medias"""
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(registro.exponer())
+    os.replace(temporal, ruta)
@@ -0,0 +1,84 @@
+import time
+import traceback
+
+import pandas as pd
+import streamlit as st
+
+from almacen import almacen_compartido
+
+st.set_page_config(page_title="Buscar movimientos", page_icon="🔎")
+
+# Búsqueda en todos los extractos guardados (índice FTS5 de almacen.py): contraparte, concepto o CUIT
+st.title("Buscar movimientos")
+
+almacen = almacen_compartido()
+if almacen is None:
+    st.info("El almacén de resultados está desactivado (BANCOS_RESULTADOS=0): no hay movimientos para buscar.")
+    st.stop()
+
+consulta = st.text_input("Contraparte, concepto o CUIT", placeholder="Ej.: distribuidora sur, 30-71151100-4")
+with st.expander("Filtros"):
+    col1, col2 = st.columns(2)
+    desde = col1.date_input("Desde", value=None, format="DD/MM/YYYY")
+    hasta = col2.date_input("Hasta", value=None, format="DD/MM/YYYY")
+    minimo = col1.number_input("Importe mínimo", min_value=0.0, value=None, step=1000.0)
+    maximo = col2.number_input("Importe máximo", min_value=0.0, value=None, step=1000.0)
+    limite = st.slider("Movimientos a mostrar", min_value=50, max_value=2000, value=200, step=50)
+
+filtros = {"desde": desde, "hasta": hasta, "minimo": minimo, "maximo": maximo}
+if not consulta.strip() and all(v is None for v in filtros.values()):
+    st.caption("Escribí un texto o elegí un filtro para buscar en todos los extractos procesados.")
+    st.stop()
+
+try:
+    inicio = time.perf_counter()
+    # Primero sin banco ni cuenta: el conteo por banco y cuenta arma las opciones de esos dos filtros
+    general = almacen.buscar(consulta, limite=0, **filtros)
+    if general["total"]:
+        por_banco, por_cuenta = dict(general["bancos"]), dict(general["cuentas"])
+        col1, col2 = st.columns(2)
+        banco = col1.selectbox("Banco", [None] + list(por_banco),
+                               format_func=lambda b: "Todos" if b is None else f"{b} ({por_banco[b]:,})")
+        cuentas = [c for c in por_cuenta if banco is None or c.startswith(f"{banco} · ")]
+        cuenta = col2.selectbox("Cuenta", [None] + cuentas,
+                                format_func=lambda c: "Todas" if c is None else f"{c} ({por_cuenta[c]:,})")
+        if cuenta is not None:
+            banco, cuenta = cuenta.split(" · ", 1)
+        resultado = almacen.buscar(consulta, banco=banco, cuenta=cuenta, limite=limite, **filtros)
+    else:
+        resultado = general
+    demora = time.perf_counter() - inicio
+except Exception:
+    print(traceback.format_exc())
+    st.error("No se pudo completar la búsqueda.")
+    st.stop()
+
+if not resultado["total"]:
+    st.warning("No se encontraron movimientos.")
+    st.stop()
+
+movimientos = resultado["movimientos"]
+st.caption(f"{resultado['total']:,} movimientos en {len(resultado['cuentas'])} cuentas "
+           f"({demora * 1000:,.0f} ms)" + (f" · se muestran {len(movimientos):,}"
+                                           if len(movimientos) < resultado["total"] else ""))
+tabla = pd.DataFrame(movimientos, columns=["fecha", "banco", "cuenta", "descripcion", "importe", "extracto"])
+tabla["fecha"] = pd.to_datetime(tabla["fecha"])
+st.dataframe(
+    tabla,
+    hide_index=True,
+    width="stretch",
+    column_config={
+        "fecha": st.column_config.DateColumn("Fecha", format="DD/MM/YYYY"),
+        "banco": "Banco",
+        "cuenta": "Cuenta",
+        "descripcion": st.column_config.TextColumn("Descripción", width="large"),
+        "importe": st.column_config.NumberColumn("Importe", format="$ %.2f"),
+        "extracto": "Extracto",
+    },
+)
+st.download_button(
+    label="Descargar CSV",
+    data=tabla.to_csv(index=False).encode("utf-8"),
+    file_name="busqueda_movimientos.csv",
+    mime="text/csv",
+)
@@ -6,6 +6,8 @@ import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_lineas
+from rendimiento import marcar, contar, paginas_medidas
 
 # Regex para limpiar caracteres ilegales de Excel
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -41,14 +43,18 @@ def procesar_patagonia(archivo_pdf):
     st.info("Procesando archivo del Banco Patagonia...")
     try:
         archivo_pdf.seek(0)
+        marcar("lectura")
         with pdfplumber.open(io.BytesIO(archivo_pdf.read())) as pdf:
             texto_completo = ""
-            for page in pdf.pages:
+            marcar("extraccion")
+            for page in paginas_medidas(pdf.pages):
                 t = page.extract_text()
                 if t:
                     texto_completo += t + "\n"
 
-        lineas = texto_completo.splitlines()
+        lineas = filtrar_lineas(texto_completo.splitlines(), "Patagonia")
+        contar("lineas", len(lineas))
+        marcar("secciones")
 
         # ============================================================
         # 1. METADATOS
@@ -72,6 +78,7 @@ def procesar_patagonia(archivo_pdf):
         # ============================================================
         # 2. PARSEO DE MOVIMIENTOS
         # ============================================================
+        marcar("movimientos")
         # Patrón: línea que empieza con fecha DD/MM/YYYY, tiene descripción,
         # y termina con dos montos (importe y saldo) en formato argentino
         patron_mov = re.compile(
@@ -149,6 +156,7 @@ def procesar_patagonia(archivo_pdf):
         # ============================================================
         # 3. DETERMINAR DÉBITO/CRÉDITO POR DIFERENCIA DE SALDOS
         # ============================================================
+        marcar("conciliacion")
         # Los movimientos están en orden DESCENDENTE (más reciente primero)
         # Invertimos para procesar cronológicamente
         movimientos_raw.reverse()
@@ -187,6 +195,8 @@ def procesar_patagonia(archivo_pdf):
                 "Importe": round(importe_val, 2)
             })
 
+        contar("movimientos", len(transactions))
+        contar("cuentas", 1)
         if not transactions:
             st.warning("No se encontraron movimientos en el PDF.")
             return None
@@ -208,6 +218,7 @@ def procesar_patagonia(archivo_pdf):
         # 4. GENERAR EXCEL (mismo estilo que otros bancos)
         # ============================================================
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         ws = wb.active
         nombre_hoja = clean_for_excel(cuenta)[:31]
@@ -409,6 +420,7 @@ def procesar_patagonia(archivo_pdf):
         ws.column_dimensions["F"].width = 45
         ws.column_dimensions["G"].width = 18
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
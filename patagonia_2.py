@@ -6,6 +6,9 @@ import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from secciones import IndiceSecciones
+from guardia import filtrar_lineas
+from rendimiento import marcar, contar, paginas_medidas
 
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
 
@@ -73,6 +76,7 @@ def find_signs(amounts, target_sum):
 
 def generar_hoja(wb, cuenta_id, titular, periodo, saldo_inicial, saldo_final, transactions):
     """Genera una hoja Excel con el formato estándar para una cuenta"""
+    marcar("excel")
     sheet_name = clean_for_excel(cuenta_id)[:31]
     ws = wb.create_sheet(title=sheet_name)
     ws.sheet_view.showGridLines = False
@@ -247,14 +251,18 @@ def procesar_patagonia_formato_2(archivo_pdf):
     st.info("Procesando archivo del Banco Patagonia (Formato 2)...")
     try:
         archivo_pdf.seek(0)
+        marcar("lectura")
         with pdfplumber.open(io.BytesIO(archivo_pdf.read())) as pdf:
             texto_completo = ""
-            for page in pdf.pages:
+            marcar("extraccion")
+            for page in paginas_medidas(pdf.pages):
                 t = page.extract_text()
                 if t:
                     texto_completo += t + "\n"
 
-        lineas = texto_completo.splitlines()
+        lineas = filtrar_lineas(texto_completo.splitlines(), "Patagonia (Formato 2)")
+        contar("lineas", len(lineas))
+        marcar("secciones")
 
         # 1. METADATOS
         titular = "Sin Especificar"
@@ -268,14 +276,15 @@ def procesar_patagonia_formato_2(archivo_pdf):
         patron_cuenta = re.compile(
             r'(?:CUENTA CORRIENTE EN PESOS|CCTE ESP PJ[\w\s/]*)\s+(\d+)\s+SUBCTA\s+(\d+)\s+SUC\s+(\d+)\s+CBU:\s*(\S+)'
         )
+        indice = IndiceSecciones(lineas, {"cuenta": lambda l: patron_cuenta.search(l.strip()) is not None})
         secciones_raw = []
-        for i, line in enumerate(lineas):
-            m = patron_cuenta.search(line.strip())
-            if m:
-                secciones_raw.append({
-                    "cuenta": m.group(1), "subcta": m.group(2),
-                    "suc": m.group(3), "cbu": m.group(4), "start_idx": i
-                })
+        for i in indice.posiciones("cuenta"):
+            m = patron_cuenta.search(lineas[i].strip())
+            secciones_raw.append({
+                "cuenta": m.group(1), "subcta": m.group(2),
+                "suc": m.group(3), "cbu": m.group(4), "start_idx": i,
+                "end_idx": indice.fin_seccion("cuenta", i)
+            })
 
         if not secciones_raw:
             st.warning("No se encontraron cuentas en el PDF.")
@@ -302,24 +311,21 @@ def procesar_patagonia_formato_2(archivo_pdf):
 
         # 4. PROCESAR CADA CUENTA (agrupada por número)
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         wb.remove(wb.active)
         total_movimientos = 0
 
-        all_secciones = list(secciones_raw)
-
         for cuenta_id, secciones in cuentas_agrupadas.items():
+            marcar("importes")
             # Parsear movimientos de TODAS las secciones de esta cuenta
             all_movimientos_raw = []
             primer_saldo_inicial = None
             ultimo_saldo_final = 0.0
 
             for sec in secciones:
-                sec_start = sec["start_idx"]
-                # Encontrar el fin de esta sección
-                sec_idx_in_all = all_secciones.index(sec)
-                sec_end = all_secciones[sec_idx_in_all + 1]["start_idx"] if sec_idx_in_all + 1 < len(all_secciones) else len(lineas)
-                seccion_lineas = lineas[sec_start:sec_end]
+                # El fin de esta sección es el inicio de la siguiente (precalculado en el índice)
+                seccion_lineas = lineas[sec["start_idx"]:sec["end_idx"]]
 
                 in_movements = False
                 for line in seccion_lineas:
@@ -368,6 +374,7 @@ def procesar_patagonia_formato_2(archivo_pdf):
             movimientos_raw = [m for m in all_movimientos_raw if not m.get("_es_marcador", False)]
 
             # DETERMINAR DÉBITO/CRÉDITO con verificación matemática
+            marcar("conciliacion")
             transactions = []
             prev_saldo = primer_saldo_inicial
             i = 0
@@ -450,8 +457,11 @@ def procesar_patagonia_formato_2(archivo_pdf):
 
             generar_hoja(wb, cuenta_id, titular, periodo, primer_saldo_inicial, ultimo_saldo_final, transactions)
 
+        contar("cuentas", len(cuentas_agrupadas))
+        contar("movimientos", total_movimientos)
         st.success(f"Se procesaron {len(cuentas_agrupadas)} cuenta(s) con {total_movimientos} movimientos totales.")
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
@@ -0,0 +1,160 @@
+import os
+import re
+import time
+from collections import OrderedDict
+
+# Modo perfilado: se decide al registrar cada patrón (normalmente al importar el módulo del banco).
+# Con BANCOS_PERFILAR_REGEX=1 (o activar_perfilado() antes de importar los procesadores) cada patrón
+# queda envuelto en un PatronMedido que cuenta llamadas, aciertos y tiempo acumulado.
+# Sin perfilado se devuelve el re.Pattern compilado tal cual: costo cero en los loops calientes.
+# perfilado.perfilar reinicia los contadores y agrega la tabla al perfil (--perfil y la app).
+# Solo usan el registro Comafi, Galicia, Macro (Formato 3), MercadoPago y los formatos declarativos:
+# los demás procesadores llaman a re directamente y no aparecen en el reporte.
+_PERFILADO = os.environ.get("BANCOS_PERFILAR_REGEX", "").strip().lower() in ("1", "true", "si", "sí")
+
+_REGISTROS = OrderedDict()
+
+
+def activar_perfilado(activo=True):
+    """Activa/desactiva el perfilado para los patrones que se registren a partir de ahora"""
+    global _PERFILADO
+    _PERFILADO = bool(activo)
+
+
+class EstadisticaPatron:
+    """Contadores de un patrón: invocaciones, aciertos y tiempo acumulado (segundos)"""
+    __slots__ = ("llamadas", "aciertos", "tiempo")
+
+    def __init__(self):
+        self.llamadas = 0
+        self.aciertos = 0
+        self.tiempo = 0.0
+
+
+class PatronMedido:
+    """Envoltorio de un re.Pattern que mide cada llamada (solo en modo perfilado)"""
+
+    def __init__(self, compilado, estadistica):
+        self._re = compilado
+        self._est = estadistica
+        self.pattern = compilado.pattern
+        self.flags = compilado.flags
+        self.groups = compilado.groups
+        self.groupindex = compilado.groupindex
+
+    def _medir(self, metodo, *args, **kwargs):
+        t0 = time.perf_counter()
+        res = metodo(*args, **kwargs)
+        est = self._est
+        est.tiempo += time.perf_counter() - t0
+        est.llamadas += 1
+        if res:
+            est.aciertos += 1
+        return res
+
+    def match(self, *args, **kwargs):
+        return self._medir(self._re.match, *args, **kwargs)
+
+    def fullmatch(self, *args, **kwargs):
+        return self._medir(self._re.fullmatch, *args, **kwargs)
+
+    def search(self, *args, **kwargs):
+        return self._medir(self._re.search, *args, **kwargs)
+
+    def findall(self, *args, **kwargs):
+        return self._medir(self._re.findall, *args, **kwargs)
+
+    def split(self, *args, **kwargs):
+        return self._medir(self._re.split, *args, **kwargs)
+
+    def finditer(self, *args, **kwargs):
+        # Se materializa para poder medir el recorrido completo
+        return iter(self._medir(lambda *a, **k: list(self._re.finditer(*a, **k)), *args, **kwargs))
+
+    def sub(self, *args, **kwargs):
+        return self._medir(self._re.sub, *args, **kwargs)
+
+    def __repr__(self):
+        return f"PatronMedido({self.pattern!r})"
+
+
+class RegistroPatrones:
+    """Registro de patrones compilados de un banco/formato"""
+
+    def __init__(self, banco):
+        self.banco = banco
+        self._patrones = OrderedDict()
+        self._estadisticas = OrderedDict()
+
+    def compilar(self, nombre, patron, flags=0):
+        """Compila (una sola vez) y registra un patrón bajo `nombre`"""
+        if nombre in self._patrones:
+            existente = self._patrones[nombre]
+            if existente.pattern != patron or existente.flags & ~re.UNICODE != flags & ~re.UNICODE:
+                raise ValueError(f"Patrón '{nombre}' ya registrado para {self.banco} con otra expresión")
+            return existente
+
+        compilado = re.compile(patron, flags)
+        if _PERFILADO:
+            est = EstadisticaPatron()
+            self._estadisticas[nombre] = est
+            compilado = PatronMedido(compilado, est)
+        self._patrones[nombre] = compilado
+        return compilado
+
+    def __getitem__(self, nombre):
+        return self._patrones[nombre]
+
+    def items(self):
+        return self._patrones.items()
+
+    def reporte(self):
+        """Filas con contadores por patrón (vacío si el perfilado estaba apagado)"""
+        filas = []
+        for nombre, est in self._estadisticas.items():
+            filas.append({
+                "Banco": self.banco,
+                "Patron": nombre,
+                "Regex": self._patrones[nombre].pattern,
+                "Llamadas": est.llamadas,
+                "Aciertos": est.aciertos,
+                "Tasa Acierto": round(est.aciertos / est.llamadas, 4) if est.llamadas else 0.0,
+                "Tiempo (ms)": round(est.tiempo * 1000, 3),
+                "Tiempo/Llamada (us)": round(est.tiempo * 1e6 / est.llamadas, 3) if est.llamadas else 0.0,
+            })
+        return filas
+
+    def reiniciar(self):
+        for est in self._estadisticas.values():
+            est.llamadas = 0
+            est.aciertos = 0
+            est.tiempo = 0.0
+
+
+def registro(banco):
+    """Devuelve (creándolo si hace falta) el registro de patrones de un banco"""
+    if banco not in _REGISTROS:
+        _REGISTROS[banco] = RegistroPatrones(banco)
+    return _REGISTROS[banco]
+
+
+def reporte_global(ordenar_por="Tiempo (ms)", solo_usados=False):
+    """Reporte de todos los bancos, ordenado por el costo acumulado (mayor primero)"""
+    filas = [f for r in _REGISTROS.values() for f in r.reporte() if f["Llamadas"] or not solo_usados]
+    return sorted(filas, key=lambda f: f[ordenar_por], reverse=True)
+
+
+def reiniciar_estadisticas():
+    for r in _REGISTROS.values():
+        r.reiniciar()
+
+
+def texto_reporte(filas):
+    """Tabla de texto con las filas de reporte_global"""
+    if not filas:
+        return "Perfilado de regex inactivo (definir BANCOS_PERFILAR_REGEX=1 antes de importar los procesadores).\n"
+    lineas = [f"{'Banco':<22} {'Patron':<28} {'Llamadas':>10} {'Aciertos':>10} {'Tasa':>7} {'ms':>10}"]
+    for f in filas:
+        lineas.append(f"{f['Banco']:<22} {f['Patron']:<28} {f['Llamadas']:>10} {f['Aciertos']:>10} "
+                      f"{f['Tasa Acierto']:>7.2%} {f['Tiempo (ms)']:>10.2f}")
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,137 @@
+import cProfile
+import io
+import linecache
+import marshal
+import pstats
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+import patrones
+
+# Modo de perfilado opcional por procesamiento (toggle en la app, --perfil en procesadores.py).
+# Corre el procesar_* bajo cProfile y tracemalloc y devuelve artefactos descargables:
+# el .prof (formato estándar de pstats: python -m pstats, snakeviz...) y el top de asignaciones.
+# Así se puede reproducir el perfil de un extracto problemático sin que el PDF salga del servidor:
+# se comparte el perfil, no el archivo. tracemalloc agrega bastante overhead (2-4x); los tiempos
+# absolutos de un job perfilado no son comparables con los de la instrumentación de rendimiento.py.
+# Con el perfilado de regex activo (patrones.py) se agregan también llamadas, aciertos y tiempo por patrón.
+# tracemalloc y los contadores de patrones son uno solo por proceso: se perfila un procesamiento a la
+# vez. Con el pool de procesos cada trabajador atiende un pedido por vez; con un hilo por sesión
+# (BANCOS_PROCESOS=0) un segundo perfil simultáneo se rechaza con PerfilEnCurso.
+
+# Frames que no aportan al reporte de memoria
+_EXCLUIR_MEMORIA = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+_lock_perfil = threading.Lock()
+
+
+class PerfilEnCurso(Exception):
+    """Otro procesamiento se está perfilando en este proceso"""
+
+
+@dataclass
+class Perfil:
+    """Resultado de un procesamiento perfilado"""
+    prof: bytes
+    reporte_cpu: str
+    reporte_memoria: str
+    asignaciones: list = field(default_factory=list)
+    pico_memoria: int = 0
+    segundos: float = 0.0
+    patrones: list = field(default_factory=list)  # filas de patrones.reporte_global (vacío sin perfilado de regex)
+    reporte_patrones: str = ""
+
+
+def _reporte_cpu(stats, top):
+    buffer = io.StringIO()
+    stats.stream = buffer
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    return buffer.getvalue()
+
+
+def _asignaciones(snapshot, top):
+    filas = []
+    for stat in snapshot.filter_traces(_EXCLUIR_MEMORIA).statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        filas.append({
+            "Archivo": frame.filename,
+            "Línea": frame.lineno,
+            "KiB": round(stat.size / 1024, 1),
+            "Bloques": stat.count,
+            "Código": linecache.getline(frame.filename, frame.lineno).strip(),
+        })
+    return filas
+
+
+def _reporte_memoria(asignaciones, pico, actual):
+    lineas = [f"Pico de memoria trazada: {pico / 1024 / 1024:.2f} MiB (retenida al final: {actual / 1024 / 1024:.2f} MiB)",
+              f"Top {len(asignaciones)} asignaciones vivas al terminar, por línea:", ""]
+    for i, a in enumerate(asignaciones, 1):
+        lineas.append(f"#{i:<3} {a['Archivo']}:{a['Línea']}  {a['KiB']:,.1f} KiB en {a['Bloques']:,} bloques")
+        if a["Código"]:
+            lineas.append(f"      {a['Código']}")
+    return "\n".join(lineas) + "\n"
+
+
+def perfilar(funcion, *args, top=30, **kwargs):
+    """
+    Ejecuta funcion(*args, **kwargs) bajo cProfile y tracemalloc.
+    Devuelve (resultado, Perfil). Si la función lanza una excepción se propaga igual
+    (los procesar_* ya capturan sus errores y devuelven None). Lanza PerfilEnCurso si otro hilo del
+    proceso ya está perfilando: su tracemalloc.stop() cortaría esta medición y los picos se mezclarían.
+    """
+    if not _lock_perfil.acquire(blocking=False):
+        raise PerfilEnCurso("Ya hay otro procesamiento perfilándose en este servidor. Volver a intentar cuando "
+                            "termine, o procesar sin perfilar.")
+    try:
+        return _perfilar(funcion, *args, top=top, **kwargs)
+    finally:
+        _lock_perfil.release()
+
+
+def _perfilar(funcion, *args, top=30, **kwargs):
+    ya_trazaba = tracemalloc.is_tracing()
+    if not ya_trazaba:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    patrones.reiniciar_estadisticas()
+    profiler = cProfile.Profile()
+    t0 = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            resultado = funcion(*args, **kwargs)
+        finally:
+            profiler.disable()
+        segundos = time.perf_counter() - t0
+        snapshot = tracemalloc.take_snapshot()
+        actual, pico = tracemalloc.get_traced_memory()
+    finally:
+        if not ya_trazaba:
+            tracemalloc.stop()
+
+    profiler.create_stats()
+    # Serializar antes de armar el Stats: pstats vacía profiler.stats al construirse
+    prof = marshal.dumps(profiler.stats)  # mismo formato que pstats.Stats.dump_stats
+    stats = pstats.Stats(profiler)
+    asignaciones = _asignaciones(snapshot, top)
+    filas_patrones = patrones.reporte_global(solo_usados=True)[:top]
+    perfil = Perfil(
+        prof=prof,
+        reporte_cpu=_reporte_cpu(stats, top),
+        reporte_memoria=_reporte_memoria(asignaciones, pico, actual),
+        asignaciones=asignaciones,
+        pico_memoria=pico,
+        segundos=segundos,
+        patrones=filas_patrones,
+        reporte_patrones=patrones.texto_reporte(filas_patrones),
+    )
+    return resultado, perfil
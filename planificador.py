@@ -0,0 +1,265 @@
+import contextvars
+import itertools
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+
+import calentamiento
+from segundo_plano import TrabajoSesion, _ejecutar, _instalar_captura
+
+# Pool de procesos compartido por todas las sesiones de Streamlit del servidor.
+# Con un hilo por sesión, los procesar_* (bucles de regex en Python puro) compiten por el GIL; acá
+# corren en procesos precalentados (calentamiento.py) y un planificador decide qué pedido entra a
+# cada proceso libre:
+#   - cada sesión tiene su propia cola y un límite de trabajos en proceso a la vez
+#     (BANCOS_TRABAJOS_POR_SESION, 1 por defecto), así que un extracto de 400 páginas ocupa como
+#     mucho un proceso y los demás siguen atendiendo a las otras sesiones;
+#   - entre las sesiones que pueden despachar se turnan: primero la que tiene menos trabajos en
+#     proceso, después la que hace más que no despacha, y a igualdad el pedido más viejo.
+# El avance por página y la cancelación cruzan de proceso por memoria compartida: cada proceso del
+# pool atiende un trabajo a la vez en una "ranura" (avance: páginas hechas/totales; cancelación:
+# número del trabajo a cancelar). BANCOS_PROCESOS fija el tamaño del pool; 0 vuelve al hilo por sesión.
+
+INTERVALO_AVANCE_S = 0.2
+
+
+# ---------------------------------------------------------------------------
+# Lado del proceso trabajador
+# ---------------------------------------------------------------------------
+
+_MEMORIA = None  # (avance, cancelados) recibidos por el inicializador
+
+
+def _recibir_memoria(avance, cancelados):
+    global _MEMORIA
+    _MEMORIA = (avance, cancelados)
+
+
+class _CancelacionRanura:
+    """Equivalente a threading.Event.is_set para un trabajo que corre en otro proceso"""
+
+    def __init__(self, numero, ranura):
+        self.numero = numero
+        self.ranura = ranura
+
+    def is_set(self):
+        return _MEMORIA[1][self.ranura] == self.numero
+
+
+class _TrabajoEnRanura(TrabajoSesion):
+    """TrabajoSesion del lado del trabajador: además publica el avance en la memoria compartida"""
+
+    def avanzar(self, hechas, totales):
+        super().avanzar(hechas, totales)
+        avance = _MEMORIA[0]
+        ranura = self.cancelacion.ranura
+        avance[2 * ranura] = hechas
+        avance[2 * ranura + 1] = totales or 0
+
+
+def _procesar_en_trabajador(numero, ranura, banco, nombre, contenido, cuits_propios, perfilar, diferido=False):
+    from procesadores import ArchivoPDF, procesar_banco
+
+    _instalar_captura()
+    trabajo = _TrabajoEnRanura(clave="", banco=banco, nombre=nombre, cancelacion=_CancelacionRanura(numero, ranura))
+    # Contexto nuevo por trabajo: el proceso se reutiliza y la captura de mensajes no debe quedar puesta
+    contextvars.Context().run(_ejecutar, trabajo, procesar_banco, (banco, ArchivoPDF(contenido, nombre)),
+                              {"cuits_propios": cuits_propios, "diferido": diferido}, perfilar)
+    if trabajo.ejecucion is not None:
+        trabajo.ejecucion.al_avanzar = trabajo.ejecucion.cancelacion = None  # no viajan al proceso principal
+    return {"resultado": trabajo.resultado, "perfil": trabajo.perfil, "ejecucion": trabajo.ejecucion,
+            "mensajes": trabajo.mensajes, "cancelado": trabajo.cancelado, "error": trabajo.error}
+
+
+# ---------------------------------------------------------------------------
+# Lado del servidor de Streamlit
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Pedido:
+    numero: int
+    sesion: str
+    trabajo: TrabajoSesion
+    argumentos: tuple
+    llegada: float = field(default_factory=time.time)
+    ranura: int = None
+
+
+class Planificador:
+    """Pool de procesos compartido con colas por sesión y turnos entre sesiones"""
+
+    def __init__(self, procesos=2, limite_por_sesion=1):
+        self.procesos = procesos
+        self.limite_por_sesion = limite_por_sesion
+        # Sin fork del servidor de Streamlit: los trabajadores salen del forkserver y se calientan solos
+        self._contexto = calentamiento.contexto_aislado()
+        contexto = self._contexto
+        self._avance = contexto.Array("i", 2 * procesos, lock=False)
+        self._cancelados = contexto.Array("i", procesos, lock=False)
+        self._lock = threading.RLock()
+        self._colas = OrderedDict()  # sesión -> deque de pedidos esperando
+        self._en_curso = {}  # número -> pedido
+        self._ranuras_libres = list(range(procesos))
+        self._ultimo_turno = {}  # sesión -> turno en que despachó por última vez
+        self._turnos = itertools.count(1)
+        self._numeros = itertools.count(1)
+        self._pool = self._crear_pool()
+        self._cerrado = threading.Event()
+        self._hilo = threading.Thread(target=self._seguir_avance, name="planificador-avance", daemon=True)
+        self._hilo.start()
+
+    def _crear_pool(self):
+        pool = calentamiento.crear_pool(self.procesos, inicializador=_recibir_memoria,
+                                        argumentos=(self._avance, self._cancelados), contexto=self._contexto)
+        calentamiento.arrancar_trabajadores(pool, self.procesos)
+        return pool
+
+    def enviar(self, sesion, clave, banco, nombre, contenido, cuits_propios=None, perfilar=False, diferido=False):
+        """
+        Encola el extracto de una sesión y devuelve su TrabajoSesion (se actualiza solo). diferido: como en
+        procesar_banco, el resultado es un ResultadoProcesado
+        """
+        trabajo = TrabajoSesion(clave=clave, banco=banco, nombre=nombre)
+        with self._lock:
+            pedido = _Pedido(numero=next(self._numeros), sesion=sesion, trabajo=trabajo,
+                             argumentos=(banco, nombre, contenido, cuits_propios or [], perfilar, diferido))
+            trabajo.al_cancelar = lambda: self._cancelar(pedido)
+            self._colas.setdefault(sesion, deque()).append(pedido)
+            self._despachar()
+        return trabajo
+
+    def _en_curso_por_sesion(self):
+        return Counter(p.sesion for p in self._en_curso.values())
+
+    def _orden(self, colas, en_curso, ultimo_turno):
+        """Sesión a la que le toca, entre las que tienen pedidos en `colas` (None si ninguna)"""
+        sesiones = [s for s, cola in colas.items() if cola]
+        if not sesiones:
+            return None
+        return min(sesiones, key=lambda s: (en_curso[s], ultimo_turno.get(s, 0), colas[s][0].llegada))
+
+    def _despachar(self):
+        en_curso = self._en_curso_por_sesion()
+        while self._ranuras_libres:
+            habilitadas = {s: c for s, c in self._colas.items() if en_curso[s] < self.limite_por_sesion}
+            sesion = self._orden(habilitadas, en_curso, self._ultimo_turno)
+            if sesion is None:
+                break
+            pedido = self._colas[sesion].popleft()
+            if not self._colas[sesion]:
+                del self._colas[sesion]
+            pedido.ranura = self._ranuras_libres.pop()
+            self._avance[2 * pedido.ranura] = self._avance[2 * pedido.ranura + 1] = 0
+            self._cancelados[pedido.ranura] = 0
+            self._en_curso[pedido.numero] = pedido
+            self._ultimo_turno[sesion] = next(self._turnos)
+            en_curso[sesion] += 1
+            pedido.trabajo.posicion = 0
+            pedido.trabajo.inicio = time.time()
+            self._enviar_al_pool(pedido)
+        self._actualizar_posiciones()
+
+    def _enviar_al_pool(self, pedido):
+        argumentos = (pedido.numero, pedido.ranura) + pedido.argumentos
+        try:
+            futuro = self._pool.submit(_procesar_en_trabajador, *argumentos)
+        except BrokenProcessPool:
+            self._rearmar_pool()
+            futuro = self._pool.submit(_procesar_en_trabajador, *argumentos)
+        futuro.add_done_callback(lambda f: self._terminar(pedido, f))
+
+    def _rearmar_pool(self):
+        # Un proceso murió (falta de memoria, señal...): los trabajos que corrían fallan y se arma otro pool
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._crear_pool()
+
+    def _actualizar_posiciones(self):
+        """Posición de cada pedido en espera: simula los turnos que van a venir"""
+        colas = {s: list(c) for s, c in self._colas.items()}
+        en_curso = self._en_curso_por_sesion()
+        ultimo_turno = dict(self._ultimo_turno)
+        turnos = itertools.count(max(ultimo_turno.values(), default=0) + 1)
+        for posicion in itertools.count(1):
+            sesion = self._orden(colas, en_curso, ultimo_turno)
+            if sesion is None:
+                break
+            colas[sesion].pop(0).trabajo.posicion = posicion
+            en_curso[sesion] += 1
+            ultimo_turno[sesion] = next(turnos)
+
+    def _terminar(self, pedido, futuro):
+        try:
+            salida = futuro.result()
+        except Exception as e:
+            # Con BrokenProcessPool el pool se rearma en el próximo envío
+            salida = {"resultado": None, "perfil": None, "ejecucion": None, "mensajes": [], "cancelado": False,
+                      "error": f"El proceso trabajador falló: {type(e).__name__}"}
+        trabajo = pedido.trabajo
+        with self._lock:
+            for campo, valor in salida.items():
+                setattr(trabajo, campo, valor)
+            trabajo.fin = time.time()
+            del self._en_curso[pedido.numero]
+            self._ranuras_libres.append(pedido.ranura)
+            self._despachar()
+
+    def _cancelar(self, pedido):
+        with self._lock:
+            cola = self._colas.get(pedido.sesion)
+            if cola is not None and pedido in cola:
+                cola.remove(pedido)
+                if not cola:
+                    del self._colas[pedido.sesion]
+                pedido.trabajo.cancelado = True
+                pedido.trabajo.posicion = 0
+                pedido.trabajo.fin = time.time()
+                self._actualizar_posiciones()
+            elif pedido.numero in self._en_curso:
+                self._cancelados[pedido.ranura] = pedido.numero
+
+    def _seguir_avance(self):
+        """Copia el avance por página de la memoria compartida a los trabajos en proceso"""
+        while not self._cerrado.wait(INTERVALO_AVANCE_S):
+            with self._lock:
+                for pedido in self._en_curso.values():
+                    hechas = self._avance[2 * pedido.ranura]
+                    totales = self._avance[2 * pedido.ranura + 1]
+                    if hechas or totales:
+                        pedido.trabajo.avanzar(hechas, totales or None)
+
+    def estado(self):
+        with self._lock:
+            return {"procesos": self.procesos, "en_proceso": len(self._en_curso),
+                    "en_cola": sum(len(c) for c in self._colas.values()), "sesiones_en_cola": len(self._colas)}
+
+    def cerrar(self):
+        self._cerrado.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_PLANIFICADOR = None
+_lock_planificador = threading.Lock()
+
+
+def procesos_configurados():
+    """BANCOS_PROCESOS (por defecto entre 2 y 4 según los núcleos); 0 desactiva el pool compartido"""
+    valor = os.environ.get("BANCOS_PROCESOS")
+    if valor is not None and valor.strip():
+        return max(0, int(valor))
+    return max(2, min(4, os.cpu_count() or 2))
+
+
+def planificador_compartido():
+    """El planificador del proceso (se crea y calienta la primera vez); None si está desactivado"""
+    global _PLANIFICADOR
+    with _lock_planificador:
+        if _PLANIFICADOR is None:
+            procesos = procesos_configurados()
+            if procesos == 0:
+                return None
+            limite = max(1, int(os.environ.get("BANCOS_TRABAJOS_POR_SESION") or 1))
+            _PLANIFICADOR = Planificador(procesos, limite_por_sesion=limite)
+        return _PLANIFICADOR
@@ -0,0 +1,285 @@
+import argparse
+import hashlib
+import io
+import os
+import sys
+
+import streamlit as st
+
+import patrones
+
+# Con --perfil se cuentan también las llamadas por patrón (patrones.py). Se activa antes de importar
+# los bancos porque registran sus patrones al importarse
+if __name__ == "__main__" and "--perfil" in sys.argv[1:]:
+    patrones.activar_perfilado()
+
+from frances import procesar_bbva_frances
+from santander import procesar_santander_rio
+from santander_prueba import procesar_santander_rio_prueba
+from galicia import procesar_galicia, parsear_galicia, renderizar_galicia, hojas_galicia
+from icbc import procesar_icbc
+from icbc_2 import procesar_icbc_formato_2
+from icbc_formato_3 import procesar_icbc_formato_3
+from macro import procesar_macro
+from nacion import procesar_nacion
+from provincia import procesar_provincia
+from provincia_2 import procesar_provincia_formato_2
+from supervielle import procesar_supervielle
+from hipotecario import procesar_hipotecario
+from hsbc import procesar_hsbc
+from credicoop import procesar_credicoop
+from mercadopago import procesar_mercadopago, parsear_mercadopago, renderizar_mercadopago, hojas_mercadopago
+from credicoop_2 import procesar_credicoop_formato_2
+from macro_2 import procesar_macro_formato_2
+from macro_3 import procesar_macro_formato_3
+from macro_4 import procesar_macro_formato_4
+from galicia_mas import procesar_galicia_mas
+from comafi import procesar_comafi, parsear_comafi, renderizar_comafi, hojas_comafi
+from ciudad import procesar_ciudad
+from patagonia import procesar_patagonia
+from patagonia_2 import procesar_patagonia_formato_2
+from formatos import FORMATOS, cargar_formatos
+
+# Registro único banco -> procesador, compartido por la app de Streamlit y las herramientas
+# de línea de comandos (así no hace falta importar app.py, que arma la interfaz al importarse).
+PROCESADORES = {
+    "BBVA Frances": procesar_bbva_frances,
+    "Ciudad": procesar_ciudad,
+    "Comafi": procesar_comafi,
+    "Credicoop": procesar_credicoop,
+    "Credicoop (Formato 2)": procesar_credicoop_formato_2,
+    "Galicia": procesar_galicia,
+    "Galicia Más": procesar_galicia_mas,
+    "Hipotecario": procesar_hipotecario,
+    "HSBC": procesar_hsbc,
+    "ICBC (Formato 1)": procesar_icbc,
+    "ICBC (Formato 2)": procesar_icbc_formato_2,
+    "ICBC (Formato 3)": procesar_icbc_formato_3,
+    "Macro": procesar_macro,
+    "Macro (Formato 2)": procesar_macro_formato_2,
+    "Macro (Formato 3)": procesar_macro_formato_3,
+    "Macro (Formato 4)": procesar_macro_formato_4,
+    "MercadoPago": procesar_mercadopago,
+    "Nacion": procesar_nacion,
+    "Patagonia": procesar_patagonia,
+    "Patagonia (Formato 2)": procesar_patagonia_formato_2,
+    "Provincia": procesar_provincia,
+    "Provincia (Formato 2)": procesar_provincia_formato_2,
+    "Santander Rio": procesar_santander_rio,
+    "Santander Rio (Prueba)": procesar_santander_rio_prueba,
+    "Supervielle": procesar_supervielle,
+}
+
+# Procesadores que separan el parseo del armado del Excel: (parsear, renderizar, hojas). Con
+# procesar_banco(..., diferido=True) se guarda el parseo y el Excel se arma recién cuando se pide
+# (los formatos declarativos de formatos.py también, ver etapas)
+ETAPAS = {
+    "Comafi": (parsear_comafi, renderizar_comafi, hojas_comafi),
+    "Galicia": (parsear_galicia, renderizar_galicia, hojas_galicia),
+    "MercadoPago": (parsear_mercadopago, renderizar_mercadopago, hojas_mercadopago),
+}
+
+# Procesadores que reciben los CUITs propios cargados en la interfaz
+CON_CUITS_PROPIOS = {"Santander Rio (Prueba)"}
+
+# Versión de la salida de cada procesador. Subirla cuando un cambio altera el Excel que genera:
+# invalida solo los resultados guardados de ese procesador (almacen.py). Los formatos declarativos
+# de formatos/ no se listan: su versión es un hash de la especificación y de
+# VERSION_REPORTE_FORMATOS, que se sube cuando cambia el Excel que arma ParserFormato.
+VERSION_REPORTE_FORMATOS = 3  # 2: hoja Control con el saldo corrido fila por fila; 3: sin ella con signo "saldo"
+VERSIONES = {
+    "BBVA Frances": 1,
+    "Ciudad": 1,
+    "Comafi": 1,
+    "Credicoop": 2,
+    "Credicoop (Formato 2)": 2,
+    "Galicia": 1,
+    "Galicia Más": 1,
+    "Hipotecario": 1,
+    "HSBC": 1,
+    "ICBC (Formato 1)": 1,
+    "ICBC (Formato 2)": 1,
+    "ICBC (Formato 3)": 1,
+    "Macro": 1,
+    "Macro (Formato 2)": 1,
+    "Macro (Formato 3)": 1,
+    "Macro (Formato 4)": 1,
+    "MercadoPago": 1,
+    "Nacion": 2,
+    "Patagonia": 1,
+    "Patagonia (Formato 2)": 1,
+    "Provincia": 1,
+    "Provincia (Formato 2)": 1,
+    "Santander Rio": 1,
+    "Santander Rio (Prueba)": 1,
+    "Supervielle": 1,
+}
+
+
+def lista_bancos():
+    """Bancos disponibles: los fijos (orden alfabético) más los formatos declarativos de formatos/"""
+    bancos = list(PROCESADORES)
+    bancos += sorted(n for n in cargar_formatos() if n not in bancos)
+    return bancos
+
+
+def version_procesador(banco):
+    """Versión (texto) del procesador de `banco`, o None si no existe"""
+    if banco in VERSIONES:
+        return str(VERSIONES[banco])
+    if banco in FORMATOS:
+        definicion = repr(FORMATOS[banco].formato) + f"|{VERSION_REPORTE_FORMATOS}"
+        return "f" + hashlib.sha256(definicion.encode("utf-8")).hexdigest()[:12]
+    return None
+
+
+def etapas(banco):
+    """(parsear, renderizar, hojas) del procesador de `banco`, o None si arma el Excel en el mismo recorrido"""
+    if banco in ETAPAS:
+        return ETAPAS[banco]
+    if banco in FORMATOS:
+        parser = FORMATOS[banco]
+        return parser.parsear_pdf, parser.renderizar, parser.hojas
+    return None
+
+
+class ResultadoProcesado:
+    """
+    Resultado de procesar_banco(..., diferido=True). Los procesadores con etapas separadas (ETAPAS y los
+    formatos declarativos) guardan el parseo y arman el Excel recién cuando se pide con excel(); los
+    demás lo arman al procesar (el reporte se escribe en el mismo recorrido que el parseo), así que ya
+    viene hecho.
+    """
+
+    def __init__(self, banco, excel=None, parseo=None):
+        self.banco = banco
+        self.parseo = parseo  # lo que devuelve el parsear de etapas(banco)
+        self._excel = excel
+
+    @property
+    def pendiente(self):
+        """True si el Excel todavía no se armó"""
+        return self._excel is None
+
+    def excel(self):
+        """Bytes del Excel (se arma la primera vez)"""
+        if self._excel is None:
+            self._excel = etapas(self.banco)[1](self.parseo)
+        return self._excel
+
+    def hojas(self):
+        """Lo mismo que lectura_excel.leer_excel(self.excel()), sin armar el Excel si todavía no se armó"""
+        if self._excel is None:
+            return etapas(self.banco)[2](self.parseo)
+        from lectura_excel import leer_excel
+        return leer_excel(self._excel)
+
+
+def procesar_banco(banco_seleccionado, archivo_pdf, cuits_propios=None, diferido=False):
+    """
+    Función principal que dirige el procesamiento según el banco seleccionado. Devuelve los bytes del
+    Excel, o con diferido=True un ResultadoProcesado (None si no se pudo procesar)
+    """
+    if diferido:
+        separado = etapas(banco_seleccionado)
+        if separado is not None:
+            parseo = separado[0](archivo_pdf)
+            return ResultadoProcesado(banco_seleccionado, parseo=parseo) if parseo is not None else None
+        excel = procesar_banco(banco_seleccionado, archivo_pdf, cuits_propios)
+        return ResultadoProcesado(banco_seleccionado, excel=excel) if excel is not None else None
+    if banco_seleccionado in PROCESADORES:
+        if banco_seleccionado in CON_CUITS_PROPIOS:
+            return PROCESADORES[banco_seleccionado](archivo_pdf, cuits_propios=cuits_propios or [])
+        return PROCESADORES[banco_seleccionado](archivo_pdf)
+    elif banco_seleccionado in FORMATOS:
+        return FORMATOS[banco_seleccionado].procesar(archivo_pdf)
+    else:
+        st.info(f"Lógica para {banco_seleccionado} aún no implementada")
+        return None
+
+
+class ArchivoPDF(io.BytesIO):
+    """PDF leído de disco con la misma interfaz que el UploadedFile de Streamlit (read/seek/name)"""
+
+    def __init__(self, contenido, name="archivo.pdf"):
+        super().__init__(contenido)
+        self.name = name
+
+    @classmethod
+    def desde_ruta(cls, ruta):
+        with open(ruta, "rb") as f:
+            return cls(f.read(), os.path.basename(ruta))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Procesa un extracto PDF y genera el Excel (sin interfaz)")
+    parser.add_argument("banco", help="Banco/formato, tal como aparece en la app (ej. \"Galicia\")")
+    parser.add_argument("pdf", help="Ruta del extracto PDF")
+    parser.add_argument("-o", "--salida", help="Excel de salida (por defecto <pdf>.xlsx)")
+    parser.add_argument("--cuit", action="append", default=[],
+                        help="CUIT propio (se puede repetir; solo Santander Rio (Prueba))")
+    parser.add_argument("--perfil", action="store_true",
+                        help="Perfilar con cProfile + tracemalloc (y el conteo por patrón de patrones.py) y guardar "
+                             "<salida>.prof, <salida>.memoria.txt y <salida>.patrones.txt")
+    parser.add_argument("--top", type=int, default=30, help="Cantidad de filas de los reportes de perfilado")
+    parser.add_argument("--analisis", action="store_true",
+                        help="Agregar las hojas de resumen por categoría, día y contraparte (analisis.py)")
+    parser.add_argument("--solo-parseo", action="store_true",
+                        help="No guardar el Excel: mostrar movimientos y saldos por cuenta. Solo los procesadores "
+                             "con etapas separadas (Comafi, Galicia, MercadoPago y los formatos declarativos) "
+                             "evitan armarlo; el resto lo arma igual al parsear")
+    args = parser.parse_args()
+
+    bancos = lista_bancos()
+    if args.banco not in bancos:
+        parser.error(f"Banco desconocido: {args.banco}. Opciones: {', '.join(bancos)}")
+
+    archivo = ArchivoPDF.desde_ruta(args.pdf)
+    salida = args.salida or os.path.splitext(args.pdf)[0] + ".xlsx"
+    cuits_propios = [(c.replace("-", ""), "", f"CUIT {c.replace('-', '')}") for c in args.cuit]
+
+    if args.perfil:
+        from perfilado import perfilar
+        resultado, perfil = perfilar(procesar_banco, args.banco, archivo, cuits_propios=cuits_propios,
+                                     diferido=args.solo_parseo, top=args.top)
+        base = os.path.splitext(salida)[0]
+        with open(base + ".prof", "wb") as f:
+            f.write(perfil.prof)
+        with open(base + ".memoria.txt", "w", encoding="utf-8") as f:
+            f.write(perfil.reporte_memoria)
+        with open(base + ".patrones.txt", "w", encoding="utf-8") as f:
+            f.write(perfil.reporte_patrones)
+        print(perfil.reporte_cpu)
+        print(perfil.reporte_memoria)
+        print(perfil.reporte_patrones)
+        print(f"Perfil guardado en {base}.prof (abrir con: python -m pstats {base}.prof), {base}.memoria.txt "
+              f"y {base}.patrones.txt")
+    else:
+        resultado = procesar_banco(args.banco, archivo, cuits_propios=cuits_propios, diferido=args.solo_parseo)
+
+    if resultado is None:
+        print("No se pudo procesar el archivo", file=sys.stderr)
+        sys.exit(1)
+    if args.solo_parseo:
+        from vista import resumen_cuentas
+
+        def importe(valor):
+            return f"{valor:>16,.2f}" if valor is not None else f"{'-':>16}"
+
+        print(f"{'Cuenta':<30} {'Movimientos':>11} {'Saldo inicial':>16} {'Créditos':>16} {'Débitos':>16} "
+              f"{'Saldo final':>16} {'Diferencia':>16}")
+        for c in resumen_cuentas(resultado.hojas()):
+            print(f"{c['Cuenta'][:30]:<30} {c['Movimientos']:>11,} {importe(c['Saldo inicial'])} "
+                  f"{importe(c['Créditos'])} {importe(c['Débitos'])} {importe(c['Saldo final'])} "
+                  f"{importe(c['Diferencia'])}")
+        return
+    if args.analisis:
+        from analisis import agregar_hojas
+        resultado = agregar_hojas(resultado)
+    with open(salida, "wb") as f:
+        f.write(resultado)
+    print(f"Excel guardado en {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import bisect
+import csv
+import io
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+
+# Detección de movimientos con entidades propias (CUITs y razones sociales del titular, socios y
+# empresas del grupo), pensada para miles de entidades y extractos de decenas de miles de movimientos.
+# - CUITs: conjunto de 11 dígitos normalizados; en cada texto se buscan las corridas de dígitos
+#   (ignorando espacios, guiones y puntos) y se consulta el conjunto, así que cuesta lo mismo con 10
+#   que con 10.000 CUITs.
+# - Razones sociales: índice invertido token -> entidades, sobre nombres normalizados (mayúsculas,
+#   sin acentos ni puntuación, sin la forma societaria). Un texto propone como candidatas solo las
+#   entidades que comparten algún token; cada candidata se puntúa por la fracción de sus tokens
+#   presentes, aceptando tokens truncados (los bancos cortan las descripciones: "DISTRIBUIDORA DEL
+#   SU") y en cualquier orden.
+# - Las descripciones se repiten mucho dentro de un extracto: el resultado se cachea por texto.
+
+FORMAS_SOCIETARIAS = {"SA", "SRL", "SAS", "SAU", "SACI", "SAIC", "SACIF", "SACIFI", "SCA", "SC", "SE", "SH",
+                      "SOCIEDAD", "ANONIMA", "RESPONSABILIDAD", "LIMITADA", "COMERCIAL", "INDUSTRIAL", "Y", "DE",
+                      "DEL", "LA", "LAS", "LOS", "EL", "E", "CIA", "COOP", "LTDA"}
+LARGO_MINIMO_PREFIJO = 4  # un token truncado cuenta si tiene al menos 4 letras
+UMBRAL = 0.75  # fracción mínima de tokens de la razón social presentes en el texto
+
+_NO_ALFANUMERICO = re.compile(r"[^A-Z0-9]+")
+_DIGITOS = re.compile(r"\d+")
+
+
+@dataclass(frozen=True)
+class EntidadPropia:
+    cuit: str  # 11 dígitos, o "" si solo se conoce el nombre
+    razon: str
+    etiqueta: str
+
+
+def normalizar_cuit(texto):
+    """Solo los dígitos; devuelve los 11 dígitos del CUIT o "" si no los tiene"""
+    digitos = re.sub(r"\D", "", str(texto or ""))
+    return digitos if len(digitos) == 11 else ""
+
+
+def cuit_valido(cuit):
+    """Verifica el dígito verificador de un CUIT/CUIL de 11 dígitos"""
+    if len(cuit) != 11 or not cuit.isdigit():
+        return False
+    suma = sum(int(d) * p for d, p in zip(cuit[:10], (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)))
+    verificador = 11 - suma % 11
+    verificador = {11: 0, 10: 9}.get(verificador, verificador)
+    return verificador == int(cuit[10])
+
+
+def validar_cuit(texto):
+    """Los 11 dígitos del CUIT si el dígito verificador es correcto; "" si no (texto vacío incluido)"""
+    cuit = normalizar_cuit(texto)
+    return cuit if cuit_valido(cuit) else ""
+
+
+def normalizar_texto(texto):
+    """Mayúsculas sin acentos, con la puntuación como espacio ("S.A." queda "S A")"""
+    texto = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode("ascii")
+    return _NO_ALFANUMERICO.sub(" ", texto.upper()).strip()
+
+
+def tokens_nombre(razon):
+    """Tokens significativos de una razón social (sin forma societaria ni conectores)"""
+    texto = normalizar_texto(razon)
+    # "S A" / "S R L" (de "S.A." / "S.R.L.") se juntan para reconocerlos como forma societaria
+    texto = re.sub(r"\b([A-Z])\s(?=[A-Z]\b)", r"\1", texto)
+    tokens = [t for t in texto.split() if t not in FORMAS_SOCIETARIAS]
+    return tuple(dict.fromkeys(tokens)) or tuple(dict.fromkeys(texto.split()))
+
+
+def entidades_desde_tuplas(cuits_propios):
+    """
+    EntidadPropia de cada (cuit, razón, etiqueta) de la interfaz, como las ve el Matcher. Un CUIT
+    inválido se descarta; si tampoco hay razón social, la entidad entera
+    """
+    entidades = []
+    for c, r, e in cuits_propios or []:
+        cuit, razon = validar_cuit(c), (r or "").strip()
+        if cuit or razon:
+            entidades.append(EntidadPropia(cuit, razon, e or razon or f"CUIT {cuit}"))
+    return entidades
+
+
+class Matcher:
+    """Índice de entidades propias: etiquetar(texto) devuelve la EntidadPropia encontrada o None"""
+
+    def __init__(self, entidades=(), umbral=UMBRAL):
+        self.umbral = umbral
+        self.entidades = []
+        self._por_cuit = {}
+        self._tokens = []  # tokens de cada entidad con nombre (mismo índice que self.entidades)
+        self._indice = defaultdict(list)  # token -> índices de entidades
+        self._vocabulario = []  # tokens indexados, ordenados (para buscar por prefijo)
+        self._cache = {}
+        for entidad in entidades:
+            self.agregar(entidad)
+
+    @classmethod
+    def desde_tuplas(cls, cuits_propios, **kwargs):
+        """Desde la lista (cuit, razón, etiqueta) que arma la interfaz"""
+        return cls(entidades_desde_tuplas(cuits_propios), **kwargs)
+
+    def agregar(self, entidad):
+        indice = len(self.entidades)
+        self.entidades.append(entidad)
+        if entidad.cuit:
+            self._por_cuit.setdefault(entidad.cuit, entidad)
+        tokens = tokens_nombre(entidad.razon) if entidad.razon else ()
+        self._tokens.append(tokens)
+        for token in tokens:
+            if token not in self._indice:
+                bisect.insort(self._vocabulario, token)
+            self._indice[token].append(indice)
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self.entidades)
+
+    def buscar_cuit(self, texto):
+        """Primer CUIT propio que aparece en el texto (sin espacios, guiones ni puntos)"""
+        if not self._por_cuit:
+            return None
+        compacto = re.sub(r"[\s.\-/]", "", texto)
+        for corrida in _DIGITOS.findall(compacto):
+            if len(corrida) == 11:
+                if corrida in self._por_cuit:
+                    return self._por_cuit[corrida]
+            elif len(corrida) > 11:
+                # CUIT pegado a otros dígitos (ej. "CUIT30711511004REF")
+                for i in range(len(corrida) - 10):
+                    entidad = self._por_cuit.get(corrida[i:i + 11])
+                    if entidad is not None:
+                        return entidad
+        return None
+
+    def _candidatos(self, token):
+        """Entidades con ese token, o con un token que empieza así si está truncado"""
+        if token in self._indice:
+            yield from ((i, token) for i in self._indice[token])
+        if len(token) < LARGO_MINIMO_PREFIJO:
+            return
+        i = bisect.bisect_right(self._vocabulario, token)
+        while i < len(self._vocabulario) and self._vocabulario[i].startswith(token):
+            completo = self._vocabulario[i]
+            yield from ((indice, completo) for indice in self._indice[completo])
+            i += 1
+
+    def buscar_nombre(self, texto):
+        """Entidad cuya razón social aparece en el texto (la de mayor puntaje), o None"""
+        if not self._indice:
+            return None
+        presentes = defaultdict(set)  # entidad -> tokens suyos presentes en el texto
+        exactos = defaultdict(int)  # entidad -> cuántos de esos tokens aparecen completos
+        for token in set(normalizar_texto(texto).split()):
+            for indice, completo in self._candidatos(token):
+                presentes[indice].add(completo)
+                exactos[indice] += completo == token
+        mejor, mejor_orden = None, None
+        for indice, encontrados in presentes.items():
+            tokens = self._tokens[indice]
+            puntaje = len(encontrados) / len(tokens)
+            # Al menos un token completo, y dos si la razón social tiene más de uno
+            if puntaje < self.umbral or not exactos[indice] or (len(tokens) > 1 and len(encontrados) < 2):
+                continue
+            orden = (puntaje, len(encontrados))
+            if mejor_orden is None or orden > mejor_orden:
+                mejor, mejor_orden = self.entidades[indice], orden
+        return mejor
+
+    def etiquetar(self, texto):
+        """CUIT primero (es exacto), después razón social; cacheado por texto"""
+        if texto in self._cache:
+            return self._cache[texto]
+        entidad = self.buscar_cuit(texto) or self.buscar_nombre(texto)
+        self._cache[texto] = entidad
+        return entidad
+
+
+def leer_csv(contenido):
+    """
+    Entidades desde un CSV (bytes o texto; separador , ; o tabulación). Columnas: cuit, razón social y
+    etiqueta opcional; con encabezado o sin él. Una fila con una sola columna es un CUIT si tiene 11
+    dígitos y una razón social si no. Un CUIT con el dígito verificador mal se ignora (la fila queda con
+    la razón social, o se descarta). Devuelve (entidades, filas_descartadas).
+    """
+    if isinstance(contenido, bytes):
+        contenido = contenido.decode("utf-8-sig", errors="replace")
+    muestra = contenido[:4096]
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+    except csv.Error:
+        dialecto = csv.excel
+    entidades = []
+    descartadas = 0
+    for n, fila in enumerate(csv.reader(io.StringIO(contenido), dialecto)):
+        fila = [c.strip() for c in fila]
+        if not any(fila):
+            continue
+        if n == 0 and "CUIT" in normalizar_texto(fila[0]) and not normalizar_cuit(fila[0]):
+            continue  # encabezado
+        if len(fila) == 1:
+            razon = "" if normalizar_cuit(fila[0]) else fila[0]
+        else:
+            razon = fila[1]
+        cuit = validar_cuit(fila[0])
+        etiqueta = (fila[2] if len(fila) > 2 else "") or razon or f"CUIT {cuit}"
+        if not cuit and not razon:
+            descartadas += 1
+            continue
+        entidades.append(EntidadPropia(cuit, razon, etiqueta))
+    return entidades, descartadas
@@ -6,6 +6,8 @@ import io
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from guardia import filtrar_lineas
+from rendimiento import marcar, contar, paginas_medidas
 
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
 
@@ -58,11 +60,15 @@ def procesar_provincia_formato_2(archivo_pdf):
 
     try:
         archivo_pdf.seek(0)
+        marcar("lectura")
         with io.BytesIO(archivo_pdf.read()) as pdf_file:
             reader = PyPDF2.PdfReader(pdf_file)
-            texto_completo = "".join(page.extract_text() + "\n" for page in reader.pages)
-            lineas = texto_completo.splitlines()
+            marcar("extraccion")
+            texto_completo = "".join(page.extract_text() + "\n" for page in paginas_medidas(reader.pages))
+            lineas = filtrar_lineas(texto_completo.splitlines(), "Provincia (Formato 2)")
+        contar("lineas", len(lineas))
 
+        marcar("secciones")
         # Extraer cuenta
         cuenta = "Sin Especificar"
         for l in lineas[:10]:
@@ -71,6 +77,7 @@ def procesar_provincia_formato_2(archivo_pdf):
                 cuenta = match_cuenta.group(1).strip()
                 break
 
+        marcar("limpieza")
         # Filtrar headers/footers
         skip_patterns = [
             re.compile(r"^Fecha:\d{2}/\d{2}/\d{4}"),
@@ -91,6 +98,7 @@ def procesar_provincia_formato_2(archivo_pdf):
                 continue
             lineas_mov.append(stripped)
 
+        marcar("union_lineas")
         # Agrupar líneas por movimiento (cada uno empieza con fecha dd-mmm-yyyy)
         date_start = re.compile(r"^\d{2}-\w{3}-\d{4}")
         movimientos_raw = []
@@ -107,6 +115,7 @@ def procesar_provincia_formato_2(archivo_pdf):
         if current:
             movimientos_raw.append(current)
 
+        marcar("movimientos")
         # Parsear cada movimiento: extraer fecha y saldo (siempre separado por espacio).
         # El importe se calcula después desde diferencias de saldos.
         saldo_re = re.compile(r"\s+(-?\d{1,3}(?:[.,]\d{3})*[.,]\d{2})$")
@@ -157,6 +166,7 @@ def procesar_provincia_formato_2(archivo_pdf):
             st.warning("No se encontraron movimientos en el PDF")
             return None
 
+        marcar("importes")
         # Calcular importes desde diferencias de saldos (orden inverso: más reciente primero)
         for i in range(len(movimientos) - 1):
             movimientos[i]["Importe"] = round(movimientos[i]["Saldo"] - movimientos[i + 1]["Saldo"], 2)
@@ -173,11 +183,16 @@ def procesar_provincia_formato_2(archivo_pdf):
             movimientos[last_idx]["Importe"] = 0.0
 
         # Saldos
+        marcar("conciliacion")
         saldo_final = movimientos[0]["Saldo"]
         saldo_inicial = round(movimientos[-1]["Saldo"] - movimientos[-1]["Importe"], 2)
 
+        contar("cuentas", 1)
+        contar("movimientos", len(movimientos))
+
         # --- GENERACIÓN EXCEL (DASHBOARD) ---
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         ws = wb.active
         ws.title = "Reporte Provincia F2"
@@ -381,6 +396,7 @@ def procesar_provincia_formato_2(archivo_pdf):
         ws.column_dimensions["F"].width = 45
         ws.column_dimensions["G"].width = 18
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
@@ -0,0 +1,196 @@
+import contextvars
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage, no se informa la memoria
+    resource = None
+
+# Instrumentación por etapas de cada procesamiento.
+# Los procesadores marcan el comienzo de cada etapa con marcar("etapa") (la etapa anterior se cierra
+# sola) y registran contadores con contar(...). Sin una ejecución activa (medir_ejecucion) todas las
+# llamadas son no-op, así que los procesar_* se pueden seguir usando sueltos (CLI, benchmarks).
+# Al cerrar la ejecución se emite una línea JSON al logger "bancos.rendimiento" (stderr por defecto,
+# o el archivo indicado en BANCOS_LOG_RENDIMIENTO; "0" lo apaga).
+# La misma ejecución sirve para seguir el avance (al_avanzar se llama después de cada página) y para
+# cancelar: si se pide la cancelación, la próxima página o etapa lanza Cancelado.
+
+# Etapas habituales, en el orden en que ocurren (se puede marcar cualquier otro nombre)
+ETAPAS = ("lectura", "extraccion", "limpieza", "secciones", "union_lineas", "importes", "movimientos",
+          "conciliacion", "excel", "guardado")
+
+_ACTUAL = contextvars.ContextVar("ejecucion_bancos", default=None)
+
+logger = logging.getLogger("bancos.rendimiento")
+
+
+def _configurar_logger():
+    if logger.handlers:
+        return
+    destino = os.environ.get("BANCOS_LOG_RENDIMIENTO", "").strip()
+    if destino == "0":
+        logger.addHandler(logging.NullHandler())
+    else:
+        handler = logging.FileHandler(destino, encoding="utf-8") if destino else logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+_configurar_logger()
+
+
+def rss_pico_kib():
+    """Pico de memoria residente del proceso hasta ahora, en KiB (None si la plataforma no lo informa)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico // 1024 if sys.platform == "darwin" else pico  # macOS lo informa en bytes
+
+
+class Cancelado(BaseException):
+    """
+    Procesamiento cancelado por el usuario. Hereda de BaseException (como KeyboardInterrupt) para
+    que el `except Exception` de los procesar_* no la convierta en un error más.
+    """
+
+
+class Ejecucion:
+    """Tiempos por etapa y contadores de un procesamiento"""
+
+    def __init__(self, banco, archivo="", memoria=False):
+        self.banco = banco
+        self.archivo = archivo
+        self.etapas = OrderedDict()
+        self.contadores = OrderedDict()
+        self.paginas = []
+        # Pico de RSS del proceso al cerrar cada etapa (opcional: lo usa el benchmark, que corre
+        # cada procesamiento en un proceso aparte; el pico es del proceso, no solo de la etapa)
+        self.memoria = OrderedDict() if memoria else None
+        self.al_avanzar = None  # f(paginas_hechas, paginas_totales o None)
+        self.cancelacion = None  # threading.Event (u otro objeto con is_set) para cancelar
+        self.ok = None
+        self.total = None
+        self._inicio = time.perf_counter()
+        self._etapa = None
+        self._t_etapa = None
+
+    def verificar_cancelacion(self):
+        if self.cancelacion is not None and self.cancelacion.is_set():
+            raise Cancelado()
+
+    def marcar(self, nombre):
+        """Cierra la etapa en curso y abre `nombre` (si se repite, el tiempo se acumula)"""
+        self.verificar_cancelacion()
+        ahora = time.perf_counter()
+        self._cerrar_etapa(ahora)
+        self._etapa = nombre
+        self._t_etapa = ahora
+
+    def _cerrar_etapa(self, ahora):
+        if self._etapa is not None:
+            self.etapas[self._etapa] = self.etapas.get(self._etapa, 0.0) + (ahora - self._t_etapa)
+            if self.memoria is not None:
+                self.memoria[self._etapa] = rss_pico_kib()
+            self._etapa = None
+
+    def contar(self, nombre, valor):
+        self.contadores[nombre] = valor
+
+    def sumar(self, nombre, valor=1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + valor
+
+    def finalizar(self):
+        ahora = time.perf_counter()
+        self._cerrar_etapa(ahora)
+        self.total = ahora - self._inicio
+
+    def como_dict(self):
+        paginas_ms = [round(p * 1000, 3) for p in self.paginas]
+        datos = {
+            "evento": "procesamiento",
+            "banco": self.banco,
+            "archivo": self.archivo,
+            "ok": self.ok,
+            "total_ms": round((self.total or 0.0) * 1000, 3),
+            "etapas_ms": {k: round(v * 1000, 3) for k, v in self.etapas.items()},
+            "contadores": dict(self.contadores),
+            "pagina_max_ms": max(paginas_ms) if paginas_ms else None,
+            "pagina_media_ms": round(sum(paginas_ms) / len(paginas_ms), 3) if paginas_ms else None,
+        }
+        if self.memoria is not None:
+            datos["etapas_rss_pico_kib"] = dict(self.memoria)
+        return datos
+
+    def filas_etapas(self):
+        """Filas para mostrar en la UI: etapa, ms y % del total"""
+        total = self.total or sum(self.etapas.values()) or 1.0
+        return [{"Etapa": k, "ms": round(v * 1000, 1), "%": round(100 * v / total, 1)}
+                for k, v in self.etapas.items()]
+
+
+@contextmanager
+def medir_ejecucion(banco, archivo="", memoria=False, al_avanzar=None, cancelacion=None):
+    """Activa la medición para el bloque y emite el log estructurado al salir"""
+    ej = Ejecucion(banco, archivo, memoria=memoria)
+    ej.al_avanzar = al_avanzar
+    ej.cancelacion = cancelacion
+    token = _ACTUAL.set(ej)
+    try:
+        yield ej
+    finally:
+        _ACTUAL.reset(token)
+        ej.finalizar()
+        logger.info(json.dumps(ej.como_dict(), ensure_ascii=False))
+
+
+def ejecucion_actual():
+    return _ACTUAL.get()
+
+
+def marcar(nombre):
+    ej = _ACTUAL.get()
+    if ej is not None:
+        ej.marcar(nombre)
+
+
+def contar(nombre, valor):
+    ej = _ACTUAL.get()
+    if ej is not None:
+        ej.contar(nombre, valor)
+
+
+def sumar(nombre, valor=1):
+    ej = _ACTUAL.get()
+    if ej is not None:
+        ej.sumar(nombre, valor)
+
+
+def paginas_medidas(paginas):
+    """
+    Recorre las páginas del PDF midiendo cuánto tarda el consumidor con cada una
+    (la extracción de texto) y cuenta las páginas. Uso: for page in paginas_medidas(pdf.pages)
+    """
+    ej = _ACTUAL.get()
+    if ej is None:
+        yield from paginas
+        return
+    try:
+        total = len(paginas)
+    except TypeError:
+        total = None
+    for i, pagina in enumerate(paginas, 1):
+        ej.verificar_cancelacion()
+        t0 = time.perf_counter()
+        yield pagina
+        ej.paginas.append(time.perf_counter() - t0)
+        ej.sumar("paginas")
+        if ej.al_avanzar is not None:
+            ej.al_avanzar(i, total)
@@ -6,6 +6,16 @@ import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from secciones import IndiceSecciones
+from guardia import filtrar_lineas
+from rendimiento import marcar, contar, paginas_medidas
+
+# Marcadores de sección (se indexan en una sola pasada)
+MARCADORES_SANTANDER = {
+    "pesos": "Movimientos en pesos",
+    "dolares": "Movimientos en dólares",
+    "fin": lambda l: "Así usaste tu dinero este mes" in l or "Detalle impositivo" in l,
+}
 
 # Regex para caracteres ilegales en Excel
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -26,10 +36,13 @@ def procesar_santander_rio(archivo_pdf):
         archivo_pdf.seek(0)
         
         # Abrir el PDF usando PyPDF2
+        marcar("lectura")
         reader = PyPDF2.PdfReader(io.BytesIO(archivo_pdf.read()))
-        texto_completo = "".join(page.extract_text() + "\n" for page in reader.pages)
+        marcar("extraccion")
+        texto_completo = "".join(page.extract_text() + "\n" for page in paginas_medidas(reader.pages))
         
-        lineas_raw = texto_completo.splitlines()
+        lineas_raw = filtrar_lineas(texto_completo.splitlines(), "Santander Rio")
+        contar("lineas", len(lineas_raw))
 
         # 1. Metadatos (Titular, Periodo)
         titular_global = "Sin Especificar"
@@ -55,21 +68,18 @@ def procesar_santander_rio(archivo_pdf):
             periodo_global = f"Del {f_desde} al {f_hasta}"
 
         # --- DELIMITAR SECCIONES ---
-        idx_pesos = None
-        idx_dolares = None
+        marcar("secciones")
+        indice = IndiceSecciones(lineas_raw, MARCADORES_SANTANDER)
+        idx_pesos = indice.primera("pesos")
+        idx_dolares = indice.primera("dolares")
         idx_fin_pesos = None # Fin de pesos puede ser inicio dolares o fin documento
         idx_fin_dolares = None
 
-        for i, l in enumerate(lineas_raw):
-            if "Movimientos en pesos" in l and idx_pesos is None:
-                idx_pesos = i
-            if "Movimientos en dólares" in l and idx_dolares is None:
-                idx_dolares = i
-            if ("Así usaste tu dinero este mes" in l or "Detalle impositivo" in l) and idx_fin_dolares is None and idx_dolares is not None:
-                idx_fin_dolares = i
+        if idx_dolares is not None:
+            idx_fin_dolares = indice.primera("fin", desde=idx_dolares)
+        elif idx_pesos is not None:
             # Si no hay dolares, el fin de pesos puede ser "Así usaste..."
-            if ("Así usaste tu dinero este mes" in l or "Detalle impositivo" in l) and idx_fin_pesos is None and idx_pesos is not None and idx_dolares is None:
-                idx_fin_pesos = i
+            idx_fin_pesos = indice.primera("fin", desde=idx_pesos)
 
         # Ajustar rangos
         lineas_pesos = []
@@ -92,6 +102,7 @@ def procesar_santander_rio(archivo_pdf):
             saldo_fin = 0.0
             
             # Pre-procesado para unir líneas
+            marcar("union_lineas")
             for l in lineas:
                 # Filtrar encabezados repetidos de página (ej: "2 -  11")
                 if re.match(r'^\s*\d+\s*-\s+\d+\s*$', l.strip()):
@@ -140,6 +151,7 @@ def procesar_santander_rio(archivo_pdf):
             if linea_actual: movimientos_text.append(linea_actual.strip())
 
             # Parsear Movimientos usando diferencia de saldos
+            marcar("movimientos")
             parsed_data = []
             saldo_anterior = saldo_ini  # Arrancar con el saldo inicial
             
@@ -198,10 +210,13 @@ def procesar_santander_rio(archivo_pdf):
         # Procesar
         datos_pesos, saldo_ini_pesos, saldo_fin_pesos = extraer_datos_seccion(lineas_pesos)
         datos_dolares, saldo_ini_dolares, saldo_fin_dolares = extraer_datos_seccion(lineas_dolares)
+        contar("cuentas", sum(1 for d in (datos_pesos, datos_dolares) if d))
+        contar("movimientos", len(datos_pesos) + len(datos_dolares))
         
 
         # --- GENERACIÓN EXCEL MULTI-HOJA ---
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         # Eliminar hoja default
         wb.remove(wb.active)
@@ -350,6 +365,7 @@ def procesar_santander_rio(archivo_pdf):
         if datos_dolares or saldo_ini_dolares != 0 or saldo_fin_dolares != 0:
             crear_hoja_dashboard(wb, "Dolares", datos_dolares, saldo_ini_dolares, saldo_fin_dolares, formato_moneda='"U$S "#,##0.00')
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
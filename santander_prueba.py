@@ -6,6 +6,17 @@ import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.formatting.rule import CellIsRule
+from propios import Matcher
+from secciones import IndiceSecciones
+from guardia import filtrar_lineas
+from rendimiento import marcar, contar, paginas_medidas
+
+# Marcadores de sección (se indexan en una sola pasada)
+MARCADORES_SANTANDER = {
+    "pesos": "Movimientos en pesos",
+    "dolares": "Movimientos en dólares",
+    "fin": lambda l: "Así usaste tu dinero este mes" in l or "Detalle impositivo" in l,
+}
 
 # Regex para caracteres ilegales en Excel
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -21,6 +32,8 @@ def procesar_santander_rio_prueba(archivo_pdf, cuits_propios=None):
     """Procesa archivos PDF de Santander Rio con Estilo Dashboard Multi-Moneda + Hojas Ingresos/Egresos"""
     if cuits_propios is None:
         cuits_propios = []
+    # Índice de CUITs y razones sociales propias (admite miles de entidades, ej. cargadas por CSV)
+    propios = cuits_propios if isinstance(cuits_propios, Matcher) else Matcher.desde_tuplas(cuits_propios)
     st.info("Procesando archivo de Santander Rio (Prueba)...")
 
     try:
@@ -28,10 +41,13 @@ def procesar_santander_rio_prueba(archivo_pdf, cuits_propios=None):
         archivo_pdf.seek(0)
         
         # Abrir el PDF usando PyPDF2
+        marcar("lectura")
         reader = PyPDF2.PdfReader(io.BytesIO(archivo_pdf.read()))
-        texto_completo = "".join(page.extract_text() + "\n" for page in reader.pages)
+        marcar("extraccion")
+        texto_completo = "".join(page.extract_text() + "\n" for page in paginas_medidas(reader.pages))
         
-        lineas_raw = texto_completo.splitlines()
+        lineas_raw = filtrar_lineas(texto_completo.splitlines(), "Santander Rio (Prueba)")
+        contar("lineas", len(lineas_raw))
 
         # 1. Metadatos (Titular, Periodo)
         titular_global = "Sin Especificar"
@@ -57,21 +73,18 @@ def procesar_santander_rio_prueba(archivo_pdf, cuits_propios=None):
             periodo_global = f"Del {f_desde} al {f_hasta}"
 
         # --- DELIMITAR SECCIONES ---
-        idx_pesos = None
-        idx_dolares = None
+        marcar("secciones")
+        indice = IndiceSecciones(lineas_raw, MARCADORES_SANTANDER)
+        idx_pesos = indice.primera("pesos")
+        idx_dolares = indice.primera("dolares")
         idx_fin_pesos = None # Fin de pesos puede ser inicio dolares o fin documento
         idx_fin_dolares = None
 
-        for i, l in enumerate(lineas_raw):
-            if "Movimientos en pesos" in l and idx_pesos is None:
-                idx_pesos = i
-            if "Movimientos en dólares" in l and idx_dolares is None:
-                idx_dolares = i
-            if ("Así usaste tu dinero este mes" in l or "Detalle impositivo" in l) and idx_fin_dolares is None and idx_dolares is not None:
-                idx_fin_dolares = i
+        if idx_dolares is not None:
+            idx_fin_dolares = indice.primera("fin", desde=idx_dolares)
+        elif idx_pesos is not None:
             # Si no hay dolares, el fin de pesos puede ser "Así usaste..."
-            if ("Así usaste tu dinero este mes" in l or "Detalle impositivo" in l) and idx_fin_pesos is None and idx_pesos is not None and idx_dolares is None:
-                idx_fin_pesos = i
+            idx_fin_pesos = indice.primera("fin", desde=idx_pesos)
 
         # Ajustar rangos
         lineas_pesos = []
@@ -94,6 +107,7 @@ def procesar_santander_rio_prueba(archivo_pdf, cuits_propios=None):
             saldo_fin = 0.0
             
             # Pre-procesado para unir líneas
+            marcar("union_lineas")
             for l in lineas:
                 # Filtrar encabezados repetidos de página (ej: "2 -  11")
                 if re.match(r'^\s*\d+\s*-\s+\d+\s*$', l.strip()):
@@ -142,6 +156,7 @@ def procesar_santander_rio_prueba(archivo_pdf, cuits_propios=None):
             if linea_actual: movimientos_text.append(linea_actual.strip())
 
             # Parsear Movimientos usando diferencia de saldos
+            marcar("movimientos")
             parsed_data = []
             saldo_anterior = saldo_ini  # Arrancar con el saldo inicial
             
@@ -200,9 +215,12 @@ def procesar_santander_rio_prueba(archivo_pdf, cuits_propios=None):
         # Procesar
         datos_pesos, saldo_ini_pesos, saldo_fin_pesos = extraer_datos_seccion(lineas_pesos)
         datos_dolares, saldo_ini_dolares, saldo_fin_dolares = extraer_datos_seccion(lineas_dolares)
+        contar("cuentas", sum(1 for d in (datos_pesos, datos_dolares) if d))
+        contar("movimientos", len(datos_pesos) + len(datos_dolares))
 
         # --- GENERACIÓN EXCEL MULTI-HOJA ---
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         # Eliminar hoja default
         wb.remove(wb.active)
@@ -383,7 +401,6 @@ def procesar_santander_rio_prueba(archivo_pdf, cuits_propios=None):
             """Asigna una categoría general a una descripción de movimiento."""
             desc_lower = descripcion.lower()
             texto_busqueda = raw_text if raw_text else descripcion
-            texto_sin_espacios = texto_busqueda.replace(" ", "")
             texto_lower = texto_busqueda.lower()
 
             # PASO 1: Categorías prioritarias (retenciones, sircreb, imp 25413)
@@ -393,12 +410,9 @@ def procesar_santander_rio_prueba(archivo_pdf, cuits_propios=None):
                         return categoria
 
             # PASO 2: Transferencias propias por CUIT o Razón Social
-            for entry in cuits_propios:
-                cuit, razon, label = entry
-                if cuit and cuit in texto_sin_espacios:
-                    return f"Transf. Propias - {label}"
-                if razon and razon.lower() in texto_lower:
-                    return f"Transf. Propias - {label}"
+            entidad = propios.etiquetar(texto_busqueda)
+            if entidad is not None:
+                return f"Transf. Propias - {entidad.etiqueta}"
 
             # PASO 3: Categorías generales
             for categoria, keywords in CATEGORIAS_GENERALES:
@@ -409,22 +423,18 @@ def procesar_santander_rio_prueba(archivo_pdf, cuits_propios=None):
 
         # --- DEBUG: Mostrar categorizaciones ---
         with st.expander("🔍 DEBUG: Categorizaciones (click para expandir)", expanded=False):
-            st.write(f"**CUITs propios configurados:** {cuits_propios}")
+            st.write(f"**Entidades propias configuradas:** {len(propios)}")
             st.write(f"**Total movimientos pesos:** {len(datos_pesos)}")
             for i, mov in enumerate(datos_pesos[:50]):
                 fecha, desc, importe, raw = mov
                 cat = categorizar(desc, raw)
                 cuit_found = ""
-                for entry in cuits_propios:
-                    c, r, l = entry
-                    raw_sin_esp = raw.replace(" ", "")
-                    if c and c in raw_sin_esp:
-                        cuit_found = f"✅ CUIT '{c}' en raw"
-                        break
-                    if r and r.lower() in raw.lower():
-                        cuit_found = f"✅ Razón '{r}' en raw"
-                        break
-                if not cuit_found and cuits_propios:
+                entidad = propios.buscar_cuit(raw)
+                if entidad is not None:
+                    cuit_found = f"✅ CUIT '{entidad.cuit}' en raw"
+                elif propios.buscar_nombre(raw) is not None:
+                    cuit_found = f"✅ Razón '{propios.buscar_nombre(raw).razon}' en raw"
+                elif len(propios):
                     cuit_found = "❌ No encontrado"
                 emoji = "🟢" if importe > 0 else "🔴"
                 st.write(f"{emoji} `{i+1}. [{cat}]` | `{desc[:70]}` | {cuit_found}")
@@ -600,6 +610,7 @@ def procesar_santander_rio_prueba(archivo_pdf, cuits_propios=None):
             # Hoja 6: Dolares - Egresos
             crear_hoja_agrupada(wb, "Dolares - Egresos", datos_dolares, "egresos", formato_moneda='"U$S "#,##0.00')
 
+        marcar("guardado")
         wb.save(output)
         output.seek(0)
         return output.getvalue()
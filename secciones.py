@@ -0,0 +1,61 @@
+import re
+from bisect import bisect_left, bisect_right
+
+
+def _crear_detector(marcador):
+    """Convierte un marcador (texto, regex compilada o función) en un predicado sobre la línea"""
+    if isinstance(marcador, str):
+        return lambda linea: marcador in linea
+    if isinstance(marcador, re.Pattern):
+        return lambda linea: marcador.search(linea) is not None
+    if callable(marcador):
+        return marcador
+    raise TypeError(f"Marcador no soportado: {marcador!r}")
+
+
+class IndiceSecciones:
+    """
+    Índice de límites de sección construido en una sola pasada sobre las líneas.
+
+    `marcadores` mapea un nombre a un texto (búsqueda por substring), una regex
+    compilada (search) o una función que recibe la línea. Cada nombre queda
+    asociado a la lista ordenada de posiciones donde aparece, y las consultas
+    "próximo límite después de i" se resuelven por búsqueda binaria.
+    """
+
+    def __init__(self, lineas, marcadores):
+        self.total_lineas = len(lineas)
+        detectores = [(nombre, _crear_detector(m)) for nombre, m in marcadores.items()]
+        self._posiciones = {nombre: [] for nombre, _ in detectores}
+
+        for i, linea in enumerate(lineas):
+            for nombre, detector in detectores:
+                if detector(linea):
+                    self._posiciones[nombre].append(i)
+
+    def posiciones(self, nombre):
+        """Todas las posiciones (ordenadas) donde aparece el marcador"""
+        return self._posiciones[nombre]
+
+    def primera(self, nombre, desde=0):
+        """Primera posición >= desde del marcador, o None"""
+        pos = self._posiciones[nombre]
+        k = bisect_left(pos, desde)
+        return pos[k] if k < len(pos) else None
+
+    def siguiente(self, nombres, despues_de):
+        """Primera posición estrictamente mayor a `despues_de` entre uno o varios marcadores, o None"""
+        if isinstance(nombres, str):
+            nombres = [nombres]
+        candidatos = []
+        for nombre in nombres:
+            pos = self._posiciones[nombre]
+            k = bisect_right(pos, despues_de)
+            if k < len(pos):
+                candidatos.append(pos[k])
+        return min(candidatos) if candidatos else None
+
+    def fin_seccion(self, nombres, despues_de):
+        """Como `siguiente`, pero devuelve el total de líneas si no hay otro límite"""
+        j = self.siguiente(nombres, despues_de)
+        return j if j is not None else self.total_lineas
@@ -0,0 +1,148 @@
+import contextlib
+import contextvars
+import hashlib
+import json
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+from rendimiento import Cancelado, medir_ejecucion
+
+# Procesamiento en segundo plano para la app de Streamlit.
+# El procesar_* corre en un hilo aparte y el trabajo se guarda en st.session_state: cada rerun
+# (cambiar un widget, apretar un botón) vuelve a encontrar el mismo trabajo en curso en lugar de
+# arrancarlo de nuevo, y el resultado sobrevive a los reruns. El avance se informa por página
+# (rendimiento.paginas_medidas) y la cancelación se revisa en cada página y en cada etapa.
+# Los mensajes que los procesadores muestran con st.error/st.warning/... desde el hilo (que no tiene
+# contexto de Streamlit) se capturan y se muestran cuando la sesión dibuja el resultado.
+# Por defecto la app no usa el hilo sino el pool compartido entre sesiones (planificador.py), que
+# devuelve el mismo TrabajoSesion; el hilo queda para BANCOS_PROCESOS=0.
+
+_CAPTURA = contextvars.ContextVar("mensajes_segundo_plano", default=None)
+_FUNCIONES_CAPTURADAS = ("error", "warning", "info", "success", "write", "code", "expander")
+_instalado = False
+_lock_instalacion = threading.Lock()
+
+
+def _envolver(nombre, original):
+    def envoltorio(*args, **kwargs):
+        mensajes = _CAPTURA.get()
+        if mensajes is None:
+            return original(*args, **kwargs)
+        if nombre == "expander":
+            # El contenido del expander (st.write) se captura igual, sin el desplegable
+            return contextlib.nullcontext()
+        mensajes.append((nombre, args, kwargs))
+        return None
+    envoltorio.__wrapped__ = original
+    return envoltorio
+
+
+def _instalar_captura():
+    """Envuelve una sola vez las funciones de mensajes de st; fuera de un trabajo se comportan igual"""
+    global _instalado
+    with _lock_instalacion:
+        if _instalado:
+            return
+        for nombre in _FUNCIONES_CAPTURADAS:
+            setattr(st, nombre, _envolver(nombre, getattr(st, nombre)))
+        _instalado = True
+
+
+@dataclass
+class TrabajoSesion:
+    """Un procesamiento en segundo plano de la sesión"""
+    clave: str
+    banco: str
+    nombre: str
+    cancelacion: threading.Event = field(default_factory=threading.Event)
+    inicio: float = field(default_factory=time.time)
+    fin: float = None
+    paginas_hechas: int = 0
+    paginas_totales: int = None
+    mensajes: list = field(default_factory=list)
+    resultado: object = None  # bytes del Excel, o ResultadoProcesado (procesar_banco con diferido=True)
+    perfil: object = None
+    ejecucion: object = None
+    cancelado: bool = False
+    error: str = None
+    hilo: threading.Thread = None
+    posicion: int = 0  # lugar en la cola del pool compartido (0: no está esperando)
+    al_cancelar: object = None  # lo usa el planificador para cancelar en otro proceso
+    recuperado: float = None  # momento en que se procesó, si el resultado vino del almacén (almacen.py)
+    guardado: bool = False  # el resultado ya está en el almacén
+    vista: tuple = None  # (tabla Arrow, saldos por cuenta) de la vista previa (vista.py), se arma una vez
+    excel_analisis: bytes = None  # Excel con las hojas de análisis (analisis.py), se arma al descargarlo
+
+    @property
+    def terminado(self):
+        return self.fin is not None
+
+    def cancelar(self):
+        self.cancelacion.set()
+        if self.al_cancelar is not None:
+            self.al_cancelar()
+
+    def avanzar(self, hechas, totales):
+        self.paginas_hechas = hechas
+        self.paginas_totales = totales
+
+    def fraccion(self):
+        """Avance entre 0 y 1 (sin total de páginas se queda en 0 hasta terminar)"""
+        if self.terminado:
+            return 1.0
+        if not self.paginas_totales:
+            return 0.0
+        return min(1.0, self.paginas_hechas / self.paginas_totales)
+
+    def mostrar_mensajes(self):
+        """Repite en la sesión los mensajes que el procesador emitió desde el hilo"""
+        for nombre, args, kwargs in self.mensajes:
+            getattr(st, nombre)(*args, **kwargs)
+
+
+def clave_trabajo(contenido, banco, cuits_propios=None, perfilar=False):
+    """Identifica el pedido: si la sesión vuelve a correr con los mismos datos se reutiliza el trabajo"""
+    h = hashlib.sha256(contenido)
+    h.update(json.dumps([banco, [list(c) for c in cuits_propios or []], bool(perfilar)],
+                        ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _ejecutar(trabajo, funcion, args, kwargs, perfilar):
+    _CAPTURA.set(trabajo.mensajes)
+    try:
+        with medir_ejecucion(trabajo.banco, trabajo.nombre, al_avanzar=trabajo.avanzar,
+                             cancelacion=trabajo.cancelacion) as ejecucion:
+            trabajo.ejecucion = ejecucion
+            if perfilar:
+                from perfilado import PerfilEnCurso, perfilar as perfilar_funcion
+                try:
+                    trabajo.resultado, trabajo.perfil = perfilar_funcion(funcion, *args, **kwargs)
+                except PerfilEnCurso as e:
+                    trabajo.error = str(e)
+            else:
+                trabajo.resultado = funcion(*args, **kwargs)
+            ejecucion.ok = trabajo.resultado is not None
+    except Cancelado:
+        trabajo.cancelado = True
+    except Exception:
+        print(traceback.format_exc())
+        trabajo.error = "Error inesperado al procesar el archivo"
+    finally:
+        trabajo.fin = time.time()
+
+
+def iniciar(clave, banco, nombre, funcion, *args, perfilar=False, **kwargs):
+    """Arranca funcion(*args, **kwargs) en un hilo y devuelve el TrabajoSesion"""
+    _instalar_captura()
+    trabajo = TrabajoSesion(clave=clave, banco=banco, nombre=nombre)
+    # Contexto nuevo para el hilo: la medición y la captura de mensajes son propias del trabajo
+    contexto = contextvars.Context()
+    trabajo.hilo = threading.Thread(target=contexto.run, args=(_ejecutar, trabajo, funcion, args, kwargs, perfilar),
+                                    name=f"procesar-{banco}", daemon=True)
+    trabajo.hilo.start()
+    return trabajo
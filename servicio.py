@@ -0,0 +1,486 @@
+"""
+Servicio HTTP local para procesar extractos desde otros sistemas (sin la interfaz de Streamlit).
+
+Los trabajos se ejecutan en un pool acotado de procesos precalentados (calentamiento.py: pandas,
+openpyxl, PyPDF2, pdfplumber y los 25 módulos importados, regex compilados) y reutilizan la misma
+lógica procesar_* de la app.
+El id de cada trabajo es el hash del contenido (PDF + banco + opciones): reenviar el mismo extracto
+devuelve el mismo trabajo en lugar de procesarlo de nuevo. Si la cola está llena responde 429.
+
+Endpoints:
+    POST /jobs                 PDF + banco ("auto" para detectarlo) + opciones -> 202 {"id": ...}
+    GET  /jobs/{id}            estado del trabajo (en_cola / procesando / terminado / error)
+    GET  /jobs/{id}/result     Excel generado (409 si todavía no terminó)
+    GET  /health               estado del pool y de la cola
+    GET  /metrics              métricas en formato de texto de Prometheus
+
+El PDF se puede enviar como cuerpo crudo (Content-Type: application/pdf, opciones en la query),
+como multipart/form-data (campo "pdf" más campos de opciones) o como JSON con "pdf_base64".
+Opciones: banco, nombre, cuit (repetible; "30711511004" o "30711511004|Razón Social").
+
+Uso:
+    python servicio.py --puerto 8600 --procesos 2 --cola 8
+    curl -X POST --data-binary @extracto.pdf -H "Content-Type: application/pdf" \\
+         "http://127.0.0.1:8600/jobs?banco=Galicia"
+    curl -F pdf=@extracto.pdf -F banco=auto http://127.0.0.1:8600/jobs
+    curl -o extracto.xlsx http://127.0.0.1:8600/jobs/<id>/result
+"""
+import argparse
+import base64
+import email.parser
+import email.policy
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import calentamiento
+import metricas
+from almacen import Almacen
+
+BANCO_AUTOMATICO = "auto"
+TAMANIO_MAXIMO_PDF = 50 * 1024 * 1024
+MIME_EXCEL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class ColaLlena(Exception):
+    """No hay lugar en la cola del pool (el cliente debe reintentar más tarde)"""
+
+
+class PedidoInvalido(Exception):
+    """El pedido no trae un PDF o trae opciones inválidas"""
+
+
+# ---------------------------------------------------------------------------
+# Lado del proceso trabajador
+# ---------------------------------------------------------------------------
+
+def _precargar():
+    """Inicializador de cada proceso del pool sin calentamiento: importa los procesadores antes del primer trabajo"""
+    import procesadores  # noqa: F401
+
+
+def _procesar_en_trabajador(banco, contenido, nombre, cuits_propios):
+    """
+    Corre en un proceso del pool. Devuelve un dict con el banco usado, el Excel (o None), sus hojas
+    leídas (lectura_excel.leer_excel: las usan los controles y el almacén), el error y los tiempos por etapa.
+    """
+    from deteccion import detectar_banco
+    from lectura_excel import leer_excel
+    from metricas import controles_conciliacion
+    from procesadores import ArchivoPDF, procesar_banco
+    from rendimiento import medir_ejecucion
+
+    cpu_inicio = time.process_time()
+    archivo = ArchivoPDF(contenido, nombre)
+    if banco == BANCO_AUTOMATICO:
+        banco = detectar_banco(archivo)
+        if banco is None:
+            return {"banco": None, "resultado": None, "error": "No se pudo detectar el banco del extracto",
+                    "rendimiento": None, "cpu_segundos": time.process_time() - cpu_inicio, "controles": [],
+                    "hojas": None}
+    try:
+        with medir_ejecucion(banco, nombre) as ejecucion:
+            resultado = procesar_banco(banco, archivo, cuits_propios=cuits_propios)
+            ejecucion.ok = resultado is not None
+    except Exception:
+        print(traceback.format_exc())
+        return {"banco": banco, "resultado": None, "error": "Error inesperado al procesar el extracto",
+                "rendimiento": None, "cpu_segundos": time.process_time() - cpu_inicio, "controles": [],
+                "hojas": None}
+    cpu_segundos = time.process_time() - cpu_inicio
+    error = None if resultado is not None else "El procesador no pudo generar el Excel para este extracto"
+    hojas = leer_excel(resultado) if resultado is not None else None
+    controles = controles_conciliacion(resultado, hojas=hojas) if resultado is not None else []
+    return {"banco": banco, "resultado": resultado, "error": error, "rendimiento": ejecucion.como_dict(),
+            "cpu_segundos": cpu_segundos, "controles": controles, "hojas": hojas}
+
+
+# ---------------------------------------------------------------------------
+# Trabajos y pool
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Trabajo:
+    id: str
+    banco: str
+    nombre: str
+    cuits_propios: list
+    creado: float = field(default_factory=time.time)
+    futuro: object = None
+    terminado: float = None
+    banco_detectado: str = None
+    resultado: bytes = None
+    error: str = None
+    rendimiento: dict = None
+    controles: list = None
+
+    @property
+    def estado(self):
+        if self.terminado is not None:
+            return "error" if self.resultado is None else "terminado"
+        if self.futuro is not None and self.futuro.running():
+            return "procesando"
+        return "en_cola"
+
+    def como_dict(self):
+        datos = {
+            "id": self.id,
+            "estado": self.estado,
+            "banco": self.banco_detectado or self.banco,
+            "nombre": self.nombre,
+            "creado": self.creado,
+            "terminado": self.terminado,
+            "segundos": round(self.terminado - self.creado, 3) if self.terminado else None,
+            "error": self.error,
+        }
+        if self.banco == BANCO_AUTOMATICO:
+            datos["detectado"] = self.banco_detectado is not None
+        if self.rendimiento:
+            datos["rendimiento"] = self.rendimiento
+        if self.controles:
+            datos["controles"] = self.controles
+        if self.resultado is not None:
+            datos["resultado"] = f"/jobs/{self.id}/result"
+        return datos
+
+
+def id_trabajo(contenido, banco, cuits_propios):
+    """Id idempotente: hash del PDF, el banco y las opciones"""
+    h = hashlib.sha256(contenido)
+    h.update(json.dumps([banco, sorted(map(list, cuits_propios))], ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+class Servicio:
+    """Cola de trabajos sobre un pool acotado de procesos"""
+
+    def __init__(self, procesos=2, cola=8, retencion_s=3600.0, max_trabajos=500, calentar=True, almacen=None):
+        self.procesos = procesos
+        self.almacen = almacen  # almacen.Almacen: resultados persistentes entre reinicios (opcional)
+        self.calentar = calentar
+        self.calentamiento = None
+        self.cola = cola
+        self.retencion_s = retencion_s
+        self.max_trabajos = max_trabajos
+        self.trabajos = {}
+        self._lock = threading.RLock()
+        self._pool = self._crear_pool()
+        # Escrituras al almacén en un hilo propio: el callback del futuro corre en el hilo que administra
+        # el pool, y una escritura de SQLite ahí demora la entrega de los resultados siguientes
+        self._escritura = ThreadPoolExecutor(max_workers=1, thread_name_prefix="servicio-almacen")
+        metricas.REGISTRO.medidor("bancos_cola_trabajos", "Trabajos esperando un proceso trabajador",
+                                  funcion=lambda: self.contar_estado("en_cola"))
+        metricas.REGISTRO.medidor("bancos_trabajos_en_proceso", "Trabajos que se están procesando",
+                                  funcion=lambda: self.contar_estado("procesando"))
+        metricas.REGISTRO.medidor("bancos_procesos_trabajadores", "Procesos del pool", funcion=lambda: self.procesos)
+
+    def _crear_pool(self):
+        if not self.calentar:
+            return ProcessPoolExecutor(max_workers=self.procesos, initializer=_precargar)
+        # Trabajadores que nacen calientes (fork de este proceso ya calentado); se arrancan ahora
+        # para que el primer extracto no pague ni el arranque del proceso
+        pool = calentamiento.crear_pool(self.procesos)
+        t0 = time.perf_counter()
+        trabajadores = calentamiento.arrancar_trabajadores(pool, self.procesos)
+        self.calentamiento = dict(calentamiento.informe() or trabajadores[0],
+                                  arranque_pool_s=round(time.perf_counter() - t0, 3),
+                                  trabajadores=sorted({t["pid_trabajador"] for t in trabajadores}))
+        metricas.CALENTAMIENTO.set(self.calentamiento["total_s"], fase="calentamiento")
+        metricas.CALENTAMIENTO.set(self.calentamiento["arranque_pool_s"], fase="arranque_pool")
+        return pool
+
+    def pendientes(self):
+        return sum(1 for t in self.trabajos.values() if t.terminado is None)
+
+    def contar_estado(self, estado):
+        with self._lock:
+            return sum(1 for t in self.trabajos.values() if t.estado == estado)
+
+    def enviar(self, contenido, banco, nombre="extracto.pdf", cuits_propios=None):
+        """
+        Encola un extracto. Devuelve (trabajo, nuevo): si el mismo PDF con las mismas opciones ya
+        está en curso o terminado se devuelve ese trabajo. Lanza ColaLlena si no hay lugar.
+        """
+        cuits_propios = [tuple(c) for c in (cuits_propios or [])]
+        id_ = id_trabajo(contenido, banco, cuits_propios)
+        with self._lock:
+            self._limpiar()
+            existente = self.trabajos.get(id_)
+            # Un trabajo fallido se reintenta: puede haber sido un problema del proceso trabajador
+            if existente is not None and existente.estado != "error":
+                metricas.CACHE.inc(cache="trabajos", resultado="acierto")
+                return existente, False
+            metricas.CACHE.inc(cache="trabajos", resultado="fallo")
+            trabajo = Trabajo(id=id_, banco=banco, nombre=nombre, cuits_propios=cuits_propios)
+            if self._recuperar(trabajo, contenido):
+                self.trabajos[id_] = trabajo
+                return trabajo, True
+            if self.pendientes() >= self.procesos + self.cola:
+                raise ColaLlena(f"Cola llena ({self.pendientes()} trabajos pendientes)")
+            self.trabajos[id_] = trabajo
+            self._despachar(trabajo, contenido)
+        return trabajo, True
+
+    def _recuperar(self, trabajo, contenido):
+        """Completa el trabajo con el resultado del almacén, si el PDF ya se procesó con esta versión"""
+        if self.almacen is None:
+            return False
+        automatico = trabajo.banco == BANCO_AUTOMATICO
+        try:
+            guardado = self.almacen.obtener(contenido, None if automatico else trabajo.banco, trabajo.cuits_propios)
+        except Exception:
+            print(traceback.format_exc())
+            return False
+        if guardado is None:
+            return False
+        trabajo.banco_detectado = guardado["banco"] if automatico else None
+        trabajo.resultado = guardado["excel"]
+        trabajo.controles = guardado["controles"]
+        trabajo.terminado = time.time()
+        return True
+
+    def _despachar(self, trabajo, contenido):
+        try:
+            futuro = self._pool.submit(_procesar_en_trabajador, trabajo.banco, contenido, trabajo.nombre,
+                                       trabajo.cuits_propios)
+        except BrokenProcessPool:
+            # Un proceso murió (falta de memoria, señal...): se rearma el pool y se reintenta una vez
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._crear_pool()
+            futuro = self._pool.submit(_procesar_en_trabajador, trabajo.banco, contenido, trabajo.nombre,
+                                       trabajo.cuits_propios)
+        trabajo.futuro = futuro
+        futuro.add_done_callback(lambda f: self._terminar(trabajo, f, contenido))
+
+    def _terminar(self, trabajo, futuro, contenido):
+        try:
+            salida = futuro.result()
+        except Exception as e:
+            salida = {"banco": None, "resultado": None, "rendimiento": None, "cpu_segundos": None, "controles": [],
+                      "hojas": None, "error": f"El proceso trabajador falló: {type(e).__name__}"}
+        with self._lock:
+            trabajo.banco_detectado = salida["banco"] if trabajo.banco == BANCO_AUTOMATICO else None
+            trabajo.resultado = salida["resultado"]
+            trabajo.error = salida["error"]
+            trabajo.rendimiento = salida["rendimiento"]
+            trabajo.controles = salida["controles"]
+            trabajo.terminado = time.time()
+            trabajo.futuro = None
+        metricas.registrar_ejecucion(salida["banco"] or trabajo.banco, salida["rendimiento"], salida["cpu_segundos"],
+                                     salida["controles"], ok=salida["resultado"] is not None)
+        if self.almacen is not None and salida["resultado"] is not None:
+            self._escritura.submit(self._guardar, trabajo, contenido, salida)
+
+    def _guardar(self, trabajo, contenido, salida):
+        try:
+            self.almacen.guardar(contenido, salida["banco"], salida["resultado"], cuits_propios=trabajo.cuits_propios,
+                                 nombre=trabajo.nombre, hojas=salida["hojas"])
+        except Exception:
+            print(traceback.format_exc())
+
+    def _limpiar(self):
+        """Descarta los trabajos terminados más viejos que la retención (y los más viejos si sobran)"""
+        ahora = time.time()
+        terminados = sorted((t for t in self.trabajos.values() if t.terminado is not None),
+                            key=lambda t: t.terminado)
+        sobrantes = max(0, len(self.trabajos) - self.max_trabajos)
+        for i, t in enumerate(terminados):
+            if i < sobrantes or ahora - t.terminado > self.retencion_s:
+                del self.trabajos[t.id]
+
+    def obtener(self, id_):
+        with self._lock:
+            return self.trabajos.get(id_)
+
+    def salud(self):
+        with self._lock:
+            datos = {"procesos": self.procesos, "cola_maxima": self.cola, "pendientes": self.pendientes(),
+                     "trabajos": len(self.trabajos), "calentamiento": self.calentamiento}
+        if self.almacen is not None:
+            datos["almacen"] = self.almacen.estadisticas()
+        return datos
+
+    def cerrar(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._escritura.shutdown(wait=True)  # los resultados ya terminados quedan guardados
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+def _cuits(valores):
+    """["30711511004", "20123456789|Razón"] -> [(cuit, razón, etiqueta)] como arma la interfaz"""
+    cuits = []
+    for valor in valores:
+        if isinstance(valor, (list, tuple)):
+            cuit, razon = (list(valor) + ["", ""])[:2]
+        else:
+            cuit, _, razon = str(valor).partition("|")
+        cuit, razon = str(cuit).strip().replace("-", ""), str(razon).strip()
+        if cuit or razon:
+            cuits.append((cuit, razon, razon if razon else f"CUIT {cuit}"))
+    return cuits
+
+
+def leer_pedido(tipo, cuerpo, query):
+    """Devuelve (contenido_pdf, banco, nombre, cuits_propios) a partir del pedido POST /jobs"""
+    opciones = {k: v for k, v in parse_qs(query).items()}
+    contenido = None
+    tipo_base = tipo.split(";")[0].strip().lower()
+    if tipo_base == "multipart/form-data":
+        mensaje = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {tipo}\r\n\r\n".encode("latin-1") + cuerpo)
+        for parte in mensaje.iter_parts():
+            campo = parte.get_param("name", header="content-disposition")
+            valor = parte.get_payload(decode=True) or b""
+            if campo == "pdf":
+                contenido = valor
+                opciones.setdefault("nombre", [parte.get_filename() or "extracto.pdf"])
+            elif campo:
+                opciones.setdefault(campo, []).append(valor.decode("utf-8", "replace"))
+    elif tipo_base == "application/json":
+        try:
+            datos = json.loads(cuerpo or b"{}")
+            contenido = base64.b64decode(datos.get("pdf_base64") or "", validate=True)
+        except ValueError as e:
+            raise PedidoInvalido(f"JSON inválido: {e}")
+        for clave in ("banco", "nombre"):
+            if datos.get(clave):
+                opciones[clave] = [datos[clave]]
+        opciones.setdefault("cuit", []).extend(datos.get("cuits_propios") or [])
+    else:
+        contenido = cuerpo
+
+    if not contenido or not contenido.startswith(b"%PDF"):
+        raise PedidoInvalido("El pedido no contiene un PDF")
+    banco = (opciones.get("banco") or [BANCO_AUTOMATICO])[0]
+    nombre = (opciones.get("nombre") or ["extracto.pdf"])[0]
+    return contenido, banco, nombre, _cuits(opciones.get("cuit", []))
+
+
+class Manejador(BaseHTTPRequestHandler):
+    server_version = "BancosServicio/1.0"
+
+    @property
+    def servicio(self):
+        return self.server.servicio
+
+    def _json(self, estado, datos, encabezados=None):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        for clave, valor in (encabezados or {}).items():
+            self.send_header(clave, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _error(self, estado, mensaje, encabezados=None):
+        self._json(estado, {"error": mensaje}, encabezados)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            return self._error(404, "Ruta inexistente")
+        largo = int(self.headers.get("Content-Length") or 0)
+        if largo > TAMANIO_MAXIMO_PDF:
+            return self._error(413, f"El PDF supera {TAMANIO_MAXIMO_PDF // (1024 * 1024)} MB")
+        cuerpo = self.rfile.read(largo)
+        try:
+            contenido, banco, nombre, cuits_propios = leer_pedido(self.headers.get("Content-Type", ""), cuerpo,
+                                                                  url.query)
+        except PedidoInvalido as e:
+            return self._error(400, str(e))
+
+        from procesadores import lista_bancos
+        if banco != BANCO_AUTOMATICO and banco not in lista_bancos():
+            return self._error(400, f"Banco desconocido: {banco}")
+        try:
+            trabajo, nuevo = self.servicio.enviar(contenido, banco, nombre, cuits_propios)
+        except ColaLlena as e:
+            return self._error(429, str(e), {"Retry-After": "5"})
+        self._json(202 if nuevo else 200, trabajo.como_dict(), {"Location": f"/jobs/{trabajo.id}"})
+
+    def do_GET(self):
+        partes = [p for p in urlparse(self.path).path.split("/") if p]
+        if partes == ["health"]:
+            return self._json(200, self.servicio.salud())
+        if partes == ["metrics"]:
+            cuerpo = metricas.REGISTRO.exponer().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+            return
+        if len(partes) not in (2, 3) or partes[0] != "jobs" or (len(partes) == 3 and partes[2] != "result"):
+            return self._error(404, "Ruta inexistente")
+        trabajo = self.servicio.obtener(partes[1])
+        if trabajo is None:
+            return self._error(404, "Trabajo inexistente o vencido")
+        if len(partes) == 2:
+            return self._json(200, trabajo.como_dict())
+
+        estado = trabajo.estado
+        if estado in ("en_cola", "procesando"):
+            return self._error(409, f"El trabajo todavía no terminó ({estado})", {"Retry-After": "2"})
+        if estado == "error":
+            return self._error(422, trabajo.error)
+        nombre = trabajo.nombre.rsplit(".", 1)[0] + ".xlsx"
+        self.send_response(200)
+        self.send_header("Content-Type", MIME_EXCEL)
+        self.send_header("Content-Length", str(len(trabajo.resultado)))
+        self.send_header("Content-Disposition", f"attachment; filename=\"{nombre}\"")
+        self.end_headers()
+        self.wfile.write(trabajo.resultado)
+
+
+def crear_servidor(servicio, host="127.0.0.1", puerto=8600):
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    servidor.daemon_threads = True
+    servidor.servicio = servicio
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de procesamiento de extractos")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8600)
+    parser.add_argument("--procesos", type=int, default=2, help="Procesos trabajadores")
+    parser.add_argument("--cola", type=int, default=8, help="Trabajos en espera además de los que se procesan")
+    parser.add_argument("--retencion", type=float, default=3600.0,
+                        help="Segundos que se guardan los resultados terminados")
+    parser.add_argument("--sin-calentar", action="store_true",
+                        help="No precalentar los trabajadores (el primer extracto paga importaciones y regex)")
+    parser.add_argument("--resultados", default=os.environ.get("BANCOS_RESULTADOS", "bancos_resultados.sqlite"),
+                        help="Almacén SQLite de resultados (\"0\" lo desactiva)")
+    args = parser.parse_args()
+
+    almacen = Almacen(args.resultados) if args.resultados != "0" else None
+    servicio = Servicio(procesos=args.procesos, cola=args.cola, retencion_s=args.retencion,
+                        calentar=not args.sin_calentar, almacen=almacen)
+    if servicio.calentamiento:
+        print(f"Trabajadores calientes en {servicio.calentamiento['total_s']:.1f} s "
+              f"(+{servicio.calentamiento['arranque_pool_s']:.1f} s de arranque del pool)")
+    servidor = crear_servidor(servicio, args.host, args.puerto)
+    print(f"Servicio escuchando en http://{args.host}:{args.puerto} ({args.procesos} procesos, cola {args.cola})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servicio.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1114 @@
+"""
+Generador de extractos sintéticos para todos los formatos soportados.
+
+Arma PDFs realistas (sin datos de clientes) con la estructura que espera cada procesar_*:
+encabezados, período, una o varias cuentas y monedas, descripciones en varias líneas, saltos de
+página con encabezados repetidos y, en MercadoPago, descripciones huérfanas partidas por el corte
+de página. Junto al PDF se devuelve la "verdad" (movimientos y saldos esperados por cuenta), así
+los benchmarks de escala y los chequeos de correctitud no dependen de extractos reales.
+
+El PDF se escribe a mano (Courier, una línea de texto por renglón): no hace falta ninguna
+dependencia extra ni red, y tanto PyPDF2 como pdfplumber lo leen igual que un extracto de banco.
+
+Uso:
+    python sinteticos.py Galicia -n 500 -o galicia_500          # galicia_500.pdf + galicia_500.json
+    python sinteticos.py Comafi -n 2000 --cuentas 2 --monedas ARS USD --verificar
+    python sinteticos.py todos -n 100 --verificar                # un extracto por banco y control
+"""
+import argparse
+import calendar
+import io
+import json
+import math
+import os
+import random
+import sys
+import zlib
+from dataclasses import dataclass, field
+from datetime import date
+
+from lectura_excel import leer_excel
+
+# ---------------------------------------------------------------------------
+# Escritor PDF mínimo
+# ---------------------------------------------------------------------------
+
+ANCHO_A4, ALTO_A4 = 595, 842
+MARGEN = 30
+
+
+def _escapar(texto):
+    crudo = texto.encode("cp1252", "replace")
+    crudo = crudo.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+    return crudo.decode("latin-1")
+
+
+def pdf_desde_paginas(paginas, tam=None, interlineado=None):
+    """
+    Escribe un PDF A4 con una línea de texto por renglón (Courier, WinAnsi).
+    paginas: lista de páginas, cada una una lista de líneas. Devuelve los bytes del PDF.
+    El tamaño de letra se ajusta para que entren la línea más larga y el renglón más bajo.
+    """
+    max_lineas = max((len(p) for p in paginas), default=1) or 1
+    max_largo = max((len(l) for p in paginas for l in p), default=1) or 1
+    if interlineado is None:
+        interlineado = min(12.0, (ALTO_A4 - 2 * MARGEN) / max_lineas)
+    if tam is None:
+        # Courier: cada carácter ocupa 0,6 del tamaño de letra
+        tam = min(8.0, interlineado * 0.85, (ANCHO_A4 - 2 * MARGEN) / (0.6 * max_largo))
+
+    objetos = []
+
+    def agregar(contenido):
+        objetos.append(contenido)
+        return len(objetos)
+
+    fuente = agregar(b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>")
+    contenidos = []
+    for lineas in paginas:
+        ops = ["BT", f"/F1 {tam:.2f} Tf", f"{interlineado:.2f} TL", f"{MARGEN} {ALTO_A4 - MARGEN - 10} Td"]
+        ops += [f"({_escapar(l)}) Tj T*" for l in lineas]
+        ops.append("ET")
+        datos = zlib.compress("\n".join(ops).encode("latin-1"))
+        contenidos.append(agregar(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(datos)
+                                  + datos + b"\nendstream"))
+    id_paginas = len(objetos) + len(contenidos) + 1
+    hijos = [agregar(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 %d 0 R >> >>"
+                     b" /Contents %d 0 R >>" % (id_paginas, ANCHO_A4, ALTO_A4, fuente, c)) for c in contenidos]
+    agregar(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % h for h in hijos), len(hijos)))
+    catalogo = agregar(b"<< /Type /Catalog /Pages %d 0 R >>" % id_paginas)
+
+    salida = io.BytesIO()
+    salida.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    posiciones = []
+    for i, contenido in enumerate(objetos, 1):
+        posiciones.append(salida.tell())
+        salida.write(b"%d 0 obj\n" % i + contenido + b"\nendobj\n")
+    inicio_xref = salida.tell()
+    salida.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1))
+    for p in posiciones:
+        salida.write(b"%010d 00000 n \n" % p)
+    salida.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                 % (len(objetos) + 1, catalogo, inicio_xref))
+    return salida.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Modelo (verdad de referencia)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Movimiento:
+    fecha: date
+    descripcion: str
+    importe: float  # + crédito, - débito
+    saldo: float
+    detalle: str = ""  # segunda línea de la descripción (vacío si entra en una)
+    huerfano: bool = False  # MercadoPago: el comienzo de la descripción queda antes de la fecha
+
+
+@dataclass
+class Cuenta:
+    numero: str
+    moneda: str  # "ARS" / "USD"
+    saldo_inicial: float
+    movimientos: list = field(default_factory=list)
+
+    @property
+    def saldo_final(self):
+        return self.movimientos[-1].saldo if self.movimientos else self.saldo_inicial
+
+
+@dataclass
+class Extracto:
+    banco: str
+    titular: str
+    cuit: str
+    desde: date
+    hasta: date
+    cuentas: list
+    semilla: int
+
+    def verdad(self):
+        """Movimientos y saldos esperados, en un dict serializable a JSON"""
+        return {
+            "banco": self.banco,
+            "titular": self.titular,
+            "cuit": self.cuit,
+            "desde": self.desde.strftime("%d/%m/%Y"),
+            "hasta": self.hasta.strftime("%d/%m/%Y"),
+            "semilla": self.semilla,
+            "cuentas": [{
+                "numero": c.numero,
+                "moneda": c.moneda,
+                "saldo_inicial": c.saldo_inicial,
+                "saldo_final": c.saldo_final,
+                "movimientos": [{
+                    "fecha": m.fecha.strftime("%d/%m/%Y"),
+                    "descripcion": f"{m.descripcion} {m.detalle}".strip(),
+                    "importe": m.importe,
+                    "saldo": m.saldo,
+                } for m in c.movimientos],
+            } for c in self.cuentas],
+        }
+
+
+@dataclass
+class Opciones:
+    movimientos: int = 100  # total, repartido entre las cuentas
+    cuentas: int = 1
+    monedas: tuple = ("ARS",)
+    paginas: int = None  # si se indica, manda sobre lineas_por_pagina
+    lineas_por_pagina: int = 55
+    multilinea: float = 0.15  # probabilidad de que la descripción siga en otra línea
+    huerfanas: float = 0.05  # MercadoPago: probabilidad de descripción partida antes de la fecha
+    semilla: int = 0
+    desde: date = date(2025, 3, 1)  # el período es el mes completo
+
+
+# Vocabulario sin dígitos (varios parsers cortan la descripción en el primer número) y con las
+# palabras clave que usan los bancos que clasifican por concepto (Comafi, Hipotecario)
+CONCEPTOS_CREDITO = [
+    "TRANSFERENCIA RECIBIDA", "DEPOSITO EFECTIVO", "CREDITO RESCATE FONDOS",
+    "ACREDITACION DE PLAZO FIJO", "TRANSF. INMEDIATA RECIBIDA",
+]
+CONCEPTOS_DEBITO = [
+    "PAGO DE SERVICIOS", "TRANSFERENCIA ENVIADA", "DEBITO AUTOMATICO SEGURO", "COMISION MANTENIMIENTO",
+    "IMPUESTO LEY", "EXTRACCION CAJERO", "PAGO ELECTRONICO PROVEEDORES",
+]
+NOMBRES = ["JUAN", "MARIA", "CARLOS", "ANA", "JORGE", "LUCIA", "PABLO", "SOFIA", "DIEGO", "LAURA"]
+APELLIDOS = ["PEREZ", "GOMEZ", "RODRIGUEZ", "FERNANDEZ", "LOPEZ", "MARTINEZ", "GARCIA", "SOSA", "ROMERO",
+             "ALVAREZ"]
+MESES = ["ENERO", "FEBRERO", "MARZO", "ABRIL", "MAYO", "JUNIO", "JULIO", "AGOSTO", "SEPTIEMBRE", "OCTUBRE",
+         "NOVIEMBRE", "DICIEMBRE"]
+MESES_ABREV = [m[:3] for m in MESES]
+
+
+def _persona(rnd):
+    return f"{rnd.choice(APELLIDOS)} {rnd.choice(NOMBRES)}"
+
+
+def _digitos(rnd, mascara):
+    """'####-#' -> '4821-7' (cada # es un dígito al azar)"""
+    return "".join(str(rnd.randint(0, 9)) if c == "#" else c for c in mascara)
+
+
+def _cuit(rnd):
+    return _digitos(rnd, f"{rnd.choice(['20', '23', '27', '30'])}-########-#")
+
+
+def _importe_centavos(rnd, moneda):
+    # Distribución log-uniforme: muchos importes chicos y algunos grandes, como en un extracto real
+    maximo = 5_000 if moneda == "USD" else 800_000
+    return max(1, int(math.exp(rnd.uniform(math.log(100), math.log(maximo * 100)))))
+
+
+def generar_cuenta(rnd, numero, moneda, cantidad, desde, hasta, multilinea, huerfanas, solo_creditos=False):
+    """Cuenta con saldo corrido siempre positivo y fechas ascendentes dentro del período"""
+    saldo = rnd.randint(50_000, 5_000_000) if moneda == "ARS" else rnd.randint(1_000, 50_000)
+    saldo *= 100
+    cuenta = Cuenta(numero=numero, moneda=moneda, saldo_inicial=saldo / 100)
+    dias = sorted(rnd.randint(desde.day, hasta.day) for _ in range(cantidad))
+    for dia in dias:
+        monto = _importe_centavos(rnd, moneda)
+        if solo_creditos or rnd.random() < 0.4 or monto >= saldo:
+            importe, concepto = monto, rnd.choice(CONCEPTOS_CREDITO)
+        else:
+            importe, concepto = -monto, rnd.choice(CONCEPTOS_DEBITO)
+        saldo += importe
+        detalle = _persona(rnd) if rnd.random() < multilinea else ""
+        cuenta.movimientos.append(Movimiento(
+            fecha=desde.replace(day=dia),
+            descripcion=concepto,
+            importe=importe / 100,
+            saldo=saldo / 100,
+            detalle=detalle,
+            huerfano=rnd.random() < huerfanas,
+        ))
+    return cuenta
+
+
+def _recalcular_saldos(cuenta):
+    saldo = cuenta.saldo_inicial
+    for m in cuenta.movimientos:
+        saldo = round(saldo + m.importe, 2)
+        m.saldo = saldo
+
+
+def _primer_importe_miles(rnd, cuenta):
+    """El importe del movimiento más antiguo entre 1.000 y 9.999,99 (Provincia Formato 2)"""
+    primero = cuenta.movimientos[0]
+    importe = rnd.randint(100_000, 999_999) / 100
+    primero.importe = importe if primero.importe > 0 else -importe
+    cuenta.saldo_inicial = max(cuenta.saldo_inicial, importe + 1)
+    _recalcular_saldos(cuenta)
+
+
+def _primer_credito(rnd, cuenta):
+    """El movimiento más antiguo es un crédito (Patagonia: sin saldo anterior no se puede deducir el signo)"""
+    primero = cuenta.movimientos[0]
+    if primero.importe < 0:
+        primero.importe = -primero.importe
+        primero.descripcion = rnd.choice(CONCEPTOS_CREDITO)
+        _recalcular_saldos(cuenta)
+
+
+# ---------------------------------------------------------------------------
+# Formatos numéricos
+# ---------------------------------------------------------------------------
+
+def _ar(valor):
+    """1234.5 -> '1.234,50' (negativo con '-' adelante)"""
+    texto = f"{abs(valor):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return ("-" if valor < 0 else "") + texto
+
+
+def _ar_sufijo(valor):
+    """Negativo con '-' al final: '1.234,50-'"""
+    return _ar(abs(valor)) + ("-" if valor < 0 else "")
+
+
+def _en(valor):
+    """1234.5 -> '1,234.50'"""
+    return f"{valor:,.2f}"
+
+
+def _dec(valor):
+    """1234.5 -> '1234.50'"""
+    return f"{valor:.2f}"
+
+
+# ---------------------------------------------------------------------------
+# Documento y paginado
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Documento:
+    """Contenido de un extracto antes de paginar"""
+    cabecera: list  # primeras líneas de la página 1
+    bloques: list  # cada movimiento (o encabezado de cuenta) es una lista de líneas
+    pie: list = field(default_factory=list)  # cierre después del último bloque
+    encabezado: object = None  # f(n, total) -> líneas al tope de cada página
+    pie_pagina: object = None  # f(n, total) -> líneas al final de cada página salvo la última
+    partir_bloques: bool = False  # si un bloque puede quedar cortado entre dos páginas
+
+
+def paginar(doc, lineas_por_pagina=55, paginas=None):
+    """Reparte el documento en páginas (listas de líneas)"""
+    n_enc = len(doc.encabezado(1, 1)) if doc.encabezado else 0
+    n_pie = len(doc.pie_pagina(1, 1)) if doc.pie_pagina else 0
+    unidades = [[l] for l in doc.cabecera]
+    for bloque in doc.bloques:
+        unidades += [[l] for l in bloque] if doc.partir_bloques else [bloque]
+    unidades += [[l] for l in doc.pie]
+    if paginas:
+        total_lineas = sum(len(u) for u in unidades)
+        capacidad = math.ceil(total_lineas / max(1, paginas))
+    else:
+        capacidad = lineas_por_pagina - n_enc - n_pie
+    capacidad = max(capacidad, 5)
+
+    cuerpos = [[]]
+    for unidad in unidades:
+        if cuerpos[-1] and len(cuerpos[-1]) + len(unidad) > capacidad:
+            cuerpos.append([])
+        cuerpos[-1].extend(unidad)
+
+    total = len(cuerpos)
+    resultado = []
+    for n, cuerpo in enumerate(cuerpos, 1):
+        pagina = list(doc.encabezado(n, total)) if doc.encabezado else []
+        pagina += cuerpo
+        if doc.pie_pagina and n < total:
+            pagina += doc.pie_pagina(n, total)
+        resultado.append(pagina)
+    return resultado
+
+
+# ---------------------------------------------------------------------------
+# Renderers por banco
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Generador:
+    renderizar: object  # f(extracto, rnd) -> Documento
+    max_cuentas: int = 1
+    monedas: tuple = ("ARS",)
+    numero_cuenta: str = "###-######/#"  # máscara del número de cuenta
+    solo_creditos: bool = False
+    ajuste: object = None  # f(rnd, cuenta) para restricciones propias del formato
+    notas: str = ""
+
+
+GENERADORES = {}
+
+
+def _formato(banco, **kwargs):
+    def registrar(funcion):
+        GENERADORES[banco] = Generador(renderizar=funcion, **kwargs)
+        return funcion
+    return registrar
+
+
+def _dmy(f):
+    return f.strftime("%d/%m/%Y")
+
+
+def _dmy2(f):
+    return f.strftime("%d/%m/%y")
+
+
+def _con_detalle(m, separador=" "):
+    return f"{m.descripcion}{separador}{m.detalle}" if m.detalle else m.descripcion
+
+
+@_formato("Galicia")
+def _galicia(ext, rnd):
+    c = ext.cuentas[0]
+    cabecera = [
+        "Banco de Galicia y Buenos Aires S.A.U.",
+        f"Cuenta: Caja de Ahorro en Pesos {c.numero} 123{ext.titular}Resumen de cuenta",
+        f"CUIT {ext.cuit}",
+        f"{_dmy(ext.desde)} {_dmy(ext.hasta)}Período",
+        f"${_ar(c.saldo_final)}${_ar(c.saldo_inicial)}Saldos",
+        "Movimientos",
+        "Fecha Descripción Origen Crédito Débito Saldo",
+    ]
+    bloques = []
+    for m in c.movimientos:
+        bloque = [f"{_dmy2(m.fecha)} {m.descripcion} {_ar(m.importe)} {_ar(m.saldo)}"]
+        if m.detalle:
+            bloque.append(m.detalle)
+        bloques.append(bloque)
+    pie = [f"Total ${_ar(sum(m.importe for m in c.movimientos if m.importe > 0))}"]
+    return Documento(cabecera, bloques, pie)
+
+
+@_formato("Ciudad", numero_cuenta="#######/#")
+def _ciudad(ext, rnd):
+    c = ext.cuentas[0]
+    cabecera = [
+        "BANCO CIUDAD DE BUENOS AIRES",
+        "RESUMEN DE CUENTA",
+        "CUIL/CUIT/CDI",
+        f"{ext.titular} {ext.cuit}",
+        f"C U E N T A N Ú M E R O {c.numero}",
+        f"Período: {_dmy(ext.desde)} al {_dmy(ext.hasta)}",
+        f"S A L D O A N T E R I O R {_ar_sufijo(c.saldo_inicial)}",
+        "FECHA CONCEPTO IMPORTE SALDO DESCRIPCION",
+    ]
+    bloques = []
+    for m in c.movimientos:
+        fecha = f"{m.fecha.day:02d}-{MESES_ABREV[m.fecha.month - 1]}-{m.fecha.year}"
+        # La descripción del movimiento va después del saldo, en la misma línea
+        linea = f"{fecha} {m.descripcion} {_ar_sufijo(m.importe)} {_ar_sufijo(m.saldo)}"
+        bloques.append([f"{linea} {m.detalle}" if m.detalle else linea])
+    pie = [f"SALDO AL {_dmy(ext.hasta)} {_ar_sufijo(c.saldo_final)}"]
+    return Documento(cabecera, bloques, pie)
+
+
+@_formato("Comafi", max_cuentas=4, monedas=("ARS", "USD"), numero_cuenta="####-#####-#")
+def _comafi(ext, rnd):
+    cabecera = [
+        "BANCO COMAFI S.A.",
+        f"{MESES[ext.desde.month - 1]} - {ext.desde.year}",
+        f"CUIT {ext.cuit}",
+    ]
+    bloques = []
+    for i, c in enumerate(ext.cuentas):
+        tipo = "CUENTA CORRIENTE BANCARIA EN PESOS" if c.moneda == "ARS" else "CAJA DE AHORROS EN DOLARES"
+        bloques.append([
+            f"{tipo} .",
+            f"NRO. {c.numero}",
+            "DETALLE DE MOVIMIENTOS",
+            "Fecha Conceptos Referencias Débitos Créditos Saldo",
+            f"{_dmy2(ext.desde)} SALDO ANTERIOR {_ar_sufijo(c.saldo_inicial)}",
+        ])
+        for m in c.movimientos:
+            bloque = [f"{_dmy2(m.fecha)} {m.descripcion} {_ar(abs(m.importe))} {_ar_sufijo(m.saldo)}"]
+            if m.detalle:
+                bloque.append(m.detalle)
+            bloques.append(bloque)
+        bloques.append([f"Saldo al: {_dmy(ext.hasta)} {_ar_sufijo(c.saldo_final)}"])
+    pie = ["RESUMEN DE SALDO"]
+    titular = ext.titular
+    return Documento(cabecera, bloques, pie,
+                     encabezado=lambda n, t: [f"{titular} Hoja: {n}/{t}" if n == 1 else f"Hoja: {n}/{t}"])
+
+
+# Credicoop y Macro (Formato 3) se leen con PyPDF2 y ubican el signo por la columna del importe
+_COL_DESC = 18
+
+
+def _linea_columnas(inicio, descripcion, importe, fin_debito, fin_credito, saldo=None, fin_saldo=None):
+    linea = f"{inicio:<{_COL_DESC}}{descripcion[:40]:<40}"
+    fin = fin_debito if importe < 0 else fin_credito
+    linea += _ar(abs(importe)).rjust(fin - len(linea))
+    if saldo is not None:
+        linea += _ar(saldo).rjust(fin_saldo - len(linea))
+    return linea
+
+
+@_formato("Credicoop", numero_cuenta="###.###.######/#")
+def _credicoop(ext, rnd):
+    c = ext.cuentas[0]
+    encabezado = f"{'FECHA':<10}{'COMBTE':<8}{'DESCRIPCION':<40}" + "DEBITO".rjust(18) + "CREDITO".rjust(16) \
+        + "SALDO".rjust(16)
+    cabecera = [
+        "Cuenta Corriente Comercial en Pesos",
+        f"{ext.titular}    CUIT {ext.cuit}",
+        f"Cta. {c.numero}",
+        f"Resumen: {ext.desde.month:02d} del: {_dmy(ext.desde)} al: {_dmy(ext.hasta)}",
+        encabezado,
+        " " * _COL_DESC + "SALDO ANTERIOR" + _ar(c.saldo_inicial).rjust(108 - _COL_DESC - 14),
+    ]
+    bloques = []
+    for m in c.movimientos:
+        inicio = f"{_dmy2(m.fecha)}  {rnd.randint(100000, 999999)}"
+        bloque = [_linea_columnas(inicio, m.descripcion, m.importe, 76, 92, m.saldo, 108)]
+        if m.detalle:
+            bloque.append(" " * _COL_DESC + m.detalle)
+        bloques.append(bloque)
+    pie = [" " * _COL_DESC + f"SALDO AL {_dmy(ext.hasta)}" + _ar(c.saldo_final).rjust(108 - _COL_DESC - 20)]
+    return Documento(cabecera, bloques, pie,
+                     encabezado=lambda n, t: [f"VIENE DE PAGINA {n - 1}", encabezado] if n > 1 else [],
+                     pie_pagina=lambda n, t: ["CONTINUA EN PAGINA SIGUIENTE"])
+
+
+@_formato("Credicoop (Formato 2)", numero_cuenta="###-######/#")
+def _credicoop_2(ext, rnd):
+    c = ext.cuentas[0]
+    cabecera = [
+        "Banca Internet Empresas",
+        f"Adherente: {ext.titular}",
+        f"Nro. de Cuenta: {c.numero}",
+        f"Saldos y movimientos {_dmy(ext.desde)} - {_dmy(ext.hasta)}",
+        "Fecha Concepto Débito Crédito Saldo Cod.",
+    ]
+    bloques = []
+    for m in reversed(c.movimientos):  # el extracto viene de más reciente a más antiguo
+        debito, credito = (-m.importe, 0.0) if m.importe < 0 else (0.0, m.importe)
+        bloque = [f"{_dmy(m.fecha)} {m.descripcion} {_dec(debito)} {_dec(credito)} {_dec(m.saldo)} "
+                  f"{rnd.choice(['AB', 'CR', 'DB'])}{rnd.randint(1, 9)}"]
+        if m.detalle:
+            bloque.append(m.detalle)
+        bloques.append(bloque)
+    return Documento(cabecera, bloques, encabezado=lambda n, t: [f"Página {n} de {t}"] if n > 1 else [])
+
+
+@_formato("BBVA Frances", max_cuentas=4, monedas=("ARS", "USD"), numero_cuenta="###-######/#")
+def _frances(ext, rnd):
+    cabecera = [
+        "BBVA",
+        "RESUMEN DE CUENTAS",
+        ext.titular,
+        f"CUIT {ext.cuit}",
+        f"Período del {_dmy(ext.desde)} al {_dmy(ext.hasta)}",
+        "Movimientos en cuentas",
+    ]
+    bloques = []
+    for i, c in enumerate(ext.cuentas):
+        tipo = "CC" if i % 2 == 0 else "CA"
+        simbolo = "$" if c.moneda == "ARS" else "U$S"
+        bloques.append([
+            f"{tipo} {simbolo} {c.numero}",
+            "FECHA ORIGEN CONCEPTO DÉBITO CRÉDITO SALDO",
+            f"SALDO ANTERIOR {_ar(c.saldo_inicial)}",
+        ])
+        for m in c.movimientos:
+            bloque = [f"{m.fecha:%d/%m} {m.descripcion} {_ar(m.importe)} {_ar(m.saldo)}"]
+            if m.detalle:
+                bloque.append(m.detalle)
+            bloques.append(bloque)
+        bloques.append([f"SALDO AL {_dmy(ext.hasta)} {_ar(c.saldo_final)}", "TOTAL MOVIMIENTOS"])
+    pie = ["Transferencias"]
+    return Documento(cabecera, bloques, pie)
+
+
+def _galicia_mas_hsbc(ext, rnd, encabezado_banco):
+    titular = ext.titular.split(" ", 1)
+    cabecera = [
+        encabezado_banco,
+        f"EXTRACTO DEL {_dmy(ext.desde)} AL {_dmy(ext.hasta)}",
+        f"ESTIMADO {titular[0]}, {titular[1]}",
+        "PRODUCTO NUMERO SALDO ANTERIOR SALDO ACTUAL",
+    ]
+    for c in ext.cuentas:
+        simbolo = "$" if c.moneda == "ARS" else "U$S"
+        cabecera.append(f"CAJA DE AHORROS {simbolo} {c.numero} {_en(c.saldo_inicial)} {_en(c.saldo_final)}")
+    cabecera.append("DETALLE DE OPERACIONES")
+    bloques = []
+    for c in ext.cuentas:
+        moneda = "PESOS" if c.moneda == "ARS" else "DOLARES"
+        bloques.append([f"CAJA DE AHORROS EN {moneda} NRO. {c.numero}",
+                        f"SALDO ANTERIOR {_en(c.saldo_inicial)}"])
+        fecha_anterior = None
+        for m in c.movimientos:
+            # Los movimientos del mismo día no repiten la fecha
+            fecha = "" if m.fecha == fecha_anterior else f"{m.fecha.day:02d}-{MESES_ABREV[m.fecha.month - 1]} "
+            fecha_anterior = m.fecha
+            bloque = [f"{fecha}- {m.descripcion} {_en(abs(m.importe))} {_en(m.saldo)}"]
+            if m.detalle:
+                bloque.append(m.detalle)
+            bloques.append(bloque)
+        bloques.append([f"SALDO FINAL {_en(c.saldo_final)}"])
+    return Documento(cabecera, bloques, encabezado=lambda n, t: [f"HOJA {n} DE {t}"] if n > 1 else [])
+
+
+@_formato("Galicia Más", max_cuentas=4, monedas=("ARS", "USD"), numero_cuenta="4###-#-#####-#")
+def _galicia_mas(ext, rnd):
+    return _galicia_mas_hsbc(ext, rnd, "BANCO GALICIA MAS S.A.")
+
+
+@_formato("HSBC", max_cuentas=4, monedas=("ARS", "USD"), numero_cuenta="4###-#-#####-#")
+def _hsbc(ext, rnd):
+    return _galicia_mas_hsbc(ext, rnd, "HSBC BANK ARGENTINA S.A.")
+
+
+@_formato("Hipotecario", numero_cuenta="###-#")
+def _hipotecario(ext, rnd):
+    c = ext.cuentas[0]
+    creditos = sum(m.importe for m in c.movimientos if m.importe > 0)
+    debitos = -sum(m.importe for m in c.movimientos if m.importe < 0)
+    cabecera = [
+        "BANCO HIPOTECARIO",
+        f"Sr(es): {ext.titular}",
+        f"Período del Extracto: {_dmy(ext.desde)} al {_dmy(ext.hasta)}",
+        f"CUENTA CORRIENTE EN PESOS Nº {c.numero}",
+        "SALDO INICIAL CREDITOS DEBITOS IVA SALDO FINAL",
+        f"$ {_en(c.saldo_inicial)} $ {_en(creditos)} $ {_en(debitos)} $ {_en(0)} $ {_en(c.saldo_final)}",
+        "FECHA DESCRIPCION IMPORTE",
+    ]
+    bloques = []
+    for m in c.movimientos:
+        # El signo sale del prefijo N/C - N/D
+        prefijo = "N/C" if m.importe > 0 else "N/D"
+        bloque = [f"{_dmy(m.fecha)} {prefijo} {m.descripcion} {_en(abs(m.importe))}"]
+        if m.detalle:
+            bloque.append(m.detalle)
+        bloques.append(bloque)
+    return Documento(cabecera, bloques)
+
+
+@_formato("ICBC (Formato 1)", numero_cuenta="####/########/##")
+def _icbc(ext, rnd):
+    c = ext.cuentas[0]
+    cabecera = [
+        "ICBC",
+        f"V.001 {ext.titular}",
+        f"CUENTA CORRIENTE {c.numero}",
+        f"PERIODO {ext.desde:%d-%m-%Y} AL {ext.hasta:%d-%m-%Y}",
+        f"SALDO ULTIMO EXTRACTO AL {ext.desde:%d/%m/%Y} {_ar(c.saldo_inicial)}",
+        "FECHA CONCEPTO                                 F.VALOR  COMPROBANTE       IMPORTE           SALDO",
+    ]
+    bloques = []
+    for m in c.movimientos:
+        # Columnas fijas: fecha 0-5, descripción 6-50, importe desde la 62 (negativo con '-' final)
+        linea = f"{m.fecha:%d-%m} {m.descripcion[:44]:<44}{rnd.randint(1000000, 9999999):>12}"
+        linea += _ar_sufijo(m.importe).rjust(18) + _ar_sufijo(m.saldo).rjust(18)
+        bloque = [linea]
+        if m.detalle:
+            bloque.append(" " * 6 + m.detalle)
+        bloques.append(bloque)
+    pie = [f"SALDO FINAL AL {ext.hasta:%d/%m/%Y} {_ar(c.saldo_final)}"]
+    return Documento(cabecera, bloques, pie)
+
+
+@_formato("ICBC (Formato 2)", numero_cuenta="####-#######/#")
+def _icbc_2(ext, rnd):
+    c = ext.cuentas[0]
+    meses = [m.lower() for m in MESES_ABREV]
+    cabecera = [
+        "Consulta de movimientos",
+        "Cuentas CC",
+        f"{ext.titular} | {c.numero}",
+        f"FILTROS Fecha desde:{ext.desde.day:02d}-{meses[ext.desde.month - 1]}.-{ext.desde.year} "
+        f"Fecha hasta:{ext.hasta.day:02d}-{meses[ext.hasta.month - 1]}.-{ext.hasta.year}",
+        "Fecha Concepto Importe Saldo",
+    ]
+    bloques = []
+    for m in reversed(c.movimientos):
+        fecha = f"{m.fecha.day:02d}-{meses[m.fecha.month - 1]}.-{m.fecha.year}"
+        bloque = [f"{fecha} {m.descripcion} $ {_ar(m.importe)} $ {_ar(m.saldo)}"]
+        if m.detalle:
+            bloque.append(m.detalle)
+        bloques.append(bloque)
+    return Documento(cabecera, bloques)
+
+
+@_formato("ICBC (Formato 3)", solo_creditos=True,
+          notas="Resumen de transferencias recibidas: solo créditos y sin saldos en el reporte")
+def _icbc_3(ext, rnd):
+    cabecera = [
+        ext.titular,
+        f"P ER I OD O {_dmy(ext.desde)} AL {_dmy(ext.hasta)}",
+        "RESUMEN DE TRANSFERENCIAS",
+        "FECHA CONCEPTO ORDENANTE IMPORTE",
+    ]
+    bloques = []
+    for m in ext.cuentas[0].movimientos:
+        # El reporte toma como crédito la transferencia que informa el ordenante
+        ordenante = m.detalle or _persona(rnd)
+        bloques.append([f"{m.fecha:%d-%m} {m.descripcion} ORD.: {ordenante} {_ar(m.importe)}"])
+    return Documento(cabecera, bloques, encabezado=lambda n, t: [f"HOJA N {n}"] if n > 1 else [])
+
+
+@_formato("Macro", numero_cuenta="#-###-##########-#")
+def _macro(ext, rnd):
+    c = ext.cuentas[0]
+    # El procesador saltea las primeras 20 líneas: el encabezado real del banco es igual de largo
+    cabecera = [
+        f"Período {_dmy(ext.desde)} al {_dmy(ext.hasta)}",
+        f"CUIT {ext.cuit}",
+        f"CUENTA {c.numero}",
+        "Banco Macro S.A.",
+    ]
+    cabecera += [f"Información al cliente {letra}" for letra in "ABCDEFGHIJKLMNOPQR"]
+    cabecera += [f"Saldos Anteriores {_ar(c.saldo_inicial)}", "Fecha Descripción Importe"]
+    bloques = []
+    for m in c.movimientos:
+        bloque = [f"{_dmy(m.fecha)} {m.descripcion} {_ar(m.importe)}"]
+        if m.detalle:
+            bloque.append(m.detalle)
+        bloques.append(bloque)
+    pie = [f"Saldos Finales {_ar(c.saldo_final)}", "Transferencias entre Cuentas"]
+    titular = ext.titular
+    return Documento(cabecera, bloques, pie, encabezado=lambda n, t: [f"Página {n}/{t}{titular}"])
+
+
+@_formato("Macro (Formato 2)", numero_cuenta="###############")
+def _macro_2(ext, rnd):
+    c = ext.cuentas[0]
+    cabecera = [
+        f"Empresa: {ext.cuit.replace('-', '')} - {ext.titular}",
+        f"Número {c.numero}",
+        "Últimos movimientos",
+        "Fecha Nro. Transacción Descripción Importe Saldo",
+    ]
+    bloques = []
+    for m in reversed(c.movimientos):
+        bloque = [f"{_dmy(m.fecha)} {rnd.randint(10000, 99999)} {m.descripcion} $ {_ar(m.importe)} $ {_ar(m.saldo)}"]
+        if m.detalle:
+            bloque.append(m.detalle)
+        bloques.append(bloque)
+    return Documento(cabecera, bloques, encabezado=lambda n, t: [f"Página {n} de {t}"] if n > 1 else [])
+
+
+@_formato("Macro (Formato 3)", max_cuentas=4, monedas=("ARS", "USD"), numero_cuenta="#-###-##########-#")
+def _macro_3(ext, rnd):
+    encabezado = f"{'FECHA':<{_COL_DESC}}{'DESCRIPCION':<40}" + "DEBITOS".rjust(12) + "CREDITOS".rjust(16) \
+        + "SALDO".rjust(18)
+    cabecera = [
+        "BANCO MACRO S.A.",
+        f"C.U.I.T {ext.cuit.replace('-', '')} {ext.titular}",
+        f"Periodo del Extracto: {_dmy(ext.desde)} al {_dmy(ext.hasta)}",
+    ]
+    bloques = []
+    for c in ext.cuentas:
+        moneda = "PESOS" if c.moneda == "ARS" else "DOLARES"
+        bloques.append([
+            f"CUENTA CORRIENTE ESPECIAL EN {moneda} NRO.: {c.numero}",
+            "DETALLE DE MOVIMIENTO",
+            encabezado,
+            f"SALDO ULTIMO EXTRACTO AL {_dmy(ext.desde)}" + _ar(c.saldo_inicial).rjust(40),
+        ])
+        for m in c.movimientos:
+            bloque = [_linea_columnas(_dmy2(m.fecha), m.descripcion, m.importe, 70, 86, m.saldo, 104)]
+            if m.detalle:
+                bloque.append(" " * _COL_DESC + m.detalle)
+            bloques.append(bloque)
+        bloques.append([f"SALDO FINAL AL {_dmy(ext.hasta)}" + _ar(c.saldo_final).rjust(40),
+                        "- - - - - - - - - - - - - - - - - - - -"])
+    return Documento(cabecera, bloques, encabezado=lambda n, t: [f"HOJA NRO {n}"] if n > 1 else [])
+
+
+@_formato("Macro (Formato 4)", numero_cuenta="#-###-##########-#")
+def _macro_4(ext, rnd):
+    c = ext.cuentas[0]
+    creditos = sum(m.importe for m in c.movimientos if m.importe > 0)
+    debitos = -sum(m.importe for m in c.movimientos if m.importe < 0)
+    cabecera = [
+        "BANCO MACRO",
+        f"Sr/a: {ext.titular}",
+        f"CUENTA CORRIENTE BANCARIA Nº {c.numero}",
+        f"Período del Extracto: {ext.desde.day}/{ext.desde.month}/{ext.desde.year} al "
+        f"{ext.hasta.day}/{ext.hasta.month}/{ext.hasta.year}",
+        "SALDO INICIAL CREDITOS DEBITOS I.V.A. SALDO FINAL",
+        f"{_en(c.saldo_inicial)} {_en(creditos)} {_en(debitos)} {_en(0)} {_en(c.saldo_final)}",
+        "FECHA DESCRIPCION IMPORTE",
+    ]
+    bloques = []
+    movimientos = c.movimientos
+    for i, m in enumerate(movimientos):
+        prefijo = "N/C" if m.importe > 0 else "N/D"
+        bloque = [f"{_dmy(m.fecha)} {prefijo} {m.descripcion} {_en(abs(m.importe))}"]
+        if m.detalle:
+            bloque.append(m.detalle)
+        if i + 1 == len(movimientos) or movimientos[i + 1].fecha != m.fecha:
+            bloque.append(f"SALDO FINAL AL DIA {_dmy(m.fecha)} : {_en(m.saldo)}")
+        bloques.append(bloque)
+    return Documento(cabecera, bloques)
+
+
+@_formato("MercadoPago", numero_cuenta="######################")
+def _mercadopago(ext, rnd):
+    c = ext.cuentas[0]
+    cabecera = [
+        "RESUMEN DE CUENTA",
+        ext.titular.title(),
+        f"Del {ext.desde.day} al {ext.hasta.day} de {MESES[ext.desde.month - 1].lower()} de {ext.desde.year} Periodo:",
+        f"CVU: {c.numero}",
+        f"Saldo inicial: $ {_ar(c.saldo_inicial)}",
+        f"Saldo final: $ {_ar(c.saldo_final)}",
+        "DETALLE DE MOVIMIENTOS",
+        "Fecha Descripción ID de la operación Valor Saldo",
+    ]
+    bloques = []
+    for i, m in enumerate(c.movimientos):
+        descripcion = _con_detalle(m).capitalize()
+        fecha = m.fecha.strftime("%d-%m-%Y")
+        montos = f"{rnd.randint(10 ** 10, 10 ** 11 - 1)} $ {_ar(m.importe)} $ {_ar(m.saldo)}"
+        palabras = descripcion.split(" ")
+        if m.huerfano and i > 0 and len(palabras) > 1:
+            # Corte de página: el comienzo de la descripción queda al pie de la hoja anterior
+            bloques.append([" ".join(palabras[:-1]), f"{fecha} {palabras[-1]} {montos}"])
+        elif m.detalle:
+            # Descripción en dos renglones: la línea de la fecha no trae montos
+            bloques.append([f"{fecha} {m.descripcion.capitalize()}", f"{m.detalle.lower()} {montos}"])
+        else:
+            bloques.append([f"{fecha} {descripcion} {montos}"])
+    return Documento(cabecera, bloques, partir_bloques=True,
+                     encabezado=lambda n, t: [f"{n}/{t} Fecha Descripción ID de la operación Valor Saldo"]
+                     if n > 1 else [])
+
+
+@_formato("Nacion", numero_cuenta="####-#######-#")
+def _nacion(ext, rnd):
+    c = ext.cuentas[0]
+    cabecera = [
+        "BANCO DE LA NACION ARGENTINA",
+        f"{ext.titular} CUIT: {ext.cuit}",
+        f"CUENTA {c.numero}",
+        f"PERIODO: {_dmy(ext.desde)} AL {_dmy(ext.hasta)}",
+        "FECHA MOVIMIENTOS COMPROB IMPORTE SALDO",
+        f"SALDO ANTERIOR {_ar(c.saldo_inicial)}",
+    ]
+    bloques = []
+    for m in c.movimientos:
+        bloque = [f"{_dmy2(m.fecha)} {m.descripcion} {rnd.randint(1000, 99999)} {_ar(abs(m.importe))} {_ar(m.saldo)}"]
+        if m.detalle:
+            bloque.append(m.detalle)
+        bloques.append(bloque)
+    pie = [f"SALDO FINAL {_ar(c.saldo_final)}"]
+    return Documento(cabecera, bloques, pie)
+
+
+@_formato("Patagonia", numero_cuenta="###-#########-###", ajuste=_primer_credito,
+          notas="El movimiento más antiguo se genera como crédito")
+def _patagonia(ext, rnd):
+    c = ext.cuentas[0]
+    cabecera = [
+        f"Cuenta: CC$ {c.numero}",
+        f"Titularidad: {ext.titular}",
+        "Movimientos de Cuenta",
+        "Fecha Descripción Referencia Importe Saldo",
+    ]
+    bloques = []
+    for m in reversed(c.movimientos):
+        bloque = [f"{_dmy(m.fecha)} {m.descripcion} {rnd.randint(100000, 999999)} {_ar(abs(m.importe))} "
+                  f"{_ar(m.saldo)}"]
+        if m.detalle:
+            bloque.append(m.detalle)
+        bloques.append(bloque)
+    return Documento(cabecera, bloques, encabezado=lambda n, t: [f"Página {n}"] if n > 1 else [])
+
+
+@_formato("Patagonia (Formato 2)", max_cuentas=4, numero_cuenta="#########")
+def _patagonia_2(ext, rnd):
+    cabecera = [
+        "BANCO PATAGONIA S.A.",
+        f"C.U.I.T. {ext.cuit.replace('-', '')} {ext.titular}",
+        f"RESUMEN DEL {_dmy(ext.desde)} AL {_dmy(ext.hasta)}",
+    ]
+    bloques = []
+    for c in ext.cuentas:
+        bloques.append([
+            f"CUENTA CORRIENTE EN PESOS {c.numero} SUBCTA 0 SUC {rnd.randint(100, 999)} "
+            f"CBU: {_digitos(rnd, '0340' + '#' * 18)}",
+            "FECHA CONCEPTO REFER. FECHA VALOR DEBITOS CREDITOS SALDO",
+            f"{_dmy2(ext.desde)} SALDO ANTERIOR {_ar(c.saldo_inicial)}",
+        ])
+        movimientos = c.movimientos
+        sin_saldo = 0
+        for i, m in enumerate(movimientos):
+            # El saldo se informa al cierre de cada día (y cada tanto, como en los extractos largos)
+            ultimo_del_dia = i + 1 == len(movimientos) or movimientos[i + 1].fecha != m.fecha
+            fecha = f"{m.fecha.day}/{m.fecha:%m/%y}"
+            linea = f"{fecha} {m.descripcion} {_ar(abs(m.importe))}"
+            if ultimo_del_dia or sin_saldo >= 6:
+                linea += f" {_ar(m.saldo)}"
+                sin_saldo = 0
+            else:
+                sin_saldo += 1
+            bloque = [linea]
+            if m.detalle:
+                bloque.append(m.detalle)
+            bloques.append(bloque)
+        bloques.append([f"{_dmy2(ext.hasta)} SALDO ACTUAL {_ar(c.saldo_final)}"])
+    return Documento(cabecera, bloques)
+
+
+@_formato("Provincia")
+def _provincia(ext, rnd):
+    c = ext.cuentas[0]
+    cabecera = [
+        f"CAJA DE AHORROS EN PESOS{ext.titular}",
+        f"CUIT {ext.cuit}",
+        f"Período {_dmy(ext.desde)} al {_dmy(ext.hasta)}",
+        "Fecha Descripción Fecha valor Saldo",
+        f"SALDO ANTERIOR {_dec(c.saldo_inicial)}",
+    ]
+    bloques = []
+    for m in c.movimientos:
+        valor = f"{m.fecha:%d-%m}"
+        if m.detalle:
+            bloques.append([f"{_dmy(m.fecha)} {m.descripcion}", f"  {m.detalle} {valor} {_dec(m.saldo)}"])
+        else:
+            bloques.append([f"{_dmy(m.fecha)} {m.descripcion} {valor} {_dec(m.saldo)}"])
+    pie = ["Todas las comisiones están gravadas con IVA"]
+    return Documento(cabecera, bloques, pie)
+
+
+@_formato("Provincia (Formato 2)", numero_cuenta="####-######/#", ajuste=_primer_importe_miles,
+          notas="El importe del movimiento más antiguo sale del texto: se genera con un solo dígito de miles")
+def _provincia_2(ext, rnd):
+    c = ext.cuentas[0]
+    meses = [m.lower() for m in MESES_ABREV]
+    cabecera = [
+        f"Fecha:{_dmy(ext.hasta)}",
+        f"Cuenta: {c.numero}",
+        "Detalle de Movimientos",
+        "Fecha Descripción Importe Saldo",
+    ]
+    bloques = []
+    for m in reversed(c.movimientos):
+        fecha = f"{m.fecha.day:02d}-{meses[m.fecha.month - 1]}-{m.fecha.year}"
+        montos = f"{_ar(m.importe)} {_ar(m.saldo)}"
+        if m.detalle:
+            # La descripción larga baja de renglón antes de los montos
+            bloques.append([f"{fecha} {m.descripcion}", f"{m.detalle} {montos}"])
+        else:
+            bloques.append([f"{fecha} {m.descripcion} {montos}"])
+    return Documento(cabecera, bloques, encabezado=lambda n, t: [f"Página {n}"] if n > 1 else [])
+
+
+def _santander(ext, rnd):
+    cabecera = [
+        "Santander",
+        "Resumen de cuenta",
+        ext.titular,
+        f"CUIT: {ext.cuit}",
+        f"Desde: {_dmy2(ext.desde)}",
+        f"Hasta: {_dmy2(ext.hasta)}",
+    ]
+    bloques = []
+    for c in ext.cuentas:
+        simbolo = "$" if c.moneda == "ARS" else "U$S"
+        titulo = "Movimientos en pesos" if c.moneda == "ARS" else "Movimientos en dólares"
+        bloques.append([titulo, f"Cuenta Corriente Nº {c.numero}", "FechaComprobanteMovimientoDébitoCréditoSaldo",
+                        f"Saldo Inicial {simbolo} {_ar(c.saldo_inicial)}"])
+        for m in c.movimientos:
+            bloque = [f"{_dmy2(m.fecha)} {rnd.randint(1000000, 9999999)} {m.descripcion} "
+                      f"{simbolo} {_ar(abs(m.importe))} {simbolo} {_ar(m.saldo)}"]
+            if m.detalle:
+                bloque.append(m.detalle)
+            bloques.append(bloque)
+        bloques.append([f"Saldo total {simbolo} {_ar(c.saldo_final)}"])
+    pie = ["Detalle impositivo"]
+    return Documento(cabecera, bloques, pie)
+
+
+_formato("Santander Rio", max_cuentas=2, monedas=("ARS", "USD"), numero_cuenta="###-######/#",
+         notas="Como máximo una cuenta en pesos y una en dólares")(_santander)
+_formato("Santander Rio (Prueba)", max_cuentas=2, monedas=("ARS", "USD"), numero_cuenta="###-######/#",
+         notas="Como máximo una cuenta en pesos y una en dólares")(_santander)
+
+
+@_formato("Supervielle", max_cuentas=4, monedas=("ARS", "USD"), numero_cuenta="##-########/#")
+def _supervielle(ext, rnd):
+    cabecera = [
+        "BANCO SUPERVIELLE S.A.",
+        f"RESUMEN DE CUENTA DESDE {_dmy2(ext.desde)} HASTA {_dmy2(ext.hasta)}",
+        f"{ext.titular}              C.U.I.T. 0{ext.cuit}",
+    ]
+    bloques = []
+    for c in ext.cuentas:
+        moneda = "PESOS" if c.moneda == "ARS" else "DOLARES"
+        bloques.append([f"CAJA DE AHORRO EN {moneda} NUMERO DE CUENTA {c.numero}",
+                        "FECHA CONCEPTO DEBITO CREDITO SALDO",
+                        f"Saldo del período anterior {_ar_sufijo(c.saldo_inicial)}"])
+        for m in c.movimientos:
+            bloque = [f"{_dmy2(m.fecha)} {m.descripcion}   {_ar(abs(m.importe))}   {_ar_sufijo(m.saldo)}"]
+            if m.detalle:
+                bloque.append(m.detalle)
+            bloques.append(bloque)
+        bloques.append([f"SALDO PERIODO ACTUAL {_ar_sufijo(c.saldo_final)}"])
+    return Documento(cabecera, bloques)
+
+
+# ---------------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------------
+
+def generar_extracto(banco, opciones=None):
+    """Arma el modelo (cuentas y movimientos) del extracto sintético, respetando los límites del formato"""
+    op = opciones or Opciones()
+    if banco not in GENERADORES:
+        raise ValueError(f"No hay generador para {banco}. Opciones: {', '.join(GENERADORES)}")
+    gen = GENERADORES[banco]
+    rnd = random.Random(f"{banco}|{op.semilla}")
+
+    monedas = [m for m in op.monedas if m in gen.monedas] or [gen.monedas[0]]
+    if gen.renderizar is _santander:
+        # Santander: una sección por moneda
+        monedas = list(dict.fromkeys(monedas))
+        n_cuentas = min(op.cuentas, len(monedas))
+    else:
+        n_cuentas = max(1, min(op.cuentas, gen.max_cuentas))
+    desde = op.desde.replace(day=1)
+    hasta = desde.replace(day=calendar.monthrange(desde.year, desde.month)[1])
+
+    cuentas = []
+    numeros = set()
+    for i in range(n_cuentas):
+        cantidad = op.movimientos // n_cuentas + (1 if i < op.movimientos % n_cuentas else 0)
+        numero = _digitos(rnd, gen.numero_cuenta)
+        while numero in numeros:
+            numero = _digitos(rnd, gen.numero_cuenta)
+        numeros.add(numero)
+        cuenta = generar_cuenta(rnd, numero, monedas[i % len(monedas)], cantidad, desde, hasta,
+                                op.multilinea, op.huerfanas, solo_creditos=gen.solo_creditos)
+        cuentas.append(cuenta)
+
+    if gen.ajuste:
+        for cuenta in cuentas:
+            if cuenta.movimientos:
+                gen.ajuste(rnd, cuenta)
+
+    return Extracto(banco=banco, titular=f"{rnd.choice(APELLIDOS)} {rnd.choice(NOMBRES)}", cuit=_cuit(rnd),
+                    desde=desde, hasta=hasta, cuentas=cuentas, semilla=op.semilla)
+
+
+def generar(banco, opciones=None):
+    """
+    Genera un extracto sintético del banco.
+    Devuelve (pdf_bytes, verdad) donde verdad es el dict de Extracto.verdad().
+    """
+    op = opciones or Opciones()
+    extracto = generar_extracto(banco, op)
+    rnd = random.Random(f"{banco}|{op.semilla}|render")
+    doc = GENERADORES[banco].renderizar(extracto, rnd)
+    paginas = paginar(doc, op.lineas_por_pagina, op.paginas)
+    verdad = extracto.verdad()
+    verdad["paginas"] = len(paginas)
+    return pdf_desde_paginas(paginas), verdad
+
+
+# ---------------------------------------------------------------------------
+# Comparación del Excel generado con la verdad
+# ---------------------------------------------------------------------------
+
+def comparar(verdad, contenido, tolerancia=0.005):
+    """
+    Compara el Excel generado por el procesador con la verdad del extracto sintético.
+    Devuelve la lista de diferencias (vacía si coincide). Se comparan, por cuenta y en orden:
+    cantidad e importes de créditos y débitos, y los saldos inicial/final cuando el reporte los trae.
+    """
+    if contenido is None:
+        return ["El procesador no generó el Excel"]
+    hojas = leer_excel(contenido)
+    cuentas = [c for c in verdad["cuentas"] if c["movimientos"]]
+    diferencias = []
+    if len(hojas) < len(cuentas):
+        diferencias.append(f"Hojas con movimientos: {len(hojas)}, cuentas esperadas: {len(cuentas)}")
+    for cuenta, hoja in zip(cuentas, hojas):
+        prefijo = f"[{hoja['hoja']}]"
+        for clave, signo in (("creditos", 1), ("debitos", -1)):
+            esperados = sorted(round(signo * m["importe"], 2) for m in cuenta["movimientos"]
+                               if signo * m["importe"] > 0)
+            leidos = sorted(round(imp, 2) for _, _, imp in hoja[clave])
+            if len(esperados) != len(leidos):
+                diferencias.append(f"{prefijo} {clave}: {len(leidos)} leídos, {len(esperados)} esperados")
+            elif any(abs(a - b) > tolerancia for a, b in zip(esperados, leidos)):
+                malos = sum(1 for a, b in zip(esperados, leidos) if abs(a - b) > tolerancia)
+                diferencias.append(f"{prefijo} {clave}: {malos} importes distintos")
+        for clave in ("saldo_inicial", "saldo_final"):
+            leido = hoja[clave]
+            if isinstance(leido, (int, float)) and abs(leido - cuenta[clave]) > tolerancia:
+                diferencias.append(f"{prefijo} {clave}: {leido} leído, {cuenta[clave]} esperado")
+    return diferencias
+
+
+def verificar(banco, opciones=None):
+    """Genera el extracto, lo procesa con el procesador real y devuelve (diferencias, verdad)"""
+    from procesadores import ArchivoPDF, procesar_banco
+
+    pdf, verdad = generar(banco, opciones)
+    resultado = procesar_banco(banco, ArchivoPDF(pdf, f"sintetico_{banco}.pdf"))
+    return comparar(verdad, resultado), verdad
+
+
+# ---------------------------------------------------------------------------
+# Línea de comandos
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera extractos PDF sintéticos con su verdad de referencia")
+    parser.add_argument("banco", help="Banco tal como aparece en la app (ej. \"Galicia\") o \"todos\"")
+    parser.add_argument("-n", "--movimientos", type=int, default=100, help="Cantidad total de movimientos")
+    parser.add_argument("--cuentas", type=int, default=1, help="Cantidad de cuentas (si el formato admite varias)")
+    parser.add_argument("--monedas", nargs="+", default=["ARS"], choices=["ARS", "USD"])
+    parser.add_argument("--paginas", type=int, help="Cantidad de páginas aproximada (manda sobre --lineas)")
+    parser.add_argument("--lineas", type=int, default=55, help="Líneas por página")
+    parser.add_argument("--multilinea", type=float, default=0.15, help="Probabilidad de descripción en 2 líneas")
+    parser.add_argument("--huerfanas", type=float, default=0.05,
+                        help="Probabilidad de descripción partida por corte de página (MercadoPago)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("-o", "--salida", help="Base de los archivos de salida (por defecto sintetico_<banco>)")
+    parser.add_argument("--directorio", default=".", help="Directorio de salida (con \"todos\")")
+    parser.add_argument("--verificar", action="store_true",
+                        help="Procesar el PDF generado y compararlo contra la verdad")
+    args = parser.parse_args()
+
+    bancos = list(GENERADORES) if args.banco == "todos" else [args.banco]
+    for banco in bancos:
+        if banco not in GENERADORES:
+            parser.error(f"Banco sin generador: {banco}. Opciones: {', '.join(GENERADORES)}")
+
+    opciones = Opciones(movimientos=args.movimientos, cuentas=args.cuentas, monedas=tuple(args.monedas),
+                        paginas=args.paginas, lineas_por_pagina=args.lineas, multilinea=args.multilinea,
+                        huerfanas=args.huerfanas, semilla=args.semilla)
+    fallidos = 0
+    for banco in bancos:
+        pdf, verdad = generar(banco, opciones)
+        nombre = "".join(c if c.isalnum() else "_" for c in banco.lower()).strip("_")
+        base = args.salida if args.salida and len(bancos) == 1 else os.path.join(args.directorio, f"sintetico_{nombre}")
+        with open(base + ".pdf", "wb") as f:
+            f.write(pdf)
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(verdad, f, ensure_ascii=False, indent=1)
+        movimientos = sum(len(c["movimientos"]) for c in verdad["cuentas"])
+        linea = f"{banco}: {base}.pdf ({verdad['paginas']} páginas, {len(verdad['cuentas'])} cuenta(s), " \
+                f"{movimientos} movimientos)"
+        if args.verificar:
+            from procesadores import ArchivoPDF, procesar_banco
+            diferencias = comparar(verdad, procesar_banco(banco, ArchivoPDF(pdf, os.path.basename(base) + ".pdf")))
+            linea += " OK" if not diferencias else " DIFERENCIAS:\n  " + "\n  ".join(diferencias)
+            fallidos += bool(diferencias)
+        print(linea)
+    if fallidos:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
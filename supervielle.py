@@ -6,6 +6,8 @@ import io
 from openpyxl import Workbook
 from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
+from guardia import filtrar_texto
+from rendimiento import marcar, contar, sumar, paginas_medidas
 
 # --- UTILIDADES DE LIMPIEZA ---
 ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
@@ -24,9 +26,13 @@ def procesar_supervielle(archivo_pdf):
         # --- LÓGICA DE EXTRACCIÓN ORIGINAL (Preservada) ---
         def procesar_pdf(file_bytes):
             reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-            texto = "".join(page.extract_text() + "\n" for page in reader.pages)
+            marcar("extraccion")
+            texto = "".join(page.extract_text() + "\n" for page in paginas_medidas(reader.pages))
+            texto = filtrar_texto(texto, "Supervielle")
             lineas = texto.splitlines()
+            contar("lineas", len(lineas))
 
+            marcar("secciones")
             capturar = False
             numero_de_cuenta_temporal = ""
             movimientos = []
@@ -208,6 +214,7 @@ def procesar_supervielle(archivo_pdf):
         # --- FIN LÓGICA ORIGINAL ---
 
         # Ejecutar extracción
+        marcar("lectura")
         cuentas, procesar_movimientos_func, periodo, nombre_titular, texto_raw = procesar_pdf(archivo_pdf.read())
 
 
@@ -217,9 +224,11 @@ def procesar_supervielle(archivo_pdf):
             return None
 
         st.success(f"Se encontraron {len(cuentas)} cuenta(s)")
+        contar("cuentas", len(cuentas))
 
         # --- GENERACIÓN DE EXCEL DASHBOARD (ESTILO FORMATO 2 EXACTO) ---
         output = io.BytesIO()
+        marcar("excel")
         wb = Workbook()
         # Eliminar hoja default
         if "Sheet" in wb.sheetnames:
@@ -236,8 +245,11 @@ def procesar_supervielle(archivo_pdf):
             # Para respetar el "Saldo Inicial" exacto del PDF y a la vez que cierre el control:
             # Agregamos una fila de "Ajuste" que compense la diferencia.
             
+            marcar("movimientos")
             datos = procesar_movimientos_func(movimientos_raw, saldo_inicial)
+            sumar("movimientos", len(datos))
             
+            marcar("conciliacion")
             total_movimientos = sum(d["Importe"] for d in datos)
             saldo_final_teorico = saldo_inicial + total_movimientos
             diferencia = saldo_final_teorico - saldo_final
@@ -285,6 +297,7 @@ def procesar_supervielle(archivo_pdf):
                     }
                     datos.insert(0, ajuste_row)
 
+            marcar("excel")
             df = pd.DataFrame(datos, columns=["Fecha", "Descripcion", "Importe"])
 
             # Separar Creditos y Debitos
@@ -523,6 +536,7 @@ def procesar_supervielle(archivo_pdf):
             ws["D7"].number_format = '"$ "#,##0.00'
 
 
+        marcar("guardado")
         wb.save(output) 
         output.seek(0)
         return output.getvalue()
@@ -0,0 +1,345 @@
+"""
+Transferencias entre cuentas propias a través de varios extractos.
+
+Toma los movimientos normalizados de muchos extractos (de cualquier banco) y empareja cada débito con
+el crédito del mismo importe en otra cuenta dentro de una ventana de días: la salida de una cuenta
+propia con la entrada en otra. Los créditos se indexan en buckets por importe en centavos, ordenados
+por fecha; cada débito solo mira su bucket y, con bisect, los créditos de su ventana, así que el costo
+es casi lineal en la cantidad de movimientos (en lugar de comparar todos contra todos).
+Entre los candidatos gana el más cercano en fecha y, a igual distancia, el que parece transferencia.
+El resultado se exporta a un Excel de conciliación (pares, sin pareja y resumen por par de cuentas).
+
+Uso:
+    python transferencias.py galicia.pdf macro.pdf santander.xlsx -o conciliacion.xlsx
+    python transferencias.py extractos/*.pdf --banco Galicia --ventana 2
+Los PDF se procesan con el banco indicado (o detectado) y reutilizan el almacén de resultados; los
+.xlsx deben ser Excel generados por la app.
+"""
+import argparse
+import bisect
+import contextlib
+import datetime
+import io
+import os
+import re
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+from dashboard import clean_for_excel
+
+VENTANA_DIAS = 3
+
+# Descripciones que indican una transferencia (en minúsculas); mismas palabras que la categoría
+# "Transferencias" de Santander más las abreviaturas habituales de otros bancos
+PATRON_TRANSFERENCIA = re.compile(r"transf|trf\b|pagos? ctas propias|cta propia|debin|e-?cheq|mismo titular")
+
+FORMATOS_FECHA = ("%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d", "%d-%m-%Y", "%d-%m-%y", "%d.%m.%Y", "%d.%m.%y")
+
+
+@dataclass
+class MovimientoNormalizado:
+    cuenta: str  # "Banco · número o titular · hoja" (lectura_excel.identificar_cuenta)
+    archivo: str
+    fecha: datetime.date
+    descripcion: str
+    centavos: int  # con signo: + crédito, - débito
+    clave_cuenta: str = ""  # la cuenta sin el banco: la misma en un PDF y en su Excel, en cualquier período
+    propio: str = ""  # etiqueta de la entidad propia mencionada en la descripción (propios.py)
+
+    @property
+    def importe(self):
+        return self.centavos / 100
+
+    @property
+    def es_transferencia(self):
+        return bool(self.propio) or bool(PATRON_TRANSFERENCIA.search(self.descripcion.lower()))
+
+
+@dataclass
+class Par:
+    debito: MovimientoNormalizado
+    credito: MovimientoNormalizado
+
+    @property
+    def dias(self):
+        return (self.credito.fecha - self.debito.fecha).days
+
+    @property
+    def confianza(self):
+        parecen = self.debito.es_transferencia + self.credito.es_transferencia
+        if self.dias == 0 and parecen == 2:
+            return "alta"
+        return "media" if parecen else "baja"
+
+
+def parsear_fecha(valor):
+    """Fecha de una celda del Excel (date o texto en los formatos de los extractos); None si no se reconoce"""
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    if isinstance(valor, datetime.date):
+        return valor
+    texto = str(valor or "").strip()
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def movimientos_de_excel(contenido, banco, archivo=""):
+    """
+    Movimientos normalizados de un Excel generado por la app (una cuenta por hoja).
+    Devuelve (movimientos, sin_fecha): los que no tienen una fecha reconocible no se pueden emparejar.
+    """
+    from lectura_excel import identificar_cuenta, leer_excel
+
+    movimientos = []
+    sin_fecha = 0
+    for hoja in leer_excel(contenido):
+        # Sin número de cuenta ni titular, la hoja vale solo para este archivo: nunca se confunde con otra
+        clave_cuenta = identificar_cuenta(None, hoja) or f"{hoja['hoja']} · {archivo}"
+        cuenta = f"{banco} · {clave_cuenta}" if banco else clave_cuenta
+        for clave, signo in (("creditos", 1), ("debitos", -1)):
+            for fecha, descripcion, importe in hoja[clave]:
+                dia = parsear_fecha(fecha)
+                if dia is None:
+                    sin_fecha += 1
+                    continue
+                movimientos.append(MovimientoNormalizado(cuenta, archivo, dia, str(descripcion or ""),
+                                                         signo * round(abs(importe) * 100), clave_cuenta))
+    return movimientos, sin_fecha
+
+
+def emparejar(movimientos, ventana_dias=VENTANA_DIAS, solo_transferencias=True, propios=None):
+    """
+    Empareja débitos con créditos del mismo importe en otra cuenta, a no más de `ventana_dias`.
+    Con solo_transferencias, al menos uno de los dos movimientos tiene que parecer una transferencia.
+    `propios` (propios.Matcher) marca los movimientos que mencionan una entidad propia: cuentan como
+    transferencia. Devuelve (pares, sin_pareja): sin_pareja son las transferencias sin contraparte.
+    """
+    if propios is not None and len(propios):
+        for m in movimientos:
+            entidad = propios.etiquetar(m.descripcion)
+            m.propio = entidad.etiqueta if entidad is not None else ""
+
+    # Bucket por importe: lista de (ordinal de la fecha, índice) ordenada por fecha
+    creditos = defaultdict(list)
+    for i, m in enumerate(movimientos):
+        if m.centavos > 0:
+            creditos[m.centavos].append((m.fecha.toordinal(), i))
+    for bucket in creditos.values():
+        bucket.sort()
+
+    usados = set()
+    pares = []
+    debitos = sorted((i for i, m in enumerate(movimientos) if m.centavos < 0),
+                     key=lambda i: movimientos[i].fecha)
+    for i in debitos:
+        debito = movimientos[i]
+        bucket = creditos.get(-debito.centavos)
+        if not bucket:
+            continue
+        dia = debito.fecha.toordinal()
+        mejor = None
+        for ordinal, j in bucket[bisect.bisect_left(bucket, (dia - ventana_dias, -1)):]:
+            if ordinal > dia + ventana_dias:
+                break
+            credito = movimientos[j]
+            if j in usados or (credito.clave_cuenta or credito.cuenta) == (debito.clave_cuenta or debito.cuenta):
+                continue
+            if solo_transferencias and not (debito.es_transferencia or credito.es_transferencia):
+                continue
+            orden = (abs(ordinal - dia), not credito.es_transferencia)
+            if mejor is None or orden < mejor[0]:
+                mejor = (orden, j)
+        if mejor is not None:
+            usados.add(mejor[1])
+            usados.add(i)
+            pares.append(Par(debito, movimientos[mejor[1]]))
+
+    sin_pareja = [m for i, m in enumerate(movimientos) if i not in usados and m.es_transferencia]
+    return pares, sin_pareja
+
+
+# ---------------------------------------------------------------------------
+# Excel de conciliación
+# ---------------------------------------------------------------------------
+
+FORMATO_MONEDA = '"$ "#,##0.00'
+_BORDE = Border(left=Side(style="thin", color="A6A6A6"), right=Side(style="thin", color="A6A6A6"),
+                top=Side(style="thin", color="A6A6A6"), bottom=Side(style="thin", color="A6A6A6"))
+_FILL_ENCABEZADO = PatternFill(start_color="1F4E78", end_color="1F4E78", fill_type="solid")
+_FILL_CONFIANZA = {
+    "alta": PatternFill(start_color="EBF1DE", end_color="EBF1DE", fill_type="solid"),
+    "media": PatternFill(start_color="FFF2CC", end_color="FFF2CC", fill_type="solid"),
+    "baja": PatternFill(start_color="FDE9D9", end_color="FDE9D9", fill_type="solid"),
+}
+
+
+def _tabla(ws, titulo, encabezados, filas, anchos, monedas=(), relleno=None):
+    """Escribe título, encabezado y filas; `monedas` son los índices (base 0) con formato de importe"""
+    ws.sheet_view.showGridLines = False
+    ws["A1"] = titulo
+    ws["A1"].font = Font(bold=True, size=14, color="1F4E78")
+    for c, (encabezado, ancho) in enumerate(zip(encabezados, anchos), 1):
+        celda = ws.cell(3, c, encabezado)
+        celda.font = Font(bold=True, color="FFFFFF")
+        celda.fill = _FILL_ENCABEZADO
+        celda.alignment = Alignment(horizontal="center")
+        celda.border = _BORDE
+        ws.column_dimensions[celda.column_letter].width = ancho
+    for r, fila in enumerate(filas, 4):
+        fill = relleno(fila) if relleno else None
+        for c, valor in enumerate(fila, 1):
+            # Solo formato numérico y color por fila: bordes por celda multiplican el tiempo de openpyxl
+            celda = ws.cell(r, c, clean_for_excel(valor) if isinstance(valor, str) else valor)
+            if c - 1 in monedas:
+                celda.number_format = FORMATO_MONEDA
+            if fill is not None:
+                celda.fill = fill
+    ws.freeze_panes = "A4"
+    if filas:
+        ws.auto_filter.ref = f"A3:{ws.cell(3, len(encabezados)).column_letter}{len(filas) + 3}"
+
+
+def exportar(pares, sin_pareja, leidos=0, sin_fecha=0, duplicados=0):
+    """Excel de conciliación (bytes): pares, transferencias sin pareja y resumen por par de cuentas"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Transferencias propias"
+    filas = [(p.debito.fecha, p.debito.cuenta, p.debito.descripcion, -p.debito.importe, p.credito.fecha,
+              p.credito.cuenta, p.credito.descripcion, p.dias, p.confianza)
+             for p in sorted(pares, key=lambda p: (p.debito.fecha, p.debito.cuenta))]
+    _tabla(ws, "TRANSFERENCIAS ENTRE CUENTAS PROPIAS",
+           ["Fecha débito", "Cuenta origen", "Descripción débito", "Importe", "Fecha crédito", "Cuenta destino",
+            "Descripción crédito", "Días", "Confianza"],
+           filas, [13, 30, 40, 16, 13, 30, 40, 7, 11], monedas=(3,), relleno=lambda f: _FILL_CONFIANZA[f[-1]])
+    for fila in ws.iter_rows(min_row=4, max_col=5):
+        fila[0].number_format = fila[4].number_format = "DD/MM/YYYY"
+
+    ws = wb.create_sheet("Sin pareja")
+    filas = [(m.fecha, m.cuenta, m.descripcion, m.importe, "Crédito" if m.centavos > 0 else "Débito", m.propio)
+             for m in sorted(sin_pareja, key=lambda m: (m.fecha, m.cuenta))]
+    _tabla(ws, "TRANSFERENCIAS SIN CONTRAPARTE", ["Fecha", "Cuenta", "Descripción", "Importe", "Tipo",
+                                                  "Entidad propia"], filas,
+           [13, 30, 50, 16, 10, 28], monedas=(3,))
+    for fila in ws.iter_rows(min_row=4, max_col=1):
+        fila[0].number_format = "DD/MM/YYYY"
+
+    ws = wb.create_sheet("Resumen")
+    totales = defaultdict(lambda: [0, 0])
+    for p in pares:
+        total = totales[(p.debito.cuenta, p.credito.cuenta)]
+        total[0] += 1
+        total[1] += -p.debito.centavos
+    filas = [(origen, destino, cantidad, centavos / 100)
+             for (origen, destino), (cantidad, centavos) in sorted(totales.items())]
+    _tabla(ws, "RESUMEN POR PAR DE CUENTAS", ["Cuenta origen", "Cuenta destino", "Transferencias", "Total"], filas,
+           [32, 32, 15, 18], monedas=(3,))
+    base = len(filas) + 6
+    for i, (rotulo, valor) in enumerate((("Movimientos leídos", leidos), ("Sin fecha reconocible", sin_fecha),
+                                         ("Repetidos entre extractos", duplicados),
+                                         ("Pares encontrados", len(pares)), ("Transferencias sin pareja",
+                                                                             len(sin_pareja)))):
+        ws.cell(base + i, 1, rotulo).font = Font(bold=True)
+        ws.cell(base + i, 2, valor)
+
+    salida = io.BytesIO()
+    wb.save(salida)
+    return salida.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Línea de comandos
+# ---------------------------------------------------------------------------
+
+def _excel_de_pdf(ruta, banco=None):
+    """Procesa un PDF (banco indicado o detectado), reutilizando el almacén de resultados"""
+    from almacen import almacen_compartido
+    from deteccion import detectar_banco
+    from procesadores import ArchivoPDF, procesar_banco
+
+    archivo = ArchivoPDF.desde_ruta(ruta)
+    banco = banco or detectar_banco(archivo)
+    if banco is None:
+        return None, None
+    contenido = archivo.getvalue()
+    almacen = almacen_compartido()
+    guardado = almacen.obtener(contenido, banco) if almacen is not None else None
+    if guardado is not None:
+        return banco, guardado["excel"]
+    resultado = procesar_banco(banco, archivo)
+    if resultado is not None and almacen is not None:
+        almacen.guardar(contenido, banco, resultado, nombre=archivo.name)
+    return banco, resultado
+
+
+def cargar(rutas, banco=None):
+    """
+    Movimientos normalizados de varios extractos PDF o Excel generados por la app, informando cada
+    archivo. Devuelve (movimientos, sin_fecha)
+    """
+    movimientos = []
+    sin_fecha = 0
+    for ruta in rutas:
+        nombre = os.path.basename(ruta)
+        if ruta.lower().endswith(".xlsx"):
+            with open(ruta, "rb") as f:
+                banco_archivo, contenido = os.path.splitext(nombre)[0], f.read()
+        else:
+            with contextlib.redirect_stdout(io.StringIO()):  # trazas de depuración de los procesadores
+                banco_archivo, contenido = _excel_de_pdf(ruta, banco)
+        if contenido is None:
+            print(f"  {nombre}: no se pudo procesar{'' if banco_archivo else ' (banco no detectado)'}",
+                  file=sys.stderr)
+            continue
+        leidos, sin = movimientos_de_excel(contenido, banco_archivo, nombre)
+        movimientos += leidos
+        sin_fecha += sin
+        print(f"  {nombre}: {banco_archivo}, {len(leidos)} movimientos")
+    return movimientos, sin_fecha
+
+
+def main():
+    from duplicados import deduplicar
+
+    parser = argparse.ArgumentParser(description="Empareja transferencias entre cuentas propias de varios extractos")
+    parser.add_argument("archivos", nargs="+", help="Extractos PDF o Excel generados por la app")
+    parser.add_argument("--banco", help="Banco de los PDF (por defecto se detecta en cada uno)")
+    parser.add_argument("--ventana", type=int, default=VENTANA_DIAS, help="Días de diferencia aceptados")
+    parser.add_argument("--todas", action="store_true",
+                        help="Emparejar también importes iguales que no parecen transferencias")
+    parser.add_argument("--propios", help="CSV de CUITs y razones sociales propias (cuit; razón social; etiqueta)")
+    parser.add_argument("-o", "--salida", default="conciliacion_transferencias.xlsx")
+    args = parser.parse_args()
+
+    propios = None
+    if args.propios:
+        from propios import Matcher, leer_csv
+        with open(args.propios, "rb") as f:
+            entidades, _ = leer_csv(f.read())
+        propios = Matcher(entidades)
+        print(f"  {len(propios)} entidades propias")
+
+    movimientos, sin_fecha = cargar(args.archivos, args.banco)
+    leidos = len(movimientos)
+    # Los períodos de extractos consecutivos se superponen: sin esto, los movimientos del borde
+    # aparecerían dos veces y quedarían como transferencias sin pareja
+    movimientos, duplicados = deduplicar(movimientos)
+    if duplicados:
+        print(f"  {len(duplicados)} movimientos repetidos entre extractos descartados")
+
+    pares, sin_pareja = emparejar(movimientos, args.ventana, solo_transferencias=not args.todas,
+                                  propios=propios)
+    with open(args.salida, "wb") as f:
+        f.write(exportar(pares, sin_pareja, leidos, sin_fecha, len(duplicados)))
+    print(f"{len(pares)} transferencias emparejadas, {len(sin_pareja)} sin pareja -> {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
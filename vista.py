@@ -0,0 +1,159 @@
+import unicodedata
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+
+from analisis import movimientos
+
+# Vista previa de los movimientos en la app, antes de descargar el Excel.
+# Los movimientos de todas las hojas quedan en una tabla Arrow (pyarrow llega con streamlit). Los
+# filtros se resuelven acá con kernels de pyarrow.compute y a la interfaz solo viaja la página que
+# se muestra (un slice de la tabla, sin copiar): con 100.000 movimientos cada rerun sigue
+# mandando unos cientos de filas. La búsqueda de texto no distingue acentos: la descripción sin
+# acentos se calcula una vez, en una columna que no se muestra.
+
+TAMANIOS_PAGINA = (100, 500, 1000, 5000)
+TIPOS = ("Todos", "Créditos", "Débitos")
+
+
+def tabla_movimientos(hojas):
+    """
+    Hojas de lectura_excel.leer_excel -> tabla Arrow con N.º, Cuenta, Fecha, Descripción e Importe
+    (+ crédito, - débito), más la columna de búsqueda _texto
+    """
+    df = movimientos(hojas)
+    descripciones = pa.array(df["Descripcion"], type=pa.string())
+    return pa.table({
+        "N.º": pa.array(range(1, len(df) + 1), type=pa.int32()),
+        "Cuenta": pa.array(df["Cuenta"].astype(str), type=pa.string()).dictionary_encode(),
+        "Fecha": pa.Array.from_pandas(df["Fecha"]).cast(pa.date32()),  # sin fecha reconocible: nulo
+        "Descripción": descripciones,
+        "Importe": pa.array(df["Importe"].astype(float), type=pa.float64()),
+        "_texto": pc.replace_substring_regex(pc.utf8_normalize(descripciones, "NFD"), r"\p{Mn}", ""),
+    })
+
+
+def _sin_acentos(texto):
+    return "".join(c for c in unicodedata.normalize("NFD", texto) if unicodedata.category(c) != "Mn")
+
+
+def resumen_cuentas(hojas, tolerancia=0.005):
+    """
+    Saldos y totales por hoja, con el mismo control que la celda D7 del reporte: saldo inicial +
+    créditos - débitos contra el saldo final informado (None si el reporte no trae los dos saldos).
+    """
+    filas = []
+    for hoja in hojas:
+        creditos = round(sum(f[2] for f in hoja["creditos"]), 2)
+        debitos = round(sum(f[2] for f in hoja["debitos"]), 2)
+        inicial, final = hoja["saldo_inicial"], hoja["saldo_final"]
+        diferencia = None
+        if isinstance(inicial, (int, float)) and isinstance(final, (int, float)):
+            diferencia = round(inicial + creditos - debitos - final, 2)
+            diferencia = 0.0 if abs(diferencia) < tolerancia else diferencia
+        filas.append({"Cuenta": hoja["hoja"], "Movimientos": len(hoja["creditos"]) + len(hoja["debitos"]),
+                      "Saldo inicial": inicial if isinstance(inicial, (int, float)) else None,
+                      "Créditos": creditos, "Débitos": debitos,
+                      "Saldo final": final if isinstance(final, (int, float)) else None,
+                      "Diferencia": diferencia})
+    return filas
+
+
+def filtrar(tabla, texto="", cuenta=None, desde=None, hasta=None, tipo="Todos", minimo=None, maximo=None):
+    """Filas que cumplen todos los filtros (texto: sin distinguir mayúsculas ni acentos; importes en valor absoluto)"""
+    condiciones = []
+    if texto and texto.strip():
+        condiciones.append(pc.match_substring(tabla["_texto"], _sin_acentos(texto.strip()), ignore_case=True))
+    if cuenta:
+        condiciones.append(pc.equal(tabla["Cuenta"].cast(pa.string()), cuenta))
+    if desde is not None:
+        condiciones.append(pc.greater_equal(tabla["Fecha"], pa.scalar(desde, type=pa.date32())))
+    if hasta is not None:
+        condiciones.append(pc.less_equal(tabla["Fecha"], pa.scalar(hasta, type=pa.date32())))
+    if tipo == "Créditos":
+        condiciones.append(pc.greater(tabla["Importe"], 0))
+    elif tipo == "Débitos":
+        condiciones.append(pc.less(tabla["Importe"], 0))
+    absolutos = pc.abs(tabla["Importe"]) if minimo is not None or maximo is not None else None
+    if minimo is not None:
+        condiciones.append(pc.greater_equal(absolutos, minimo))
+    if maximo is not None:
+        condiciones.append(pc.less_equal(absolutos, maximo))
+    if not condiciones:
+        return tabla
+    mascara = condiciones[0]
+    for condicion in condiciones[1:]:
+        mascara = pc.and_kleene(mascara, condicion)
+    return tabla.filter(mascara)  # los nulos (fila sin fecha con filtro de fecha) quedan afuera
+
+
+def pagina(tabla, numero, tamanio):
+    """Página `numero` (base 1) de la tabla para mostrar, sin copiar los datos"""
+    return tabla.slice((numero - 1) * tamanio, tamanio).drop_columns(["_texto"])
+
+
+def paginas(tabla, tamanio):
+    return max(1, -(-tabla.num_rows // tamanio))
+
+
+def rango_fechas(tabla):
+    """(primera, última) fecha de la tabla, o (None, None) si ninguna fila tiene fecha"""
+    extremos = pc.min_max(tabla["Fecha"]).as_py()
+    if extremos["min"] is None:
+        return None, None
+    return extremos["min"], extremos["max"]
+
+
+def totales(tabla):
+    """(créditos, débitos) de la tabla, los dos positivos"""
+    importes = tabla["Importe"]
+    creditos = pc.sum(pc.if_else(pc.greater(importes, 0), importes, 0.0)).as_py() or 0.0
+    debitos = pc.sum(pc.if_else(pc.less(importes, 0), importes, 0.0)).as_py() or 0.0
+    return round(creditos, 2), round(-debitos, 2)
+
+
+def mostrar(tabla, cuentas, clave="vista"):
+    """Dibuja saldos, control y la tabla paginada con sus filtros (los widgets usan claves `clave_*`)"""
+    formato = {c: st.column_config.NumberColumn(c, format="$ %.2f")
+               for c in ("Saldo inicial", "Créditos", "Débitos", "Saldo final", "Diferencia", "Importe")}
+    st.dataframe(cuentas, hide_index=True, width="stretch", column_config=formato)
+    for cuenta in cuentas:
+        if cuenta["Diferencia"]:
+            st.warning(f"{cuenta['Cuenta']}: saldo inicial + créditos - débitos no da el saldo final "
+                       f"(diferencia {cuenta['Diferencia']:,.2f}).")
+    if cuentas and all(c["Diferencia"] == 0 for c in cuentas):
+        st.caption("Saldo inicial + créditos - débitos coincide con el saldo final en todas las cuentas.")
+    if tabla is None or not tabla.num_rows:
+        return
+
+    with st.expander("Filtros"):
+        texto = st.text_input("Descripción contiene", key=f"{clave}_texto")
+        col1, col2 = st.columns(2)
+        nombres = [c["Cuenta"] for c in cuentas]
+        cuenta = col1.selectbox("Cuenta", [None] + nombres, format_func=lambda c: "Todas" if c is None else c,
+                                key=f"{clave}_cuenta") if len(nombres) > 1 else None
+        tipo = col2.radio("Tipo", TIPOS, horizontal=True, key=f"{clave}_tipo")
+        primera, ultima = rango_fechas(tabla)
+        desde = col1.date_input("Desde", value=None, min_value=primera, max_value=ultima, format="DD/MM/YYYY",
+                                key=f"{clave}_desde")
+        hasta = col2.date_input("Hasta", value=None, min_value=primera, max_value=ultima, format="DD/MM/YYYY",
+                                key=f"{clave}_hasta")
+        minimo = col1.number_input("Importe mínimo", min_value=0.0, value=None, key=f"{clave}_minimo")
+        maximo = col2.number_input("Importe máximo", min_value=0.0, value=None, key=f"{clave}_maximo")
+    filtrada = filtrar(tabla, texto, cuenta, desde, hasta, tipo, minimo, maximo)
+
+    col1, col2 = st.columns(2)
+    tamanio = col1.selectbox("Filas por página", TAMANIOS_PAGINA, index=1, key=f"{clave}_tamanio")
+    total_paginas = paginas(filtrada, tamanio)
+    if st.session_state.get(f"{clave}_pagina", 1) > total_paginas:
+        st.session_state[f"{clave}_pagina"] = 1  # los filtros achicaron la tabla
+    numero = col2.number_input(f"Página (de {total_paginas:,})", min_value=1, max_value=total_paginas, step=1,
+                               key=f"{clave}_pagina")
+    creditos, debitos = totales(filtrada)
+    st.caption(f"{filtrada.num_rows:,} de {tabla.num_rows:,} movimientos · créditos $ {creditos:,.2f} · "
+               f"débitos $ {debitos:,.2f}")
+    st.dataframe(pagina(filtrada, int(numero), tamanio), hide_index=True, width="stretch",
+                 column_config={"Fecha": st.column_config.DateColumn("Fecha", format="DD/MM/YYYY"),
+                                "Importe": formato["Importe"],
+                                "Descripción": st.column_config.TextColumn("Descripción", width="large")})